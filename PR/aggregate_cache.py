@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import OrderedDict
+import pandas as pd
+from shared_cache import get_shared_cache
+
+# Maximum number of aggregate results kept in memory (shared by all sessions in the process)
+AGGREGATE_CACHE_SIZE = 512
+
+# Upper bound on an entry's age, for changes that do not bump a data version
+AGGREGATE_CACHE_TTL_SECONDS = 600
+
+_aggregate_cache = OrderedDict()
+_aggregate_cache_lock = threading.Lock()
+
+# Keys being recomputed -> number of computes running (guarded by _aggregate_cache_lock)
+_computing = {}
+
+# (user_id, new version) -> monotonic time the write began (see begin_cached_change)
+_changes_begun = {}
+
+def _copy_result(result):
+    """Hand out copies so callers can add columns without touching the cached frames"""
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, dict):
+        return {name: _copy_result(value) for name, value in result.items()}
+    return result
+
+def cached_aggregate(key, version, compute):
+    """Return compute() for key, reusing the stored result while version is unchanged
+
+    version is the user's data version (see database.get_data_version); None
+    disables caching for the call. Empty results ({} / None) are not stored, as
+    the data layer returns those on errors.
+    """
+    if version is None:
+        return compute()
+
+    with _aggregate_cache_lock:
+        entry = _aggregate_cache.get(key)
+        if entry is not None and entry[0] == version and time.monotonic() - entry[1] < AGGREGATE_CACHE_TTL_SECONDS:
+            _aggregate_cache.move_to_end(key)
+            return _copy_result(entry[2])
+        _computing[key] = _computing.get(key, 0) + 1
+
+    try:
+        # Another worker may have computed it already
+        shared = get_shared_cache()
+        result = shared.get(key, version, AGGREGATE_CACHE_TTL_SECONDS) if shared is not None else None
+        if result is None:
+            result = compute()
+            if result is None or (isinstance(result, dict) and not result):
+                return result
+            if shared is not None:
+                shared.put(key, version, result)
+
+        with _aggregate_cache_lock:
+            # A write may have moved the entry on while we computed; keep the newer one
+            current = _aggregate_cache.get(key)
+            if current is None or current[0] <= version:
+                # Stored with the time the result was ready, which update_cached_aggregates relies on
+                _aggregate_cache[key] = (version, time.monotonic(), _copy_result(result))
+                _aggregate_cache.move_to_end(key)
+                while len(_aggregate_cache) > AGGREGATE_CACHE_SIZE:
+                    _aggregate_cache.popitem(last=False)
+    finally:
+        with _aggregate_cache_lock:
+            _computing[key] -= 1
+            if not _computing[key]:
+                del _computing[key]
+
+    return result
+
+def begin_cached_change(user_id, new_version):
+    """Note that a write taking user_id's data to new_version is under way (call before it commits)
+
+    A result stored after this point may have been computed from the committed
+    write while still labelled with the old version, so update_cached_aggregates
+    drops such entries rather than adding the write's delta to them twice.
+    """
+    with _aggregate_cache_lock:
+        _changes_begun[(user_id, new_version)] = time.monotonic()
+
+def cached_keys(user_id):
+    """Keys of a user's cached entries"""
+    with _aggregate_cache_lock:
+        return [key for key in _aggregate_cache if key[1] == user_id]
+
+def update_cached_aggregates(user_id, old_version, new_version, update):
+    """Move a user's entries cached at old_version to new_version via update(name, base_currency, result)
+
+    Keys are (name, user_id, base_currency). update changes the result in place
+    or returns a replacement; returning None drops the entry. It runs under the
+    cache lock, so it must not query the database. Entries at any other
+    version, being recomputed, or stored after the write began (see
+    begin_cached_change) may already include the change and are dropped as
+    well. Updated entries are also published to the shared tier when one is
+    configured.
+    """
+    published = []
+    with _aggregate_cache_lock:
+        begun = _changes_begun.pop((user_id, new_version), None)
+        for key in [key for key in _aggregate_cache if key[1] == user_id]:
+            version, stored_at, result = _aggregate_cache[key]
+            current = (version == old_version and key not in _computing
+                       and (begun is None or stored_at < begun))
+            updated = update(key[0], key[2], result) if current else None
+            if updated is None:
+                del _aggregate_cache[key]
+            else:
+                _aggregate_cache[key] = (new_version, stored_at, updated)
+                published.append((key, _copy_result(updated)))
+
+    # Hand the updated results to the other workers, which would otherwise recompute them
+    shared = get_shared_cache()
+    if shared is not None:
+        for key, result in published:
+            shared.put(key, new_version, result)
+
+def clear_aggregate_cache():
+    """Drop every cached aggregate"""
+    with _aggregate_cache_lock:
+        _aggregate_cache.clear()
+
+def export_cached_aggregates(user_id):
+    """A user's cached entries as {key: (version, result)}, for saving with their session"""
+    with _aggregate_cache_lock:
+        return {key: (entry[0], _copy_result(entry[2])) for key, entry in _aggregate_cache.items() if key[1] == user_id}
+
+def seed_cached_aggregates(entries):
+    """Load entries saved by export_cached_aggregates; ones already cached at a newer version are kept"""
+    now = time.monotonic()
+    with _aggregate_cache_lock:
+        for key, (version, result) in entries.items():
+            current = _aggregate_cache.get(key)
+            if current is not None and current[0] >= version:
+                continue
+            _aggregate_cache[key] = (version, now, result)
+            _aggregate_cache.move_to_end(key)
+        while len(_aggregate_cache) > AGGREGATE_CACHE_SIZE:
+            _aggregate_cache.popitem(last=False)
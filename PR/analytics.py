@@ -2,11 +2,42 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from database import get_mysql_connection
+from database import get_mysql_connection, fetch_typed_frame, get_data_version, BASE_CURRENCY, BASE_AMOUNT_SQL, FX_JOIN_SQL
+from aggregate_cache import cached_aggregate
+from figure_cache import cached_figure
+from timeseries import downsample_time_series, aggregate_time_series
+from column_store import get_user_store, store_analytics_data
 from mysql.connector import Error
 
-def get_advanced_analytics_data(user_id):
-    """Get comprehensive analytics data for advanced visualizations"""
+# Result dtypes for the analytics queries; amounts arrive as Decimal and counts as int
+ANALYTICS_DTYPES = {
+    'Day': 'datetime64[ns]',
+    'DailyExpense': 'float64',
+    'DailyIncome': 'float64',
+    'ExpenseCount': 'int64',
+    'IncomeCount': 'int64',
+    'TotalAmount': 'float64',
+    'TransactionCount': 'int64',
+    'AvgAmount': 'float64',
+    'MinAmount': 'float64',
+    'MaxAmount': 'float64',
+    'DayOfWeek': 'int8',
+    'WeeklyExpense': 'float64',
+    'TotalIncome': 'float64',
+    'TotalExpense': 'float64',
+    'NetAmount': 'float64'
+}
+
+def get_advanced_analytics_data(user_id, base_currency=BASE_CURRENCY):
+    """Get comprehensive analytics data for advanced visualizations, in base_currency"""
+    return cached_aggregate(('advanced_analytics', user_id, base_currency), get_data_version(user_id),
+                            lambda: _load_advanced_analytics_data(user_id, base_currency))
+
+def _load_advanced_analytics_data(user_id, base_currency):
+    store = get_user_store(user_id, base_currency)
+    if store is not None:
+        return store_analytics_data(store)
+
     connection = get_mysql_connection()
     if connection is None:
         return {}
@@ -15,109 +46,77 @@ def get_advanced_analytics_data(user_id):
         cursor = connection.cursor()
         
         # 1. Daily spending patterns
-        cursor.execute('''
+        daily_data = fetch_typed_frame(cursor, f'''
             SELECT 
                 DATE(Date) as Day,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as DailyExpense,
-                SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) as DailyIncome,
+                SUM(CASE WHEN income_expense = 'Expense' THEN {BASE_AMOUNT_SQL} ELSE 0 END) as DailyExpense,
+                SUM(CASE WHEN income_expense = 'Income' THEN {BASE_AMOUNT_SQL} ELSE 0 END) as DailyIncome,
                 COUNT(CASE WHEN income_expense = 'Expense' THEN 1 END) as ExpenseCount,
                 COUNT(CASE WHEN income_expense = 'Income' THEN 1 END) as IncomeCount
-            FROM Data 
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY DATE(Date)
             ORDER BY Day
-        ''', (user_id,))
-        daily_data = pd.DataFrame(cursor.fetchall(), columns=['Day', 'DailyExpense', 'DailyIncome', 'ExpenseCount', 'IncomeCount'])
+        ''', (base_currency, user_id), ['Day', 'DailyExpense', 'DailyIncome', 'ExpenseCount', 'IncomeCount'], ANALYTICS_DTYPES)
         
         # 2. Category-wise spending over time
-        cursor.execute('''
+        category_trends = fetch_typed_frame(cursor, f'''
             SELECT 
                 Category,
-                DATE_FORMAT(Date, '%%Y-%%m') as Month,
-                SUM(Amount) as TotalAmount,
+                DATE_FORMAT(Date, '%Y-%m') as Month,
+                SUM({BASE_AMOUNT_SQL}) as TotalAmount,
                 COUNT(*) as TransactionCount
-            FROM Data 
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s AND income_expense = 'Expense'
-            GROUP BY Category, DATE_FORMAT(Date, '%%Y-%%m')
+            GROUP BY Category, DATE_FORMAT(Date, '%Y-%m')
             ORDER BY Month, TotalAmount DESC
-        ''', (user_id,))
-        category_trends = pd.DataFrame(cursor.fetchall(), columns=['Category', 'Month', 'TotalAmount', 'TransactionCount'])
+        ''', (base_currency, user_id), ['Category', 'Month', 'TotalAmount', 'TransactionCount'], ANALYTICS_DTYPES)
         
         # 3. Payment method analysis
-        cursor.execute('''
+        payment_analysis = fetch_typed_frame(cursor, f'''
             SELECT 
                 Mode,
                 COUNT(*) as TransactionCount,
-                SUM(Amount) as TotalAmount,
-                AVG(Amount) as AvgAmount,
-                MIN(Amount) as MinAmount,
-                MAX(Amount) as MaxAmount
-            FROM Data 
+                SUM({BASE_AMOUNT_SQL}) as TotalAmount,
+                AVG({BASE_AMOUNT_SQL}) as AvgAmount,
+                MIN({BASE_AMOUNT_SQL}) as MinAmount,
+                MAX({BASE_AMOUNT_SQL}) as MaxAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY Mode
             ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        payment_analysis = pd.DataFrame(cursor.fetchall(), columns=['Mode', 'TransactionCount', 'TotalAmount', 'AvgAmount', 'MinAmount', 'MaxAmount'])
+        ''', (base_currency, user_id), ['Mode', 'TransactionCount', 'TotalAmount', 'AvgAmount', 'MinAmount', 'MaxAmount'], ANALYTICS_DTYPES)
         
         # 4. Weekly spending patterns
-        cursor.execute('''
+        weekly_patterns = fetch_typed_frame(cursor, f'''
             SELECT 
                 DAYOFWEEK(Date) as DayOfWeek,
                 DAYNAME(Date) as DayName,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as WeeklyExpense,
+                SUM(CASE WHEN income_expense = 'Expense' THEN {BASE_AMOUNT_SQL} ELSE 0 END) as WeeklyExpense,
                 COUNT(CASE WHEN income_expense = 'Expense' THEN 1 END) as ExpenseCount
-            FROM Data 
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY DAYOFWEEK(Date), DAYNAME(Date)
             ORDER BY DAYOFWEEK(Date)
-        ''', (user_id,))
-        weekly_patterns = pd.DataFrame(cursor.fetchall(), columns=['DayOfWeek', 'DayName', 'WeeklyExpense', 'ExpenseCount'])
+        ''', (base_currency, user_id), ['DayOfWeek', 'DayName', 'WeeklyExpense', 'ExpenseCount'], ANALYTICS_DTYPES)
         
         # 5. Income vs Expense ratio by month
-        cursor.execute('''
+        monthly_ratio = fetch_typed_frame(cursor, f'''
             SELECT 
-                DATE_FORMAT(Date, '%%Y-%%m') as Month,
-                SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) as TotalIncome,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as TotalExpense,
-                (SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) - 
-                 SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END)) as NetAmount
-            FROM Data 
+                DATE_FORMAT(Date, '%Y-%m') as Month,
+                SUM(CASE WHEN income_expense = 'Income' THEN {BASE_AMOUNT_SQL} ELSE 0 END) as TotalIncome,
+                SUM(CASE WHEN income_expense = 'Expense' THEN {BASE_AMOUNT_SQL} ELSE 0 END) as TotalExpense,
+                (SUM(CASE WHEN income_expense = 'Income' THEN {BASE_AMOUNT_SQL} ELSE 0 END) - 
+                 SUM(CASE WHEN income_expense = 'Expense' THEN {BASE_AMOUNT_SQL} ELSE 0 END)) as NetAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
-            GROUP BY DATE_FORMAT(Date, '%%Y-%%m')
+            GROUP BY DATE_FORMAT(Date, '%Y-%m')
             ORDER BY Month
-        ''', (user_id,))
-        monthly_ratio = pd.DataFrame(cursor.fetchall(), columns=['Month', 'TotalIncome', 'TotalExpense', 'NetAmount'])
+        ''', (base_currency, user_id), ['Month', 'TotalIncome', 'TotalExpense', 'NetAmount'], ANALYTICS_DTYPES)
         
         cursor.close()
         connection.close()
         
-        # Convert numeric columns to proper data types
-        if not daily_data.empty:
-            daily_data['DailyExpense'] = pd.to_numeric(daily_data['DailyExpense'], errors='coerce')
-            daily_data['DailyIncome'] = pd.to_numeric(daily_data['DailyIncome'], errors='coerce')
-            daily_data['ExpenseCount'] = pd.to_numeric(daily_data['ExpenseCount'], errors='coerce')
-            daily_data['IncomeCount'] = pd.to_numeric(daily_data['IncomeCount'], errors='coerce')
-        
-        if not category_trends.empty:
-            category_trends['TotalAmount'] = pd.to_numeric(category_trends['TotalAmount'], errors='coerce')
-            category_trends['TransactionCount'] = pd.to_numeric(category_trends['TransactionCount'], errors='coerce')
-        
-        if not payment_analysis.empty:
-            payment_analysis['TotalAmount'] = pd.to_numeric(payment_analysis['TotalAmount'], errors='coerce')
-            payment_analysis['AvgAmount'] = pd.to_numeric(payment_analysis['AvgAmount'], errors='coerce')
-            payment_analysis['MinAmount'] = pd.to_numeric(payment_analysis['MinAmount'], errors='coerce')
-            payment_analysis['MaxAmount'] = pd.to_numeric(payment_analysis['MaxAmount'], errors='coerce')
-            payment_analysis['TransactionCount'] = pd.to_numeric(payment_analysis['TransactionCount'], errors='coerce')
-        
-        if not weekly_patterns.empty:
-            weekly_patterns['WeeklyExpense'] = pd.to_numeric(weekly_patterns['WeeklyExpense'], errors='coerce')
-            weekly_patterns['ExpenseCount'] = pd.to_numeric(weekly_patterns['ExpenseCount'], errors='coerce')
-        
-        if not monthly_ratio.empty:
-            monthly_ratio['TotalIncome'] = pd.to_numeric(monthly_ratio['TotalIncome'], errors='coerce')
-            monthly_ratio['TotalExpense'] = pd.to_numeric(monthly_ratio['TotalExpense'], errors='coerce')
-            monthly_ratio['NetAmount'] = pd.to_numeric(monthly_ratio['NetAmount'], errors='coerce')
-        
         return {
             'daily_data': daily_data,
             'category_trends': category_trends,
@@ -147,49 +146,62 @@ def advanced_analytics_page():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=daily_data['Day'], 
-                y=daily_data['DailyExpense'], 
-                name='Daily Expenses',
-                line=dict(color='red'),
-                mode='lines+markers'
-            ))
-            fig.add_trace(go.Scatter(
-                x=daily_data['Day'], 
-                y=daily_data['DailyIncome'], 
-                name='Daily Income',
-                line=dict(color='green'),
-                mode='lines+markers'
-            ))
-            fig.update_layout(
-                title="Daily Income vs Expenses",
-                xaxis_title="Date",
-                yaxis_title="Amount (₹)",
-                hovermode='x unified'
-            )
+            # Long histories are thinned to a point budget, keeping each bucket's peaks
+            daily_points = downsample_time_series(daily_data, 'Day', ['DailyExpense', 'DailyIncome'])
+            
+            def build_daily_amounts():
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(
+                    x=daily_points['Day'], 
+                    y=daily_points['DailyExpense'], 
+                    name='Daily Expenses',
+                    line=dict(color='red'),
+                    mode='lines+markers'
+                ))
+                fig.add_trace(go.Scatter(
+                    x=daily_points['Day'], 
+                    y=daily_points['DailyIncome'], 
+                    name='Daily Income',
+                    line=dict(color='green'),
+                    mode='lines+markers'
+                ))
+                fig.update_layout(
+                    title="Daily Income vs Expenses",
+                    xaxis_title="Date",
+                    yaxis_title="Amount (₹)",
+                    hovermode='x unified'
+                )
+                return fig
+            
+            fig = cached_figure("analytics.daily_amounts", [daily_points], build_daily_amounts)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=daily_data['Day'],
-                y=daily_data['ExpenseCount'],
-                name='Expense Transactions',
-                marker_color='red'
-            ))
-            fig.add_trace(go.Bar(
-                x=daily_data['Day'],
-                y=daily_data['IncomeCount'],
-                name='Income Transactions',
-                marker_color='green'
-            ))
-            fig.update_layout(
-                title="Daily Transaction Count",
-                xaxis_title="Date",
-                yaxis_title="Number of Transactions",
-                barmode='group'
-            )
+            daily_counts, count_granularity = aggregate_time_series(daily_data, 'Day', ['ExpenseCount', 'IncomeCount'])
+            
+            def build_daily_counts():
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=daily_counts['Day'],
+                    y=daily_counts['ExpenseCount'],
+                    name='Expense Transactions',
+                    marker_color='red'
+                ))
+                fig.add_trace(go.Bar(
+                    x=daily_counts['Day'],
+                    y=daily_counts['IncomeCount'],
+                    name='Income Transactions',
+                    marker_color='green'
+                ))
+                fig.update_layout(
+                    title=f"{count_granularity or 'Daily'} Transaction Count",
+                    xaxis_title="Date",
+                    yaxis_title="Number of Transactions",
+                    barmode='group'
+                )
+                return fig
+            
+            fig = cached_figure("analytics.daily_counts", [daily_counts], build_daily_counts)
             st.plotly_chart(fig, use_container_width=True)
     
     # 2. Category Spending Trends Over Time
@@ -199,12 +211,12 @@ def advanced_analytics_page():
         # Pivot data for heatmap
         pivot_data = category_trends.pivot(index='Category', columns='Month', values='TotalAmount').fillna(0)
         
-        fig = px.imshow(
+        fig = cached_figure("analytics.category_heatmap", [pivot_data], lambda: px.imshow(
             pivot_data,
             title="Category Spending Heatmap",
             labels=dict(x="Month", y="Category", color="Amount (₹)"),
             color_continuous_scale="Reds"
-        )
+        ))
         st.plotly_chart(fig, use_container_width=True)
         
         # Top categories line chart
@@ -212,14 +224,18 @@ def advanced_analytics_page():
             category_sums = category_trends.groupby('Category')['TotalAmount'].sum()
             top_categories = category_sums.nlargest(5)
             top_cat_data = category_trends[category_trends['Category'].isin(top_categories.index)]
+            top_cat_data = pd.concat([
+                downsample_time_series(series, 'Month', ['TotalAmount'])
+                for _, series in top_cat_data.groupby('Category')
+            ])
             
-            fig = px.line(
+            fig = cached_figure("analytics.top_categories", [top_cat_data], lambda: px.line(
                 top_cat_data,
                 x='Month',
                 y='TotalAmount',
                 color='Category',
                 title="Top 5 Categories - Monthly Trends"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         except Exception as e:
             st.warning(f"Could not generate top categories chart: {e}")
@@ -231,37 +247,37 @@ def advanced_analytics_page():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = px.pie(
+            fig = cached_figure("analytics.payment_totals", [payment_analysis], lambda: px.pie(
                 payment_analysis,
                 values='TotalAmount',
                 names='Mode',
                 title="Total Amount by Payment Method"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            fig = px.bar(
+            fig = cached_figure("analytics.payment_averages", [payment_analysis], lambda: px.bar(
                 payment_analysis,
                 x='Mode',
                 y='AvgAmount',
                 title="Average Transaction Amount by Payment Method",
                 color='TransactionCount',
                 color_continuous_scale='Blues'
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
     
     # 4. Weekly Spending Patterns
     st.markdown("###  Weekly Spending Patterns")
     weekly_patterns = analytics_data['weekly_patterns']
     if not weekly_patterns.empty:
-        fig = px.bar(
+        fig = cached_figure("analytics.weekly_patterns", [weekly_patterns], lambda: px.bar(
             weekly_patterns,
             x='DayName',
             y='WeeklyExpense',
             title="Average Spending by Day of Week",
             color='ExpenseCount',
             color_continuous_scale='Reds'
-        )
+        ))
         st.plotly_chart(fig, use_container_width=True)
     
     # 5. Monthly Income vs Expense Ratio
@@ -271,39 +287,50 @@ def advanced_analytics_page():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=monthly_ratio['Month'],
-                y=monthly_ratio['TotalIncome'],
-                name='Income',
-                marker_color='green'
-            ))
-            fig.add_trace(go.Bar(
-                x=monthly_ratio['Month'],
-                y=monthly_ratio['TotalExpense'],
-                name='Expenses',
-                marker_color='red'
-            ))
-            fig.update_layout(
-                title="Monthly Income vs Expenses",
-                xaxis_title="Month",
-                yaxis_title="Amount (₹)",
-                barmode='group'
-            )
+            monthly_totals, month_granularity = aggregate_time_series(monthly_ratio, 'Month', ['TotalIncome', 'TotalExpense'])
+            
+            def build_monthly_totals():
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=monthly_totals['Month'],
+                    y=monthly_totals['TotalIncome'],
+                    name='Income',
+                    marker_color='green'
+                ))
+                fig.add_trace(go.Bar(
+                    x=monthly_totals['Month'],
+                    y=monthly_totals['TotalExpense'],
+                    name='Expenses',
+                    marker_color='red'
+                ))
+                fig.update_layout(
+                    title=f"{month_granularity or 'Monthly'} Income vs Expenses",
+                    xaxis_title="Month",
+                    yaxis_title="Amount (₹)",
+                    barmode='group'
+                )
+                return fig
+            
+            fig = cached_figure("analytics.monthly_totals", [monthly_totals], build_monthly_totals)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Calculate savings rate
             monthly_ratio['SavingsRate'] = (monthly_ratio['NetAmount'] / monthly_ratio['TotalIncome'] * 100).fillna(0)
+            savings_points = downsample_time_series(monthly_ratio, 'Month', ['SavingsRate'])
             
-            fig = px.line(
-                monthly_ratio,
-                x='Month',
-                y='SavingsRate',
-                title="Monthly Savings Rate (%)",
-                markers=True
-            )
-            fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Break-even")
+            def build_savings_rate():
+                fig = px.line(
+                    savings_points,
+                    x='Month',
+                    y='SavingsRate',
+                    title="Monthly Savings Rate (%)",
+                    markers=True
+                )
+                fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Break-even")
+                return fig
+            
+            fig = cached_figure("analytics.savings_rate", [savings_points], build_savings_rate)
             st.plotly_chart(fig, use_container_width=True)
     
     # 6. Spending Insights
@@ -319,7 +346,7 @@ def advanced_analytics_page():
                 st.metric(
                     "Highest Spending Day",
                     f"₹{max_expense_day['DailyExpense']:,.0f}",
-                    f"on {max_expense_day['Day']}"
+                    f"on {max_expense_day['Day']:%Y-%m-%d}"
                 )
             except Exception as e:
                 st.metric("Highest Spending Day", "N/A")
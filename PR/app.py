@@ -1,13 +1,28 @@
 import streamlit as st
 import pandas as pd
-import hashlib
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-import mysql.connector
-from mysql.connector import Error
-import requests
-import json
+
+# Data access is shared with the modular app so both entry points hit the same queries
+from database import (
+    authenticate_user, get_user_data, get_user_summary,
+    get_category_data, get_monthly_trends, validate_email, validate_phone,
+    get_next_user_id, check_email_exists, register_user, insert_transaction,
+    get_available_categories, get_available_modes
+)
+from analytics import get_advanced_analytics_data
+from schema import bootstrap_schema
+from chatbot import call_grok_api, get_analytics_data_for_chatbot, get_quick_response
+from debt_tracker import (
+    add_debt, get_user_debts, add_debt_payment,
+    calculate_optimal_repayment_strategy, calculate_debt_snowball_strategy
+)
+from goals_manager import (
+    add_goal, get_user_goals, add_goal_contribution,
+    get_monthly_contributions, calculate_goal_insights
+)
+from history_pages import render_history_pages
 
 # Page configuration
 st.set_page_config(
@@ -67,297 +82,6 @@ if 'user_id' not in st.session_state:
 if 'user_name' not in st.session_state:
     st.session_state.user_name = None
 
-def get_mysql_connection():
-    """Create MySQL connection to XAMPP database"""
-    try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            port=3307,  # Default XAMPP MySQL port
-            database='dabba',
-            user='root',
-            password=''
-        )
-        return connection
-    except Error as e:
-        st.error(f"Error connecting to MySQL database: {e}")
-        return None
-
-def authenticate_user(email, password):
-    """Authenticate user with email and password from MySQL database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return None
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('''
-            SELECT user_id, Name, email, password 
-            FROM Users 
-            WHERE email = %s AND password = %s
-        ''', (email, password))
-        
-        user = cursor.fetchone()
-        cursor.close()
-        connection.close()
-        
-        return user
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
-def get_user_data(user_id):
-    """Get user's expense data from MySQL database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT Date, Mode, Category, Amount, income_expense, Currency
-            FROM Data 
-            WHERE id = %s
-            ORDER BY Date DESC
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Error as e:
-        st.error(f"Error fetching user data: {e}")
-        return pd.DataFrame()
-
-def get_user_summary(user_id):
-    """Get user's financial summary from MySQL database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return None
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Get total income
-        cursor.execute('''
-            SELECT COALESCE(SUM(Amount), 0) as total_income
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Income'
-        ''', (user_id,))
-        total_income = cursor.fetchone()[0]
-        
-        # Get total expenses
-        cursor.execute('''
-            SELECT COALESCE(SUM(Amount), 0) as total_expenses
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Expense'
-        ''', (user_id,))
-        total_expenses = cursor.fetchone()[0]
-        
-        # Get transaction count
-        cursor.execute('''
-            SELECT COUNT(*) as transaction_count
-            FROM Data 
-            WHERE id = %s
-        ''', (user_id,))
-        transaction_count = cursor.fetchone()[0]
-        
-        cursor.close()
-        connection.close()
-        
-        return {
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'net_balance': total_income - total_expenses,
-            'transaction_count': transaction_count
-        }
-    except Error as e:
-        st.error(f"Error fetching user summary: {e}")
-        return None
-
-def get_category_data(user_id):
-    """Get expense category breakdown for user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT Category, SUM(Amount) as TotalAmount
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Expense'
-            GROUP BY Category
-            ORDER BY TotalAmount DESC
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Error as e:
-        st.error(f"Error fetching category data: {e}")
-        return pd.DataFrame()
-
-def get_monthly_trends(user_id):
-    """Get monthly income vs expenses trends"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT 
-                DATE_FORMAT(Date, '%Y-%m') as Month,
-                income_expense,
-                SUM(Amount) as TotalAmount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY DATE_FORMAT(Date, '%Y-%m'), income_expense
-            ORDER BY Month
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Error as e:
-        st.error(f"Error fetching monthly trends: {e}")
-        return pd.DataFrame()
-
-def get_advanced_analytics_data(user_id):
-    """Get comprehensive analytics data for advanced visualizations"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return {}
-    
-    try:
-        cursor = connection.cursor()
-        
-        # 1. Daily spending patterns
-        cursor.execute('''
-            SELECT 
-                DATE(Date) as Day,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as DailyExpense,
-                SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) as DailyIncome,
-                COUNT(CASE WHEN income_expense = 'Expense' THEN 1 END) as ExpenseCount,
-                COUNT(CASE WHEN income_expense = 'Income' THEN 1 END) as IncomeCount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY DATE(Date)
-            ORDER BY Day
-        ''', (user_id,))
-        daily_data = pd.DataFrame(cursor.fetchall(), columns=['Day', 'DailyExpense', 'DailyIncome', 'ExpenseCount', 'IncomeCount'])
-        
-        # 2. Category-wise spending over time
-        cursor.execute('''
-            SELECT 
-                Category,
-                DATE_FORMAT(Date, '%%Y-%%m') as Month,
-                SUM(Amount) as TotalAmount,
-                COUNT(*) as TransactionCount
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Expense'
-            GROUP BY Category, DATE_FORMAT(Date, '%%Y-%%m')
-            ORDER BY Month, TotalAmount DESC
-        ''', (user_id,))
-        category_trends = pd.DataFrame(cursor.fetchall(), columns=['Category', 'Month', 'TotalAmount', 'TransactionCount'])
-        
-        # 3. Payment method analysis
-        cursor.execute('''
-            SELECT 
-                Mode,
-                COUNT(*) as TransactionCount,
-                SUM(Amount) as TotalAmount,
-                AVG(Amount) as AvgAmount,
-                MIN(Amount) as MinAmount,
-                MAX(Amount) as MaxAmount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY Mode
-            ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        payment_analysis = pd.DataFrame(cursor.fetchall(), columns=['Mode', 'TransactionCount', 'TotalAmount', 'AvgAmount', 'MinAmount', 'MaxAmount'])
-        
-        # 4. Weekly spending patterns
-        cursor.execute('''
-            SELECT 
-                DAYOFWEEK(Date) as DayOfWeek,
-                DAYNAME(Date) as DayName,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as WeeklyExpense,
-                COUNT(CASE WHEN income_expense = 'Expense' THEN 1 END) as ExpenseCount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY DAYOFWEEK(Date), DAYNAME(Date)
-            ORDER BY DAYOFWEEK(Date)
-        ''', (user_id,))
-        weekly_patterns = pd.DataFrame(cursor.fetchall(), columns=['DayOfWeek', 'DayName', 'WeeklyExpense', 'ExpenseCount'])
-        
-        # 5. Top spending categories by month
-        cursor.execute('''
-            SELECT 
-                Category,
-                DATE_FORMAT(Date, '%%Y-%%m') as Month,
-                SUM(Amount) as TotalAmount
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Expense'
-            GROUP BY Category, DATE_FORMAT(Date, '%%Y-%%m')
-            HAVING TotalAmount > 0
-            ORDER BY Month, TotalAmount DESC
-        ''', (user_id,))
-        top_categories = pd.DataFrame(cursor.fetchall(), columns=['Category', 'Month', 'TotalAmount'])
-        
-        # 6. Income vs Expense ratio by month
-        cursor.execute('''
-            SELECT 
-                DATE_FORMAT(Date, '%%Y-%%m') as Month,
-                SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) as TotalIncome,
-                SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END) as TotalExpense,
-                (SUM(CASE WHEN income_expense = 'Income' THEN Amount ELSE 0 END) - 
-                 SUM(CASE WHEN income_expense = 'Expense' THEN Amount ELSE 0 END)) as NetAmount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY DATE_FORMAT(Date, '%%Y-%%m')
-            ORDER BY Month
-        ''', (user_id,))
-        monthly_ratio = pd.DataFrame(cursor.fetchall(), columns=['Month', 'TotalIncome', 'TotalExpense', 'NetAmount'])
-        
-        cursor.close()
-        connection.close()
-        
-        # Convert numeric columns to proper data types
-        if not daily_data.empty:
-            daily_data['DailyExpense'] = pd.to_numeric(daily_data['DailyExpense'], errors='coerce')
-            daily_data['DailyIncome'] = pd.to_numeric(daily_data['DailyIncome'], errors='coerce')
-            daily_data['ExpenseCount'] = pd.to_numeric(daily_data['ExpenseCount'], errors='coerce')
-            daily_data['IncomeCount'] = pd.to_numeric(daily_data['IncomeCount'], errors='coerce')
-        
-        if not category_trends.empty:
-            category_trends['TotalAmount'] = pd.to_numeric(category_trends['TotalAmount'], errors='coerce')
-            category_trends['TransactionCount'] = pd.to_numeric(category_trends['TransactionCount'], errors='coerce')
-        
-        if not payment_analysis.empty:
-            payment_analysis['TotalAmount'] = pd.to_numeric(payment_analysis['TotalAmount'], errors='coerce')
-            payment_analysis['AvgAmount'] = pd.to_numeric(payment_analysis['AvgAmount'], errors='coerce')
-            payment_analysis['MinAmount'] = pd.to_numeric(payment_analysis['MinAmount'], errors='coerce')
-            payment_analysis['MaxAmount'] = pd.to_numeric(payment_analysis['MaxAmount'], errors='coerce')
-            payment_analysis['TransactionCount'] = pd.to_numeric(payment_analysis['TransactionCount'], errors='coerce')
-        
-        if not weekly_patterns.empty:
-            weekly_patterns['WeeklyExpense'] = pd.to_numeric(weekly_patterns['WeeklyExpense'], errors='coerce')
-            weekly_patterns['ExpenseCount'] = pd.to_numeric(weekly_patterns['ExpenseCount'], errors='coerce')
-        
-        if not top_categories.empty:
-            top_categories['TotalAmount'] = pd.to_numeric(top_categories['TotalAmount'], errors='coerce')
-        
-        if not monthly_ratio.empty:
-            monthly_ratio['TotalIncome'] = pd.to_numeric(monthly_ratio['TotalIncome'], errors='coerce')
-            monthly_ratio['TotalExpense'] = pd.to_numeric(monthly_ratio['TotalExpense'], errors='coerce')
-            monthly_ratio['NetAmount'] = pd.to_numeric(monthly_ratio['NetAmount'], errors='coerce')
-        
-        return {
-            'daily_data': daily_data,
-            'category_trends': category_trends,
-            'payment_analysis': payment_analysis,
-            'weekly_patterns': weekly_patterns,
-            'top_categories': top_categories,
-            'monthly_ratio': monthly_ratio
-        }
-    except Error as e:
-        st.error(f"Error fetching advanced analytics: {e}")
-        return {}
-
 def advanced_analytics_page():
     """Display advanced analytics page with comprehensive spending trends"""
     st.markdown(f'<h1 class="main-header">📊 Advanced Analytics - {st.session_state.user_name}</h1>', unsafe_allow_html=True)
@@ -577,7 +301,7 @@ def advanced_analytics_page():
                 st.metric(
                     "Highest Spending Day",
                     f"₹{max_expense_day['DailyExpense']:,.0f}",
-                    f"on {max_expense_day['Day']}"
+                    f"on {max_expense_day['Day']:%Y-%m-%d}"
                 )
             except Exception as e:
                 st.metric("Highest Spending Day", "N/A")
@@ -619,81 +343,6 @@ def advanced_analytics_page():
             }
         )
 
-def validate_email(email):
-    """Basic email validation"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    """Basic phone number validation"""
-    import re
-    # Remove all non-digit characters
-    digits_only = re.sub(r'\D', '', phone)
-    # Check if it's between 10-15 digits
-    return 10 <= len(digits_only) <= 15
-
-def get_next_user_id():
-    """Get the next available user ID by counting existing users"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return 1
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('SELECT COUNT(*) FROM Users')
-        count = cursor.fetchone()[0]
-        cursor.close()
-        connection.close()
-        return count + 1
-    except Error as e:
-        st.error(f"Error getting user count: {e}")
-        connection.close()
-        return 1
-
-def check_email_exists(email):
-    """Check if email already exists in the database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('SELECT COUNT(*) FROM Users WHERE email = %s', (email,))
-        count = cursor.fetchone()[0]
-        cursor.close()
-        connection.close()
-        return count > 0
-    except Error as e:
-        st.error(f"Error checking email: {e}")
-        connection.close()
-        return False
-
-def register_user(name, age, email, password, phone_number):
-    """Register a new user in the database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        # Get next user ID
-        next_user_id = get_next_user_id()
-        
-        cursor = connection.cursor()
-        cursor.execute('''
-            INSERT INTO Users (user_id, Name, Age, email, password, phone_number)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (next_user_id, name, age, email, password, phone_number))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-    except Error as e:
-        st.error(f"Error registering user: {e}")
-        connection.close()
-        return False
-
 def login_page():
     """Display login page with signup option"""
     st.markdown('<h1 class="main-header">💰 Dabba Expense Tracker</h1>', unsafe_allow_html=True)
@@ -1017,72 +666,6 @@ def dashboard():
         else:
             st.info("No payment method data available.")
 
-def insert_transaction(user_id, date, mode, category, amount, income_expense, currency):
-    """Insert a new transaction into the MySQL database"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('''
-            INSERT INTO Data (id, Date, Mode, Category, Amount, income_expense, Currency)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ''', (user_id, date, mode, category, amount, income_expense, currency))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-    except Error as e:
-        st.error(f"Error inserting transaction: {e}")
-        connection.close()
-        return False
-
-def get_available_categories():
-    """Get list of available categories from existing data"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return []
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('''
-            SELECT DISTINCT Category 
-            FROM Data 
-            ORDER BY Category
-        ''')
-        categories = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        connection.close()
-        return categories
-    except Error as e:
-        st.error(f"Error fetching categories: {e}")
-        connection.close()
-        return []
-
-def get_available_modes():
-    """Get list of available payment modes from existing data"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return []
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('''
-            SELECT DISTINCT Mode 
-            FROM Data 
-            ORDER BY Mode
-        ''')
-        modes = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        connection.close()
-        return modes
-    except Error as e:
-        st.error(f"Error fetching payment modes: {e}")
-        connection.close()
-        return []
-
 def transaction_page():
     """Display the transaction insertion page"""
     st.markdown(f'<h1 class="main-header">💰 Add New Transaction - {st.session_state.user_name}</h1>', unsafe_allow_html=True)
@@ -1320,188 +903,6 @@ def transaction_page():
     for tip in tips:
         st.markdown(tip)
 
-# Grok AI API Configuration
-GROK_API_KEY = st.secrets.get("GROK_API_KEY", "your-grok-api-key-here")
-GROK_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-def call_grok_api(user_query, context_data):
-    """Call Grok AI API with user query and context data"""
-    try:
-        # Prepare the context with user data
-        context = f"""
-        You are a financial advisor chatbot for the Dabba expense tracker app. 
-        Provide responses between 2-6 sentences - not too short, not too long.
-        
-        User Data:
-        - Income: ₹{context_data.get('total_income', 0):,.0f}
-        - Expenses: ₹{context_data.get('total_expenses', 0):,.0f}
-        - Net: ₹{context_data.get('net_balance', 0):,.0f}
-        - Transactions: {context_data.get('transaction_count', 0)}
-        
-        Top Categories: {context_data.get('category_data', pd.DataFrame()).head(3).to_string() if not context_data.get('category_data', pd.DataFrame()).empty else 'None'}
-        
-        Recent: {context_data.get('recent_data', pd.DataFrame()).head(3).to_string() if not context_data.get('recent_data', pd.DataFrame()).empty else 'None'}
-        
-        Query: {user_query}
-        
-        RESPONSE RULES:
-        - Keep responses between 2-6 sentences (not too short, not too long)
-        - Be DIRECT and TO-THE-POINT
-        - Use bullet points for multiple points
-        - Focus on actionable advice
-        - Use specific numbers from user data
-        - Provide context and explanation
-        - Include practical suggestions
-        """
-        
-        headers = {
-            "Authorization": f"Bearer {GROK_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "llama3-8b-8192",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful financial advisor. Provide responses between 2-6 sentences - not too short, not too long. Be direct and to-the-point while providing context and practical suggestions. Use bullet points when needed. Focus on actionable insights and specific data from the user's financial records."
-                },
-                {
-                    "role": "user",
-                    "content": context
-                }
-            ],
-            "temperature": 0.3,  # Lower temperature for more focused responses
-            "max_tokens": 500    # Increased max tokens for 2-6 sentence responses
-        }
-        
-        response = requests.post(GROK_API_URL, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result['choices'][0]['message']['content']
-        else:
-            st.error(f"Error calling Grok API: {response.status_code} - {response.text}")
-            return "I'm sorry, I'm having trouble processing your request right now. Please try again later."
-            
-    except Exception as e:
-        st.error(f"Error calling Grok API: {e}")
-        return "I'm sorry, I'm experiencing technical difficulties. Please try again later."
-
-def get_analytics_data_for_chatbot(user_id):
-    """Get comprehensive analytics data for the chatbot"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return {}
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Category breakdown
-        cursor.execute('''
-            SELECT Category, SUM(Amount) as TotalAmount, COUNT(*) as TransactionCount
-            FROM Data 
-            WHERE id = %s AND income_expense = 'Expense'
-            GROUP BY Category
-            ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        category_data = pd.DataFrame(cursor.fetchall(), columns=['Category', 'TotalAmount', 'TransactionCount'])
-        
-        # Monthly trends
-        cursor.execute('''
-            SELECT 
-                DATE_FORMAT(Date, '%Y-%m') as Month,
-                income_expense,
-                SUM(Amount) as TotalAmount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY DATE_FORMAT(Date, '%Y-%m'), income_expense
-            ORDER BY Month
-        ''', (user_id,))
-        monthly_data = pd.DataFrame(cursor.fetchall(), columns=['Month', 'income_expense', 'TotalAmount'])
-        
-        # Payment methods
-        cursor.execute('''
-            SELECT Mode, COUNT(*) as TransactionCount, SUM(Amount) as TotalAmount
-            FROM Data 
-            WHERE id = %s
-            GROUP BY Mode
-            ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        payment_data = pd.DataFrame(cursor.fetchall(), columns=['Mode', 'TransactionCount', 'TotalAmount'])
-        
-        # Recent transactions
-        cursor.execute('''
-            SELECT Date, Category, Amount, income_expense, Mode
-            FROM Data 
-            WHERE id = %s
-            ORDER BY Date DESC
-            LIMIT 10
-        ''', (user_id,))
-        recent_data = pd.DataFrame(cursor.fetchall(), columns=['Date', 'Category', 'Amount', 'income_expense', 'Mode'])
-        
-        cursor.close()
-        connection.close()
-        
-        return {
-            'category_data': category_data,
-            'monthly_data': monthly_data,
-            'payment_data': payment_data,
-            'recent_data': recent_data
-        }
-    except Error as e:
-        st.error(f"Error fetching analytics data: {e}")
-        return {}
-
-def get_quick_response(user_query, context_data):
-    """Provide quick template-based responses for common questions"""
-    query_lower = user_query.lower()
-    
-    # Income vs expenses comparison
-    if any(word in query_lower for word in ['income', 'expense', 'compare', 'balance']):
-        net_balance = context_data.get('net_balance', 0)
-        if net_balance > 0:
-            return f"✅ You're in good shape! Net balance: ₹{net_balance:,.0f} (Income exceeds expenses). Your financial health is positive, which means you're saving money effectively. Consider investing the surplus for better returns."
-        elif net_balance < 0:
-            return f"⚠️ Watch your spending! Net balance: ₹{net_balance:,.0f} (Expenses exceed income). You're spending more than you earn, which can lead to financial stress. Focus on reducing expenses in your top spending categories to improve your financial situation."
-        else:
-            return "📊 Your income and expenses are perfectly balanced. This is a stable financial position, but you might want to consider increasing your income or reducing expenses to build savings. Aim for a positive net balance for better financial security."
-    
-    # Top spending categories
-    elif any(word in query_lower for word in ['category', 'spending', 'biggest', 'top']):
-        category_data = context_data.get('category_data', pd.DataFrame())
-        if not category_data.empty:
-            top_cat = category_data.iloc[0]
-            return f"🏆 Top category: {top_cat['Category']} (₹{top_cat['TotalAmount']:,.0f}). This represents your highest spending area, accounting for {top_cat['TransactionCount']} transactions. Consider reviewing this category for potential savings opportunities and setting a budget limit."
-        return "📊 No spending data available yet. Start adding transactions to see your spending patterns and get personalized insights. This will help you identify areas where you can optimize your expenses."
-    
-    # Recent transactions
-    elif any(word in query_lower for word in ['recent', 'latest', 'transactions']):
-        recent_data = context_data.get('recent_data', pd.DataFrame())
-        if not recent_data.empty:
-            latest = recent_data.iloc[0]
-            return f"📅 Latest: {latest['Category']} - ₹{latest['Amount']:,.0f} ({latest['income_expense']}). Your recent spending shows a {latest['income_expense'].lower()} transaction. Monitor your recent patterns to maintain financial discipline and avoid unnecessary expenses."
-        return "📅 No recent transactions found. Add your daily expenses and income to track your financial activity. Regular transaction logging helps you stay aware of your spending habits and financial goals."
-    
-    # Savings advice
-    elif any(word in query_lower for word in ['save', 'savings', 'improve']):
-        net_balance = context_data.get('net_balance', 0)
-        if net_balance < 0:
-            return "💡 Cut expenses in your top spending category to improve savings. Your current spending exceeds income, so prioritize reducing non-essential expenses. Consider creating a budget and tracking every expense to identify areas for improvement."
-        else:
-            return "💡 Great job! Consider increasing your savings rate. You're already saving money, which is excellent. Look into investment options or emergency funds to make your money work harder for you."
-    
-    # Payment methods
-    elif any(word in query_lower for word in ['payment', 'method', 'mode']):
-        payment_data = context_data.get('payment_data', pd.DataFrame())
-        if not payment_data.empty:
-            top_payment = payment_data.iloc[0]
-            return f"💳 Most used: {top_payment['Mode']} ({top_payment['TransactionCount']} transactions). This is your preferred payment method, indicating your comfort with digital transactions. Consider diversifying payment methods for better financial tracking and security."
-        return "💳 No payment data available. Start recording your transactions to see which payment methods you use most. This information helps in better financial planning and understanding your spending patterns."
-    
-    # Return None to use AI response
-    return None
-
 def chatbot_page():
     """Display the chatbot interface"""
     st.markdown('<h1 class="main-header">🤖 Dabba Financial Advisor Chatbot</h1>', unsafe_allow_html=True)
@@ -1684,236 +1085,6 @@ def chatbot_page():
                     f"{top_payment['TransactionCount']} transactions"
                 )
 
-def create_debt_tables():
-    """Create debt tracking tables if they don't exist"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Create Debts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Debts (
-                debt_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                debt_name VARCHAR(255) NOT NULL,
-                lender_name VARCHAR(255) NOT NULL,
-                original_amount DECIMAL(15,2) NOT NULL,
-                current_balance DECIMAL(15,2) NOT NULL,
-                interest_rate DECIMAL(5,2) NOT NULL,
-                interest_type ENUM('Simple', 'Compound') DEFAULT 'Simple',
-                payment_frequency ENUM('Monthly', 'Weekly', 'Daily') DEFAULT 'Monthly',
-                start_date DATE NOT NULL,
-                due_date DATE,
-                minimum_payment DECIMAL(15,2) DEFAULT 0,
-                debt_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        # Create Debt_Payments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Debt_Payments (
-                payment_id INT AUTO_INCREMENT PRIMARY KEY,
-                debt_id INT NOT NULL,
-                user_id INT NOT NULL,
-                payment_amount DECIMAL(15,2) NOT NULL,
-                payment_date DATE NOT NULL,
-                payment_type ENUM('Regular', 'Extra', 'Lump Sum') DEFAULT 'Regular',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (debt_id) REFERENCES Debts(debt_id),
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-    except Exception as e:
-        st.error(f"Error creating debt tables: {e}")
-
-def add_debt(user_id, debt_name, lender_name, original_amount, current_balance, 
-              interest_rate, interest_type, payment_frequency, start_date, due_date, 
-              minimum_payment, debt_priority, notes):
-    """Add a new debt for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Convert data types to ensure compatibility with MySQL
-        user_id = int(user_id)
-        original_amount = float(original_amount)
-        current_balance = float(current_balance)
-        interest_rate = float(interest_rate)
-        minimum_payment = float(minimum_payment) if minimum_payment else 0.0
-        
-        cursor.execute('''
-            INSERT INTO Debts (user_id, debt_name, lender_name, original_amount, 
-                              current_balance, interest_rate, interest_type, payment_frequency,
-                              start_date, due_date, minimum_payment, debt_priority, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (user_id, debt_name, lender_name, original_amount, current_balance,
-              interest_rate, interest_type, payment_frequency, start_date, due_date,
-              minimum_payment, debt_priority, notes))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-        
-    except Exception as e:
-        st.error(f"Error adding debt: {e}")
-        return False
-
-def get_user_debts(user_id):
-    """Get all debts for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT debt_id, debt_name, lender_name, original_amount, current_balance,
-                   interest_rate, interest_type, payment_frequency, start_date, due_date,
-                   minimum_payment, debt_priority, notes,
-                   DATEDIFF(due_date, CURDATE()) as days_remaining
-            FROM Debts 
-            WHERE user_id = %s AND current_balance > 0
-            ORDER BY debt_priority DESC, interest_rate DESC
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching debts: {e}")
-        return pd.DataFrame()
-
-def add_debt_payment(user_id, debt_id, payment_amount, payment_date, payment_type, notes):
-    """Add a debt payment"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Convert data types to ensure compatibility with MySQL
-        debt_id = int(debt_id)
-        user_id = int(user_id)
-        payment_amount = float(payment_amount)
-        
-        # Add payment record
-        cursor.execute('''
-            INSERT INTO Debt_Payments (debt_id, user_id, payment_amount, payment_date, 
-                                      payment_type, notes)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (debt_id, user_id, payment_amount, payment_date, payment_type, notes))
-        
-        # Update debt balance
-        cursor.execute('''
-            UPDATE Debts 
-            SET current_balance = GREATEST(0, current_balance - %s)
-            WHERE debt_id = %s AND user_id = %s
-        ''', (payment_amount, debt_id, user_id))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-        
-    except Exception as e:
-        st.error(f"Error adding debt payment: {e}")
-        return False
-
-def get_debt_payments(user_id, debt_id=None):
-    """Get debt payments for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        if debt_id:
-            query = '''
-                SELECT dp.payment_id, dp.payment_amount, dp.payment_date, dp.payment_type,
-                       dp.notes, d.debt_name, d.lender_name
-                FROM Debt_Payments dp
-                JOIN Debts d ON dp.debt_id = d.debt_id
-                WHERE dp.user_id = %s AND dp.debt_id = %s
-                ORDER BY dp.payment_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id, debt_id))
-        else:
-            query = '''
-                SELECT dp.payment_id, dp.payment_amount, dp.payment_date, dp.payment_type,
-                       dp.notes, d.debt_name, d.lender_name
-                FROM Debt_Payments dp
-                JOIN Debts d ON dp.debt_id = d.debt_id
-                WHERE dp.user_id = %s
-                ORDER BY dp.payment_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id,))
-        
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching debt payments: {e}")
-        return pd.DataFrame()
-
-def calculate_optimal_repayment_strategy(user_id):
-    """Calculate optimal debt repayment strategy using debt avalanche method"""
-    debts_df = get_user_debts(user_id)
-    if debts_df.empty:
-        return None
-    
-    # Calculate additional metrics for each debt
-    debts_df['monthly_interest'] = debts_df['current_balance'] * debts_df['interest_rate'] / 100 / 12
-    debts_df['total_interest_paid'] = debts_df['original_amount'] - debts_df['current_balance']
-    debts_df['remaining_principal'] = debts_df['current_balance']
-    
-    # Sort by interest rate (highest first) for avalanche method
-    debts_df = debts_df.sort_values('interest_rate', ascending=False)
-    
-    # Calculate total monthly payments
-    total_minimum_payment = debts_df['minimum_payment'].sum()
-    
-    # Calculate optimal strategy
-    strategy = {
-        'debts': debts_df.to_dict('records'),
-        'total_debt': debts_df['current_balance'].sum(),
-        'total_monthly_payment': total_minimum_payment,
-        'highest_interest_debt': debts_df.iloc[0] if not debts_df.empty else None,
-        'priority_order': debts_df[['debt_name', 'lender_name', 'interest_rate', 'current_balance']].to_dict('records')
-    }
-    
-    return strategy
-
-def calculate_debt_snowball_strategy(user_id):
-    """Calculate debt snowball strategy (lowest balance first)"""
-    debts_df = get_user_debts(user_id)
-    if debts_df.empty:
-        return None
-    
-    # Sort by current balance (lowest first) for snowball method
-    debts_df = debts_df.sort_values('current_balance', ascending=True)
-    
-    strategy = {
-        'debts': debts_df.to_dict('records'),
-        'total_debt': debts_df['current_balance'].sum(),
-        'lowest_balance_debt': debts_df.iloc[0] if not debts_df.empty else None,
-        'priority_order': debts_df[['debt_name', 'lender_name', 'current_balance', 'interest_rate']].to_dict('records')
-    }
-    
-    return strategy
-
 def debt_tracker_page():
     """Display the debt tracker interface"""
     st.markdown('<h1 class="main-header">💳 Debt Tracker</h1>', unsafe_allow_html=True)
@@ -1955,9 +1126,6 @@ def debt_tracker_page():
         st.error("User ID not found. Please login again.")
         return
     
-    # Create debt tables if they don't exist
-    create_debt_tables()
-    
     # Get user debts
     debts_df = get_user_debts(user_id)
     
@@ -2164,265 +1332,6 @@ def debt_tracker_page():
                 - Both methods work, but avalanche typically saves more money in the long run
                 """)
 
-def create_goals_tables():
-    """Create goals tracking tables if they don't exist"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Create Goals table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Goals (
-                goal_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                goal_name VARCHAR(255) NOT NULL,
-                goal_description TEXT,
-                target_amount DECIMAL(15,2) NOT NULL,
-                current_amount DECIMAL(15,2) DEFAULT 0.00,
-                goal_category ENUM('Emergency Fund', 'Vacation', 'Home', 'Car', 'Education', 'Wedding', 'Business', 'Investment', 'Other') DEFAULT 'Other',
-                goal_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
-                target_date DATE,
-                start_date DATE DEFAULT (CURDATE()),
-                goal_status ENUM('Active', 'Completed', 'Paused', 'Cancelled') DEFAULT 'Active',
-                monthly_target DECIMAL(15,2),
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        # Create Goal_Contributions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Goal_Contributions (
-                contribution_id INT AUTO_INCREMENT PRIMARY KEY,
-                goal_id INT NOT NULL,
-                user_id INT NOT NULL,
-                contribution_amount DECIMAL(15,2) NOT NULL,
-                contribution_date DATE NOT NULL,
-                contribution_type ENUM('Manual', 'Automatic', 'Bonus', 'Refund', 'Other') DEFAULT 'Manual',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (goal_id) REFERENCES Goals(goal_id),
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-    except Exception as e:
-        st.error(f"Error creating goals tables: {e}")
-
-def add_goal(user_id, goal_name, goal_description, target_amount, goal_category, 
-             goal_priority, target_date, monthly_target, notes):
-    """Add a new financial goal for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Convert data types
-        user_id = int(user_id)
-        target_amount = float(target_amount)
-        monthly_target = float(monthly_target) if monthly_target else None
-        
-        cursor.execute('''
-            INSERT INTO Goals (user_id, goal_name, goal_description, target_amount, 
-                              goal_category, goal_priority, target_date, monthly_target, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (user_id, goal_name, goal_description, target_amount, goal_category,
-              goal_priority, target_date, monthly_target, notes))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-        
-    except Exception as e:
-        st.error(f"Error adding goal: {e}")
-        return False
-
-def get_user_goals(user_id):
-    """Get all goals for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT goal_id, goal_name, goal_description, target_amount, current_amount,
-                   goal_category, goal_priority, target_date, start_date, goal_status,
-                   monthly_target, notes,
-                   DATEDIFF(target_date, CURDATE()) as days_remaining,
-                   ROUND((current_amount / target_amount) * 100, 2) as progress_percentage,
-                   ROUND((target_amount - current_amount), 2) as remaining_amount
-            FROM Goals 
-            WHERE user_id = %s
-            ORDER BY goal_priority DESC, target_date ASC
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching goals: {e}")
-        return pd.DataFrame()
-
-def add_goal_contribution(user_id, goal_id, contribution_amount, contribution_date, 
-                         contribution_type, notes):
-    """Add a contribution to a goal"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Convert data types
-        goal_id = int(goal_id)
-        user_id = int(user_id)
-        contribution_amount = float(contribution_amount)
-        
-        # Add contribution record
-        cursor.execute('''
-            INSERT INTO Goal_Contributions (goal_id, user_id, contribution_amount, 
-                                          contribution_date, contribution_type, notes)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (goal_id, user_id, contribution_amount, contribution_date, 
-              contribution_type, notes))
-        
-        # Update goal current amount
-        cursor.execute('''
-            UPDATE Goals 
-            SET current_amount = current_amount + %s
-            WHERE goal_id = %s AND user_id = %s
-        ''', (contribution_amount, goal_id, user_id))
-        
-        # Check if goal is completed
-        cursor.execute('''
-            UPDATE Goals 
-            SET goal_status = 'Completed'
-            WHERE goal_id = %s AND user_id = %s AND current_amount >= target_amount
-        ''', (goal_id, user_id))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-        
-    except Exception as e:
-        st.error(f"Error adding goal contribution: {e}")
-        return False
-
-def get_goal_contributions(user_id, goal_id=None):
-    """Get goal contributions for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        if goal_id:
-            query = '''
-                SELECT gc.contribution_id, gc.contribution_amount, gc.contribution_date,
-                       gc.contribution_type, gc.notes, g.goal_name
-                FROM Goal_Contributions gc
-                JOIN Goals g ON gc.goal_id = g.goal_id
-                WHERE gc.user_id = %s AND gc.goal_id = %s
-                ORDER BY gc.contribution_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id, goal_id))
-        else:
-            query = '''
-                SELECT gc.contribution_id, gc.contribution_amount, gc.contribution_date,
-                       gc.contribution_type, gc.notes, g.goal_name
-                FROM Goal_Contributions gc
-                JOIN Goals g ON gc.goal_id = g.goal_id
-                WHERE gc.user_id = %s
-                ORDER BY gc.contribution_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id,))
-        
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching goal contributions: {e}")
-        return pd.DataFrame()
-
-def update_goal_status(user_id, goal_id, new_status):
-    """Update goal status"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return False
-    
-    try:
-        cursor = connection.cursor()
-        cursor.execute('''
-            UPDATE Goals 
-            SET goal_status = %s
-            WHERE goal_id = %s AND user_id = %s
-        ''', (new_status, goal_id, user_id))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        return True
-        
-    except Exception as e:
-        st.error(f"Error updating goal status: {e}")
-        return False
-
-def calculate_goal_insights(user_id):
-    """Calculate insights about user's goals"""
-    goals_df = get_user_goals(user_id)
-    if goals_df.empty:
-        return None
-    
-    # Calculate insights
-    total_goals = len(goals_df)
-    active_goals = len(goals_df[goals_df['goal_status'] == 'Active'])
-    completed_goals = len(goals_df[goals_df['goal_status'] == 'Completed'])
-    
-    total_target = goals_df['target_amount'].sum()
-    total_current = goals_df['current_amount'].sum()
-    total_progress = (total_current / total_target * 100) if total_target > 0 else 0
-    
-    # Average progress
-    avg_progress = goals_df['progress_percentage'].mean()
-    
-    # Goals by category
-    category_distribution = goals_df.groupby('goal_category')['target_amount'].sum()
-    
-    # Goals by priority
-    priority_distribution = goals_df.groupby('goal_priority')['target_amount'].sum()
-    
-    # Upcoming deadlines (within 30 days)
-    upcoming_deadlines = goals_df[
-        (goals_df['days_remaining'] >= 0) & 
-        (goals_df['days_remaining'] <= 30) & 
-        (goals_df['goal_status'] == 'Active')
-    ]
-    
-    insights = {
-        'total_goals': total_goals,
-        'active_goals': active_goals,
-        'completed_goals': completed_goals,
-        'total_target': total_target,
-        'total_current': total_current,
-        'total_progress': total_progress,
-        'avg_progress': avg_progress,
-        'category_distribution': category_distribution,
-        'priority_distribution': priority_distribution,
-        'upcoming_deadlines': upcoming_deadlines
-    }
-    
-    return insights
-
 def goals_management_page():
     """Display the goals management interface"""
     st.markdown('<h1 class="main-header">🎯 Financial Goals Manager</h1>', unsafe_allow_html=True)
@@ -2464,9 +1373,6 @@ def goals_management_page():
         st.error("User ID not found. Please login again.")
         return
     
-    # Create goals tables if they don't exist
-    create_goals_tables()
-    
     # Get user goals and insights
     goals_df = get_user_goals(user_id)
     insights = calculate_goal_insights(user_id)
@@ -2763,14 +1669,8 @@ def goals_management_page():
             st.markdown("#### 📈 Progress Trends")
             
             # Get contributions over time
-            contributions_df = get_goal_contributions(user_id)
-            if not contributions_df.empty:
-                contributions_df['contribution_date'] = pd.to_datetime(contributions_df['contribution_date'])
-                monthly_contributions = contributions_df.groupby(
-                    contributions_df['contribution_date'].dt.to_period('M')
-                )['contribution_amount'].sum().reset_index()
-                monthly_contributions['contribution_date'] = monthly_contributions['contribution_date'].astype(str)
-                
+            monthly_contributions = get_monthly_contributions(user_id)
+            if not monthly_contributions.empty:
                 fig = px.line(
                     monthly_contributions,
                     x='contribution_date',
@@ -2793,21 +1693,16 @@ def goals_management_page():
             
             # Contribution history
             st.markdown("#### 📋 Recent Contributions")
-            recent_contributions = get_goal_contributions(user_id)
-            if not recent_contributions.empty:
-                st.dataframe(
-                    recent_contributions.head(10),
-                    use_container_width=True,
-                    column_config={
-                        "contribution_amount": st.column_config.NumberColumn("Amount (₹)", format="₹%.2f"),
-                        "contribution_date": st.column_config.DateColumn("Date")
-                    }
-                )
-            else:
-                st.info("No contributions recorded yet. Start contributing to your goals!")
+            render_history_pages('goal_contributions', user_id, 'goal_contribution_history', column_config={
+                "contribution_amount": st.column_config.NumberColumn("Amount (₹)", format="₹%.2f"),
+                "running_total": st.column_config.NumberColumn("Contributed to date (₹)", format="₹%.2f"),
+                "contribution_date": st.column_config.DateColumn("Date")
+            })
 
 def main():
     """Main application function"""
+    # Tables are created once per process here, never by the pages
+    bootstrap_schema()
     # Initialize current page in session state
     if 'current_page' not in st.session_state:
         st.session_state.current_page = "dashboard"
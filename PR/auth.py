@@ -1,5 +1,7 @@
 import streamlit as st
-from database import authenticate_user, register_user, validate_email, validate_phone, check_email_exists, get_next_user_id
+from database import authenticate_user, register_user, validate_email, validate_phone, check_email_exists
+from passwords import login_locked_for
+from session_store import start_session
 
 def login_page():
     """Display login page with signup option"""
@@ -58,12 +60,16 @@ def login_page():
                     submit_button = st.form_submit_button("🚀 Login", use_container_width=True)
 
                 if submit_button:
-                    if email and password:
+                    if email and password and login_locked_for(email.strip().lower()):
+                        minutes = int(login_locked_for(email.strip().lower()) // 60) + 1
+                        st.error(f"Too many failed attempts. Please try again in {minutes} minute(s).")
+                    elif email and password:
                         user = authenticate_user(email, password)
                         if user:
                             st.session_state.authenticated = True
                             st.session_state.user_id = user[0]
                             st.session_state.user_name = user[1]
+                            start_session(user[0], user[1])
                             st.success("Login successful! Welcome back!")
                             st.rerun()
                         else:
@@ -147,8 +153,8 @@ def login_page():
                     elif check_email_exists(email):
                         st.error("Email already exists. Please use a different email or login.")
                     else:
-                        success = register_user(name.strip(), age, email.lower(), password, phone_number)
-                        if success:
+                        new_user_id = register_user(name.strip(), age, email.lower(), password, phone_number)
+                        if new_user_id:
                             st.success("Account created successfully! You can now login.")
                             st.balloons()
 
@@ -160,7 +166,7 @@ def login_page():
                                 st.metric("Phone", phone_number)
                             with col2:
                                 st.metric("Age", age)
-                                st.metric("User ID", get_next_user_id() - 1)
+                                st.metric("User ID", new_user_id)
                                 st.metric("Status", "Active")
 
                             st.info("You can now login with your email and password!")
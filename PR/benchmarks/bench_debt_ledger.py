@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: debt balance lookups from ledger snapshots vs full replay
+
+For each size in EVENT_COUNTS, creates a throwaway debt for an existing user
+and appends that many daily payments plus monthly interest events through
+append_debt_events. It then asks for the balance at random dates two ways:
+last snapshot plus tail (debt_balance_at) and a SUM over every event up to
+the date. Both must agree. Reports median and p99 latency, the longest tail
+replayed, and the cost of appending one payment to a long ledger. The debts
+and their events are deleted at the end.
+
+Usage: python benchmarks/bench_debt_ledger.py
+"""
+
+import sys
+import os
+import time
+import random
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from database import get_mysql_connection
+from schema import bootstrap_schema
+from debt_ledger import append_debt_events, balance_with_tail, LEDGER_SNAPSHOT_EVERY
+
+EVENT_COUNTS = [1000, 5000, 20000]
+LOOKUPS = 200
+APPEND_BATCH = 500
+APPENDS_TIMED = 50
+
+def full_replay(cursor, debt_id, as_of):
+    cursor.execute('SELECT COALESCE(SUM(amount), 0) FROM Debt_Ledger WHERE debt_id = %s AND event_date <= %s',
+                   (debt_id, as_of))
+    return round(float(cursor.fetchone()[0]), 2)
+
+def build_debt(connection, cursor, user_id, payments):
+    """A debt with `payments` daily payments and monthly interest; returns (debt_id, first_date, last_date)"""
+    first = date.today() - timedelta(days=payments)
+    cursor.execute('''
+        INSERT INTO Debts (user_id, debt_name, lender_name, original_amount, current_balance,
+                           interest_rate, start_date)
+        VALUES (%s, 'Ledger benchmark', 'Benchmark', %s, %s, 12, %s)
+    ''', (user_id, payments * 100, payments * 100, first))
+    debt_id = cursor.lastrowid
+    events = [(first, 'Opening', payments * 100, 'opening')]
+    for day in range(1, payments + 1):
+        event_date = first + timedelta(days=day)
+        events.append((event_date, 'Payment', -50, f"payment:{day}"))
+        if event_date.day == 1:
+            events.append((event_date, 'Interest', 25, f"interest:{event_date}"))
+    for start in range(0, len(events), APPEND_BATCH):
+        append_debt_events(cursor, debt_id, user_id, events[start:start + APPEND_BATCH])
+        connection.commit()
+    return debt_id, first, first + timedelta(days=payments)
+
+def time_lookups(cursor, debt_id, dates, lookup):
+    timings = []
+    for as_of in dates:
+        started = time.perf_counter()
+        lookup(cursor, debt_id, as_of)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.array(timings)
+
+def main():
+    """Run the benchmark"""
+    if not bootstrap_schema():
+        return
+    connection = get_mysql_connection()
+    if connection is None:
+        return
+    cursor = connection.cursor()
+    cursor.execute('SELECT MIN(user_id) FROM Users')
+    user_id = cursor.fetchone()[0]
+    if user_id is None:
+        print("No users to attach benchmark debts to")
+        return
+
+    rng = random.Random(42)
+    debt_ids = []
+    print(f"Snapshot every {LEDGER_SNAPSHOT_EVERY} events, {LOOKUPS} lookups per size")
+    print(f"{'events':>8}{'snap p50':>10}{'snap p99':>10}{'max tail':>10}{'full p50':>10}{'full p99':>10}{'append':>10}")
+    try:
+        for payments in EVENT_COUNTS:
+            debt_id, first, last = build_debt(connection, cursor, user_id, payments)
+            debt_ids.append(debt_id)
+            dates = [first + timedelta(days=rng.randint(0, (last - first).days)) for _ in range(LOOKUPS)]
+
+            tails = [balance_with_tail(cursor, debt_id, as_of)[1] for as_of in dates]
+            mismatches = sum(balance_with_tail(cursor, debt_id, as_of)[0] != full_replay(cursor, debt_id, as_of)
+                             for as_of in dates)
+            snapshot_ms = time_lookups(cursor, debt_id, dates, balance_with_tail)
+            replay_ms = time_lookups(cursor, debt_id, dates, full_replay)
+
+            append_ms = []
+            for i in range(APPENDS_TIMED):
+                started = time.perf_counter()
+                append_debt_events(cursor, debt_id, user_id, [(last, 'Payment', -1, f"bench-append:{i}")])
+                connection.commit()
+                append_ms.append((time.perf_counter() - started) * 1000)
+
+            cursor.execute('SELECT COUNT(*) FROM Debt_Ledger WHERE debt_id = %s', (debt_id,))
+            events = cursor.fetchone()[0]
+            print(f"{events:>8}{np.percentile(snapshot_ms, 50):>10.2f}{np.percentile(snapshot_ms, 99):>10.2f}"
+                  f"{max(tails):>10}{np.percentile(replay_ms, 50):>10.2f}{np.percentile(replay_ms, 99):>10.2f}"
+                  f"{np.median(append_ms):>10.2f}")
+            if mismatches:
+                print(f"  ❌ {mismatches} lookups disagree with the full replay")
+    finally:
+        for debt_id in debt_ids:
+            for table in ['Debt_Balance_Snapshots', 'Debt_Ledger', 'Debts']:
+                cursor.execute(f'DELETE FROM {table} WHERE debt_id = %s', (debt_id,))
+        connection.commit()
+        cursor.close()
+        connection.close()
+        print(f"\n🧹 Removed {len(debt_ids)} benchmark debts")
+
+if __name__ == "__main__":
+    main()
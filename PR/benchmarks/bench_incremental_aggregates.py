@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of one transaction edit on cached aggregates
+
+For users with 1k to 1M transactions, compares re-aggregating everything
+(what a cache invalidation costs on the next page load) with carrying the
+cached summary, category, monthly and analytics results forward through
+transaction_deltas. The delta cost should stay flat as the history grows.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cache import cached_aggregate, clear_aggregate_cache, _aggregate_cache
+from transaction_deltas import apply_transaction_changes
+
+USER_ID = 1
+REPEATS = 20
+
+def make_transactions(rows, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D'),
+        'Mode': rng.choice(['UPI', 'Cash', 'Debit Card', 'Credit Card'], rows),
+        'Category': rng.choice(['Food', 'Rent', 'Travel', 'Salary', 'Grocery', 'Other'], rows),
+        'Amount': rng.integers(10, 5000, rows).astype('float64'),
+        'income_expense': rng.choice(['Income', 'Expense'], rows, p=[0.3, 0.7]),
+        'Currency': 'INR'
+    })
+
+def aggregate(df):
+    """Pandas equivalent of the SQL aggregates the pages cache"""
+    expense = df['income_expense'] == 'Expense'
+    amount_expense = df['Amount'].where(expense, 0.0)
+    amount_income = df['Amount'].where(~expense, 0.0)
+    month = df['Date'].dt.strftime('%Y-%m')
+    summary = {
+        'total_income': float(amount_income.sum()),
+        'total_expenses': float(amount_expense.sum()),
+        'net_balance': float(amount_income.sum() - amount_expense.sum()),
+        'transaction_count': len(df)
+    }
+    categories = (df[expense].groupby('Category')['Amount'].sum().sort_values(ascending=False)
+                  .rename('TotalAmount').reset_index())
+    trends = df.groupby([month.rename('Month'), 'income_expense'])['Amount'].sum().rename('TotalAmount').reset_index()
+    daily = pd.DataFrame({
+        'DailyExpense': amount_expense, 'DailyIncome': amount_income,
+        'ExpenseCount': expense.astype('int64'), 'IncomeCount': (~expense).astype('int64')
+    }).groupby(df['Date'].rename('Day')).sum().reset_index()
+    category_trends = (df[expense].groupby(['Category', month[expense].rename('Month')])['Amount']
+                       .agg(TotalAmount='sum', TransactionCount='count').reset_index())
+    payments = df.groupby('Mode')['Amount'].agg(TransactionCount='count', TotalAmount='sum', AvgAmount='mean',
+                                                MinAmount='min', MaxAmount='max').reset_index()
+    weekday = (df['Date'].dt.dayofweek + 1) % 7 + 1
+    weekly = pd.DataFrame({'WeeklyExpense': amount_expense, 'ExpenseCount': expense.astype('int64')}).groupby(weekday.rename('DayOfWeek')).sum().reset_index()
+    weekly.insert(1, 'DayName', weekly['DayOfWeek'].map(dict(enumerate(['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'], 1))))
+    ratio = pd.DataFrame({'TotalIncome': amount_income, 'TotalExpense': amount_expense}).groupby(month.rename('Month')).sum().reset_index()
+    ratio['NetAmount'] = ratio['TotalIncome'] - ratio['TotalExpense']
+    analytics = {'daily_data': daily, 'category_trends': category_trends, 'payment_analysis': payments,
+                 'weekly_patterns': weekly, 'monthly_ratio': ratio}
+    return summary, categories, trends, analytics
+
+def seed_cache(df, version):
+    summary, categories, trends, analytics = aggregate(df)
+    for name, result in [('summary', summary), ('categories', categories),
+                         ('monthly_trends', trends), ('advanced_analytics', analytics)]:
+        cached_aggregate((name, USER_ID, 'INR'), version, lambda result=result: result)
+
+def main():
+    """Run the benchmark"""
+    print(f"{'Transactions':>12} {'Recompute':>12} {'Delta edit':>12} {'Ratio':>8}")
+    print("-" * 48)
+    for rows in [1_000, 10_000, 100_000, 1_000_000]:
+        df = make_transactions(rows)
+
+        started = time.perf_counter()
+        aggregate(df)
+        recompute = time.perf_counter() - started
+
+        clear_aggregate_cache()
+        seed_cache(df, 0)
+        delta_times = []
+        for version in range(REPEATS):
+            old = df.iloc[version].to_dict()
+            new = dict(old, Amount=old['Amount'] + 1, Category='Travel')
+            started = time.perf_counter()
+            apply_transaction_changes(USER_ID, (version, version + 1), [old], [new])
+            delta_times.append(time.perf_counter() - started)
+            df.iloc[version, df.columns.get_loc('Amount')] = new['Amount']
+            df.iloc[version, df.columns.get_loc('Category')] = 'Travel'
+        delta = float(np.median(delta_times))
+
+        kept = sum(1 for key in _aggregate_cache if key[1] == USER_ID)
+        summary = _aggregate_cache[('summary', USER_ID, 'INR')][2]
+        assert np.isclose(summary['total_expenses'] + summary['total_income'], df['Amount'].sum())
+        print(f"{rows:>12,} {recompute * 1000:>10.1f}ms {delta * 1000:>10.2f}ms {recompute / delta:>7.0f}x"
+              f"  ({kept}/4 aggregates updated in place)")
+
+if __name__ == "__main__":
+    main()
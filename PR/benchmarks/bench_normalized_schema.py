@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: label-per-row Data_Legacy vs the Data view over integer-keyed Transactions
+
+Run after `python migrations.py normalize`. Compares on-disk size of the two
+tables (information_schema, after ANALYZE TABLE), then times the per-user
+queries the app runs (database.py's transaction listing, summary, category
+and monthly loaders, with their FX joins) through the Data view against the
+same queries on Data_Legacy, for a sample of users from light to heavy.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_mysql_connection, BASE_CURRENCY, FX_JOIN_SQL, BASE_AMOUNT_SQL
+
+REPEATS = 5
+
+# Users timed: evenly spaced through the users ordered by transaction count
+SAMPLE_USERS = 20
+
+# The app's queries with the table left open; the FX queries take (base currency, user id)
+APP_QUERIES = {
+    'transaction list': ('''
+        SELECT Date, Mode, Category, Amount, income_expense, Currency
+        FROM {table}
+        WHERE id = %s
+        ORDER BY Date DESC
+    ''', False),
+    'summary totals': (f'''
+        SELECT income_expense, COALESCE(SUM({BASE_AMOUNT_SQL}), 0), COUNT(*)
+        FROM {{table}} {FX_JOIN_SQL}
+        WHERE id = %s
+        GROUP BY income_expense
+    ''', True),
+    'category totals': (f'''
+        SELECT Category, SUM({BASE_AMOUNT_SQL}) as TotalAmount
+        FROM {{table}} {FX_JOIN_SQL}
+        WHERE id = %s AND income_expense = 'Expense'
+        GROUP BY Category
+        ORDER BY TotalAmount DESC
+    ''', True),
+    'monthly trends': (f'''
+        SELECT DATE_FORMAT(Date, '%Y-%m') as Month, income_expense, SUM({BASE_AMOUNT_SQL}) as TotalAmount
+        FROM {{table}} {FX_JOIN_SQL}
+        WHERE id = %s
+        GROUP BY DATE_FORMAT(Date, '%Y-%m'), income_expense
+        ORDER BY Month
+    ''', True)
+}
+
+def table_size(cursor, table):
+    """(rows, data bytes, index bytes) as reported by InnoDB"""
+    cursor.execute(f'ANALYZE TABLE {table}')
+    cursor.fetchall()
+    cursor.execute('''
+        SELECT TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    return cursor.fetchone()
+
+def sample_users(cursor):
+    """SAMPLE_USERS (user id, transactions) pairs spread from the lightest to the heaviest user"""
+    cursor.execute('SELECT id, COUNT(*) AS n FROM Transactions GROUP BY id ORDER BY n, id')
+    users = cursor.fetchall()
+    step = max(len(users) / SAMPLE_USERS, 1)
+    return [users[int(i * step)] for i in range(min(SAMPLE_USERS, len(users)))]
+
+def time_query(cursor, query, params):
+    """Best-of-REPEATS wall time and the sorted result"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best, sorted((tuple(str(v) for v in row) for row in rows))
+
+def main():
+    """Run the benchmark"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return
+    cursor = connection.cursor()
+
+    cursor.execute("SHOW TABLES LIKE 'Data_Legacy'")
+    if not cursor.fetchall():
+        print("❌ Data_Legacy not found - run `python migrations.py normalize` first")
+        return
+
+    print(f"{'Table':<16} {'Rows':>10} {'Data':>12} {'Index':>12} {'Bytes/row':>10}")
+    print("-" * 64)
+    for table in ['Data_Legacy', 'Transactions']:
+        rows, data_bytes, index_bytes = table_size(cursor, table)
+        print(f"{table:<16} {rows:>10,} {data_bytes:>12,} {index_bytes:>12,} "
+              f"{(data_bytes + index_bytes) / max(rows, 1):>10.1f}")
+
+    users = sample_users(cursor)
+    print(f"\nPer-user queries, summed over {len(users)} users "
+          f"({users[0][1] if users else 0:,} to {users[-1][1] if users else 0:,} transactions each)")
+    print(f"{'Query':<18} {'Legacy':>10} {'Data view':>11} {'Speedup':>9}")
+    print("-" * 51)
+    for name, (query, fx) in APP_QUERIES.items():
+        legacy_time = view_time = 0.0
+        for user_id, _ in users:
+            params = (BASE_CURRENCY, user_id) if fx else (user_id,)
+            legacy_seconds, legacy_rows = time_query(cursor, query.format(table='Data_Legacy'), params)
+            view_seconds, view_rows = time_query(cursor, query.format(table='Data'), params)
+            assert legacy_rows == view_rows, f"{name} results differ for user {user_id}"
+            legacy_time += legacy_seconds
+            view_time += view_seconds
+        print(f"{name:<18} {legacy_time * 1000:>8.1f}ms {view_time * 1000:>9.1f}ms "
+              f"{legacy_time / max(view_time, 1e-9):>8.2f}x")
+
+    print("\n✅ Both schemas return the same results for every sampled user")
+    cursor.close()
+    connection.close()
+
+if __name__ == "__main__":
+    main()
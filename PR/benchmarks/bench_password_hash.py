@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: password hash cost against the login latency target
+
+Times verify_password for a range of PBKDF2 iteration counts and scrypt N
+values, with LOGIN_CONCURRENCY logins hashing at once (hashlib releases the
+GIL, so concurrent logins share the CPU cores). Reports p50/p99 per setting and
+recommends the highest cost whose p99 stays within the target.
+
+Usage: python benchmarks/bench_password_hash.py [p99_target_ms] [concurrency]
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from passwords import hash_password, verify_password
+
+# Login p99 budget for the password check alone (the user lookup is one index probe)
+LOGIN_P99_TARGET_MS = 250
+
+# Logins arriving at the same moment
+LOGIN_CONCURRENCY = 4
+
+SAMPLES = 40
+
+CANDIDATES = (
+    [('pbkdf2_sha256', (iterations,)) for iterations in (50000, 100000, 200000, 400000, 600000, 1000000)] +
+    [('scrypt', (n, 8, 1)) for n in (2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16)]
+)
+
+def time_logins(stored, concurrency):
+    """Latency in ms of SAMPLES verifications run concurrency at a time"""
+    def one_login(_):
+        started = time.perf_counter()
+        verify_password('correct horse battery staple', stored)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return np.array(list(pool.map(one_login, range(SAMPLES))))
+
+def main():
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else LOGIN_P99_TARGET_MS
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else LOGIN_CONCURRENCY
+    print(f"Login p99 target {target:.0f} ms with {concurrency} concurrent logins, {SAMPLES} samples each")
+    print(f"{'algorithm':<15}{'cost':>20}{'p50 ms':>10}{'p99 ms':>10}  within target")
+
+    best = {}
+    for algorithm, params in CANDIDATES:
+        stored = hash_password('correct horse battery staple', algorithm, params)
+        latencies = time_logins(stored, concurrency)
+        p50, p99 = np.percentile(latencies, 50), np.percentile(latencies, 99)
+        ok = p99 <= target
+        if ok:
+            best[algorithm] = params
+        print(f"{algorithm:<15}{'/'.join(map(str, params)):>20}{p50:>10.1f}{p99:>10.1f}  {'yes' if ok else 'no'}")
+
+    print()
+    if 'pbkdf2_sha256' in best:
+        print(f"Recommended: DABBA_PASSWORD_HASH=pbkdf2_sha256 DABBA_PBKDF2_ITERATIONS={best['pbkdf2_sha256'][0]}")
+    if 'scrypt' in best:
+        print(f"Recommended: DABBA_PASSWORD_HASH=scrypt DABBA_SCRYPT_N={best['scrypt'][0]}")
+    if not best:
+        print("No candidate meets the target; lower the concurrency or raise the target")
+
+if __name__ == "__main__":
+    main()
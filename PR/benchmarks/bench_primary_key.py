@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Transactions before and after `python migrations.py primary_key`
+
+Runs the per-user dashboard and analytics query shapes against the keyless
+Transactions_Old and the rebuilt Transactions (clustered on id, Date, txn_id)
+for the users with the most rows, and shows which partitions a date-bounded
+query touches.
+"""
+
+import sys
+import os
+import time
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_mysql_connection
+
+SAMPLE_USERS = 50
+REPEATS = 3
+
+QUERIES = {
+    'history (get_user_data)': '''
+        SELECT Date, mode_id, category_id, Amount, type_id, currency_id
+        FROM {table} WHERE id = %s ORDER BY Date DESC
+    ''',
+    'summary': '''
+        SELECT type_id, SUM(Amount), COUNT(*) FROM {table} WHERE id = %s GROUP BY type_id
+    ''',
+    'monthly trends': '''
+        SELECT DATE_FORMAT(Date, '%Y-%m'), type_id, SUM(Amount)
+        FROM {table} WHERE id = %s GROUP BY DATE_FORMAT(Date, '%Y-%m'), type_id
+    ''',
+    'daily analytics': '''
+        SELECT Date, SUM(Amount), COUNT(*) FROM {table} WHERE id = %s GROUP BY Date ORDER BY Date
+    ''',
+    'last 12 months': '''
+        SELECT category_id, SUM(Amount) FROM {table}
+        WHERE id = %s AND Date >= %s GROUP BY category_id
+    '''
+}
+
+def run_query(cursor, query, user_id, since):
+    params = (user_id, since) if query.count('%s') == 2 else (user_id,)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def time_table(cursor, table, user_ids, since):
+    """Best-of-REPEATS total time per query shape over all sampled users"""
+    timings = {}
+    for name, template in QUERIES.items():
+        query = template.format(table=table)
+        best = float('inf')
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            for user_id in user_ids:
+                run_query(cursor, query, user_id, since)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+    return timings
+
+def main():
+    """Run the benchmark"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return
+    cursor = connection.cursor()
+
+    cursor.execute("SHOW TABLES LIKE 'Transactions_Old'")
+    if not cursor.fetchall():
+        print("❌ Transactions_Old not found - run `python migrations.py primary_key` first")
+        return
+
+    cursor.execute(f'''
+        SELECT id FROM Transactions GROUP BY id ORDER BY COUNT(*) DESC LIMIT {SAMPLE_USERS}
+    ''')
+    user_ids = [row[0] for row in cursor.fetchall()]
+    since = date.today() - timedelta(days=365)
+
+    before = time_table(cursor, 'Transactions_Old', user_ids, since)
+    after = time_table(cursor, 'Transactions', user_ids, since)
+
+    print(f"{len(user_ids)} heaviest users, best of {REPEATS}\n")
+    print(f"{'Query':<26} {'Before':>10} {'After':>10} {'Speedup':>9}")
+    print("-" * 58)
+    for name in QUERIES:
+        print(f"{name:<26} {before[name] * 1000:>8.1f}ms {after[name] * 1000:>8.1f}ms "
+              f"{before[name] / after[name]:>8.2f}x")
+
+    # MariaDB (XAMPP) syntax; MySQL 8 reports partitions in plain EXPLAIN
+    cursor.execute('EXPLAIN PARTITIONS ' + QUERIES['last 12 months'].format(table='Transactions'),
+                   (user_ids[0], since))
+    columns = [column[0] for column in cursor.description]
+    plan = dict(zip(columns, cursor.fetchone()))
+    print(f"\nPartitions read by 'last 12 months': {plan.get('partitions') or 'not partitioned'}")
+
+    cursor.close()
+    connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recurring transaction detection on large histories
+
+For users with 10k to 1M transactions, times a full scan (what the
+migration backfill and a rescan cost) against extending the stored states
+with a new batch of transactions (what each insert costs). The incremental
+cost should stay flat as the history grows.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from recurring import transaction_frame, pattern_states, merge_pattern_states, classify_patterns
+
+ROW_COUNTS = [10000, 100000, 1000000]
+NEW_ROWS = [1, 100]
+REPEATS = 5
+
+def make_transactions(rows, seed=8):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': 1,
+        'Date': pd.Timestamp('2000-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 9000, rows)), unit='D'),
+        'Mode': rng.choice(['UPI', 'Cash', 'Debit Card', 'Credit Card', 'Bank Transfer'], rows),
+        'Category': rng.choice(['Food', 'Rent', 'Travel', 'Recharge', 'Metro', 'Grocery', 'Transfer'], rows),
+        'Amount': np.round(rng.lognormal(6, 1.5, rows)),
+        'income_expense': rng.choice(['Income', 'Expense'], rows, p=[0.2, 0.8])
+    })
+
+def best_of(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+def main():
+    print(f"{'rows':>10} {'groups':>8} {'full scan':>12} " + " ".join(f"{f'+{n} rows':>12}" for n in NEW_ROWS))
+    for rows in ROW_COUNTS:
+        history = make_transactions(rows)
+        full_ms, states = best_of(lambda: classify_patterns(pattern_states(transaction_frame(history))))
+        stored = pattern_states(transaction_frame(history))
+        last_day = history['Date'].max()
+
+        incremental = []
+        for count in NEW_ROWS:
+            new_rows = make_transactions(count, seed=count).assign(Date=last_day + pd.Timedelta(days=1))
+            ms, _ = best_of(lambda: classify_patterns(
+                merge_pattern_states(stored, pattern_states(transaction_frame(new_rows)))[0]))
+            incremental.append(ms)
+
+        print(f"{rows:>10,} {len(states):>8,} {full_ms:>10.1f}ms " + " ".join(f"{ms:>10.1f}ms" for ms in incremental))
+
+if __name__ == "__main__":
+    main()
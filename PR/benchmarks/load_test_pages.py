@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Load test: simulated users clicking through the app's pages on one node
+
+A Streamlit node serves every browser session as a thread of one process, so
+each simulated user here is a thread with its own headless AppTest session.
+Users are logged in as random ids from Data. Each one repeatedly opens a page
+from main_app (dashboard, transactions, analytics, debts, goals, assistant),
+waits for the full script run, then thinks for an exponentially distributed
+pause. The assistant page also sends a question. Its LLM call is replaced by
+a canned reply, so no API key or network is needed.
+
+Reports throughput, latency percentiles per page, MySQL connections opened
+(counted client-side, and server-side when SHOW GLOBAL STATUS is readable),
+and process memory growth and session-state size per session. AppTest
+checks for script completion every 100 ms, so page latencies have a ~100 ms
+floor; compare runs with each other rather than with browser timings.
+
+Usage: python benchmarks/load_test_pages.py [users] [duration_seconds] [think_time_seconds]
+"""
+
+import sys
+import os
+import time
+import random
+import pickle
+import threading
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import mysql.connector
+from streamlit.testing.v1 import AppTest
+
+USERS = 10
+DURATION = 60
+THINK_TIME_SECONDS = 2.0
+SCRIPT_TIMEOUT = 60
+
+# Relative frequency of page visits
+PAGE_WEIGHTS = {
+    'dashboard': 4,
+    'transactions': 2,
+    'analytics': 2,
+    'debts': 1,
+    'goals': 1,
+    'assistant': 1
+}
+
+ASSISTANT_QUESTION = "How can I cut my food spending next month?"
+
+def page_script():
+    """Runs as the AppTest script: dispatch to the page named in session state"""
+    import streamlit as st
+    import chatbot
+    from main_app import (dashboard, transaction_page, advanced_analytics_page, debt_tracker_page,
+                          goals_management_page, chatbot_page)
+
+    chatbot.call_grok_api = lambda user_query, context_data: "Here is a stubbed assistant reply for load testing."
+    pages = {
+        'dashboard': dashboard,
+        'transactions': transaction_page,
+        'analytics': advanced_analytics_page,
+        'debts': debt_tracker_page,
+        'goals': goals_management_page,
+        'assistant': chatbot_page
+    }
+    pages[st.session_state.load_test_page]()
+
+_connections_opened = 0
+_connections_lock = threading.Lock()
+_real_connect = mysql.connector.connect
+
+def _counting_connect(*args, **kwargs):
+    """mysql.connector.connect that also counts the attempt"""
+    global _connections_opened
+    with _connections_lock:
+        _connections_opened += 1
+    return _real_connect(*args, **kwargs)
+
+def server_status(names):
+    """{name: value} from SHOW GLOBAL STATUS, or None when MySQL is unreachable"""
+    try:
+        connection = _real_connect(host='localhost', port=3307, database='dabba', user='root', password='')
+    except mysql.connector.Error:
+        return None
+    cursor = connection.cursor()
+    placeholders = ', '.join(['%s'] * len(names))
+    cursor.execute(f'SHOW GLOBAL STATUS WHERE Variable_name IN ({placeholders})', names)
+    status = {name: int(value) for name, value in cursor.fetchall()}
+    cursor.close()
+    connection.close()
+    return status
+
+def pick_user_ids(count):
+    try:
+        connection = _real_connect(host='localhost', port=3307, database='dabba', user='root', password='')
+        cursor = connection.cursor()
+        cursor.execute('SELECT DISTINCT id FROM Data LIMIT 1000')
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        connection.close()
+    except mysql.connector.Error:
+        ids = []
+    return [random.choice(ids) if ids else 1 for _ in range(count)]
+
+def rss_bytes():
+    """Current resident set size of this process"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def simulated_user(user_id, seed, deadline, think_time, results, session_sizes):
+    rng = random.Random(seed)
+    sessions = {}
+    names, weights = list(PAGE_WEIGHTS), list(PAGE_WEIGHTS.values())
+    while time.monotonic() < deadline:
+        page = rng.choices(names, weights)[0]
+        app = sessions.get(page)
+        if app is None:
+            app = sessions[page] = AppTest.from_function(page_script, default_timeout=SCRIPT_TIMEOUT)
+            app.session_state['authenticated'] = True
+            app.session_state['user_id'] = user_id
+            app.session_state['user_name'] = f"Load test {user_id}"
+            app.session_state['load_test_page'] = page
+
+        started = time.perf_counter()
+        try:
+            app.run()
+            if page == 'assistant' and app.text_input:
+                app.text_input(key='user_input').set_value(ASSISTANT_QUESTION)
+                app.button(key='send_button').click().run()
+            failed = bool(app.exception)
+        except RuntimeError:
+            # Script run timed out
+            failed = True
+        results.append((page, time.perf_counter() - started, failed))
+        time.sleep(rng.expovariate(1 / think_time) if think_time > 0 else 0)
+
+    session_sizes.append(sum(
+        len(pickle.dumps(app.session_state.filtered_state, protocol=pickle.HIGHEST_PROTOCOL))
+        for app in sessions.values()
+    ))
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    duration = int(sys.argv[2]) if len(sys.argv) > 2 else DURATION
+    think_time = float(sys.argv[3]) if len(sys.argv) > 3 else THINK_TIME_SECONDS
+
+    mysql.connector.connect = _counting_connect
+    user_ids = pick_user_ids(users)
+    status_before = server_status(['Connections', 'Questions'])
+    rss_before = rss_bytes()
+
+    results, session_sizes = [], []
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=simulated_user, args=(user_id, seed, deadline, think_time, results, session_sizes))
+               for seed, user_id in enumerate(user_ids)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_after = rss_bytes()
+    status_after = server_status(['Connections', 'Questions', 'Max_used_connections'])
+
+    print(f"{users} users for {duration}s with {think_time:.1f}s mean think time")
+    print(f"Page views: {len(results)} ({len(results) / elapsed:.1f}/s), "
+          f"{sum(failed for _, _, failed in results)} with exceptions")
+    print(f"\n{'page':<14}{'views':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    by_page = defaultdict(list)
+    for page, seconds, _ in results:
+        by_page[page].append(seconds * 1000)
+    for page in PAGE_WEIGHTS:
+        if by_page[page]:
+            latencies = np.array(by_page[page])
+            print(f"{page:<14}{len(latencies):>7}{np.percentile(latencies, 50):>10.1f}"
+                  f"{np.percentile(latencies, 95):>10.1f}{np.percentile(latencies, 99):>10.1f}")
+
+    print(f"\nMySQL connections opened: {_connections_opened} ({_connections_opened / max(len(results), 1):.1f} per page view)")
+    if status_before and status_after:
+        print(f"Server side: {status_after['Connections'] - status_before['Connections']} connections, "
+              f"{status_after['Questions'] - status_before['Questions']} statements, "
+              f"max {status_after['Max_used_connections']} connections in use")
+    else:
+        print("Server side: MySQL status unavailable")
+    print(f"Memory: process RSS +{(rss_after - rss_before) / 2 ** 20:.1f} MiB, "
+          f"{(rss_after - rss_before) / users / 2 ** 20:.2f} MiB per session; "
+          f"session state {np.mean(session_sizes) / 1024:.1f} KiB per session")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load test: N worker processes against one MySQL instance
+
+Each worker plays a Streamlit process behind a load balancer. For DURATION
+seconds it picks random users and either renders their dashboard aggregates
+(summary, categories, monthly trends) or, with probability WRITE_FRACTION,
+saves a transaction for them. Because users are picked at random, they hop
+between workers the way they would behind a round-robin balancer.
+
+The run is done twice, once with per-process caches only and once with the
+shared SQLite tier (DABBA_SHARED_CACHE). It reports requests/sec, latency
+percentiles, MySQL statements per request (from SHOW GLOBAL STATUS) and
+shared-cache hit rates. It then checks that every worker agrees with MySQL
+on each written user's transaction count, i.e. that no worker served a
+stale aggregate after a write once versions had propagated.
+
+Rows written by the test use the category LOAD_TEST_CATEGORY and are deleted
+at the end.
+
+Usage: python benchmarks/load_test_workers.py [workers] [duration_seconds]
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+import multiprocessing
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+WORKERS = 4
+DURATION = 20
+WRITE_FRACTION = 0.05
+USERS_SAMPLED = 200
+LOAD_TEST_CATEGORY = 'LoadTest'
+
+def mysql_statements():
+    from database import get_mysql_connection
+    connection = get_mysql_connection()
+    cursor = connection.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    questions = int(cursor.fetchone()[1])
+    cursor.close()
+    connection.close()
+    return questions
+
+def pick_users():
+    from database import get_mysql_connection
+    connection = get_mysql_connection()
+    cursor = connection.cursor()
+    cursor.execute('SELECT DISTINCT id FROM Data LIMIT %s', (USERS_SAMPLED,))
+    users = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    connection.close()
+    return users
+
+def worker(shared_path, users, duration, seed, results):
+    """One simulated app process; env is set before the data layer is imported"""
+    if shared_path:
+        os.environ['DABBA_SHARED_CACHE'] = shared_path
+    from database import get_user_summary, get_category_data, get_monthly_trends, insert_transaction
+    from shared_cache import get_shared_cache_metrics
+
+    rng = random.Random(seed)
+    reads, writes, written = [], [], set()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        user_id = rng.choice(users)
+        started = time.perf_counter()
+        if rng.random() < WRITE_FRACTION:
+            insert_transaction(user_id, date.today(), 'UPI', LOAD_TEST_CATEGORY, rng.randint(10, 500), 'Expense', 'INR')
+            writes.append(time.perf_counter() - started)
+            written.add(user_id)
+        else:
+            get_user_summary(user_id)
+            get_category_data(user_id)
+            get_monthly_trends(user_id)
+            reads.append(time.perf_counter() - started)
+    results.put((reads, writes, written, get_shared_cache_metrics()))
+
+def check_worker(shared_path, users, results):
+    """Transaction counts as this worker's cache tiers report them"""
+    if shared_path:
+        os.environ['DABBA_SHARED_CACHE'] = shared_path
+    from database import get_user_summary
+    results.put({user_id: get_user_summary(user_id).get('transaction_count') for user_id in users})
+
+def run_phase(label, shared_path, users, workers, duration):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    statements_before = mysql_statements()
+    processes = [context.Process(target=worker, args=(shared_path, users, duration, seed, results))
+                 for seed in range(workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    statements = mysql_statements() - statements_before
+
+    reads = np.array([t for outcome in outcomes for t in outcome[0]]) * 1000
+    writes = np.array([t for outcome in outcomes for t in outcome[1]]) * 1000
+    requests = len(reads) + len(writes)
+    print(f"\n{label} ({workers} workers, {duration}s)")
+    print(f"  throughput      {requests / elapsed:10.1f} requests/s ({len(writes)} writes)")
+    print(f"  read  p50/p99   {np.percentile(reads, 50):8.1f} / {np.percentile(reads, 99):8.1f} ms")
+    if len(writes):
+        print(f"  write p50/p99   {np.percentile(writes, 50):8.1f} / {np.percentile(writes, 99):8.1f} ms")
+    print(f"  MySQL statements/request {statements / max(requests, 1):6.2f}")
+    metrics = [outcome[3] for outcome in outcomes if outcome[3]]
+    if metrics:
+        hits = sum(m['hits'] for m in metrics)
+        misses = sum(m['misses'] for m in metrics)
+        print(f"  shared tier hit rate {hits / max(hits + misses, 1):6.1%} ({hits} hits, {misses} misses)")
+    return set().union(*(outcome[2] for outcome in outcomes))
+
+def check_consistency(shared_path, users, workers):
+    """Every worker must report what MySQL holds once version reads have expired"""
+    from database import DATA_VERSION_TTL_SECONDS
+    time.sleep(DATA_VERSION_TTL_SECONDS + 0.5)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    check_worker(None, users, results)  # this process has no cache yet: straight from MySQL
+    expected = results.get()
+    processes = [context.Process(target=check_worker, args=(shared_path, users, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    reported = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    stale = sum(counts != expected for counts in reported)
+    print(f"  consistency: {workers - stale}/{workers} workers match MySQL for {len(users)} written users")
+
+def clean_up():
+    from database import get_mysql_connection, is_schema_normalized, bump_data_version
+    connection = get_mysql_connection()
+    cursor = connection.cursor()
+    if is_schema_normalized(cursor):
+        cursor.execute('''
+            DELETE t FROM Transactions t JOIN Categories c ON c.id = t.category_id WHERE c.name = %s
+        ''', (LOAD_TEST_CATEGORY,))
+    else:
+        cursor.execute('DELETE FROM Data WHERE Category = %s', (LOAD_TEST_CATEGORY,))
+    deleted = cursor.rowcount
+    bump_data_version(cursor)
+    connection.commit()
+    cursor.close()
+    connection.close()
+    print(f"\n🧹 Removed {deleted} load-test rows")
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    duration = int(sys.argv[2]) if len(sys.argv) > 2 else DURATION
+    users = pick_users()
+    if not users:
+        print("No users with transactions to load test")
+        return
+
+    try:
+        run_phase("Per-process caches only", None, users, workers, duration)
+        with tempfile.TemporaryDirectory() as base_dir:
+            shared_path = os.path.join(base_dir, 'shared_cache.db')
+            written = run_phase("With shared cache tier", shared_path, users, workers, duration)
+            if written:
+                check_consistency(shared_path, sorted(written), workers)
+    finally:
+        clean_up()
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 import streamlit as st
 import pandas as pd
 import requests
-from database import get_user_summary, get_mysql_connection
+from database import get_user_summary, get_mysql_connection, fetch_typed_frame, get_data_version, BASE_CURRENCY, BASE_AMOUNT_SQL, FX_JOIN_SQL
+from aggregate_cache import cached_aggregate
 from mysql.connector import Error
 
 # Grok AI API Configuration
 GROK_API_KEY = st.secrets.get("GROK_API_KEY", "your-grok-api-key-here")
 GROK_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Result dtypes for the chatbot context queries
+CHATBOT_DTYPES = {
+    'Date': 'datetime64[ns]',
+    'Amount': 'float64',
+    'TotalAmount': 'float64',
+    'TransactionCount': 'int64'
+}
+
 def call_grok_api(user_query, context_data):
     """Call Grok AI API with user query and context data"""
     try:
@@ -72,8 +81,12 @@ def call_grok_api(user_query, context_data):
         st.error(f"Error calling Grok API: {e}")
         return "I'm sorry, I'm experiencing technical difficulties. Please try again later."
 
-def get_analytics_data_for_chatbot(user_id):
-    """Get comprehensive analytics data for the chatbot"""
+def get_analytics_data_for_chatbot(user_id, base_currency=BASE_CURRENCY):
+    """Get comprehensive analytics data for the chatbot, in base_currency"""
+    return cached_aggregate(('chatbot_analytics', user_id, base_currency), get_data_version(user_id),
+                            lambda: _load_analytics_data_for_chatbot(user_id, base_currency))
+
+def _load_analytics_data_for_chatbot(user_id, base_currency):
     connection = get_mysql_connection()
     if connection is None:
         return {}
@@ -82,47 +95,43 @@ def get_analytics_data_for_chatbot(user_id):
         cursor = connection.cursor()
         
         # Category breakdown
-        cursor.execute('''
-            SELECT Category, SUM(Amount) as TotalAmount, COUNT(*) as TransactionCount
-            FROM Data 
+        category_data = fetch_typed_frame(cursor, f'''
+            SELECT Category, SUM({BASE_AMOUNT_SQL}) as TotalAmount, COUNT(*) as TransactionCount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s AND income_expense = 'Expense'
             GROUP BY Category
             ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        category_data = pd.DataFrame(cursor.fetchall(), columns=['Category', 'TotalAmount', 'TransactionCount'])
+        ''', (base_currency, user_id), ['Category', 'TotalAmount', 'TransactionCount'], CHATBOT_DTYPES)
         
         # Monthly trends
-        cursor.execute('''
+        monthly_data = fetch_typed_frame(cursor, f'''
             SELECT 
                 DATE_FORMAT(Date, '%Y-%m') as Month,
                 income_expense,
-                SUM(Amount) as TotalAmount
-            FROM Data 
+                SUM({BASE_AMOUNT_SQL}) as TotalAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY DATE_FORMAT(Date, '%Y-%m'), income_expense
             ORDER BY Month
-        ''', (user_id,))
-        monthly_data = pd.DataFrame(cursor.fetchall(), columns=['Month', 'income_expense', 'TotalAmount'])
+        ''', (base_currency, user_id), ['Month', 'income_expense', 'TotalAmount'], CHATBOT_DTYPES)
         
         # Payment methods
-        cursor.execute('''
-            SELECT Mode, COUNT(*) as TransactionCount, SUM(Amount) as TotalAmount
-            FROM Data 
+        payment_data = fetch_typed_frame(cursor, f'''
+            SELECT Mode, COUNT(*) as TransactionCount, SUM({BASE_AMOUNT_SQL}) as TotalAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY Mode
             ORDER BY TotalAmount DESC
-        ''', (user_id,))
-        payment_data = pd.DataFrame(cursor.fetchall(), columns=['Mode', 'TransactionCount', 'TotalAmount'])
+        ''', (base_currency, user_id), ['Mode', 'TransactionCount', 'TotalAmount'], CHATBOT_DTYPES)
         
         # Recent transactions
-        cursor.execute('''
+        recent_data = fetch_typed_frame(cursor, '''
             SELECT Date, Category, Amount, income_expense, Mode
             FROM Data 
             WHERE id = %s
             ORDER BY Date DESC
             LIMIT 10
-        ''', (user_id,))
-        recent_data = pd.DataFrame(cursor.fetchall(), columns=['Date', 'Category', 'Amount', 'income_expense', 'Mode'])
+        ''', (user_id,), ['Date', 'Category', 'Amount', 'income_expense', 'Mode'], CHATBOT_DTYPES)
         
         cursor.close()
         connection.close()
@@ -0,0 +1,374 @@
+import os
+import json
+import fcntl
+import shutil
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import streamlit as st
+from mysql.connector import Error
+from database import get_mysql_connection, fetch_typed_frame, create_support_tables, BASE_CURRENCY
+from currency import convert_amounts, get_fx_rates
+
+# Directory for the per-user column files; the store is disabled when this is unset
+COLUMN_STORE_DIR = os.environ.get("DABBA_COLUMN_STORE_DIR")
+
+# On-disk layout: one flat binary file per column, rows sorted by date
+STORE_COLUMNS = {
+    'date': 'int32',       # days since 1970-01-01
+    'amount': 'float64',
+    'category': 'int16',   # index into meta['categories']
+    'mode': 'int16',       # index into meta['modes']
+    'is_income': 'int8',   # 1 = Income, 0 = Expense
+    'currency': 'int16'    # index into meta['currencies']
+}
+
+# Bumped when STORE_COLUMNS changes; stores written in another format are rebuilt
+STORE_FORMAT = 2
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+@contextmanager
+def _store_lock(user_id, base_dir=None):
+    """Exclusive flock on one user's store, so sessions in any thread or process don't interleave syncs
+
+    The lock file sits beside the store directory, which a rebuild deletes.
+    """
+    base_dir = base_dir or COLUMN_STORE_DIR
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, f"user_{int(user_id)}.lock"), 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        yield
+
+def get_store_path(user_id, base_dir=None):
+    """Directory holding one user's column files"""
+    return os.path.join(base_dir or COLUMN_STORE_DIR, f"user_{int(user_id)}")
+
+def load_store_meta(path):
+    """Read the store metadata, or a fresh one if the store does not exist yet"""
+    meta_file = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_file):
+        with open(meta_file) as f:
+            meta = json.load(f)
+        if meta.get('format') == STORE_FORMAT:
+            return meta
+    return {'format': STORE_FORMAT, 'rows': 0, 'categories': [], 'modes': [], 'currencies': [],
+            'hwm_date': None, 'hwm_rows': 0}
+
+def _save_store_meta(path, meta):
+    """Atomically replace meta.json; it is only written after the column files"""
+    tmp_file = os.path.join(path, 'meta.json.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, os.path.join(path, 'meta.json'))
+
+def _truncate_columns(path, rows):
+    """Cut every column file back to `rows` entries (drops a torn or stale tail)"""
+    for column, dtype in STORE_COLUMNS.items():
+        column_file = os.path.join(path, f"{column}.bin")
+        if os.path.exists(column_file):
+            with open(column_file, 'r+b') as f:
+                f.truncate(rows * np.dtype(dtype).itemsize)
+
+def _encode_labels(values, vocabulary):
+    """Map labels to stable integer codes, extending the vocabulary in place"""
+    index = {label: code for code, label in enumerate(vocabulary)}
+    for label in pd.unique(values):
+        if label not in index:
+            index[label] = len(vocabulary)
+            vocabulary.append(label)
+    return pd.Series(values).map(index).to_numpy(dtype='int16')
+
+def append_to_store(path, meta, frame):
+    """Append Date-sorted transactions to the column files and advance the high-water mark
+
+    frame has the Data columns Date, Mode, Category, Amount, income_expense, Currency.
+    Rows on the current high-water date must be included again: they are
+    rewritten because rows within one day have no stable order to resume from.
+    They are overwritten in place rather than truncated first, so a file that
+    another process has memory-mapped never shrinks under it.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    if meta['hwm_date'] is not None:
+        meta['rows'] -= meta['hwm_rows']
+
+    if frame.empty:
+        _truncate_columns(path, meta['rows'])
+        meta['hwm_date'], meta['hwm_rows'] = None, 0
+        _save_store_meta(path, meta)
+        return meta
+
+    days = pd.to_datetime(frame['Date']).to_numpy().astype('datetime64[D]').astype('int32')
+    columns = {
+        'date': days,
+        'amount': frame['Amount'].to_numpy(dtype='float64'),
+        'category': _encode_labels(frame['Category'].astype(str), meta['categories']),
+        'mode': _encode_labels(frame['Mode'].astype(str), meta['modes']),
+        'is_income': (frame['income_expense'].astype(str) == 'Income').to_numpy(dtype='int8'),
+        'currency': _encode_labels(frame['Currency'].astype(str), meta['currencies'])
+    }
+    for column, dtype in STORE_COLUMNS.items():
+        column_file = os.path.join(path, f"{column}.bin")
+        with open(column_file, 'r+b' if os.path.exists(column_file) else 'wb') as f:
+            f.seek(meta['rows'] * np.dtype(dtype).itemsize)
+            columns[column].astype(dtype).tofile(f)
+            f.truncate()  # drops a torn tail from an interrupted sync
+            f.flush()
+            os.fsync(f.fileno())
+
+    meta['rows'] += len(frame)
+    meta['hwm_date'] = int(days[-1])
+    meta['hwm_rows'] = int((days == days[-1]).sum())
+    _save_store_meta(path, meta)
+    return meta
+
+def open_store(path, meta):
+    """Memory-map a store's columns read-only; nothing is copied into memory"""
+    store = {'categories': meta['categories'], 'modes': meta['modes'], 'currencies': meta['currencies'],
+             'rows': meta['rows']}
+    for column, dtype in STORE_COLUMNS.items():
+        if meta['rows'] == 0:
+            store[column] = np.empty(0, dtype=dtype)
+        else:
+            store[column] = np.memmap(os.path.join(path, f"{column}.bin"), dtype=dtype,
+                                      mode='r', shape=(meta['rows'],))
+    return store
+
+def sync_user_store(user_id, base_dir=None):
+    """Bring a user's store up to date with Data, fetching only rows past the high-water mark"""
+    path = get_store_path(user_id, base_dir)
+    connection = get_mysql_connection()
+    if connection is None:
+        return None
+
+    try:
+        create_support_tables(connection)
+        cursor = connection.cursor()
+        cursor.execute('''
+            SELECT (SELECT COUNT(*) FROM Data WHERE id = %s),
+                   (SELECT COALESCE(MAX(rewrites), 0) FROM Data_Versions WHERE user_id = %s)
+        ''', (user_id, user_id))
+        total_rows, rewrites = cursor.fetchone()
+
+        meta = load_store_meta(path)
+        if meta['rows'] > total_rows or meta.get('rewrites', 0) != rewrites:
+            # Rows were edited or removed upstream; an append-only store has to start over
+            shutil.rmtree(path, ignore_errors=True)
+            meta = load_store_meta(path)
+        meta['rewrites'] = rewrites
+
+        if meta['rows'] < total_rows:
+            columns = ['Date', 'Mode', 'Category', 'Amount', 'income_expense', 'Currency']
+            if meta['hwm_date'] is None:
+                query = '''
+                    SELECT Date, Mode, Category, Amount, income_expense, Currency
+                    FROM Data
+                    WHERE id = %s
+                    ORDER BY Date
+                '''
+                params = (user_id,)
+            else:
+                query = '''
+                    SELECT Date, Mode, Category, Amount, income_expense, Currency
+                    FROM Data
+                    WHERE id = %s AND Date >= %s
+                    ORDER BY Date
+                '''
+                hwm_date = np.datetime64(meta['hwm_date'], 'D').astype(object)
+                params = (user_id, hwm_date)
+            frame = fetch_typed_frame(cursor, query, params, columns, {'Date': 'datetime64[ns]', 'Amount': 'float64'})
+            meta = append_to_store(path, meta, frame)
+
+            if meta['rows'] != total_rows:
+                # A back-dated insert landed before the high-water mark; rebuild once
+                shutil.rmtree(path, ignore_errors=True)
+                frame = fetch_typed_frame(cursor, '''
+                    SELECT Date, Mode, Category, Amount, income_expense, Currency
+                    FROM Data
+                    WHERE id = %s
+                    ORDER BY Date
+                ''', (user_id,), columns, {'Date': 'datetime64[ns]', 'Amount': 'float64'})
+                meta = load_store_meta(path)
+                meta['rewrites'] = rewrites
+                meta = append_to_store(path, meta, frame)
+
+        cursor.close()
+        connection.close()
+        return meta
+    except (Error, OSError) as e:
+        st.error(f"Error syncing column store: {e}")
+        connection.close()
+        return None
+
+def get_user_store(user_id, base_currency=BASE_CURRENCY):
+    """Sync and memory-map a user's column store, or None when the store is disabled
+
+    'amount' is in base_currency. It stays the zero-copy mapped column unless
+    the user has transactions in other currencies.
+    """
+    if not COLUMN_STORE_DIR:
+        return None
+    with _store_lock(user_id):
+        meta = sync_user_store(user_id)
+        if meta is None:
+            return None
+        store = open_store(get_store_path(user_id), meta)
+
+    if any(currency != base_currency for currency in store['currencies']):
+        store['amount'] = convert_amounts(store['amount'], store['currency'], store['currencies'],
+                                          store['date'], base_currency, get_fx_rates())
+    return store
+
+def _months(store):
+    """Month index (months since 1970-01) for every row"""
+    return store['date'].astype('datetime64[D]').astype('datetime64[M]').astype('int32')
+
+def _month_labels(month_index):
+    return np.datetime_as_string(np.asarray(month_index).astype('datetime64[M]'), unit='M')
+
+def store_summary(store):
+    """Same shape as database.get_user_summary"""
+    is_income = store['is_income'].astype(bool)
+    total_income = float(store['amount'][is_income].sum())
+    total_expenses = float(store['amount'][~is_income].sum())
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'net_balance': total_income - total_expenses,
+        'transaction_count': int(store['rows'])
+    }
+
+def store_transaction_stats(store):
+    """Income and expense counts and averages, and transactions per payment mode (most used first)"""
+    is_income = store['is_income'].astype(bool)
+    income_count = int(is_income.sum())
+    expense_count = int(store['rows']) - income_count
+    mode_counts = np.bincount(store['mode'], minlength=len(store['modes']))
+    present = np.flatnonzero(mode_counts)
+    payment_methods = pd.Series(mode_counts[present], index=np.array(store['modes'], dtype=object)[present],
+                                name='count').sort_values(ascending=False, kind='stable')
+    return {
+        'income_count': income_count,
+        'expense_count': expense_count,
+        'avg_income': float(store['amount'][is_income].mean()) if income_count else float('nan'),
+        'avg_expense': float(store['amount'][~is_income].mean()) if expense_count else float('nan'),
+        'payment_methods': payment_methods
+    }
+
+def store_category_data(store):
+    """Same shape as database.get_category_data"""
+    expense = store['is_income'] == 0
+    totals = np.bincount(store['category'][expense], weights=store['amount'][expense],
+                         minlength=len(store['categories']))
+    present = np.bincount(store['category'][expense], minlength=len(store['categories'])) > 0
+    df = pd.DataFrame({'Category': np.array(store['categories'], dtype=object)[present],
+                       'TotalAmount': totals[present]})
+    return df.sort_values('TotalAmount', ascending=False, kind='stable').reset_index(drop=True)
+
+def store_monthly_trends(store):
+    """Same shape as database.get_monthly_trends"""
+    if store['rows'] == 0:
+        return pd.DataFrame(columns=['Month', 'income_expense', 'TotalAmount'])
+    months = _months(store)
+    first_month = months.min()
+    keys = (months - first_month) * 2 + store['is_income']
+    totals = np.bincount(keys, weights=store['amount'])
+    present = np.flatnonzero(np.bincount(keys))
+    return pd.DataFrame({
+        'Month': _month_labels(present // 2 + first_month),
+        'income_expense': np.where(present % 2 == 1, 'Income', 'Expense'),
+        'TotalAmount': totals[present]
+    })
+
+def store_analytics_data(store):
+    """Same frames as analytics.get_advanced_analytics_data, computed from the memory-mapped columns"""
+    amount = store['amount']
+    is_income = store['is_income'].astype(bool)
+    expense_amount = np.where(is_income, 0.0, amount)
+    income_amount = np.where(is_income, amount, 0.0)
+    categories = np.array(store['categories'], dtype=object)
+    modes = np.array(store['modes'], dtype=object)
+
+    # 1. Daily (rows are stored sorted by date)
+    days, day_index = np.unique(store['date'], return_inverse=True)
+    daily_data = pd.DataFrame({
+        'Day': days.astype('datetime64[D]').astype('datetime64[ns]'),
+        'DailyExpense': np.bincount(day_index, weights=expense_amount, minlength=len(days)),
+        'DailyIncome': np.bincount(day_index, weights=income_amount, minlength=len(days)),
+        'ExpenseCount': np.bincount(day_index, weights=~is_income, minlength=len(days)).astype('int64'),
+        'IncomeCount': np.bincount(day_index, weights=is_income, minlength=len(days)).astype('int64')
+    })
+
+    # 2. Category by month (expenses only)
+    months = _months(store)
+    expense_months = months[~is_income]
+    expense_categories = store['category'][~is_income]
+    if len(expense_months):
+        first_month = expense_months.min()
+        keys = (expense_months - first_month).astype('int64') * len(categories) + expense_categories
+        totals = np.bincount(keys, weights=amount[~is_income])
+        counts = np.bincount(keys)
+        present = np.flatnonzero(counts)
+        category_trends = pd.DataFrame({
+            'Category': categories[present % len(categories)],
+            'Month': _month_labels(present // len(categories) + first_month),
+            'TotalAmount': totals[present],
+            'TransactionCount': counts[present].astype('int64')
+        }).sort_values(['Month', 'TotalAmount'], ascending=[True, False], kind='stable').reset_index(drop=True)
+    else:
+        category_trends = pd.DataFrame(columns=['Category', 'Month', 'TotalAmount', 'TransactionCount'])
+
+    # 3. Payment modes
+    mode_counts = np.bincount(store['mode'], minlength=len(modes))
+    mode_present = np.flatnonzero(mode_counts)
+    mode_totals = np.bincount(store['mode'], weights=amount, minlength=len(modes))
+    mode_min = np.full(len(modes), np.inf)
+    mode_max = np.full(len(modes), -np.inf)
+    np.minimum.at(mode_min, store['mode'], amount)
+    np.maximum.at(mode_max, store['mode'], amount)
+    payment_analysis = pd.DataFrame({
+        'Mode': modes[mode_present],
+        'TransactionCount': mode_counts[mode_present].astype('int64'),
+        'TotalAmount': mode_totals[mode_present],
+        'AvgAmount': mode_totals[mode_present] / mode_counts[mode_present],
+        'MinAmount': mode_min[mode_present],
+        'MaxAmount': mode_max[mode_present]
+    }).sort_values('TotalAmount', ascending=False, kind='stable').reset_index(drop=True)
+
+    # 4. Day of week (MySQL DAYOFWEEK: 1 = Sunday); 1970-01-01 was a Thursday
+    weekday = (store['date'].astype('int64') + 4) % 7
+    weekday_counts = np.bincount(weekday, minlength=7)
+    weekday_present = np.flatnonzero(weekday_counts)
+    weekly_patterns = pd.DataFrame({
+        'DayOfWeek': (weekday_present + 1).astype('int8'),
+        'DayName': np.array(DAY_NAMES, dtype=object)[weekday_present],
+        'WeeklyExpense': np.bincount(weekday, weights=expense_amount, minlength=7)[weekday_present],
+        'ExpenseCount': np.bincount(weekday, weights=~is_income, minlength=7)[weekday_present].astype('int64')
+    })
+
+    # 5. Monthly income vs expense
+    if store['rows']:
+        first_month = months.min()
+        month_keys = months - first_month
+        month_present = np.flatnonzero(np.bincount(month_keys))
+        total_income = np.bincount(month_keys, weights=income_amount)[month_present]
+        total_expense = np.bincount(month_keys, weights=expense_amount)[month_present]
+        monthly_ratio = pd.DataFrame({
+            'Month': _month_labels(month_present + first_month),
+            'TotalIncome': total_income,
+            'TotalExpense': total_expense,
+            'NetAmount': total_income - total_expense
+        })
+    else:
+        monthly_ratio = pd.DataFrame(columns=['Month', 'TotalIncome', 'TotalExpense', 'NetAmount'])
+
+    return {
+        'daily_data': daily_data,
+        'category_trends': category_trends,
+        'payment_analysis': payment_analysis,
+        'weekly_patterns': weekly_patterns,
+        'monthly_ratio': monthly_ratio
+    }
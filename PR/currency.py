@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Local FX rates and vectorized currency conversion
+
+Rates come from a CSV file (no network access needed) with the columns
+date,currency,rate where rate is the value of one unit of the currency in
+FX_PIVOT_CURRENCY on that date. Loading expands them into one row per
+currency per day in FX_Rates, so SQL aggregates convert with a plain
+equality join (see database.FX_JOIN_SQL).
+
+Usage: python currency.py load [path/to/rates.csv]
+"""
+
+import os
+import sys
+import time
+import threading
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+from database import get_mysql_connection, create_support_tables, bump_data_version
+
+# Rates in the file are quoted in this currency
+FX_PIVOT_CURRENCY = 'INR'
+
+FX_RATES_FILE = os.environ.get("DABBA_FX_RATES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.csv"))
+
+# Daily rows are generated from this date (back-filled with the first known rate) ...
+FX_HISTORY_START = '2000-01-01'
+# ... to this many days past today (forward-filled with the last known rate)
+FX_FORWARD_DAYS = 366
+
+# Rows per INSERT batch when loading FX_Rates
+FX_INSERT_BATCH = 5000
+
+# Seconds before a process re-reads FX_Rates for in-memory conversion
+FX_CACHE_TTL_SECONDS = 600
+
+_fx_cache = {}
+_fx_cache_lock = threading.Lock()
+
+def densify_rates(rates, start=FX_HISTORY_START, end=None):
+    """Expand sparse (date, currency, rate) quotes into one forward-filled rate per currency per day
+
+    Days before a currency's first quote take that first quote. The pivot
+    currency is always present with rate 1.
+    """
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize() + pd.Timedelta(days=FX_FORWARD_DAYS)
+    days = pd.date_range(start, end, freq='D')
+
+    rates = rates.assign(date=pd.to_datetime(rates['date']), rate=rates['rate'].astype('float64'))
+    wide = rates.pivot_table(index='date', columns='currency', values='rate', aggfunc='last')
+    wide = wide.reindex(wide.index.union(days)).sort_index().ffill().bfill().reindex(days)
+    wide[FX_PIVOT_CURRENCY] = 1.0
+
+    daily = wide.rename_axis(index='rate_date', columns='currency_code').stack().rename('rate_to_pivot').reset_index()
+    return daily[['currency_code', 'rate_date', 'rate_to_pivot']]
+
+def load_fx_rates_file(path=FX_RATES_FILE):
+    """Replace FX_Rates with the daily expansion of a rates file and invalidate cached aggregates"""
+    rates = pd.read_csv(path)
+    daily = densify_rates(rates)
+
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        create_support_tables(connection)
+        cursor = connection.cursor()
+        cursor.execute('DELETE FROM FX_Rates')
+        rows = list(zip(daily['currency_code'], daily['rate_date'].dt.date, daily['rate_to_pivot']))
+        for start in range(0, len(rows), FX_INSERT_BATCH):
+            cursor.executemany('''
+                INSERT INTO FX_Rates (currency_code, rate_date, rate_to_pivot) VALUES (%s, %s, %s)
+            ''', rows[start:start + FX_INSERT_BATCH])
+        # Converted aggregates are cached per data version, so new rates need a bump for everyone
+        bump_data_version(cursor)
+        connection.commit()
+        cursor.close()
+        connection.close()
+        with _fx_cache_lock:
+            _fx_cache.clear()
+        print(f"✅ Loaded {len(rates)} quotes as {len(rows):,} daily rates for {daily['currency_code'].nunique()} currencies")
+        return True
+    except Error as e:
+        print(f"❌ Error loading FX rates: {e}")
+        connection.close()
+        return False
+
+def get_fx_rates():
+    """Per-currency daily rate arrays from FX_Rates: {currency: (first day number, rates)}
+
+    Day numbers are days since 1970-01-01, matching the column store's date column.
+    """
+    with _fx_cache_lock:
+        cached = _fx_cache.get('rates')
+        if cached is not None and time.monotonic() - cached[0] < FX_CACHE_TTL_SECONDS:
+            return cached[1]
+
+    connection = get_mysql_connection()
+    if connection is None:
+        return {}
+
+    try:
+        create_support_tables(connection)
+        cursor = connection.cursor()
+        cursor.execute('SELECT currency_code, rate_date, rate_to_pivot FROM FX_Rates ORDER BY currency_code, rate_date')
+        daily = pd.DataFrame(cursor.fetchall(), columns=['currency_code', 'rate_date', 'rate_to_pivot'])
+        cursor.close()
+        connection.close()
+    except Error as e:
+        print(f"❌ Error reading FX rates: {e}")
+        connection.close()
+        return {}
+
+    fx_rates = {}
+    for currency, group in daily.groupby('currency_code', sort=False):
+        first_day = np.datetime64(group['rate_date'].iloc[0], 'D').astype('int64')
+        fx_rates[currency] = (int(first_day), group['rate_to_pivot'].to_numpy(dtype='float64'))
+
+    with _fx_cache_lock:
+        _fx_cache['rates'] = (time.monotonic(), fx_rates)
+    return fx_rates
+
+def _lookup_rates(fx_rates, currency, days):
+    """Rate of currency on each day, NaN where none is loaded"""
+    out = np.full(len(days), np.nan)
+    if currency not in fx_rates:
+        return out
+    first_day, rates = fx_rates[currency]
+    offsets = days.astype('int64') - first_day
+    valid = (offsets >= 0) & (offsets < len(rates))
+    out[valid] = rates[offsets[valid]]
+    return out
+
+def convert_amounts(amounts, currency_codes, currencies, days, base_currency, fx_rates):
+    """Convert amounts to base_currency using each row's currency and day
+
+    currency_codes index into the currencies list; days are days since
+    1970-01-01. Work is one array pass per distinct currency, and rows without
+    a loaded rate keep their raw amount (like BASE_AMOUNT_SQL). Returns amounts
+    itself when nothing needs converting.
+    """
+    present = np.flatnonzero(np.bincount(currency_codes, minlength=len(currencies)))
+    if all(currencies[code] == base_currency for code in present):
+        return amounts
+
+    base_rates = _lookup_rates(fx_rates, base_currency, days)
+    factors = np.ones(len(amounts))
+    for code in present:
+        if currencies[code] == base_currency:
+            continue
+        rows = currency_codes == code
+        factors[rows] = _lookup_rates(fx_rates, currencies[code], days[rows]) / base_rates[rows]
+    factors[np.isnan(factors)] = 1.0
+    return amounts * factors
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    if not args or args[0] != 'load' or len(args) > 2:
+        print("Usage: python currency.py load [path/to/rates.csv]")
+        return
+    load_fx_rates_file(args[1] if len(args) == 2 else FX_RATES_FILE)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-from database import get_user_data, get_user_summary, get_category_data, get_monthly_trends
+from database import get_user_data, get_recent_transactions, get_user_summary, get_category_data, get_monthly_trends
+from figure_cache import cached_figure
+from timeseries import downsample_time_series
+from column_store import get_user_store, store_summary, store_category_data, store_monthly_trends, store_transaction_stats
+
+def _transaction_stats(user_data):
+    """Same shape as column_store.store_transaction_stats, from the full transaction frame"""
+    income = user_data[user_data['income_expense'] == 'Income']['Amount']
+    expense = user_data[user_data['income_expense'] == 'Expense']['Amount']
+    return {
+        'income_count': len(income),
+        'expense_count': len(expense),
+        'avg_income': income.mean(),
+        'avg_expense': expense.mean(),
+        'payment_methods': user_data['Mode'].value_counts()
+    }
 
 def dashboard():
 
@@ -9,11 +24,19 @@ def dashboard():
     st.markdown(f'<h1 class="main-header"> Welcome, {st.session_state.user_name}! </h1>', unsafe_allow_html=True)
     
     
-    # Get user data and summary
-    user_data = get_user_data(st.session_state.user_id)
-    user_summary = get_user_summary(st.session_state.user_id)
+    # Get user data and summary; with the column store only the 20 latest rows are read from MySQL
+    store = get_user_store(st.session_state.user_id)
+    if store is not None:
+        user_summary = store_summary(store)
+        recent_data = get_recent_transactions(st.session_state.user_id, 20)
+        transaction_stats = store_transaction_stats(store)
+    else:
+        user_summary = get_user_summary(st.session_state.user_id)
+        user_data = get_user_data(st.session_state.user_id)
+        recent_data = user_data.head(20)
+        transaction_stats = _transaction_stats(user_data)
     
-    if user_data.empty:
+    if recent_data.empty:
         st.warning(" No transaction data found for this user.")
         st.info("💡 This user doesn't have any transactions in the database yet.")
         return
@@ -40,48 +63,60 @@ def dashboard():
     
     with col1:
         st.markdown("###  Expense Categories")
-        category_data = get_category_data(st.session_state.user_id)
+        if store is not None:
+            category_data = store_category_data(store)
+        else:
+            category_data = get_category_data(st.session_state.user_id)
         if not category_data.empty:
-            fig = px.pie(
+            fig = cached_figure("dashboard.categories", [category_data], lambda: px.pie(
                 values=category_data['TotalAmount'], 
                 names=category_data['Category'], 
                 title="Expense Distribution by Category"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No expense data available for categories chart.")
     
     with col2:
         st.markdown("###  Monthly Income vs Expenses")
-        monthly_data = get_monthly_trends(st.session_state.user_id)
+        if store is not None:
+            monthly_data = store_monthly_trends(store)
+        else:
+            monthly_data = get_monthly_trends(st.session_state.user_id)
         if not monthly_data.empty:
             # Pivot the data for better visualization
             pivot_data = monthly_data.pivot(index='Month', columns='income_expense', values='TotalAmount').fillna(0)
+            trend_columns = [col for col in ['Income', 'Expense'] if col in pivot_data.columns]
+            pivot_data = downsample_time_series(pivot_data.reset_index(), 'Month', trend_columns)
             
-            fig = go.Figure()
-            if 'Income' in pivot_data.columns:
-                fig.add_trace(go.Scatter(
-                    x=pivot_data.index, 
-                    y=pivot_data['Income'], 
-                    name='Income', 
-                    line=dict(color='green'),
-                    mode='lines+markers'
-                ))
-            if 'Expense' in pivot_data.columns:
-                fig.add_trace(go.Scatter(
-                    x=pivot_data.index, 
-                    y=pivot_data['Expense'], 
-                    name='Expenses', 
-                    line=dict(color='red'),
-                    mode='lines+markers'
-                ))
+            def build_monthly_chart():
+                fig = go.Figure()
+                if 'Income' in pivot_data.columns:
+                    fig.add_trace(go.Scatter(
+                        x=pivot_data['Month'], 
+                        y=pivot_data['Income'], 
+                        name='Income', 
+                        line=dict(color='green'),
+                        mode='lines+markers'
+                    ))
+                if 'Expense' in pivot_data.columns:
+                    fig.add_trace(go.Scatter(
+                        x=pivot_data['Month'], 
+                        y=pivot_data['Expense'], 
+                        name='Expenses', 
+                        line=dict(color='red'),
+                        mode='lines+markers'
+                    ))
+                
+                fig.update_layout(
+                    title="Monthly Income vs Expenses Trend",
+                    xaxis_title="Month",
+                    yaxis_title="Amount (₹)",
+                    hovermode='x unified'
+                )
+                return fig
             
-            fig.update_layout(
-                title="Monthly Income vs Expenses Trend",
-                xaxis_title="Month",
-                yaxis_title="Amount (₹)",
-                hovermode='x unified'
-            )
+            fig = cached_figure("dashboard.monthly_trend", [pivot_data], build_monthly_chart)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No monthly trend data available.")
@@ -89,7 +124,7 @@ def dashboard():
     # Recent transactions
     st.markdown("###  Recent Transactions")
     st.dataframe(
-        user_data.head(20), 
+        recent_data, 
         use_container_width=True,
         column_config={
             "Date": st.column_config.DateColumn("Date"),
@@ -105,28 +140,20 @@ def dashboard():
     
     with col1:
         st.markdown("**Transaction Summary**")
-        income_count = len(user_data[user_data['income_expense'] == 'Income'])
-        expense_count = len(user_data[user_data['income_expense'] == 'Expense'])
-        
-        st.metric("Income Transactions", income_count)
-        st.metric("Expense Transactions", expense_count)
-        
-        if not user_data.empty:
-            avg_income = user_data[user_data['income_expense'] == 'Income']['Amount'].mean()
-            avg_expense = user_data[user_data['income_expense'] == 'Expense']['Amount'].mean()
-            
-            st.metric("Average Income", f"₹{avg_income:,.2f}")
-            st.metric("Average Expense", f"₹{avg_expense:,.2f}")
+        st.metric("Income Transactions", transaction_stats['income_count'])
+        st.metric("Expense Transactions", transaction_stats['expense_count'])
+        st.metric("Average Income", f"₹{transaction_stats['avg_income']:,.2f}")
+        st.metric("Average Expense", f"₹{transaction_stats['avg_expense']:,.2f}")
     
     with col2:
         st.markdown("**Payment Methods**")
-        payment_methods = user_data['Mode'].value_counts()
+        payment_methods = transaction_stats['payment_methods']
         if not payment_methods.empty:
-            fig = px.bar(
+            fig = cached_figure("dashboard.payment_methods", [payment_methods], lambda: px.bar(
                 x=payment_methods.index, 
                 y=payment_methods.values,
                 title="Transactions by Payment Method"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No payment method data available.") 
\ No newline at end of file
@@ -1,8 +1,58 @@
 import streamlit as st
+import os
+import threading
+import time
 import pandas as pd
+import numpy as np
 import mysql.connector
-from mysql.connector import Error
-from datetime import datetime
+from mysql.connector import Error, IntegrityError, DataError
+from pandas.api.types import union_categoricals
+from datetime import date
+from aggregate_cache import cached_aggregate, begin_cached_change
+from transaction_deltas import apply_transaction_changes
+from recurring import record_recurring_changes, period_name
+from passwords import (hash_password, verify_password, needs_rehash, burn_verification_time,
+                       login_locked_for, record_login_failure, clear_login_failures)
+
+# Rows pulled from the cursor per round of conversion in fetch_typed_frame
+FETCH_CHUNK_SIZE = 50000
+
+# Compact dtypes for the columns of Data, used instead of object columns
+TRANSACTION_DTYPES = {
+    'id': 'int32',
+    'Date': 'datetime64[ns]',
+    'Mode': 'category',
+    'Category': 'category',
+    'Amount': 'float64',
+    'income_expense': 'category',
+    'Currency': 'category'
+}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Currency every aggregate is reported in unless a caller asks for another
+BASE_CURRENCY = os.environ.get("DABBA_BASE_CURRENCY", "INR")
+
+# Joins each Data row to its day's FX rate and to the base currency's rate that day.
+# Takes the base currency as its one parameter, placed before the WHERE parameters.
+FX_JOIN_SQL = '''
+    LEFT JOIN FX_Rates fx ON fx.currency_code = Currency AND fx.rate_date = Date
+    LEFT JOIN FX_Rates bx ON bx.currency_code = %s AND bx.rate_date = Date
+'''
+
+# Amount in the base currency; rows without a loaded rate keep their raw amount
+BASE_AMOUNT_SQL = '(Amount * COALESCE(fx.rate_to_pivot / bx.rate_to_pivot, 1))'
+
+# Users.password holds a hash string (see passwords.py), not the password itself
+PASSWORD_COLUMN_WIDTH = 255
+
+# Seconds a data version read from Data_Versions is trusted before it is read again;
+# bounds how long another process's write can go unseen here
+DATA_VERSION_TTL_SECONDS = 2
+
+_support_tables_ready = False
+_data_versions = {}
+_data_version_lock = threading.Lock()
 
 def get_mysql_connection():
     """Create MySQL connection to XAMPP database"""
@@ -19,27 +69,145 @@ def get_mysql_connection():
         st.error(f"Error connecting to MySQL database: {e}")
         return None
 
+def _to_typed_column(values, dtype):
+    """Convert one column of fetched cells straight to its target dtype"""
+    if dtype == 'category':
+        return pd.Categorical(values)
+    if dtype == 'object':
+        return np.array(values, dtype=object)
+    
+    try:
+        if dtype.startswith('datetime64'):
+            if type(values[0]) is date:
+                # DATE cells: go through day ordinals instead of per-cell datetime conversion
+                days = np.fromiter(map(date.toordinal, values), dtype='int64', count=len(values))
+                return (days - _EPOCH_ORDINAL).astype('datetime64[D]').astype(dtype)
+        else:
+            return np.fromiter(values, dtype=dtype, count=len(values))
+    except TypeError:
+        # NULL cells; the slower path below maps them to NaN/NaT
+        pass
+    try:
+        return np.array(values, dtype=dtype)
+    except TypeError:
+        # NULLs in an integer column: a nullable integer array keeps the other values exact
+        return pd.array(values, dtype=dtype.replace('uint', 'UInt') if dtype.startswith('uint') else dtype.capitalize())
+
+def fetch_typed_frame(cursor, query, params, columns, dtypes=None):
+    """Run a query and build a DataFrame with compact dtypes, chunk by chunk
+
+    dtypes maps column names to numpy/pandas dtypes ('int32', 'float64',
+    'datetime64[ns]', 'category', ...); columns not listed stay as objects.
+    Each chunk of rows is converted column-wise as soon as it is fetched, so
+    Decimal amounts and date objects never accumulate in object columns the
+    way they do with pd.read_sql_query or DataFrame(cursor.fetchall()).
+    """
+    dtypes = dtypes or {}
+    cursor.execute(query, params)
+
+    chunks = {column: [] for column in columns}
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+        if not rows:
+            break
+        for column, values in zip(columns, zip(*rows)):
+            chunks[column].append(_to_typed_column(values, dtypes.get(column, 'object')))
+
+    data = {}
+    for column in columns:
+        dtype = dtypes.get(column, 'object')
+        parts = chunks[column]
+        if not parts:
+            data[column] = pd.Series([], dtype=dtype)
+        elif dtype == 'category':
+            data[column] = union_categoricals(parts) if len(parts) > 1 else parts[0]
+        elif all(isinstance(part, np.ndarray) for part in parts):
+            data[column] = np.concatenate(parts)
+        else:
+            # Some chunk had NULLs in an integer column; the whole column becomes nullable
+            data[column] = pd.concat([pd.Series(part) for part in parts], ignore_index=True)
+    return pd.DataFrame(data, columns=columns)
+
+_users_table_ready = False
+
+def prepare_users_table(connection):
+    """Give Users AUTO_INCREMENT ids, a unique email index and room for password hashes, once per process"""
+    global _users_table_ready
+    if _users_table_ready:
+        return
+
+    cursor = connection.cursor()
+    cursor.execute('''
+        SELECT COLUMN_NAME, EXTRA, CHARACTER_MAXIMUM_LENGTH FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Users' AND COLUMN_NAME IN ('user_id', 'password')
+    ''')
+    columns = {name: (extra, length) for name, extra, length in cursor.fetchall()}
+    if 'auto_increment' not in (columns.get('user_id', ('', 0))[0] or '').lower():
+        # Data/Transactions reference user_id; the column type is unchanged, so the keys stay valid
+        cursor.execute('SET FOREIGN_KEY_CHECKS = 0')
+        cursor.execute('ALTER TABLE Users MODIFY user_id INT NOT NULL AUTO_INCREMENT')
+        cursor.execute('SET FOREIGN_KEY_CHECKS = 1')
+    if (columns.get('password', ('', 0))[1] or 0) < PASSWORD_COLUMN_WIDTH:
+        cursor.execute(f'ALTER TABLE Users MODIFY password VARCHAR({PASSWORD_COLUMN_WIDTH}) NOT NULL')
+
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Users' AND INDEX_NAME = 'uq_users_email'
+    ''')
+    if cursor.fetchone()[0] == 0:
+        try:
+            cursor.execute('ALTER TABLE Users ADD UNIQUE KEY uq_users_email (email)')
+        except Error as e:
+            # Existing duplicate emails; logins still work, signups fall back to check_email_exists
+            print(f"❌ Could not add unique email index: {e}")
+    connection.commit()
+    cursor.close()
+    _users_table_ready = True
+
 def authenticate_user(email, password):
-    """Authenticate user with email and password from MySQL database"""
+    """Authenticate user with email and password from MySQL database
+
+    Returns (user_id, Name, email), or None for a wrong password or an email
+    locked by too many recent failures (see login_locked_for). Plaintext or
+    outdated hashes are re-hashed with the current settings on success.
+    """
+    email = email.strip().lower()
+    if login_locked_for(email):
+        return None
+
     connection = get_mysql_connection()
     if connection is None:
         return None
     
     try:
+        prepare_users_table(connection)
         cursor = connection.cursor()
         cursor.execute('''
             SELECT user_id, Name, email, password 
             FROM Users 
-            WHERE email = %s AND password = %s
-        ''', (email, password))
+            WHERE email = %s
+        ''', (email,))
         
         user = cursor.fetchone()
+        if user is None:
+            burn_verification_time(password)
+        if user is None or not verify_password(password, user[3]):
+            record_login_failure(email)
+            cursor.close()
+            connection.close()
+            return None
+
+        clear_login_failures(email)
+        if needs_rehash(user[3]):
+            cursor.execute('UPDATE Users SET password = %s WHERE user_id = %s', (hash_password(password), user[0]))
+            connection.commit()
         cursor.close()
         connection.close()
         
-        return user
+        return user[:3]
     except Error as e:
         st.error(f"Database error: {e}")
+        connection.close()
         return None
 
 def get_user_data(user_id):
@@ -49,21 +217,52 @@ def get_user_data(user_id):
         return pd.DataFrame()
     
     try:
+        cursor = connection.cursor()
         query = '''
             SELECT Date, Mode, Category, Amount, income_expense, Currency
             FROM Data 
             WHERE id = %s
             ORDER BY Date DESC
         '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
+        columns = ['Date', 'Mode', 'Category', 'Amount', 'income_expense', 'Currency']
+        df = fetch_typed_frame(cursor, query, (user_id,), columns, TRANSACTION_DTYPES)
+        cursor.close()
         connection.close()
         return df
     except Error as e:
         st.error(f"Error fetching user data: {e}")
         return pd.DataFrame()
 
-def get_user_summary(user_id):
-    """Get user's financial summary from MySQL database"""
+def get_recent_transactions(user_id, limit=20):
+    """A user's latest transactions, newest first: one seek on (id, Date) instead of the full history"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return pd.DataFrame()
+    
+    try:
+        cursor = connection.cursor()
+        query = '''
+            SELECT Date, Mode, Category, Amount, income_expense, Currency
+            FROM Data 
+            WHERE id = %s
+            ORDER BY Date DESC
+            LIMIT %s
+        '''
+        columns = ['Date', 'Mode', 'Category', 'Amount', 'income_expense', 'Currency']
+        df = fetch_typed_frame(cursor, query, (user_id, int(limit)), columns, TRANSACTION_DTYPES)
+        cursor.close()
+        connection.close()
+        return df
+    except Error as e:
+        st.error(f"Error fetching recent transactions: {e}")
+        return pd.DataFrame()
+
+def get_user_summary(user_id, base_currency=BASE_CURRENCY):
+    """Get user's financial summary, in base_currency"""
+    return cached_aggregate(('summary', user_id, base_currency), get_data_version(user_id),
+                            lambda: _load_user_summary(user_id, base_currency))
+
+def _load_user_summary(user_id, base_currency):
     connection = get_mysql_connection()
     if connection is None:
         return None
@@ -72,19 +271,19 @@ def get_user_summary(user_id):
         cursor = connection.cursor()
         
         # Get total income
-        cursor.execute('''
-            SELECT COALESCE(SUM(Amount), 0) as total_income
-            FROM Data 
+        cursor.execute(f'''
+            SELECT COALESCE(SUM({BASE_AMOUNT_SQL}), 0) as total_income
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s AND income_expense = 'Income'
-        ''', (user_id,))
+        ''', (base_currency, user_id))
         total_income = cursor.fetchone()[0]
         
         # Get total expenses
-        cursor.execute('''
-            SELECT COALESCE(SUM(Amount), 0) as total_expenses
-            FROM Data 
+        cursor.execute(f'''
+            SELECT COALESCE(SUM({BASE_AMOUNT_SQL}), 0) as total_expenses
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s AND income_expense = 'Expense'
-        ''', (user_id,))
+        ''', (base_currency, user_id))
         total_expenses = cursor.fetchone()[0]
         
         # Get transaction count
@@ -99,104 +298,339 @@ def get_user_summary(user_id):
         connection.close()
         
         return {
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'net_balance': total_income - total_expenses,
+            'total_income': float(total_income),
+            'total_expenses': float(total_expenses),
+            'net_balance': float(total_income - total_expenses),
             'transaction_count': transaction_count
         }
     except Error as e:
         st.error(f"Error fetching user summary: {e}")
         return None
 
-def get_category_data(user_id):
-    """Get expense category breakdown for user"""
+def get_category_data(user_id, base_currency=BASE_CURRENCY):
+    """Get expense category breakdown for user, in base_currency"""
+    return cached_aggregate(('categories', user_id, base_currency), get_data_version(user_id),
+                            lambda: _load_category_data(user_id, base_currency))
+
+def _load_category_data(user_id, base_currency):
     connection = get_mysql_connection()
     if connection is None:
         return pd.DataFrame()
     
     try:
-        query = '''
-            SELECT Category, SUM(Amount) as TotalAmount
-            FROM Data 
+        cursor = connection.cursor()
+        query = f'''
+            SELECT Category, SUM({BASE_AMOUNT_SQL}) as TotalAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s AND income_expense = 'Expense'
             GROUP BY Category
             ORDER BY TotalAmount DESC
         '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
+        df = fetch_typed_frame(cursor, query, (base_currency, user_id), ['Category', 'TotalAmount'], {'TotalAmount': 'float64'})
+        cursor.close()
         connection.close()
         return df
     except Error as e:
         st.error(f"Error fetching category data: {e}")
         return pd.DataFrame()
 
-def get_monthly_trends(user_id):
-    """Get monthly income vs expenses trends"""
+def get_monthly_trends(user_id, base_currency=BASE_CURRENCY):
+    """Get monthly income vs expenses trends, in base_currency"""
+    return cached_aggregate(('monthly_trends', user_id, base_currency), get_data_version(user_id),
+                            lambda: _load_monthly_trends(user_id, base_currency))
+
+def _load_monthly_trends(user_id, base_currency):
     connection = get_mysql_connection()
     if connection is None:
         return pd.DataFrame()
     
     try:
-        query = '''
+        cursor = connection.cursor()
+        query = f'''
             SELECT 
                 DATE_FORMAT(Date, '%Y-%m') as Month,
                 income_expense,
-                SUM(Amount) as TotalAmount
-            FROM Data 
+                SUM({BASE_AMOUNT_SQL}) as TotalAmount
+            FROM Data {FX_JOIN_SQL}
             WHERE id = %s
             GROUP BY DATE_FORMAT(Date, '%Y-%m'), income_expense
             ORDER BY Month
         '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
+        columns = ['Month', 'income_expense', 'TotalAmount']
+        df = fetch_typed_frame(cursor, query, (base_currency, user_id), columns, {'TotalAmount': 'float64'})
+        cursor.close()
         connection.close()
         return df
     except Error as e:
         st.error(f"Error fetching monthly trends: {e}")
         return pd.DataFrame()
 
-def get_available_categories():
-    """Get list of available categories from existing data"""
+def create_support_tables(connection):
+    """Create the data-version and FX rate tables once per process"""
+    global _support_tables_ready
+    if _support_tables_ready:
+        return
+
+    cursor = connection.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Data_Versions (
+            user_id INT PRIMARY KEY,
+            version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+            rewrites BIGINT UNSIGNED NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS FX_Rates (
+            currency_code VARCHAR(20) NOT NULL,
+            rate_date DATE NOT NULL,
+            rate_to_pivot DOUBLE NOT NULL,
+            PRIMARY KEY (currency_code, rate_date)
+        )
+    ''')
+    connection.commit()
+    cursor.close()
+    _support_tables_ready = True
+
+def remember_data_version(user_id, version):
+    """Record a version known to be current (after our own commit, or restored with a session)"""
+    with _data_version_lock:
+        _data_versions[user_id] = (version, time.monotonic())
+
+def get_data_version(user_id):
+    """Counter bumped on every write to a user's transactions; None if it can't be read
+
+    A version read within DATA_VERSION_TTL_SECONDS is reused, so one page
+    render checks it once rather than once per aggregate. Writes made by this
+    process update it immediately.
+    """
+    with _data_version_lock:
+        remembered = _data_versions.get(user_id)
+    if remembered is not None and time.monotonic() - remembered[1] < DATA_VERSION_TTL_SECONDS:
+        return remembered[0]
+
     connection = get_mysql_connection()
     if connection is None:
-        return []
-    
+        return None
+
     try:
+        create_support_tables(connection)
         cursor = connection.cursor()
-        cursor.execute('''
-            SELECT DISTINCT Category 
-            FROM Data 
-            ORDER BY Category
-        ''')
-        categories = [row[0] for row in cursor.fetchall()]
+        cursor.execute('SELECT version FROM Data_Versions WHERE user_id = %s', (user_id,))
+        row = cursor.fetchone()
         cursor.close()
         connection.close()
-        return categories
+        version = row[0] if row else 0
+        remember_data_version(user_id, version)
+        return version
     except Error as e:
-        st.error(f"Error fetching categories: {e}")
+        st.error(f"Error reading data version: {e}")
         connection.close()
-        return []
+        return None
+
+def bump_data_version(cursor, user_id=None, rewrite=False):
+    """Invalidate cached aggregates for one user, or for everyone when user_id is None (caller commits)
+
+    For one user the version row stays locked until commit, which serializes
+    that user's writers, and (old, new) is returned. rewrite marks edits and
+    deletes, which append-only readers such as the column store can't follow.
+    """
+    if user_id is None:
+        cursor.execute('UPDATE Data_Versions SET version = version + 1')
+        return None
+
+    cursor.execute('SELECT version FROM Data_Versions WHERE user_id = %s FOR UPDATE', (user_id,))
+    row = cursor.fetchone()
+    old_version = row[0] if row else 0
+    begin_cached_change(user_id, old_version + 1)
+    cursor.execute('''
+        INSERT INTO Data_Versions (user_id, version, rewrites) VALUES (%s, 1, %s)
+        ON DUPLICATE KEY UPDATE version = version + 1, rewrites = rewrites + VALUES(rewrites)
+    ''', (user_id, int(rewrite)))
+    return old_version, old_version + 1
+
+# Dimension tables for the label columns of Data: kind -> (table, source column in Data, width)
+VOCABULARY_TABLES = {
+    'categories': ('Categories', 'Category', 50),
+    'modes': ('Modes', 'Mode', 50),
+    'currencies': ('Currencies', 'Currency', 20),
+    'types': ('Transaction_Types', 'income_expense', 30)
+}
+
+# Vocabulary kind of each label column in a Data row
+LABEL_COLUMNS = [('categories', 'Category'), ('modes', 'Mode'), ('currencies', 'Currency'), ('types', 'income_expense')]
+
+# Largest amount the DECIMAL(11,0) Amount columns hold
+MAX_TRANSACTION_AMOUNT = 10 ** 11 - 1
+
+def transaction_problem(mode, category, amount, income_expense, currency):
+    """Why a transaction can't be stored, as a message for the user, or None when it fits the columns"""
+    if abs(round(float(amount))) > MAX_TRANSACTION_AMOUNT:
+        return f"Amount must be at most {MAX_TRANSACTION_AMOUNT:,}."
+    for kind, label in [('modes', mode), ('categories', category), ('currencies', currency), ('types', income_expense)]:
+        _, column, width = VOCABULARY_TABLES[kind]
+        if len(str(label)) > width:
+            return f"{column} must be at most {width} characters."
+    return None
+
+# Seconds before a process re-reads a vocabulary, so inserts made by other processes show up
+VOCABULARY_TTL_SECONDS = 300
+
+_vocabulary_cache = {}
+_vocabulary_lock = threading.Lock()
+_vocabulary_tables_ready = False
+_schema_normalized = False
+
+def create_vocabulary_tables(connection):
+    """Create the dimension tables and seed them from Data once per process"""
+    global _vocabulary_tables_ready
+    if _vocabulary_tables_ready:
+        return
+
+    cursor = connection.cursor()
+    for table, column, width in VOCABULARY_TABLES.values():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR({width}) NOT NULL,
+                UNIQUE KEY uq_{table.lower()}_name (name)
+            )
+        ''')
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        if cursor.fetchone()[0] == 0:
+            # One-off full scan to seed an empty table; later values arrive through insert_transaction
+            cursor.execute(f'''
+                INSERT IGNORE INTO {table} (name)
+                SELECT DISTINCT {column} FROM Data WHERE {column} IS NOT NULL
+            ''')
+    connection.commit()
+    cursor.close()
+    _vocabulary_tables_ready = True
+
+def mark_schema_ready():
+    """Skip the lazy table checks from now on; called by schema.bootstrap_schema once the schema is current"""
+    global _support_tables_ready, _vocabulary_tables_ready, _users_table_ready
+    _support_tables_ready = True
+    _vocabulary_tables_ready = True
+    _users_table_ready = True
+
+def get_vocabulary(kind):
+    """Sorted labels for a dropdown, served from memory and refreshed from its dimension table"""
+    with _vocabulary_lock:
+        cached = _vocabulary_cache.get(kind)
+        if cached is not None and time.monotonic() - cached[0] < VOCABULARY_TTL_SECONDS:
+            return sorted(cached[1])
 
-def get_available_modes():
-    """Get list of available payment modes from existing data"""
     connection = get_mysql_connection()
     if connection is None:
         return []
-    
+
+    table = VOCABULARY_TABLES[kind][0]
     try:
+        create_vocabulary_tables(connection)
         cursor = connection.cursor()
-        cursor.execute('''
-            SELECT DISTINCT Mode 
-            FROM Data 
-            ORDER BY Mode
-        ''')
-        modes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT name FROM {table}")
+        labels = {row[0] for row in cursor.fetchall()}
         cursor.close()
         connection.close()
-        return modes
+        with _vocabulary_lock:
+            _vocabulary_cache[kind] = (time.monotonic(), labels)
+        return sorted(labels)
     except Error as e:
-        st.error(f"Error fetching payment modes: {e}")
+        st.error(f"Error fetching {kind}: {e}")
         connection.close()
         return []
 
+def vocabulary_ids(cursor, kind, labels):
+    """{label: id} for those labels already in kind's dimension table
+
+    The labels are joined to the table, so they match under its collation
+    and come back spelled as given.
+    """
+    labels = sorted(set(labels))
+    if not labels:
+        return {}
+    given = ' UNION ALL '.join(['SELECT %s AS label'] * len(labels))
+    cursor.execute(f"SELECT v.label, d.id FROM ({given}) v JOIN {VOCABULARY_TABLES[kind][0]} d ON d.name = v.label",
+                   labels)
+    return dict(cursor.fetchall())
+
+def add_to_vocabulary(cursor, kind, label):
+    """Record a label in its dimension table and the in-memory set (caller commits)"""
+    cursor.execute(f"INSERT IGNORE INTO {VOCABULARY_TABLES[kind][0]} (name) VALUES (%s)", (label,))
+    with _vocabulary_lock:
+        cached = _vocabulary_cache.get(kind)
+        if cached is not None:
+            cached[1].add(label)
+
+def get_available_categories():
+    """Get list of available categories"""
+    return get_vocabulary('categories')
+
+def get_available_modes():
+    """Get list of available payment modes"""
+    return get_vocabulary('modes')
+
+def is_schema_normalized(cursor):
+    """True once migrations.py has turned Data into a view over Transactions"""
+    global _schema_normalized
+    if not _schema_normalized:
+        # The migration is one-way, so only a negative answer needs re-checking
+        cursor.execute('''
+            SELECT TABLE_TYPE FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Data'
+        ''')
+        row = cursor.fetchone()
+        _schema_normalized = row is not None and row[0] == 'VIEW'
+    return _schema_normalized
+
+def write_transactions(connection, cursor, rows):
+    """Insert many transactions in the caller's open transaction (caller commits)
+
+    rows are dicts with user_id, Date, Mode, Category, Amount, income_expense
+    and Currency. Returns {user_id: (old, new) data version} for applying the
+    inserts to cached aggregates once committed.
+    """
+    create_vocabulary_tables(connection)
+    create_support_tables(connection)
+    for kind, column in LABEL_COLUMNS:
+        for label in sorted({row[column] for row in rows}):
+            add_to_vocabulary(cursor, kind, label)
+    # Lock version rows in a fixed order so concurrent batches can't deadlock
+    versions = {user_id: bump_data_version(cursor, user_id) for user_id in sorted({row['user_id'] for row in rows})}
+
+    if is_schema_normalized(cursor):
+        # Each label's id in one query per dimension, then one multi-row insert
+        ids = {kind: vocabulary_ids(cursor, kind, [row[column] for row in rows]) for kind, column in LABEL_COLUMNS}
+        missing = sorted({row[column] for kind, column in LABEL_COLUMNS for row in rows if row[column] not in ids[kind]})
+        if missing:
+            raise DataError(f"Labels missing from the dimension tables: {missing}")
+        cursor.executemany('''
+            INSERT INTO Transactions (id, Date, mode_id, category_id, Amount, type_id, currency_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', [(row['user_id'], row['Date'], ids['modes'][row['Mode']], ids['categories'][row['Category']], row['Amount'],
+               ids['types'][row['income_expense']], ids['currencies'][row['Currency']]) for row in rows])
+    else:
+        cursor.executemany('''
+            INSERT INTO Data (id, Date, Mode, Category, Amount, income_expense, Currency)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', [(row['user_id'], row['Date'], row['Mode'], row['Category'], row['Amount'], row['income_expense'],
+               row['Currency']) for row in rows])
+    if cursor.rowcount != len(rows):
+        raise DataError(f"Inserted {cursor.rowcount} of {len(rows)} transactions")
+    for user_id in versions:
+        record_recurring_changes(cursor, user_id, [], [row for row in rows if row['user_id'] == user_id])
+    return versions
+
+def _apply_committed_changes(user_id, versions, removed, added):
+    """After commit: the new version is current here, and cached aggregates move to it"""
+    remember_data_version(user_id, versions[1])
+    apply_transaction_changes(user_id, versions, removed, added)
+
+def apply_inserted_transactions(versions, rows):
+    """Add committed rows to each user's cached aggregates"""
+    for user_id, user_versions in versions.items():
+        _apply_committed_changes(user_id, user_versions, [], [row for row in rows if row['user_id'] == user_id])
+
 def insert_transaction(user_id, date, mode, category, amount, income_expense, currency):
     """Insert a new transaction into the MySQL database"""
     connection = get_mysql_connection()
@@ -205,20 +639,152 @@ def insert_transaction(user_id, date, mode, category, amount, income_expense, cu
     
     try:
         cursor = connection.cursor()
-        cursor.execute('''
-            INSERT INTO Data (id, Date, Mode, Category, Amount, income_expense, Currency)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ''', (user_id, date, mode, category, amount, income_expense, currency))
+        rows = [{
+            'user_id': user_id, 'Date': date, 'Mode': mode, 'Category': category, 'Amount': amount,
+            'income_expense': income_expense, 'Currency': currency
+        }]
+        versions = write_transactions(connection, cursor, rows)
         
         connection.commit()
         cursor.close()
         connection.close()
+        apply_inserted_transactions(versions, rows)
         return True
     except Error as e:
         st.error(f"Error inserting transaction: {e}")
         connection.close()
         return False
 
+def _fetch_transactions_by_id(cursor, user_id, txn_ids):
+    """The user's Data rows with the given txn_ids, as dicts"""
+    placeholders = ', '.join(['%s'] * len(txn_ids))
+    cursor.execute(f'''
+        SELECT txn_id, Date, Mode, Category, Amount, income_expense, Currency
+        FROM Data
+        WHERE id = %s AND txn_id IN ({placeholders})
+    ''', (user_id, *txn_ids))
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def update_transaction(user_id, txn_id, date, mode, category, amount, income_expense, currency):
+    """Edit one transaction and apply the difference to cached aggregates"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
+        if not is_schema_normalized(cursor):
+            st.error("Editing needs transaction ids. Run `python migrations.py primary_key` first.")
+            connection.close()
+            return False
+
+        create_vocabulary_tables(connection)
+        create_support_tables(connection)
+        versions = bump_data_version(cursor, user_id, rewrite=True)
+        old_rows = _fetch_transactions_by_id(cursor, user_id, [txn_id])
+        if not old_rows:
+            connection.rollback()
+            st.error("Transaction not found.")
+            connection.close()
+            return False
+
+        add_to_vocabulary(cursor, 'categories', category)
+        add_to_vocabulary(cursor, 'modes', mode)
+        add_to_vocabulary(cursor, 'currencies', currency)
+        add_to_vocabulary(cursor, 'types', income_expense)
+        cursor.execute('''
+            UPDATE Transactions
+            SET Date = %s,
+                Amount = %s,
+                mode_id = (SELECT id FROM Modes WHERE name = %s),
+                category_id = (SELECT id FROM Categories WHERE name = %s),
+                type_id = (SELECT id FROM Transaction_Types WHERE name = %s),
+                currency_id = (SELECT id FROM Currencies WHERE name = %s)
+            WHERE id = %s AND txn_id = %s
+        ''', (date, amount, mode, category, income_expense, currency, user_id, txn_id))
+        new_row = {
+            'Date': date, 'Mode': mode, 'Category': category, 'Amount': amount,
+            'income_expense': income_expense, 'Currency': currency
+        }
+        record_recurring_changes(cursor, user_id, old_rows, [new_row])
+        
+        connection.commit()
+        cursor.close()
+        connection.close()
+        _apply_committed_changes(user_id, versions, old_rows, [new_row])
+        return True
+    except Error as e:
+        st.error(f"Error updating transaction: {e}")
+        connection.close()
+        return False
+
+def delete_transactions(user_id, txn_ids):
+    """Delete the given transactions and subtract them from cached aggregates; returns how many were deleted"""
+    if not txn_ids:
+        return 0
+    connection = get_mysql_connection()
+    if connection is None:
+        return 0
+    
+    try:
+        cursor = connection.cursor()
+        if not is_schema_normalized(cursor):
+            st.error("Deleting needs transaction ids. Run `python migrations.py primary_key` first.")
+            connection.close()
+            return 0
+
+        create_support_tables(connection)
+        versions = bump_data_version(cursor, user_id, rewrite=True)
+        old_rows = _fetch_transactions_by_id(cursor, user_id, list(txn_ids))
+        placeholders = ', '.join(['%s'] * len(txn_ids))
+        cursor.execute(f'''
+            DELETE FROM Transactions WHERE id = %s AND txn_id IN ({placeholders})
+        ''', (user_id, *txn_ids))
+        record_recurring_changes(cursor, user_id, old_rows, [])
+        
+        connection.commit()
+        cursor.close()
+        connection.close()
+        _apply_committed_changes(user_id, versions, old_rows, [])
+        return len(old_rows)
+    except Error as e:
+        st.error(f"Error deleting transactions: {e}")
+        connection.close()
+        return 0
+
+# Column dtypes of get_recurring_transactions
+RECURRING_DTYPES = {
+    'category': 'category', 'mode': 'category', 'income_expense': 'category', 'typical_amount': 'float64',
+    'period_days': 'float64', 'occurrences': 'int32', 'last_date': 'datetime64[ns]', 'next_expected': 'datetime64[ns]'
+}
+
+def get_recurring_transactions(user_id):
+    """A user's detected recurring transactions, next expected first (see recurring.py)"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return pd.DataFrame()
+    
+    try:
+        cursor = connection.cursor()
+        query = '''
+            SELECT category, mode, income_expense, amount_sum / transactions AS typical_amount, period_days,
+                   occurrences, last_date, next_expected
+            FROM Recurring_Patterns
+            WHERE user_id = %s AND is_recurring = 1
+            ORDER BY next_expected
+        '''
+        df = fetch_typed_frame(cursor, query, (int(user_id),), list(RECURRING_DTYPES), RECURRING_DTYPES)
+        cursor.close()
+        if not df.empty:
+            df.insert(4, 'period', df['period_days'].map(period_name))
+        return df
+    except Error as e:
+        st.error(f"Error fetching recurring transactions: {e}")
+        return pd.DataFrame()
+    finally:
+        connection.close()
+
 def validate_email(email):
     """Basic email validation"""
     import re
@@ -234,18 +800,18 @@ def validate_phone(phone):
     return 10 <= len(digits_only) <= 15
 
 def get_next_user_id():
-    """Get the next available user ID by counting existing users"""
+    """Get the user ID the next signup will most likely receive (ids come from AUTO_INCREMENT)"""
     connection = get_mysql_connection()
     if connection is None:
         return 1
     
     try:
         cursor = connection.cursor()
-        cursor.execute('SELECT COUNT(*) FROM Users')
-        count = cursor.fetchone()[0]
+        cursor.execute('SELECT COALESCE(MAX(user_id), 0) FROM Users')
+        max_user_id = cursor.fetchone()[0]
         cursor.close()
         connection.close()
-        return count + 1
+        return max_user_id + 1
     except Error as e:
         st.error(f"Error getting user count: {e}")
         connection.close()
@@ -259,37 +825,44 @@ def check_email_exists(email):
     
     try:
         cursor = connection.cursor()
-        cursor.execute('SELECT COUNT(*) FROM Users WHERE email = %s', (email,))
-        count = cursor.fetchone()[0]
+        cursor.execute('SELECT EXISTS(SELECT 1 FROM Users WHERE email = %s)', (email.strip().lower(),))
+        exists = cursor.fetchone()[0]
         cursor.close()
         connection.close()
-        return count > 0
+        return bool(exists)
     except Error as e:
         st.error(f"Error checking email: {e}")
         connection.close()
         return False
 
 def register_user(name, age, email, password, phone_number):
-    """Register a new user in the database"""
+    """Register a new user in the database
+
+    Returns the new user_id, or False if the email is taken or the insert fails.
+    """
     connection = get_mysql_connection()
     if connection is None:
         return False
     
     try:
-        # Get next user ID
-        next_user_id = get_next_user_id()
-        
+        prepare_users_table(connection)
         cursor = connection.cursor()
         cursor.execute('''
-            INSERT INTO Users (user_id, Name, Age, email, password, phone_number)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (next_user_id, name, age, email, password, phone_number))
+            INSERT INTO Users (Name, Age, email, password, phone_number)
+            VALUES (%s, %s, %s, %s, %s)
+        ''', (name, age, email.strip().lower(), hash_password(password), phone_number))
+        user_id = cursor.lastrowid
         
         connection.commit()
         cursor.close()
         connection.close()
-        return True
+        return user_id
+    except IntegrityError:
+        # The unique email index caught a signup racing another with the same email
+        st.error("Email already exists. Please use a different email or login.")
+        connection.close()
+        return False
     except Error as e:
         st.error(f"Error registering user: {e}")
         connection.close()
-        return False 
\ No newline at end of file
+        return False
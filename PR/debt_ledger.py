@@ -0,0 +1,238 @@
+"""
+Append-only debt ledger with periodic balance snapshots
+
+Every change to a debt balance is an event row in Debt_Ledger: the opening
+balance, payments (negative), interest accruals (positive) and manual
+adjustments. Events are never updated or deleted. After every
+LEDGER_SNAPSHOT_EVERY events the running balance is written to
+Debt_Balance_Snapshots. The balance at any date is then the last snapshot on
+or before that date, found with one primary-key seek, plus the sum of at most
+LEDGER_SNAPSHOT_EVERY events after it. The replay length stays fixed however
+many payments a debt has.
+
+Debts.current_balance stays as a projection of the ledger, so list and
+strategy queries keep reading a single column. Debts recorded before the
+ledger existed are moved onto it (backfill_ledger) the first time anything
+writes to them, so the projection never starts from an empty ledger.
+"""
+
+import streamlit as st
+import pandas as pd
+from datetime import date
+from mysql.connector import Error
+from database import get_mysql_connection
+
+# Events between snapshots; the longest tail a balance query replays
+LEDGER_SNAPSHOT_EVERY = 100
+
+# Position before the first event of every debt
+_LEDGER_START = (date(1000, 1, 1), 0, 0.0, 0)
+
+def _latest_snapshot(cursor, debt_id, as_of=None):
+    """(snapshot_date, last_event_id, balance, event_count) of the last snapshot on or before as_of"""
+    if as_of is None:
+        cursor.execute('''
+            SELECT snapshot_date, last_event_id, balance, event_count FROM Debt_Balance_Snapshots
+            WHERE debt_id = %s ORDER BY snapshot_date DESC, last_event_id DESC LIMIT 1
+        ''', (debt_id,))
+    else:
+        cursor.execute('''
+            SELECT snapshot_date, last_event_id, balance, event_count FROM Debt_Balance_Snapshots
+            WHERE debt_id = %s AND snapshot_date <= %s
+            ORDER BY snapshot_date DESC, last_event_id DESC LIMIT 1
+        ''', (debt_id, as_of))
+    row = cursor.fetchone()
+    return (row[0], row[1], float(row[2]), row[3]) if row else _LEDGER_START
+
+def balance_with_tail(cursor, debt_id, as_of=None):
+    """(balance, events replayed) for a debt at the end of as_of, or now when as_of is None"""
+    snapshot_date, last_event_id, balance, _ = _latest_snapshot(cursor, debt_id, as_of)
+    # Events ordered after the snapshot's position (event_date, event_id)
+    cursor.execute('''
+        SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM Debt_Ledger
+        WHERE debt_id = %s AND event_date >= %s AND event_date <= %s
+          AND (event_date > %s OR event_id > %s)
+    ''', (debt_id, snapshot_date, as_of or date.max, snapshot_date, last_event_id))
+    tail_sum, tail_events = cursor.fetchone()
+    return round(balance + float(tail_sum), 2), tail_events
+
+def debt_balance_at(cursor, debt_id, as_of=None):
+    """Balance of a debt at the end of as_of (a date), or now when as_of is None"""
+    return balance_with_tail(cursor, debt_id, as_of)[0]
+
+def extend_debt_snapshots(cursor, debt_id):
+    """Snapshot every LEDGER_SNAPSHOT_EVERY-th event after the latest snapshot"""
+    snapshot_date, last_event_id, balance, event_count = _latest_snapshot(cursor, debt_id)
+    cursor.execute('''
+        INSERT INTO Debt_Balance_Snapshots (debt_id, snapshot_date, last_event_id, balance, event_count)
+        SELECT debt_id, event_date, event_id, %s + running_total, %s + position
+        FROM (
+            SELECT debt_id, event_date, event_id,
+                   SUM(amount) OVER w AS running_total,
+                   ROW_NUMBER() OVER w AS position
+            FROM Debt_Ledger
+            WHERE debt_id = %s AND event_date >= %s AND (event_date > %s OR event_id > %s)
+            WINDOW w AS (ORDER BY event_date, event_id ROWS UNBOUNDED PRECEDING)
+        ) tail
+        WHERE MOD(position, %s) = 0
+    ''', (balance, event_count, debt_id, snapshot_date, snapshot_date, last_event_id, LEDGER_SNAPSHOT_EVERY))
+    return cursor.rowcount
+
+def rebuild_debt_snapshots(cursor, debt_id, since=None):
+    """Drop snapshots after since (all of them when None) and rebuild them from the ledger"""
+    if since is None:
+        cursor.execute('DELETE FROM Debt_Balance_Snapshots WHERE debt_id = %s', (debt_id,))
+    else:
+        cursor.execute('DELETE FROM Debt_Balance_Snapshots WHERE debt_id = %s AND snapshot_date > %s',
+                       (debt_id, since))
+    return extend_debt_snapshots(cursor, debt_id)
+
+def extend_snapshots_for_users(cursor, first_user_id, last_user_id):
+    """extend_debt_snapshots for every debt of a user-id range, in one statement"""
+    cursor.execute('''
+        INSERT INTO Debt_Balance_Snapshots (debt_id, snapshot_date, last_event_id, balance, event_count)
+        SELECT debt_id, event_date, event_id, base_balance + running_total, base_count + position
+        FROM (
+            SELECT l.debt_id, l.event_date, l.event_id, base.balance AS base_balance, base.event_count AS base_count,
+                   SUM(l.amount) OVER w AS running_total,
+                   ROW_NUMBER() OVER w AS position
+            FROM (
+                SELECT d.debt_id,
+                       COALESCE(s.snapshot_date, %s) AS snapshot_date, COALESCE(s.last_event_id, 0) AS last_event_id,
+                       COALESCE(s.balance, 0) AS balance, COALESCE(s.event_count, 0) AS event_count
+                FROM Debts d
+                LEFT JOIN (
+                    SELECT bs.debt_id, bs.snapshot_date, bs.last_event_id, bs.balance, bs.event_count,
+                           ROW_NUMBER() OVER (PARTITION BY bs.debt_id
+                                              ORDER BY bs.snapshot_date DESC, bs.last_event_id DESC) AS newest
+                    FROM Debt_Balance_Snapshots bs JOIN Debts sd ON sd.debt_id = bs.debt_id
+                    WHERE sd.user_id BETWEEN %s AND %s
+                ) s ON s.debt_id = d.debt_id AND s.newest = 1
+                WHERE d.user_id BETWEEN %s AND %s
+            ) base
+            JOIN Debt_Ledger l ON l.debt_id = base.debt_id AND l.event_date >= base.snapshot_date
+                AND (l.event_date > base.snapshot_date OR l.event_id > base.last_event_id)
+            WINDOW w AS (PARTITION BY l.debt_id ORDER BY l.event_date, l.event_id ROWS UNBOUNDED PRECEDING)
+        ) tail
+        WHERE MOD(position, %s) = 0
+    ''', (_LEDGER_START[0], first_user_id, last_user_id, first_user_id, last_user_id, LEDGER_SNAPSHOT_EVERY))
+    return cursor.rowcount
+
+def backfill_ledger(cursor, condition, params):
+    """Write the history of debts that match condition (on Debts d) and have no ledger events yet
+
+    Each such debt gets its opening balance, one event per Debt_Payments row
+    and, where old payments were clamped at zero, an adjustment that
+    reconciles the ledger with Debts.current_balance. Its snapshots are then
+    rebuilt. Callers hold the debts' row locks. Returns the debt ids moved
+    onto the ledger.
+    """
+    cursor.execute(f'''
+        SELECT d.debt_id FROM Debts d
+        WHERE {condition} AND NOT EXISTS (SELECT 1 FROM Debt_Ledger l WHERE l.debt_id = d.debt_id)
+    ''', params)
+    debt_ids = [row[0] for row in cursor.fetchall()]
+    if not debt_ids:
+        return []
+
+    placeholders = ', '.join(['%s'] * len(debt_ids))
+    cursor.execute(f'''
+        INSERT IGNORE INTO Debt_Ledger (debt_id, user_id, event_date, event_type, amount, source_key)
+        SELECT debt_id, user_id, start_date, 'Opening', original_amount, 'opening'
+        FROM Debts WHERE debt_id IN ({placeholders})
+    ''', debt_ids)
+    cursor.execute(f'''
+        INSERT IGNORE INTO Debt_Ledger (debt_id, user_id, event_date, event_type, amount, source_key)
+        SELECT debt_id, user_id, payment_date, 'Payment', -payment_amount, CONCAT('payment:', payment_id)
+        FROM Debt_Payments WHERE debt_id IN ({placeholders})
+    ''', debt_ids)
+    cursor.execute(f'''
+        INSERT IGNORE INTO Debt_Ledger (debt_id, user_id, event_date, event_type, amount, source_key)
+        SELECT d.debt_id, d.user_id, CURDATE(), 'Adjustment', d.current_balance - SUM(l.amount),
+               'backfill-adjustment'
+        FROM Debts d JOIN Debt_Ledger l ON l.debt_id = d.debt_id
+        WHERE d.debt_id IN ({placeholders})
+        GROUP BY d.debt_id, d.user_id, d.current_balance
+        HAVING d.current_balance <> SUM(l.amount)
+    ''', debt_ids)
+    for debt_id in debt_ids:
+        rebuild_debt_snapshots(cursor, debt_id)
+    return debt_ids
+
+def append_debt_events(cursor, debt_id, user_id, events):
+    """Append (event_date, event_type, amount, source_key) events to a debt; returns its new balance
+
+    The debt row is locked for the rest of the caller's transaction, so
+    concurrent appends to one debt serialize. Events whose source_key is
+    already in the ledger are skipped, so replaying a payment or an accrual
+    is harmless. An event dated before the latest snapshot invalidates the
+    snapshots after it; they are rebuilt here. The caller commits. Returns
+    None when the debt doesn't belong to user_id.
+
+    A debt without ledger events is backfilled first, unless events carries
+    its opening (a debt being created). Callers that insert the event's
+    source row (a Debt_Payments row) before appending backfill before that
+    insert, so the backfill doesn't pick the new row up.
+    """
+    cursor.execute('SELECT debt_id FROM Debts WHERE debt_id = %s AND user_id = %s FOR UPDATE',
+                   (debt_id, user_id))
+    if cursor.fetchone() is None:
+        return None
+    if not any(source_key == 'opening' for _, _, _, source_key in events):
+        backfill_ledger(cursor, 'd.debt_id = %s', (debt_id,))
+
+    if events:
+        cursor.executemany('''
+            INSERT IGNORE INTO Debt_Ledger (debt_id, user_id, event_date, event_type, amount, source_key)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        ''', [(debt_id, user_id, event_date, event_type, round(float(amount), 2), source_key)
+              for event_date, event_type, amount, source_key in events])
+
+        earliest = min(event[0] for event in events)
+        latest_snapshot_date = _latest_snapshot(cursor, debt_id)[0]
+        if earliest < latest_snapshot_date:
+            rebuild_debt_snapshots(cursor, debt_id, since=earliest)
+        else:
+            extend_debt_snapshots(cursor, debt_id)
+
+    balance = debt_balance_at(cursor, debt_id)
+    cursor.execute('UPDATE Debts SET current_balance = %s WHERE debt_id = %s', (max(balance, 0.0), debt_id))
+    return balance
+
+def get_debt_balance_at(user_id, debt_id, as_of):
+    """Balance of one of the user's debts at the end of as_of; None on error"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return None
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1 FROM Debts WHERE debt_id = %s AND user_id = %s', (int(debt_id), int(user_id)))
+        balance = debt_balance_at(cursor, int(debt_id), as_of) if cursor.fetchone() else None
+        cursor.close()
+        connection.close()
+        return balance
+    except Error as e:
+        st.error(f"Error reading debt balance: {e}")
+        return None
+
+def get_debt_ledger(user_id, debt_id):
+    """A debt's events in order, with the running balance after each"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return pd.DataFrame()
+
+    try:
+        query = '''
+            SELECT event_date, event_type, amount,
+                   SUM(amount) OVER (ORDER BY event_date, event_id ROWS UNBOUNDED PRECEDING) AS balance
+            FROM Debt_Ledger
+            WHERE debt_id = %s AND user_id = %s
+            ORDER BY event_date, event_id
+        '''
+        df = pd.read_sql_query(query, connection, params=(int(debt_id), int(user_id)))
+        connection.close()
+        return df
+    except Exception as e:
+        st.error(f"Error fetching debt ledger: {e}")
+        return pd.DataFrame()
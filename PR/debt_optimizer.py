@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Longest plan simulated, in months
+PLAN_MAX_MONTHS = 360
+
+# Balances below this count as paid off
+PAID_OFF_EPSILON = 0.005
+
+def plan_debt_payments(balances, annual_rates, minimum_payments, monthly_budget,
+                       max_months=PLAN_MAX_MONTHS, priority='avalanche'):
+    """Allocate a fixed monthly budget across debts; returns the month-by-month schedule
+
+    Each month interest (annual_rate / 12) is added, every debt receives its
+    minimum payment (or its whole balance if smaller), and the rest of the
+    budget goes to debts in priority order. 'avalanche' ranks by rate, highest
+    first, with ties going to the smaller balance. 'snowball' ranks by balance,
+    smallest first. A sequence of debt indices sets the order explicitly. A
+    paid-off debt's minimum is freed for the others.
+
+    With fixed rates and minimums, avalanche is optimal both for total interest
+    and for time to debt-free. Moving a rupee of extra payment from a debt with
+    rate r_low to one with rate r_high >= r_low keeps every minimum satisfied.
+    It leaves the total balance the next month lower by (r_high - r_low) and
+    never higher afterwards. So no feasible schedule has a lower total balance
+    in any month than the greedy one. Less balance means less interest, and it
+    reaches zero first. The plan is the greedy schedule simulated with one
+    vectorized step per month.
+
+    Returns None when the budget doesn't cover the minimum payments. Otherwise
+    returns a dict:
+
+      payments, interest, balances: (months, debts) arrays, balances after payment
+      order: debt indices in priority order
+      payoff_month: per debt, the 1-based month it reaches zero (0 if not within max_months)
+      months_to_debt_free: months until every balance is zero, or None
+      total_interest, total_paid
+    """
+    balance = np.asarray(balances, dtype='float64').copy()
+    rates = np.asarray(annual_rates, dtype='float64') / 100 / 12
+    minimums = np.asarray(minimum_payments, dtype='float64')
+    if monthly_budget + PAID_OFF_EPSILON < np.minimum(minimums, balance * (1 + rates)).sum():
+        return None
+
+    if isinstance(priority, str):
+        order = np.argsort(balance, kind='stable') if priority == 'snowball' else np.lexsort((balance, -rates))
+    else:
+        order = np.asarray(priority)
+
+    debts = len(balance)
+    payments = np.zeros((max_months, debts))
+    interest = np.zeros((max_months, debts))
+    balances_after = np.zeros((max_months, debts))
+    months = 0
+    while months < max_months and balance.sum() > PAID_OFF_EPSILON * debts:
+        interest[months] = balance * rates
+        balance += interest[months]
+        payment = np.minimum(minimums, balance)
+        need = (balance - payment)[order]
+        # Extra budget fills debts in priority order: each takes what earlier ones left, up to its need
+        extra = max(monthly_budget - payment.sum(), 0.0)
+        payment[order] += np.clip(extra - (np.cumsum(need) - need), 0.0, need)
+        balance -= payment
+        balance[balance < PAID_OFF_EPSILON] = 0.0
+        payments[months] = payment
+        balances_after[months] = balance
+        months += 1
+
+    paid_off = balances_after[:months] == 0.0
+    payoff_month = np.where(paid_off.any(axis=0), paid_off.argmax(axis=0) + 1, 0)
+    payoff_month[np.asarray(balances, dtype='float64') <= PAID_OFF_EPSILON] = 0
+    return {
+        'payments': payments[:months],
+        'interest': interest[:months],
+        'balances': balances_after[:months],
+        'order': order,
+        'payoff_month': payoff_month,
+        'months_to_debt_free': months if balance.sum() <= PAID_OFF_EPSILON * debts else None,
+        'total_interest': float(interest[:months].sum()),
+        'total_paid': float(payments[:months].sum())
+    }
+
+def plan_frame(plan, names, field='balances'):
+    """One plan array as a month-indexed DataFrame with a column per debt"""
+    return pd.DataFrame(plan[field], columns=list(names),
+                        index=pd.RangeIndex(1, len(plan[field]) + 1, name='Month'))
@@ -1,63 +1,20 @@
 import streamlit as st
 import pandas as pd
-from database import get_mysql_connection
+import numpy as np
+from database import get_mysql_connection, get_data_version, bump_data_version, remember_data_version, BASE_CURRENCY
+from aggregate_cache import cached_aggregate, update_cached_aggregates
+from transaction_deltas import AGGREGATE_DELTAS
+from schema import bootstrap_schema
+from debt_ledger import append_debt_events, backfill_ledger, get_debt_balance_at, get_debt_ledger
+from history_pages import fetch_history_page, render_history_pages, HISTORY_PAGE_SIZE
+from debt_optimizer import plan_debt_payments, plan_frame, PLAN_MAX_MONTHS
 from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, date
 import plotly.express as px
 
 def create_debt_tables():
-    """Create debt tracking tables if they don't exist"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Create Debts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Debts (
-                debt_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                debt_name VARCHAR(255) NOT NULL,
-                lender_name VARCHAR(255) NOT NULL,
-                original_amount DECIMAL(15,2) NOT NULL,
-                current_balance DECIMAL(15,2) NOT NULL,
-                interest_rate DECIMAL(5,2) NOT NULL,
-                interest_type ENUM('Simple', 'Compound') DEFAULT 'Simple',
-                payment_frequency ENUM('Monthly', 'Weekly', 'Daily') DEFAULT 'Monthly',
-                start_date DATE NOT NULL,
-                due_date DATE,
-                minimum_payment DECIMAL(15,2) DEFAULT 0,
-                debt_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        # Create Debt_Payments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Debt_Payments (
-                payment_id INT AUTO_INCREMENT PRIMARY KEY,
-                debt_id INT NOT NULL,
-                user_id INT NOT NULL,
-                payment_amount DECIMAL(15,2) NOT NULL,
-                payment_date DATE NOT NULL,
-                payment_type ENUM('Regular', 'Extra', 'Lump Sum') DEFAULT 'Regular',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (debt_id) REFERENCES Debts(debt_id),
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-    except Exception as e:
-        st.error(f"Error creating debt tables: {e}")
+    """Make sure the debt tables exist (they are created by the schema bootstrap)"""
+    bootstrap_schema()
 
 def add_debt(user_id, debt_name, lender_name, original_amount, current_balance, 
               interest_rate, interest_type, payment_frequency, start_date, due_date, 
@@ -86,37 +43,119 @@ def add_debt(user_id, debt_name, lender_name, original_amount, current_balance,
               interest_rate, interest_type, payment_frequency, start_date, due_date,
               minimum_payment, debt_priority, notes))
         
+        # Opening balance, plus whatever was already repaid before the debt was tracked
+        debt_id = cursor.lastrowid
+        events = [(start_date, 'Opening', original_amount, 'opening')]
+        if current_balance != original_amount:
+            events.append((max(start_date, date.today()), 'Adjustment', current_balance - original_amount, 'opening-adjustment'))
+        append_debt_events(cursor, debt_id, user_id, events)
+        versions = bump_data_version(cursor, user_id)
+        
         connection.commit()
         cursor.close()
         connection.close()
+        apply_debt_changes(user_id, versions)
         return True
         
     except Exception as e:
         st.error(f"Error adding debt: {e}")
         return False
 
+# Columns of get_user_debts, in order
+DEBT_COLUMNS = ['debt_id', 'debt_name', 'lender_name', 'original_amount', 'current_balance',
+                'interest_rate', 'interest_type', 'payment_frequency', 'start_date', 'due_date',
+                'minimum_payment', 'debt_priority', 'notes', 'days_remaining']
+
+# Cached aggregates derived from Debts; any debt write drops them
+DEBT_AGGREGATES = {'debt_overview'}
+
+# Transaction writes don't change debts, so they carry the overview forward unchanged
+AGGREGATE_DELTAS['debt_overview'] = lambda result, changes: result
+
+def apply_debt_changes(user_id, versions):
+    """After a committed debt write: drop the user's cached debt aggregates, keep the transaction ones"""
+    remember_data_version(user_id, versions[1])
+    update_cached_aggregates(user_id, versions[0], versions[1],
+                             lambda name, base_currency, result: None if name in DEBT_AGGREGATES else result)
+
+def get_debt_overview(user_id):
+    """Active debts with totals, per-priority and per-lender aggregates, fetched in one query
+
+    Returns {'debts', 'by_priority', 'by_lender'} frames and a 'totals' dict
+    (total_debt, total_original, avg_interest, debt_count, next_due_days,
+    overdue). Cached until the user's data version changes, which every
+    debt, payment and accrual write bumps. {} on error.
+    """
+    def compute():
+        connection = get_mysql_connection()
+        if connection is None:
+            return {}
+
+        try:
+            active = 'FROM Debts WHERE user_id = %s AND current_balance > 0'
+            days = 'DATEDIFF(due_date, CURDATE())'
+            groups = f'''
+                SUM(original_amount), SUM(current_balance), AVG(interest_rate), NULL, NULL, NULL, NULL,
+                NULL, {{priority}}, NULL, MIN({days}), COUNT(*), SUM({days} < 0)
+            '''
+            query = f'''
+                SELECT 'debt' AS level, debt_priority + 0 AS priority_rank, debt_id, debt_name, lender_name,
+                       original_amount, current_balance, interest_rate, interest_type, payment_frequency,
+                       start_date, due_date, minimum_payment, debt_priority, notes,
+                       {days} AS days_remaining, 1 AS debt_count, {days} < 0 AS overdue
+                {active}
+                UNION ALL
+                SELECT 'priority', debt_priority + 0, NULL, NULL, NULL, {groups.format(priority='debt_priority')}
+                {active} GROUP BY debt_priority
+                UNION ALL
+                SELECT 'lender', NULL, NULL, NULL, lender_name, {groups.format(priority='NULL')}
+                {active} GROUP BY lender_name
+                UNION ALL
+                SELECT 'total', NULL, NULL, NULL, NULL, {groups.format(priority='NULL')}
+                {active}
+                ORDER BY level, priority_rank DESC, interest_rate DESC
+            '''
+            df = pd.read_sql_query(query, connection, params=(user_id,) * 4)
+        except Exception as e:
+            st.error(f"Error fetching debts: {e}")
+            return {}
+        finally:
+            connection.close()
+
+        df = df.reindex(columns=['level', 'priority_rank'] + DEBT_COLUMNS + ['debt_count', 'overdue'])
+        numeric = ['original_amount', 'current_balance', 'interest_rate', 'minimum_payment', 'days_remaining',
+                   'debt_count', 'overdue']
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce')
+        debts = df[df['level'] == 'debt'][DEBT_COLUMNS].reset_index(drop=True)
+        total = df[df['level'] == 'total'].iloc[0] if (df['level'] == 'total').any() else None
+        summary = ['current_balance', 'original_amount', 'interest_rate', 'days_remaining', 'debt_count']
+        return {
+            'debts': debts,
+            'by_priority': df[df['level'] == 'priority'][['debt_priority'] + summary].reset_index(drop=True),
+            'by_lender': df[df['level'] == 'lender'][['lender_name'] + summary].reset_index(drop=True),
+            'totals': {
+                'total_debt': float(total['current_balance']) if len(debts) else 0.0,
+                'total_original': float(total['original_amount']) if len(debts) else 0.0,
+                'avg_interest': float(total['interest_rate']) if len(debts) else 0.0,
+                'debt_count': len(debts),
+                'next_due_days': None if not len(debts) or pd.isna(total['days_remaining']) else int(total['days_remaining']),
+                'overdue': int(total['overdue'] or 0) if len(debts) else 0
+            }
+        }
+
+    # Debt amounts aren't converted; the key's currency slot matches the other aggregates'
+    return cached_aggregate(('debt_overview', user_id, BASE_CURRENCY), get_data_version(user_id), compute)
+
 def get_user_debts(user_id):
     """Get all debts for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        query = '''
-            SELECT debt_id, debt_name, lender_name, original_amount, current_balance,
-                   interest_rate, interest_type, payment_frequency, start_date, due_date,
-                   minimum_payment, debt_priority, notes,
-                   DATEDIFF(due_date, CURDATE()) as days_remaining
-            FROM Debts 
-            WHERE user_id = %s AND current_balance > 0
-            ORDER BY debt_priority DESC, interest_rate DESC
-        '''
-        df = pd.read_sql_query(query, connection, params=(user_id,))
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching debts: {e}")
-        return pd.DataFrame()
+    overview = get_debt_overview(user_id)
+    return overview['debts'] if overview else pd.DataFrame()
+
+def format_days_remaining(days):
+    """'N days', 'Due today', 'Overdue' or '' (no due date) for a column of day counts"""
+    days = pd.to_numeric(days, errors='coerce')
+    labels = np.select([days > 0, days < 0, days == 0], [days.fillna(0).astype('int64').astype(str) + " days", "Overdue", "Due today"], "")
+    return pd.Series(labels, index=days.index)
 
 def add_debt_payment(user_id, debt_id, payment_amount, payment_date, payment_type, notes):
     """Add a debt payment"""
@@ -132,6 +171,17 @@ def add_debt_payment(user_id, debt_id, payment_amount, payment_date, payment_typ
         user_id = int(user_id)
         payment_amount = float(payment_amount)
         
+        # Lock the debt before reading its balance so concurrent payments can't overpay it
+        cursor.execute('SELECT current_balance FROM Debts WHERE debt_id = %s AND user_id = %s FOR UPDATE',
+                       (debt_id, user_id))
+        row = cursor.fetchone()
+        if row is None:
+            connection.rollback()
+            connection.close()
+            return False
+        # A debt from before the ledger gets its history first, so this payment isn't part of it
+        backfill_ledger(cursor, 'd.debt_id = %s', (debt_id,))
+        
         # Add payment record
         cursor.execute('''
             INSERT INTO Debt_Payments (debt_id, user_id, payment_amount, payment_date, 
@@ -139,55 +189,30 @@ def add_debt_payment(user_id, debt_id, payment_amount, payment_date, payment_typ
             VALUES (%s, %s, %s, %s, %s, %s)
         ''', (debt_id, user_id, payment_amount, payment_date, payment_type, notes))
         
-        # Update debt balance
+        # The ledger event also updates Debts.current_balance; it never takes the debt below zero
+        applied = min(payment_amount, float(row[0]))
+        append_debt_events(cursor, debt_id, user_id,
+                           [(payment_date, 'Payment', -applied, f"payment:{cursor.lastrowid}")])
+        # Unpaid interest is paid off first (see interest_accrual.py)
         cursor.execute('''
-            UPDATE Debts 
-            SET current_balance = GREATEST(0, current_balance - %s)
-            WHERE debt_id = %s AND user_id = %s
-        ''', (payment_amount, debt_id, user_id))
+            UPDATE Debts SET uncapitalized_interest = GREATEST(0, uncapitalized_interest - %s) WHERE debt_id = %s
+        ''', (applied, debt_id))
+        versions = bump_data_version(cursor, user_id)
         
         connection.commit()
         cursor.close()
         connection.close()
+        apply_debt_changes(user_id, versions)
         return True
         
     except Exception as e:
         st.error(f"Error adding debt payment: {e}")
         return False
 
-def get_debt_payments(user_id, debt_id=None):
-    """Get debt payments for a user"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return pd.DataFrame()
-    
-    try:
-        if debt_id:
-            query = '''
-                SELECT dp.payment_id, dp.payment_amount, dp.payment_date, dp.payment_type,
-                       dp.notes, d.debt_name, d.lender_name
-                FROM Debt_Payments dp
-                JOIN Debts d ON dp.debt_id = d.debt_id
-                WHERE dp.user_id = %s AND dp.debt_id = %s
-                ORDER BY dp.payment_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id, debt_id))
-        else:
-            query = '''
-                SELECT dp.payment_id, dp.payment_amount, dp.payment_date, dp.payment_type,
-                       dp.notes, d.debt_name, d.lender_name
-                FROM Debt_Payments dp
-                JOIN Debts d ON dp.debt_id = d.debt_id
-                WHERE dp.user_id = %s
-                ORDER BY dp.payment_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id,))
-        
-        connection.close()
-        return df
-    except Exception as e:
-        st.error(f"Error fetching debt payments: {e}")
-        return pd.DataFrame()
+def get_debt_payments(user_id, debt_id=None, start_date=None, end_date=None, cursor=None,
+                      page_size=HISTORY_PAGE_SIZE):
+    """One page of a user's debt payments, newest first, with running totals; returns (DataFrame, next cursor)"""
+    return fetch_history_page('debt_payments', user_id, debt_id, start_date, end_date, cursor, page_size)
 
 def calculate_optimal_repayment_strategy(user_id):
     """Calculate optimal debt repayment strategy using debt avalanche method"""
@@ -252,11 +277,9 @@ def debt_tracker_page():
         st.error("User ID not found. Please login again.")
         return
     
-    # Create debt tables if they don't exist
-    create_debt_tables()
-    
-    # Get user debts
-    debts_df = get_user_debts(user_id)
+    # Get user debts with their aggregates (one cached query)
+    overview = get_debt_overview(user_id)
+    debts_df = overview['debts'] if overview else pd.DataFrame()
     
     # Tabs for different debt management features
     tab1, tab2, tab3, tab4 = st.tabs([" Debt Overview", " Add Debt", " Make Payment", " Repayment Strategy"])
@@ -268,53 +291,48 @@ def debt_tracker_page():
             st.info(" You have no active debts! Great job managing your finances.")
         else:
             # Debt summary metrics
-            total_debt = debts_df['current_balance'].sum()
-            total_original = debts_df['original_amount'].sum()
-            total_paid = total_original - total_debt
-            avg_interest = debts_df['interest_rate'].mean()
+            totals = overview['totals']
+            total_paid = totals['total_original'] - totals['total_debt']
             
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric(" Total Debt", f"₹{total_debt:,.0f}")
+                st.metric(" Total Debt", f"₹{totals['total_debt']:,.0f}")
             with col2:
-                st.metric(" Original Amount", f"₹{total_original:,.0f}")
+                st.metric(" Original Amount", f"₹{totals['total_original']:,.0f}")
             with col3:
                 st.metric(" Amount Paid", f"₹{total_paid:,.0f}")
             with col4:
-                st.metric(" Avg Interest Rate", f"{avg_interest:.1f}%")
+                st.metric(" Avg Interest Rate", f"{totals['avg_interest']:.1f}%")
             
             # Display debts table
             st.markdown("###  Your Debts")
             
-            # Format the dataframe for display
-            display_df = debts_df.copy()
-            display_df['current_balance'] = display_df['current_balance'].apply(lambda x: f"₹{x:,.0f}")
-            display_df['original_amount'] = display_df['original_amount'].apply(lambda x: f"₹{x:,.0f}")
-            display_df['interest_rate'] = display_df['interest_rate'].apply(lambda x: f"{x:.1f}%")
-            display_df['days_remaining'] = display_df['days_remaining'].apply(lambda x: f"{x} days" if x > 0 else "Overdue" if x < 0 else "Due today")
-            
-            # Select columns to display
+            # Numbers stay numeric; the table formats them in the browser
             display_columns = ['debt_name', 'lender_name', 'current_balance', 'interest_rate', 
                              'payment_frequency', 'debt_priority', 'days_remaining']
+            display_df = debts_df[display_columns].assign(days_remaining=format_days_remaining(debts_df['days_remaining']))
             
-            st.dataframe(display_df[display_columns], use_container_width=True)
+            st.dataframe(display_df, use_container_width=True, column_config={
+                "current_balance": st.column_config.NumberColumn("current_balance", format="₹%.0f"),
+                "interest_rate": st.column_config.NumberColumn("interest_rate", format="%.1f%%")
+            })
             
             # Debt charts
             col1, col2 = st.columns(2)
             
             with col1:
                 # Debt by priority
-                priority_data = debts_df.groupby('debt_priority')['current_balance'].sum()
+                priority_data = overview['by_priority']
                 if not priority_data.empty:
-                    fig = px.pie(values=priority_data.values, names=priority_data.index, 
+                    fig = px.pie(values=priority_data['current_balance'], names=priority_data['debt_priority'], 
                                 title="Debt by Priority")
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Debt by lender
-                lender_data = debts_df.groupby('lender_name')['current_balance'].sum()
+                lender_data = overview['by_lender']
                 if not lender_data.empty:
-                    fig = px.bar(x=lender_data.index, y=lender_data.values, 
+                    fig = px.bar(x=lender_data['lender_name'], y=lender_data['current_balance'], 
                                 title="Debt by Lender")
                     st.plotly_chart(fig, use_container_width=True)
     
@@ -390,6 +408,25 @@ def debt_tracker_page():
                         st.error(" Failed to record payment. Please try again.")
                 elif submitted:
                     st.error(" Please enter a valid payment amount.")
+            
+            with st.expander(" Payment History"):
+                render_history_pages('debt_payments', user_id, 'debt_payment_history', column_config={
+                    "payment_amount": st.column_config.NumberColumn("Amount (₹)", format="₹%.2f"),
+                    "running_total": st.column_config.NumberColumn("Paid to date (₹)", format="₹%.2f"),
+                    "payment_date": st.column_config.DateColumn("Date")
+                })
+            
+            with st.expander(" Balance History"):
+                history_debt = st.selectbox("Debt", options=debt_options['display'].tolist(), key="history_debt")
+                history_debt_id = int(debt_options.loc[debt_options['display'] == history_debt, 'debt_id'].iloc[0])
+                as_of = st.date_input("Balance as of", value=datetime.now().date(), key="history_as_of")
+                balance = get_debt_balance_at(user_id, history_debt_id, as_of)
+                if balance is not None:
+                    st.metric(f"Balance on {as_of:%d %b %Y}", f"₹{balance:,.0f}")
+                ledger_df = get_debt_ledger(user_id, history_debt_id)
+                if not ledger_df.empty:
+                    fig = px.line(ledger_df, x='event_date', y='balance', title="Balance Over Time", line_shape='hv')
+                    st.plotly_chart(fig, use_container_width=True)
     
     with tab4:
         st.markdown("###  Optimal Repayment Strategy")
@@ -459,4 +496,34 @@ def debt_tracker_page():
                 - Use **Debt Avalanche** if you want to save the most money on interest
                 - Use **Debt Snowball** if you need motivation and quick wins
                 - Both methods work, but avalanche typically saves more money in the long run
-                """) 
\ No newline at end of file
+                """)
+            
+            # Month-by-month plan for a fixed budget
+            st.markdown("###  Payment Plan")
+            minimum_total = float(debts_df['minimum_payment'].sum())
+            monthly_budget = st.number_input("Monthly budget for debts (₹)", min_value=0.0,
+                                             value=max(minimum_total, 1000.0), step=500.0)
+            plan_args = (debts_df['current_balance'].to_numpy(dtype='float64'),
+                         debts_df['interest_rate'].to_numpy(dtype='float64'),
+                         debts_df['minimum_payment'].fillna(0).to_numpy(dtype='float64'),
+                         monthly_budget)
+            plan = plan_debt_payments(*plan_args)
+            if plan is None:
+                st.warning(f" The budget doesn't cover your minimum payments (₹{minimum_total:,.0f}).")
+            else:
+                snowball_plan = plan_debt_payments(*plan_args, priority='snowball')
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    months = plan['months_to_debt_free']
+                    st.metric("Debt-free in", f"{months} months" if months else f"over {PLAN_MAX_MONTHS} months")
+                with col2:
+                    st.metric("Total interest", f"₹{plan['total_interest']:,.0f}")
+                with col3:
+                    st.metric("Saved vs snowball", f"₹{snowball_plan['total_interest'] - plan['total_interest']:,.0f}")
+                
+                debt_names = debts_df['debt_name'] + " - " + debts_df['lender_name']
+                balances_df = plan_frame(plan, debt_names)
+                fig = px.area(balances_df, title="Balances Under the Plan")
+                st.plotly_chart(fig, use_container_width=True)
+                st.markdown("**Payments for the first 12 months**")
+                st.dataframe(plan_frame(plan, debt_names, 'payments').head(12).round(0), use_container_width=True) 
\ No newline at end of file
@@ -0,0 +1,68 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+
+# Maximum number of serialized figures kept in memory (shared by all sessions in the process)
+FIGURE_CACHE_SIZE = 256
+
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+def data_fingerprint(*datasets):
+    """Hash the data behind a chart so unchanged results map to the same cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    for data in datasets:
+        if isinstance(data, pd.DataFrame):
+            digest.update(repr(list(data.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        elif isinstance(data, pd.Series):
+            digest.update(repr(data.name).encode())
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        else:
+            digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+def get_chart_theme():
+    """Get the active Streamlit theme so light and dark renders are cached separately"""
+    try:
+        return st.get_option("theme.base") or "default"
+    except Exception:
+        return "default"
+
+def cached_figure(chart_id, data, build_figure):
+    """Return the figure for chart_id, only calling build_figure when its data changed
+
+    data is the list of DataFrames/Series/values the chart is built from. The cache
+    stores the serialized figure JSON; on a hit the figure is rehydrated without
+    re-running plotly express or re-validating every trace property.
+    """
+    key = (chart_id, data_fingerprint(*data), get_chart_theme())
+
+    with _figure_cache_lock:
+        spec = _figure_cache.get(key)
+        if spec is not None:
+            _figure_cache.move_to_end(key)
+
+    if spec is not None:
+        # The spec was validated when it was first built, so skip validation here
+        return go.Figure(json.loads(spec), _validate=False)
+
+    fig = build_figure()
+    spec = fig.to_json()
+
+    with _figure_cache_lock:
+        _figure_cache[key] = spec
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+
+    return fig
+
+def clear_figure_cache():
+    """Drop every cached figure"""
+    with _figure_cache_lock:
+        _figure_cache.clear()
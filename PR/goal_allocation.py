@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Nightly surplus allocation across goals
+
+For one month (the previous month by default) each user's surplus, income
+minus expenses in the base currency, is split across their active goals.
+Goals are funded in two passes, both in order of priority (High first),
+then deadline feasibility, then target date:
+
+  1. each goal gets what it needs this month: the larger of its
+     monthly_target and the remaining amount spread over the months left to
+     its target date (all of it once the date has passed)
+  2. surplus still left fills the goals' remaining amounts in the same order
+
+A goal whose monthly need is more than the user's whole surplus can't meet
+its deadline from surplus alone. It is funded after the feasible goals of the
+same priority, so it doesn't starve them.
+
+The allocation is computed with grouped array operations for every user in a
+chunk at once (allocate_surplus). Each chunk is one transaction: the goals
+are locked, allocations are inserted into Goal_Contributions as
+'Automatic' contributions in one bulk insert, batched UPDATEs add each
+goal's amount (CASE goal_id) and one more completes the goals that reach
+their target. The transaction also moves the month's checkpoint in
+Goal_Allocation_Progress, so a restarted run resumes after the last
+committed chunk and re-running a month is a no-op.
+
+Usage: python goal_allocation.py [YYYY-MM] [--dry-run]
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+from database import get_mysql_connection, fetch_typed_frame, BASE_CURRENCY, FX_JOIN_SQL, BASE_AMOUNT_SQL
+from schema import bootstrap_schema
+
+# Users per transaction
+ALLOCATION_CHUNK_USERS = 2000
+
+# Goals credited per UPDATE statement
+ALLOCATION_UPDATE_BATCH = 500
+
+# Share of each month's surplus moved into goals
+ALLOCATION_SURPLUS_SHARE = float(os.environ.get("DABBA_SURPLUS_SHARE", "1.0"))
+
+GOAL_COLUMNS = ['user_id', 'goal_id', 'priority_rank', 'target_date', 'target_amount',
+                'current_amount', 'monthly_target']
+
+def month_bounds(month):
+    """First and last day of the month containing month"""
+    first = month.replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return first, last
+
+def _no_allocations():
+    return pd.DataFrame({'goal_id': pd.Series(dtype='int64'), 'user_id': pd.Series(dtype='int64'),
+                         'amount': pd.Series(dtype='float64')})
+
+def allocate_surplus(goals, surplus, month):
+    """Split each user's surplus across their goals; returns a goal_id, user_id, amount frame
+
+    goals has GOAL_COLUMNS (priority_rank 1 = High, target_date may be NaT,
+    monthly_target may be NaN). surplus is a Series of amounts indexed by
+    user_id; users missing from it or with no surplus get nothing. Amounts are
+    rounded down to the paisa, so no user is allocated more than their
+    surplus and no goal more than it still needs.
+    """
+    if goals.empty:
+        return _no_allocations()
+
+    available = goals['user_id'].map(surplus).fillna(0.0).clip(lower=0.0).to_numpy()
+    remaining = (goals['target_amount'] - goals['current_amount']).clip(lower=0.0).to_numpy()
+
+    target_date = pd.to_datetime(goals['target_date'])
+    months_left = (target_date.dt.year * 12 + target_date.dt.month - (month.year * 12 + month.month) + 1).clip(lower=1)
+    required = (remaining / months_left).fillna(0.0).to_numpy()
+    need = np.minimum(np.maximum(required, goals['monthly_target'].fillna(0.0).to_numpy()), remaining)
+
+    order = pd.DataFrame({
+        'user_id': goals['user_id'].to_numpy(),
+        'priority_rank': goals['priority_rank'].to_numpy(),
+        'infeasible': need > available,
+        'deadline': target_date.fillna(pd.Timestamp.max).to_numpy(),
+        'goal_id': goals['goal_id'].to_numpy()
+    }).sort_values(['user_id', 'priority_rank', 'infeasible', 'deadline', 'goal_id'], kind='stable').index.to_numpy()
+
+    users = goals['user_id'].to_numpy()[order]
+    available, remaining, need = available[order], remaining[order], need[order]
+
+    def fill(claims, budget):
+        # Each goal takes what earlier goals of the same user left, up to its claim
+        earlier = pd.Series(claims).groupby(users).cumsum().to_numpy() - claims
+        return np.clip(budget - earlier, 0.0, claims)
+
+    first_pass = fill(need, available)
+    left = available - pd.Series(first_pass).groupby(users).transform('sum').to_numpy()
+    amount = first_pass + fill(remaining - first_pass, left)
+    amount = np.floor(amount * 100 + 1e-6) / 100
+
+    allocations = pd.DataFrame({'goal_id': goals['goal_id'].to_numpy()[order], 'user_id': users, 'amount': amount})
+    return allocations[allocations['amount'] > 0].reset_index(drop=True)
+
+def read_chunk(cursor, first_day, last_day, first_user_id, last_user_id, lock, base_currency=BASE_CURRENCY):
+    """The chunk's active, unfinished goals and each user's surplus for the month"""
+    goals = fetch_typed_frame(cursor, f'''
+        SELECT user_id, goal_id, goal_priority + 0, target_date, target_amount, current_amount, monthly_target
+        FROM Goals
+        WHERE user_id BETWEEN %s AND %s AND goal_status = 'Active' AND current_amount < target_amount
+          AND (start_date IS NULL OR start_date <= %s)
+        ORDER BY goal_id
+        {'FOR UPDATE' if lock else ''}
+    ''', (first_user_id, last_user_id, last_day), GOAL_COLUMNS,
+        {'user_id': 'int64', 'goal_id': 'int64', 'priority_rank': 'int8', 'target_date': 'datetime64[ns]',
+         'target_amount': 'float64', 'current_amount': 'float64', 'monthly_target': 'float64'})
+    if goals.empty:
+        return goals, pd.Series(dtype='float64')
+
+    totals = fetch_typed_frame(cursor, f'''
+        SELECT id, SUM(CASE WHEN income_expense = 'Income' THEN {BASE_AMOUNT_SQL} ELSE -{BASE_AMOUNT_SQL} END)
+        FROM Data {FX_JOIN_SQL}
+        WHERE id BETWEEN %s AND %s AND Date BETWEEN %s AND %s
+        GROUP BY id
+    ''', (base_currency, first_user_id, last_user_id, first_day, last_day), ['user_id', 'surplus'],
+        {'user_id': 'int64', 'surplus': 'float64'})
+    return goals, totals.set_index('user_id')['surplus'] * ALLOCATION_SURPLUS_SHARE
+
+def write_allocations(cursor, allocations, last_day, first_user_id, last_user_id):
+    """Insert the chunk's contributions in bulk and add them to their goals"""
+    note = f"Surplus allocation {last_day:%Y-%m}"
+    cursor.executemany('''
+        INSERT INTO Goal_Contributions (goal_id, user_id, contribution_amount, contribution_date,
+                                        contribution_type, notes)
+        VALUES (%s, %s, %s, %s, 'Automatic', %s)
+    ''', [(int(goal_id), int(user_id), float(amount), last_day, note)
+          for goal_id, user_id, amount in allocations.itertuples(index=False)])
+    # Credit the goals from the allocations themselves; rows users entered can't be mistaken for them
+    for start in range(0, len(allocations), ALLOCATION_UPDATE_BATCH):
+        batch = allocations.iloc[start:start + ALLOCATION_UPDATE_BATCH]
+        goal_ids = [int(goal_id) for goal_id in batch['goal_id']]
+        cursor.execute(f'''
+            UPDATE Goals
+            SET current_amount = current_amount + CASE goal_id {' '.join(['WHEN %s THEN %s'] * len(batch))} END
+            WHERE goal_id IN ({', '.join(['%s'] * len(batch))})
+        ''', [value for goal_id, amount in zip(goal_ids, batch['amount']) for value in (goal_id, float(amount))]
+            + goal_ids)
+    cursor.execute('''
+        UPDATE Goals SET goal_status = 'Completed'
+        WHERE user_id BETWEEN %s AND %s AND goal_status = 'Active' AND current_amount >= target_amount
+    ''', (first_user_id, last_user_id))
+
+def run_allocation(month=None, dry_run=False, chunk_users=ALLOCATION_CHUNK_USERS):
+    """Allocate one month's surplus for every user; returns the allocations frame, or None on error
+
+    month defaults to the previous month. A dry run reads and allocates but
+    writes nothing, and ignores the checkpoint.
+    """
+    first_day, last_day = month_bounds(month or date.today().replace(day=1) - timedelta(days=1))
+    if not bootstrap_schema():
+        return None
+    connection = get_mysql_connection()
+    if connection is None:
+        return None
+
+    timings = {'read': 0.0, 'allocate': 0.0, 'write': 0.0}
+    results = []
+    users = 0
+    started = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT MIN(user_id), MAX(user_id) FROM Goals WHERE goal_status = 'Active'")
+        first_user_id, last_user_id = cursor.fetchone()
+        if first_user_id is None:
+            print("No active goals to fund")
+            connection.close()
+            return _no_allocations()
+
+        last_done = first_user_id - 1
+        if not dry_run:
+            cursor.execute('''
+                INSERT IGNORE INTO Goal_Allocation_Progress (allocation_month, last_user_id) VALUES (%s, %s)
+            ''', (first_day, last_done))
+            cursor.execute('SELECT last_user_id FROM Goal_Allocation_Progress WHERE allocation_month = %s',
+                           (first_day,))
+            last_done = max(cursor.fetchone()[0], last_done)
+            connection.commit()
+
+        while last_done < last_user_id:
+            first = last_done + 1
+            last = min(first + chunk_users - 1, last_user_id)
+
+            phase = time.perf_counter()
+            goals, surplus = read_chunk(cursor, first_day, last_day, first, last, lock=not dry_run)
+            timings['read'] += time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            allocations = allocate_surplus(goals, surplus, first_day)
+            timings['allocate'] += time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            if not dry_run:
+                if not allocations.empty:
+                    write_allocations(cursor, allocations, last_day, first, last)
+                cursor.execute('''
+                    UPDATE Goal_Allocation_Progress
+                    SET last_user_id = %s, goals_funded = goals_funded + %s,
+                        amount_allocated = amount_allocated + %s, status = %s
+                    WHERE allocation_month = %s
+                ''', (last, len(allocations), float(allocations['amount'].sum()),
+                      'done' if last == last_user_id else 'running', first_day))
+                connection.commit()
+            timings['write'] += time.perf_counter() - phase
+
+            users += goals['user_id'].nunique()
+            results.append(allocations)
+            last_done = last
+
+        cursor.close()
+        connection.close()
+    except Error as e:
+        print(f"❌ Allocation for {first_day:%Y-%m} stopped at a checkpoint: {e}")
+        connection.rollback()
+        connection.close()
+        return None
+
+    elapsed = time.perf_counter() - started
+    allocations = pd.concat(results, ignore_index=True) if results else _no_allocations()
+    print(f"{'🔎 Dry run: would allocate' if dry_run else '✅ Allocated'} ₹{allocations['amount'].sum():,.2f} "
+          f"of {first_day:%Y-%m} surplus to {len(allocations)} goals of "
+          f"{allocations['user_id'].nunique()} users in {elapsed:.1f}s, "
+          f"{users / max(elapsed, 1e-9):,.0f} users/s")
+    print("  " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return allocations
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    args = [arg for arg in args if arg != '--dry-run']
+    month = date.fromisoformat(f"{args[0]}-01") if args else None
+    run_allocation(month, dry_run)
+
+if __name__ == "__main__":
+    main()
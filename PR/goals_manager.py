@@ -1,63 +1,15 @@
 import streamlit as st
 import pandas as pd
 from database import get_mysql_connection
+from schema import bootstrap_schema
+from history_pages import fetch_history_page, render_history_pages, HISTORY_PAGE_SIZE
 from mysql.connector import Error
 from datetime import datetime
 import plotly.express as px
 
 def create_goals_tables():
-    """Create goals tracking tables if they don't exist"""
-    connection = get_mysql_connection()
-    if connection is None:
-        return
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Create Goals table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Goals (
-                goal_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                goal_name VARCHAR(255) NOT NULL,
-                goal_description TEXT,
-                target_amount DECIMAL(15,2) NOT NULL,
-                current_amount DECIMAL(15,2) DEFAULT 0.00,
-                goal_category ENUM('Emergency Fund', 'Vacation', 'Home', 'Car', 'Education', 'Wedding', 'Business', 'Investment', 'Other') DEFAULT 'Other',
-                goal_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
-                target_date DATE,
-                start_date DATE DEFAULT (CURDATE()),
-                goal_status ENUM('Active', 'Completed', 'Paused', 'Cancelled') DEFAULT 'Active',
-                monthly_target DECIMAL(15,2),
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        # Create Goal_Contributions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Goal_Contributions (
-                contribution_id INT AUTO_INCREMENT PRIMARY KEY,
-                goal_id INT NOT NULL,
-                user_id INT NOT NULL,
-                contribution_amount DECIMAL(15,2) NOT NULL,
-                contribution_date DATE NOT NULL,
-                contribution_type ENUM('Manual', 'Automatic', 'Bonus', 'Refund', 'Other') DEFAULT 'Manual',
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (goal_id) REFERENCES Goals(goal_id),
-                FOREIGN KEY (user_id) REFERENCES Users(user_id)
-            )
-        ''')
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-    except Exception as e:
-        st.error(f"Error creating goals tables: {e}")
+    """Make sure the goals tables exist (they are created by the schema bootstrap)"""
+    bootstrap_schema()
 
 def add_goal(user_id, goal_name, goal_description, target_amount, goal_category, 
              goal_priority, target_date, monthly_target, notes):
@@ -117,7 +69,14 @@ def get_user_goals(user_id):
 
 def add_goal_contribution(user_id, goal_id, contribution_amount, contribution_date, 
                          contribution_type, notes):
-    """Add a contribution to a goal"""
+    """Add a contribution to a goal
+
+    The goal row is updated first, in a single statement that adds the amount
+    and completes the goal once it reaches its target. The update holds the
+    row lock until commit, so concurrent contributions to the same goal
+    queue behind it instead of interleaving. The connection is closed on
+    every path, and rolled back on errors so the row lock is released.
+    """
     connection = get_mysql_connection()
     if connection is None:
         return False
@@ -129,6 +88,21 @@ def add_goal_contribution(user_id, goal_id, contribution_amount, contribution_da
         goal_id = int(goal_id)
         user_id = int(user_id)
         contribution_amount = float(contribution_amount)
+        if contribution_amount <= 0:
+            st.error("Contribution amount must be positive")
+            return False
+        
+        # goal_status is assigned first so it still sees the old current_amount (MySQL assigns left to right)
+        cursor.execute('''
+            UPDATE Goals 
+            SET goal_status = CASE WHEN current_amount + %s >= target_amount THEN 'Completed' ELSE goal_status END,
+                current_amount = current_amount + %s
+            WHERE goal_id = %s AND user_id = %s
+        ''', (contribution_amount, contribution_amount, goal_id, user_id))
+        if cursor.rowcount == 0:
+            # Not this user's goal
+            connection.rollback()
+            return False
         
         # Add contribution record
         cursor.execute('''
@@ -138,63 +112,67 @@ def add_goal_contribution(user_id, goal_id, contribution_amount, contribution_da
         ''', (goal_id, user_id, contribution_amount, contribution_date, 
               contribution_type, notes))
         
-        # Update goal current amount
-        cursor.execute('''
-            UPDATE Goals 
-            SET current_amount = current_amount + %s
-            WHERE goal_id = %s AND user_id = %s
-        ''', (contribution_amount, goal_id, user_id))
-        
-        # Check if goal is completed
-        cursor.execute('''
-            UPDATE Goals 
-            SET goal_status = 'Completed'
-            WHERE goal_id = %s AND user_id = %s AND current_amount >= target_amount
-        ''', (goal_id, user_id))
-        
         connection.commit()
         cursor.close()
-        connection.close()
         return True
         
     except Exception as e:
+        connection.rollback()
         st.error(f"Error adding goal contribution: {e}")
         return False
+    finally:
+        connection.close()
 
-def get_goal_contributions(user_id, goal_id=None):
-    """Get goal contributions for a user"""
+def get_goal_contributions(user_id, goal_id=None, start_date=None, end_date=None, cursor=None,
+                           page_size=HISTORY_PAGE_SIZE):
+    """One page of a user's goal contributions, newest first, with running totals; returns (DataFrame, next cursor)"""
+    return fetch_history_page('goal_contributions', user_id, goal_id, start_date, end_date, cursor, page_size)
+
+def get_monthly_contributions(user_id):
+    """Total contributed per month, oldest first"""
     connection = get_mysql_connection()
     if connection is None:
         return pd.DataFrame()
     
     try:
-        if goal_id:
-            query = '''
-                SELECT gc.contribution_id, gc.contribution_amount, gc.contribution_date,
-                       gc.contribution_type, gc.notes, g.goal_name
-                FROM Goal_Contributions gc
-                JOIN Goals g ON gc.goal_id = g.goal_id
-                WHERE gc.user_id = %s AND gc.goal_id = %s
-                ORDER BY gc.contribution_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id, goal_id))
-        else:
-            query = '''
-                SELECT gc.contribution_id, gc.contribution_amount, gc.contribution_date,
-                       gc.contribution_type, gc.notes, g.goal_name
-                FROM Goal_Contributions gc
-                JOIN Goals g ON gc.goal_id = g.goal_id
-                WHERE gc.user_id = %s
-                ORDER BY gc.contribution_date DESC
-            '''
-            df = pd.read_sql_query(query, connection, params=(user_id,))
-        
+        query = '''
+            SELECT DATE_FORMAT(contribution_date, '%Y-%m') AS contribution_date,
+                   SUM(contribution_amount) AS contribution_amount
+            FROM Goal_Contributions
+            WHERE user_id = %s
+            GROUP BY DATE_FORMAT(contribution_date, '%Y-%m')
+            ORDER BY contribution_date
+        '''
+        df = pd.read_sql_query(query, connection, params=(user_id,))
         connection.close()
         return df
     except Exception as e:
-        st.error(f"Error fetching goal contributions: {e}")
+        st.error(f"Error fetching monthly contributions: {e}")
         return pd.DataFrame()
 
+def update_goal_status(user_id, goal_id, new_status):
+    """Update goal status"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
+        cursor.execute('''
+            UPDATE Goals 
+            SET goal_status = %s
+            WHERE goal_id = %s AND user_id = %s
+        ''', (new_status, goal_id, user_id))
+        
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return True
+        
+    except Exception as e:
+        st.error(f"Error updating goal status: {e}")
+        return False
+
 def calculate_goal_insights(user_id):
     """Calculate insights about user's goals"""
     goals_df = get_user_goals(user_id)
@@ -258,9 +236,6 @@ def goals_management_page():
         st.error("User ID not found. Please login again.")
         return
     
-    # Create goals tables if they don't exist
-    create_goals_tables()
-    
     # Get user goals and insights
     goals_df = get_user_goals(user_id)
     insights = calculate_goal_insights(user_id)
@@ -557,14 +532,8 @@ def goals_management_page():
             st.markdown("####  Progress Trends")
             
             # Get contributions over time
-            contributions_df = get_goal_contributions(user_id)
-            if not contributions_df.empty:
-                contributions_df['contribution_date'] = pd.to_datetime(contributions_df['contribution_date'])
-                monthly_contributions = contributions_df.groupby(
-                    contributions_df['contribution_date'].dt.to_period('M')
-                )['contribution_amount'].sum().reset_index()
-                monthly_contributions['contribution_date'] = monthly_contributions['contribution_date'].astype(str)
-                
+            monthly_contributions = get_monthly_contributions(user_id)
+            if not monthly_contributions.empty:
                 fig = px.line(
                     monthly_contributions,
                     x='contribution_date',
@@ -587,15 +556,8 @@ def goals_management_page():
             
             # Contribution history
             st.markdown("####  Recent Contributions")
-            recent_contributions = get_goal_contributions(user_id)
-            if not recent_contributions.empty:
-                st.dataframe(
-                    recent_contributions.head(10),
-                    use_container_width=True,
-                    column_config={
-                        "contribution_amount": st.column_config.NumberColumn("Amount (₹)", format="₹%.2f"),
-                        "contribution_date": st.column_config.DateColumn("Date")
-                    }
-                )
-            else:
-                st.info("No contributions recorded yet. Start contributing to your goals!") 
\ No newline at end of file
+            render_history_pages('goal_contributions', user_id, 'goal_contribution_history', column_config={
+                "contribution_amount": st.column_config.NumberColumn("Amount (₹)", format="₹%.2f"),
+                "running_total": st.column_config.NumberColumn("Contributed to date (₹)", format="₹%.2f"),
+                "contribution_date": st.column_config.DateColumn("Date")
+            })
@@ -0,0 +1,138 @@
+"""
+Keyset-paginated payment and contribution history
+
+History is read newest first, one page at a time. Each query seeks past the
+last row of the previous page with (date, id) < (last date, last id) on the
+(user_id, date) index. A deep page then costs the same as the first, where
+OFFSET would scan every earlier row. The running total (everything paid up to
+and including a row, within the date filter) comes from a window function
+over the page. The total carried in from older pages rides along in the
+cursor, so only the first page sums the whole range.
+"""
+
+import streamlit as st
+import pandas as pd
+from database import get_mysql_connection
+
+# Rows per history page
+HISTORY_PAGE_SIZE = 25
+
+# History kind -> how to read it; columns are selected from the history table (h) and its parent (p)
+HISTORY_SOURCES = {
+    'debt_payments': {
+        'table': 'Debt_Payments', 'parent': 'Debts', 'parent_id': 'debt_id',
+        'id': 'payment_id', 'date': 'payment_date', 'amount': 'payment_amount',
+        'columns': 'h.payment_id, h.payment_amount, h.payment_date, h.payment_type, h.notes, '
+                   'p.debt_name, p.lender_name'
+    },
+    'goal_contributions': {
+        'table': 'Goal_Contributions', 'parent': 'Goals', 'parent_id': 'goal_id',
+        'id': 'contribution_id', 'date': 'contribution_date', 'amount': 'contribution_amount',
+        'columns': 'h.contribution_id, h.contribution_amount, h.contribution_date, h.contribution_type, '
+                   'h.notes, p.goal_name'
+    }
+}
+
+def fetch_history_page(kind, user_id, parent_id=None, start_date=None, end_date=None, cursor=None,
+                       page_size=HISTORY_PAGE_SIZE):
+    """One page of a user's history, newest first; returns (DataFrame, cursor for the next page or None)
+
+    cursor is the value returned with the previous page. Rows carry a
+    running_total column. Returns (empty frame, None) on error.
+    """
+    source = HISTORY_SOURCES[kind]
+    connection = get_mysql_connection()
+    if connection is None:
+        return pd.DataFrame(), None
+
+    filters = ['h.user_id = %s']
+    params = [int(user_id)]
+    if parent_id:
+        filters.append(f"h.{source['parent_id']} = %s")
+        params.append(int(parent_id))
+    if start_date:
+        filters.append(f"h.{source['date']} >= %s")
+        params.append(start_date)
+    if end_date:
+        filters.append(f"h.{source['date']} <= %s")
+        params.append(end_date)
+    where = ' AND '.join(filters)
+
+    if cursor is None:
+        # First page: the newest row's running total is the sum of the whole filtered range
+        start_total = f"(SELECT COALESCE(SUM(h.{source['amount']}), 0) FROM {source['table']} h WHERE {where})"
+        total_params = list(params)
+        seek = ''
+        seek_params = []
+    else:
+        last_date, last_id, total_before = cursor
+        start_total = '%s'
+        total_params = [total_before]
+        seek = f" AND h.{source['date']} <= %s AND (h.{source['date']} < %s OR h.{source['id']} < %s)"
+        seek_params = [last_date, last_date, last_id]
+
+    order = f"{source['date']} DESC, {source['id']} DESC"
+    query = f'''
+        SELECT page.*,
+               {start_total} - COALESCE(SUM(page.{source['amount']}) OVER (
+                   ORDER BY {order} ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS running_total
+        FROM (
+            SELECT {source['columns']}
+            FROM {source['table']} h
+            JOIN {source['parent']} p ON p.{source['parent_id']} = h.{source['parent_id']}
+            WHERE {where}{seek}
+            ORDER BY h.{source['date']} DESC, h.{source['id']} DESC
+            LIMIT %s
+        ) page
+        ORDER BY {order}
+    '''
+    try:
+        df = pd.read_sql_query(query, connection, params=tuple(total_params + params + seek_params + [page_size + 1]))
+    except Exception as e:
+        st.error(f"Error fetching history: {e}")
+        return pd.DataFrame(), None
+    finally:
+        connection.close()
+
+    if len(df) <= page_size:
+        return df, None
+    df = df.iloc[:page_size]
+    last = df.iloc[-1]
+    next_cursor = (last[source['date']], int(last[source['id']]),
+                   float(last['running_total']) - float(last[source['amount']]))
+    return df, next_cursor
+
+def render_history_pages(kind, user_id, key, parent_id=None, column_config=None, page_size=HISTORY_PAGE_SIZE):
+    """Date filter, one page of history and Newer/Older buttons
+
+    The cursors of the pages already visited are kept in session state under
+    key, so Newer steps back without re-reading the older pages. Changing the
+    filter starts again from the newest page.
+    """
+    date_range = st.date_input("Date range", value=(), key=f"{key}_range")
+    start_date = date_range[0] if len(date_range) > 0 else None
+    end_date = date_range[1] if len(date_range) > 1 else None
+
+    state = st.session_state.setdefault(key, {'filter': None, 'cursors': [None]})
+    if state['filter'] != (parent_id, start_date, end_date):
+        state['filter'] = (parent_id, start_date, end_date)
+        state['cursors'] = [None]
+
+    df, next_cursor = fetch_history_page(kind, user_id, parent_id, start_date, end_date,
+                                         state['cursors'][-1], page_size)
+    if df.empty:
+        st.info("No history for this selection.")
+        return
+
+    st.dataframe(df, use_container_width=True, hide_index=True, column_config=column_config)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Newer", key=f"{key}_newer", disabled=len(state['cursors']) == 1):
+            state['cursors'].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(state['cursors'])}")
+    with col3:
+        if st.button("Older →", key=f"{key}_older", disabled=next_cursor is None):
+            state['cursors'].append(next_cursor)
+            st.rerun()
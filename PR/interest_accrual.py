@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Nightly interest accrual for every active debt
+
+Each run accrues interest up to one accrual date (today by default). The
+user-id space is split into ranges, one worker process per range. Each worker
+walks its range in chunks of ACCRUAL_CHUNK_USERS users. A chunk is a handful
+of set-based statements in one transaction:
+
+  1. lock the chunk's debts (payments wait rather than interleave) and move
+     any debt recorded before the ledger existed onto it
+  2. capitalize compound interest when a compounding period has ended
+  3. append one Interest event per debt to Debt_Ledger
+  4. move the interest into current_balance and mark the debts accrued
+     through the accrual date
+  5. extend the chunk's balance snapshots and bump the users' data versions
+
+The transaction also records the worker's checkpoint in
+Interest_Accrual_Progress, so a restarted run resumes after the last
+committed chunk. Re-running a date is a no-op: debts already accrued
+through it are skipped, and Interest events are keyed 'interest:<date>'.
+Days missed since a debt's last accrual are accrued in the same event.
+
+Simple interest accrues only on the balance without unpaid interest.
+Compound interest is added to that base at the end of each payment period
+(month, ISO week or day). Payments pay unpaid interest first.
+
+Usage: python interest_accrual.py [YYYY-MM-DD] [--workers N]
+"""
+
+import sys
+import time
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from mysql.connector import Error
+from database import get_mysql_connection
+from schema import bootstrap_schema
+from debt_ledger import backfill_ledger, extend_snapshots_for_users
+
+# Users per transaction
+ACCRUAL_CHUNK_USERS = 500
+
+# Parallel worker processes, each with its own user-id range and connection
+ACCRUAL_WORKERS = 4
+
+DAYS_PER_YEAR = 365
+
+# Debts with a day to accrue on the accrual date
+_DUE = '''
+    d.user_id BETWEEN %(first)s AND %(last)s AND d.start_date <= %(date)s
+    AND (d.interest_accrued_through IS NULL OR d.interest_accrued_through < %(date)s)
+'''
+
+# Interest is compounded when a payment period ends between the last accrual and the accrual date
+_PERIOD_ENDED = '''
+    d.payment_frequency = 'Daily'
+    OR (d.payment_frequency = 'Monthly'
+        AND EXTRACT(YEAR_MONTH FROM d.interest_accrued_through) <> EXTRACT(YEAR_MONTH FROM %(date)s))
+    OR (d.payment_frequency = 'Weekly' AND YEARWEEK(d.interest_accrued_through, 1) <> YEARWEEK(%(date)s, 1))
+'''
+
+def accrue_chunk(cursor, accrual_date, first_user_id, last_user_id):
+    """Accrue interest through accrual_date for one user-id range; returns (debts advanced, interest events)
+
+    Runs inside the caller's transaction.
+    """
+    params = {'first': first_user_id, 'last': last_user_id, 'date': accrual_date,
+              'key': f"interest:{accrual_date.isoformat()}", 'days_per_year': DAYS_PER_YEAR}
+
+    cursor.execute(f'SELECT d.debt_id FROM Debts d WHERE {_DUE} FOR UPDATE', params)
+    if not cursor.fetchall():
+        return 0, 0
+    # Interest must land on a ledger that already holds the debt's history
+    backfill_ledger(cursor, _DUE, params)
+
+    cursor.execute(f'''
+        UPDATE Debts d SET d.uncapitalized_interest = 0
+        WHERE {_DUE} AND d.interest_type = 'Compound' AND d.interest_accrued_through IS NOT NULL
+          AND ({_PERIOD_ENDED})
+    ''', params)
+
+    cursor.execute(f'''
+        INSERT IGNORE INTO Debt_Ledger (debt_id, user_id, event_date, event_type, amount, source_key)
+        SELECT debt_id, user_id, %(date)s, 'Interest', interest, %(key)s
+        FROM (
+            SELECT d.debt_id, d.user_id,
+                   ROUND(GREATEST(d.current_balance - d.uncapitalized_interest, 0) * d.interest_rate / 100
+                         / %(days_per_year)s
+                         * DATEDIFF(%(date)s, COALESCE(d.interest_accrued_through,
+                                                       GREATEST(d.start_date, DATE(d.created_at)))), 2) AS interest
+            FROM Debts d
+            WHERE {_DUE} AND d.current_balance > 0 AND d.interest_rate > 0
+        ) due
+        WHERE interest > 0
+    ''', params)
+    events = cursor.rowcount
+
+    cursor.execute(f'''
+        UPDATE Debts d
+        LEFT JOIN Debt_Ledger l ON l.debt_id = d.debt_id AND l.source_key = %(key)s
+        SET d.current_balance = d.current_balance + COALESCE(l.amount, 0),
+            d.uncapitalized_interest = d.uncapitalized_interest + COALESCE(l.amount, 0),
+            d.interest_accrued_through = %(date)s
+        WHERE {_DUE}
+    ''', params)
+    debts = cursor.rowcount
+
+    if events:
+        # Cached debt overviews of these users are now stale
+        cursor.execute('''
+            INSERT INTO Data_Versions (user_id, version)
+            SELECT DISTINCT d.user_id, 1 FROM Debts d
+            JOIN Debt_Ledger l ON l.debt_id = d.debt_id AND l.source_key = %(key)s
+            WHERE d.user_id BETWEEN %(first)s AND %(last)s
+            ON DUPLICATE KEY UPDATE version = version + 1
+        ''', params)
+        # Snapshots dated after the accrual date (future-dated payments) no longer cover every earlier event
+        cursor.execute('''
+            DELETE s FROM Debt_Balance_Snapshots s JOIN Debts d ON d.debt_id = s.debt_id
+            WHERE d.user_id BETWEEN %(first)s AND %(last)s AND s.snapshot_date > %(date)s
+        ''', params)
+        extend_snapshots_for_users(cursor, first_user_id, last_user_id)
+    return debts, events
+
+def accrue_range(accrual_date, range_start, range_end, chunk_users=ACCRUAL_CHUNK_USERS):
+    """Accrue one user-id range, resuming from its checkpoint; returns (debts, events, seconds)"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return 0, 0, 0.0
+
+    started = time.perf_counter()
+    debts = events = 0
+    try:
+        cursor = connection.cursor()
+        cursor.execute('''
+            INSERT IGNORE INTO Interest_Accrual_Progress (accrual_date, range_start, range_end, last_user_id)
+            VALUES (%s, %s, %s, %s)
+        ''', (accrual_date, range_start, range_end, range_start - 1))
+        cursor.execute('''
+            SELECT last_user_id FROM Interest_Accrual_Progress
+            WHERE accrual_date = %s AND range_start = %s AND range_end = %s
+        ''', (accrual_date, range_start, range_end))
+        last_user_id = cursor.fetchone()[0]
+        connection.commit()
+
+        while last_user_id < range_end:
+            first = last_user_id + 1
+            last = min(first + chunk_users - 1, range_end)
+            chunk_debts, chunk_events = accrue_chunk(cursor, accrual_date, first, last)
+            cursor.execute('''
+                UPDATE Interest_Accrual_Progress
+                SET last_user_id = %s, debts_accrued = debts_accrued + %s, status = %s
+                WHERE accrual_date = %s AND range_start = %s AND range_end = %s
+            ''', (last, chunk_debts, 'done' if last == range_end else 'running',
+                  accrual_date, range_start, range_end))
+            connection.commit()
+            debts += chunk_debts
+            events += chunk_events
+            last_user_id = last
+
+        cursor.close()
+        connection.close()
+    except Error as e:
+        print(f"❌ Accrual of users {range_start}-{range_end} stopped at a checkpoint: {e}")
+        connection.rollback()
+        connection.close()
+    return debts, events, time.perf_counter() - started
+
+def split_user_ranges(first_user_id, last_user_id, workers):
+    """Contiguous, equal-width (range_start, range_end) pairs covering the user ids"""
+    width = max((last_user_id - first_user_id + workers) // workers, 1)
+    return [(start, min(start + width - 1, last_user_id))
+            for start in range(first_user_id, last_user_id + 1, width)]
+
+def run_accrual(accrual_date=None, workers=ACCRUAL_WORKERS):
+    """Accrue interest for every user's debts through accrual_date; returns debts advanced, or None on error"""
+    accrual_date = accrual_date or date.today()
+    if not bootstrap_schema():
+        return None
+    connection = get_mysql_connection()
+    if connection is None:
+        return None
+    cursor = connection.cursor()
+    cursor.execute('SELECT MIN(user_id), MAX(user_id) FROM Debts')
+    first_user_id, last_user_id = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    if first_user_id is None:
+        print("No debts to accrue")
+        return 0
+
+    ranges = split_user_ranges(first_user_id, last_user_id, workers)
+    started = time.perf_counter()
+    if len(ranges) == 1:
+        results = [accrue_range(accrual_date, *ranges[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            results = list(pool.map(accrue_range, [accrual_date] * len(ranges),
+                                    [start for start, _ in ranges], [end for _, end in ranges]))
+    elapsed = time.perf_counter() - started
+
+    for (start, end), (debts, events, seconds) in zip(ranges, results):
+        print(f"  users {start}-{end}: {debts} debts, {events} interest events, "
+              f"{debts / max(seconds, 1e-9):,.0f} debts/s")
+    debts = sum(result[0] for result in results)
+    events = sum(result[1] for result in results)
+    print(f"✅ Accrued through {accrual_date}: {debts} debts ({events} with interest) in {elapsed:.1f}s, "
+          f"{debts / max(elapsed, 1e-9):,.0f} debts/s with {len(ranges)} workers")
+    return debts
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    workers = ACCRUAL_WORKERS
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    accrual_date = date.fromisoformat(args[0]) if args else None
+    run_accrual(accrual_date, workers)
+
+if __name__ == "__main__":
+    main()
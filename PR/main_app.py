@@ -15,6 +15,9 @@ from goals_manager import goals_management_page
 from analytics import advanced_analytics_page
 from loan_comparison import loan_comparison_page
 from investments import investments_page
+from session_store import resume_session, save_session, end_session
+from schema import bootstrap_schema
+from notifications import get_unread_notifications, mark_notifications_read
 
 # Page configuration
 st.set_page_config(
@@ -34,9 +37,13 @@ if 'user_id' not in st.session_state:
     st.session_state.user_id = None
 if 'user_name' not in st.session_state:
     st.session_state.user_name = None
+if not st.session_state.authenticated:
+    resume_session()
 
 def main():
     """Main application function"""
+    # Tables are created once per process here, never by the pages
+    bootstrap_schema()
 
     # Show login/signup page first
     if not st.session_state.authenticated:
@@ -101,16 +108,33 @@ def main():
 
         pg = st.navigation(pages, position="top", expanded=True)
 
+        # 🟩 Notifications: read once per login (the daily job in notifications.py writes them)
+        if st.session_state.get('notifications') is None:
+            st.session_state.notifications = get_unread_notifications(st.session_state.user_id)
+        notifications = st.session_state.notifications
+
         # 🟩 Logout Button
         col1, col2, col3 = st.columns([6, 1, 0.6])
+        with col1:
+            if not notifications.empty:
+                with st.expander(f"🔔 {len(notifications)} new notifications"):
+                    for message in notifications['message']:
+                        st.write(message)
+                    if st.button("Mark all as read"):
+                        mark_notifications_read(st.session_state.user_id)
+                        st.session_state.notifications = notifications.iloc[0:0]
+                        st.rerun()
         with col3:
             if st.button("Logout", use_container_width=True):
                 st.session_state.authenticated = False
                 st.session_state.user_id = None
                 st.session_state.user_name = None
+                st.session_state.notifications = None
+                end_session()
                 st.rerun()
 
         pg.run()
+        save_session()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Online schema migrations for the dabba database
+
+Usage: python migrations.py normalize [--partition]
+       python migrations.py primary_key [--partition]
+       python migrations.py hash_passwords
+       python migrations.py debt_ledger
+       python migrations.py recurring
+"""
+
+import sys
+import time
+from datetime import date
+from mysql.connector import Error
+from database import (get_mysql_connection, create_vocabulary_tables, create_support_tables, prepare_users_table,
+                      VOCABULARY_TABLES)
+from passwords import hash_password, needs_rehash
+from schema import bootstrap_schema
+from debt_ledger import backfill_ledger
+from recurring import rescan_patterns
+
+# Users copied per batch; each batch is its own short transaction
+MIGRATION_BATCH_USERS = 50
+
+# Debts moved onto the ledger per batch
+MIGRATION_BATCH_DEBTS = 200
+
+# Pause between batches so the app keeps its share of the server
+MIGRATION_PAUSE_SECONDS = 0.05
+
+# Yearly partitions created by `primary_key --partition`; older and later rows go to catch-all partitions
+PARTITION_YEARS_BACK = 10
+PARTITION_YEARS_AHEAD = 5
+
+# Reads keep going through Data, which returns the original label columns
+def data_view_sql(view='Data'):
+    """DDL for the view that exposes Transactions with its label columns"""
+    return f'''
+    CREATE OR REPLACE VIEW {view} AS
+    SELECT t.txn_id, t.id, t.Date, m.name AS Mode, c.name AS Category, t.Amount,
+           ty.name AS income_expense, cu.name AS Currency
+    FROM Transactions t
+    JOIN Modes m ON m.id = t.mode_id
+    JOIN Categories c ON c.id = t.category_id
+    JOIN Transaction_Types ty ON ty.id = t.type_id
+    JOIN Currencies cu ON cu.id = t.currency_id
+    '''
+
+def transactions_table_sql(table, partitioned=False):
+    """DDL for the normalized transactions table
+
+    Rows are clustered by (user, Date) so a user's history is one contiguous
+    range; txn_id identifies a single transaction for edits and deletes.
+    Partitioned tables cannot carry foreign keys in InnoDB, so those are only
+    added to the unpartitioned layout.
+    """
+    foreign_keys = ''',
+        FOREIGN KEY (id) REFERENCES Users(user_id) ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY (mode_id) REFERENCES Modes(id),
+        FOREIGN KEY (category_id) REFERENCES Categories(id),
+        FOREIGN KEY (type_id) REFERENCES Transaction_Types(id),
+        FOREIGN KEY (currency_id) REFERENCES Currencies(id)'''
+    partitions = ''
+    if partitioned:
+        foreign_keys = ''
+        first_year = date.today().year - PARTITION_YEARS_BACK
+        yearly = ',\n'.join(
+            f"        PARTITION p{year} VALUES LESS THAN ({year + 1})"
+            for year in range(first_year, date.today().year + PARTITION_YEARS_AHEAD + 1)
+        )
+        partitions = f'''
+    PARTITION BY RANGE (YEAR(Date)) (
+        PARTITION p_old VALUES LESS THAN ({first_year}),
+{yearly},
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    )'''
+    return f'''
+    CREATE TABLE IF NOT EXISTS {table} (
+        txn_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        id INT NOT NULL,
+        Date DATE NOT NULL,
+        mode_id SMALLINT UNSIGNED NOT NULL,
+        category_id SMALLINT UNSIGNED NOT NULL,
+        Amount DECIMAL(11,0) NOT NULL,
+        type_id SMALLINT UNSIGNED NOT NULL,
+        currency_id SMALLINT UNSIGNED NOT NULL,
+        PRIMARY KEY (id, Date, txn_id),
+        KEY idx_{table.lower()}_txn (txn_id){foreign_keys}
+    ){partitions}
+    '''
+
+def create_migration_state_table(cursor):
+    """Progress table that lets an interrupted migration resume where it stopped"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Migration_State (
+            name VARCHAR(64) PRIMARY KEY,
+            last_key BIGINT NOT NULL DEFAULT 0,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    ''')
+
+def get_migration_state(cursor, name):
+    """(last_key, status) for a migration, creating its row on first use"""
+    cursor.execute('INSERT IGNORE INTO Migration_State (name) VALUES (%s)', (name,))
+    cursor.execute('SELECT last_key, status FROM Migration_State WHERE name = %s', (name,))
+    return cursor.fetchone()
+
+def set_migration_state(cursor, name, last_key, status='running'):
+    cursor.execute('''
+        UPDATE Migration_State SET last_key = %s, status = %s WHERE name = %s
+    ''', (last_key, status, name))
+
+def column_exists(cursor, table, column):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    ''', (table, column))
+    return cursor.fetchone()[0] > 0
+
+def is_partitioned(cursor, table):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ''', (table,))
+    return cursor.fetchone()[0] > 0
+
+def get_table_type(cursor, table):
+    """'BASE TABLE', 'VIEW' or None"""
+    cursor.execute('''
+        SELECT TABLE_TYPE FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def seed_dimension_tables(cursor, source):
+    """Add every label found in source to its dimension table"""
+    for table, column, _ in VOCABULARY_TABLES.values():
+        cursor.execute(f'''
+            INSERT IGNORE INTO {table} (name)
+            SELECT DISTINCT {column} FROM {source} WHERE {column} IS NOT NULL
+        ''')
+
+_ENCODED_SOURCE = '''
+    SELECT d.id, d.Date, m.id AS mode_id, c.id AS category_id, d.Amount, ty.id AS type_id, cu.id AS currency_id
+    FROM {source} d
+    JOIN Modes m ON m.name = d.Mode
+    JOIN Categories c ON c.name = d.Category
+    JOIN Transaction_Types ty ON ty.name = d.income_expense
+    JOIN Currencies cu ON cu.name = d.Currency
+    WHERE {user_filter}
+'''
+
+def copy_users(cursor, source, user_filter, params):
+    """Replace the Transactions rows of the selected users with encoded copies from source
+
+    user_filter is a condition on {user} such as '{user} = %s'. Only used
+    while nothing but the migration writes to Transactions.
+    """
+    cursor.execute(f"DELETE FROM Transactions WHERE {user_filter.format(user='id')}", params)
+    cursor.execute(f'''
+        INSERT INTO Transactions (id, Date, mode_id, category_id, Amount, type_id, currency_id)
+        {_ENCODED_SOURCE.format(source=source, user_filter=user_filter.format(user='d.id'))}
+        ORDER BY d.id, d.Date
+    ''', params)
+
+def copy_missing_rows(cursor, source, user_filter, params):
+    """Insert the rows of the selected users that are in source but not yet in Transactions
+
+    Identical rows (two equal purchases on one day) are matched by their
+    position among the duplicates, so each copy is inserted once. The app only
+    ever inserts into the label-per-row Data table, so these are exactly the
+    rows written since the user's batch was copied. Nothing is deleted.
+    """
+    columns = 'id, Date, mode_id, category_id, Amount, type_id, currency_id'
+    cursor.execute(f'''
+        INSERT INTO Transactions ({columns})
+        SELECT s.id, s.Date, s.mode_id, s.category_id, s.Amount, s.type_id, s.currency_id
+        FROM (
+            SELECT encoded.*, ROW_NUMBER() OVER (PARTITION BY {columns}) AS nth
+            FROM ({_ENCODED_SOURCE.format(source=source, user_filter=user_filter.format(user='d.id'))}) encoded
+        ) s
+        LEFT JOIN (
+            SELECT {columns}, ROW_NUMBER() OVER (PARTITION BY {columns}) AS nth
+            FROM Transactions WHERE {user_filter.format(user='id')}
+        ) copied ON copied.id = s.id AND copied.Date = s.Date AND copied.mode_id = s.mode_id
+            AND copied.category_id = s.category_id AND copied.Amount = s.Amount
+            AND copied.type_id = s.type_id AND copied.currency_id = s.currency_id AND copied.nth = s.nth
+        WHERE copied.id IS NULL
+        ORDER BY s.id, s.Date
+    ''', params + params)
+    return cursor.rowcount
+
+def user_row_counts(cursor, source):
+    """{user id: rows} in source"""
+    cursor.execute(f'SELECT id, COUNT(*) FROM {source} GROUP BY id')
+    return dict(cursor.fetchall())
+
+def find_stale_users(cursor, source):
+    """Users whose row count in source differs from Transactions (written during the backfill)"""
+    cursor.execute(f'''
+        SELECT s.id
+        FROM (SELECT id, COUNT(*) AS n FROM {source} GROUP BY id) s
+        LEFT JOIN (SELECT id, COUNT(*) AS n FROM Transactions GROUP BY id) t ON t.id = s.id
+        WHERE t.n IS NULL OR t.n <> s.n
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+def catch_up_users(cursor, source):
+    """Copy the rows users added to source since their batch was copied; returns (users, rows)
+
+    Runs in the caller's transaction.
+    """
+    seed_dimension_tables(cursor, source)
+    stale_users = find_stale_users(cursor, source)
+    rows = sum(copy_missing_rows(cursor, source, '{user} = %s', (user_id,)) for user_id in stale_users)
+    return len(stale_users), rows
+
+def normalize_data_table(batch_users=MIGRATION_BATCH_USERS, pause=MIGRATION_PAUSE_SECONDS, partitioned=False):
+    """Move Data to integer-keyed Transactions in batches, then swap Data for a view
+
+    The app keeps reading and writing the old Data table while users are copied
+    in id ranges, and rows added in the meantime are caught up. For the swap,
+    writers are held off by locking every Data_Versions row (each write locks
+    its user's row first) rather than with LOCK TABLES, which MariaDB doesn't
+    allow RENAME TABLE under. The last rows are copied, then Data becomes
+    Data_Legacy and the prepared view becomes Data in one RENAME, so there is
+    no moment without a Data table. RENAME commits first, so a writer let go
+    in that instant can still land a row in the old table; users whose
+    Data_Legacy count changed are caught up once more.
+    """
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        cursor = connection.cursor()
+        if get_table_type(cursor, 'Data') == 'VIEW':
+            print("✅ Data is already normalized")
+            return True
+
+        create_vocabulary_tables(connection)
+        create_migration_state_table(cursor)
+        cursor.execute(transactions_table_sql('Transactions', partitioned))
+        last_user_id, _ = get_migration_state(cursor, 'normalize_data')
+        seed_dimension_tables(cursor, 'Data')
+        connection.commit()
+
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM Data')
+        max_user_id = cursor.fetchone()[0]
+
+        # 1. Backfill in user-id ranges, one short transaction each
+        started = time.perf_counter()
+        while last_user_id < max_user_id:
+            upper = last_user_id + batch_users
+            copy_users(cursor, 'Data', '{user} > %s AND {user} <= %s', (last_user_id, upper))
+            set_migration_state(cursor, 'normalize_data', upper)
+            connection.commit()
+            last_user_id = upper
+            print(f"📦 Copied users up to {min(upper, max_user_id)}/{max_user_id}")
+            time.sleep(pause)
+
+        # 2. Copy rows written while the ranges were being copied, so the locked step has little left
+        users, rows = catch_up_users(cursor, 'Data')
+        connection.commit()
+        cursor.execute(data_view_sql('Data_Normalized'))
+
+        # 3. Hold off writers, copy the last rows and swap
+        create_support_tables(connection)
+        cursor.execute('SELECT user_id FROM Data_Versions FOR UPDATE')
+        cursor.fetchall()
+        final_users, final_rows = catch_up_users(cursor, 'Data')
+        counts = user_row_counts(cursor, 'Data')
+        cursor.execute('RENAME TABLE Data TO Data_Legacy, Data_Normalized TO Data')
+        stragglers = [user_id for user_id, n in user_row_counts(cursor, 'Data_Legacy').items() if counts.get(user_id) != n]
+        final_rows += sum(copy_missing_rows(cursor, 'Data_Legacy', '{user} = %s', (user_id,)) for user_id in stragglers)
+        set_migration_state(cursor, 'normalize_data', last_user_id, 'done')
+        connection.commit()
+
+        print(f"✅ Normalized Data in {time.perf_counter() - started:.1f}s "
+              f"({rows + final_rows} rows of {users + final_users} users caught up)")
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        print(f"❌ Migration failed: {e}")
+        connection.rollback()
+        connection.close()
+        return False
+
+# Triggers that keep Transactions_New in step with Transactions during add_transaction_primary_key
+_MIRROR_COLUMNS = 'id, Date, mode_id, category_id, Amount, type_id, currency_id'
+
+def mirror_triggers(keep_ids):
+    """{name: CREATE TRIGGER} mirroring writes on Transactions into Transactions_New
+
+    With keep_ids, rows keep their txn_id, and edits and deletes are
+    mirrored by it. Without (a table from before txn_id existed, which the
+    app can only insert into), inserts alone are mirrored.
+    """
+    new_values = ', '.join(f'NEW.{column}' for column in _MIRROR_COLUMNS.split(', '))
+    if not keep_ids:
+        return {'trg_transactions_mirror': f'''
+            CREATE TRIGGER trg_transactions_mirror AFTER INSERT ON Transactions FOR EACH ROW
+            INSERT INTO Transactions_New ({_MIRROR_COLUMNS}) VALUES ({new_values})
+        '''}
+    assignments = ', '.join(f'{column} = NEW.{column}' for column in _MIRROR_COLUMNS.split(', '))
+    return {
+        'trg_transactions_mirror': f'''
+            CREATE TRIGGER trg_transactions_mirror AFTER INSERT ON Transactions FOR EACH ROW
+            INSERT INTO Transactions_New (txn_id, {_MIRROR_COLUMNS}) VALUES (NEW.txn_id, {new_values})
+        ''',
+        'trg_transactions_mirror_update': f'''
+            CREATE TRIGGER trg_transactions_mirror_update AFTER UPDATE ON Transactions FOR EACH ROW
+            UPDATE Transactions_New SET {assignments} WHERE txn_id = OLD.txn_id
+        ''',
+        'trg_transactions_mirror_delete': '''
+            CREATE TRIGGER trg_transactions_mirror_delete AFTER DELETE ON Transactions FOR EACH ROW
+            DELETE FROM Transactions_New WHERE txn_id = OLD.txn_id
+        '''
+    }
+
+def existing_triggers(cursor, names):
+    cursor.execute(f'''
+        SELECT TRIGGER_NAME FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME IN ({', '.join(['%s'] * len(names))})
+    ''', list(names))
+    return {row[0] for row in cursor.fetchall()}
+
+def add_transaction_primary_key(batch_users=MIGRATION_BATCH_USERS, pause=MIGRATION_PAUSE_SECONDS, partitioned=False):
+    """Rebuild Transactions with a txn_id key clustered by (user, Date), optionally partitioned by year
+
+    Normalizes Data first when needed. Rows are copied to Transactions_New in
+    user-id batches while triggers mirror new writes into it, then both
+    tables are swapped in one atomic RENAME. A table that already has txn_id
+    (being re-laid out, e.g. partitioned) keeps every row's txn_id, and its
+    edits and deletes are mirrored too, so ids the app already shows stay
+    valid. The previous table is kept as Transactions_Old.
+    """
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        cursor = connection.cursor()
+        if get_table_type(cursor, 'Data') != 'VIEW':
+            cursor.close()
+            connection.close()
+            return normalize_data_table(batch_users, pause, partitioned)
+
+        keep_ids = column_exists(cursor, 'Transactions', 'txn_id')
+        if keep_ids and (is_partitioned(cursor, 'Transactions') or not partitioned):
+            print("✅ Transactions already has the requested layout")
+            return True
+
+        triggers = mirror_triggers(keep_ids)
+        all_triggers = mirror_triggers(True)
+        create_migration_state_table(cursor)
+        last_user_id, status = get_migration_state(cursor, 'primary_key')
+        if (status != 'running' or get_table_type(cursor, 'Transactions_New') is None
+                or existing_triggers(cursor, all_triggers) != set(triggers)):
+            # Fresh start; a resumed run keeps the copy and triggers it already has
+            for name in all_triggers:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP TABLE IF EXISTS Transactions_New')
+            cursor.execute(transactions_table_sql('Transactions_New', partitioned))
+            for statement in triggers.values():
+                cursor.execute(statement)
+            last_user_id = 0
+            set_migration_state(cursor, 'primary_key', last_user_id)
+            connection.commit()
+
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM Transactions')
+        max_user_id = cursor.fetchone()[0]
+
+        # 1. Backfill; rows the triggers already mirrored for a range are replaced by the copy
+        columns = f'txn_id, {_MIRROR_COLUMNS}' if keep_ids else _MIRROR_COLUMNS
+        started = time.perf_counter()
+        while last_user_id < max_user_id:
+            upper = last_user_id + batch_users
+            cursor.execute('DELETE FROM Transactions_New WHERE id > %s AND id <= %s', (last_user_id, upper))
+            cursor.execute(f'''
+                INSERT INTO Transactions_New ({columns})
+                SELECT {columns}
+                FROM Transactions
+                WHERE id > %s AND id <= %s
+                ORDER BY id, Date
+            ''', (last_user_id, upper))
+            set_migration_state(cursor, 'primary_key', upper)
+            connection.commit()
+            last_user_id = upper
+            print(f"📦 Copied users up to {min(upper, max_user_id)}/{max_user_id}")
+            time.sleep(pause)
+
+        # 2. Swap; Data is re-created so it exposes txn_id
+        cursor.execute('RENAME TABLE Transactions TO Transactions_Old, Transactions_New TO Transactions')
+        for name in all_triggers:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(data_view_sql())
+        set_migration_state(cursor, 'primary_key', last_user_id, 'done')
+        connection.commit()
+
+        print(f"✅ Rebuilt Transactions in {time.perf_counter() - started:.1f}s")
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        print(f"❌ Migration failed: {e}")
+        connection.close()
+        return False
+
+def hash_user_passwords(batch_users=MIGRATION_BATCH_USERS, pause=MIGRATION_PAUSE_SECONDS):
+    """Replace plaintext (and outdated) passwords in Users with salted hashes
+
+    authenticate_user upgrades each user on their next login anyway; this
+    does everyone now, in user-id batches. Safe to re-run.
+    """
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        prepare_users_table(connection)
+        cursor = connection.cursor()
+        last_user_id = 0
+        upgraded = 0
+        started = time.perf_counter()
+        while True:
+            cursor.execute('''
+                SELECT user_id, password FROM Users WHERE user_id > %s ORDER BY user_id LIMIT %s
+            ''', (last_user_id, batch_users))
+            users = cursor.fetchall()
+            if not users:
+                break
+            # Compare-and-set, so a user who logs in meanwhile keeps the hash their login wrote
+            updates = [(hash_password(password), user_id, password) for user_id, password in users if needs_rehash(password)]
+            if updates:
+                cursor.executemany('UPDATE Users SET password = %s WHERE user_id = %s AND password = %s', updates)
+            connection.commit()
+            upgraded += len(updates)
+            last_user_id = users[-1][0]
+            print(f"🔐 Hashed passwords up to user {last_user_id} ({upgraded} upgraded)")
+            time.sleep(pause)
+
+        print(f"✅ Upgraded {upgraded} passwords in {time.perf_counter() - started:.1f}s")
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        print(f"❌ Migration failed: {e}")
+        connection.close()
+        return False
+
+def backfill_debt_ledger(batch_debts=MIGRATION_BATCH_DEBTS, pause=MIGRATION_PAUSE_SECONDS):
+    """Write ledger events and snapshots for debts recorded before Debt_Ledger existed
+
+    Debts are also moved onto the ledger the first time they are paid or
+    accrue interest (see debt_ledger.backfill_ledger); this does the rest in
+    debt-id batches. Debts already on the ledger are left as they are, so
+    re-runs are safe.
+    """
+    if not bootstrap_schema():
+        return False
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        cursor = connection.cursor()
+        last_debt_id = 0
+        backfilled = 0
+        started = time.perf_counter()
+        while True:
+            # Locks the batch against concurrent payments until it commits
+            cursor.execute('''
+                SELECT debt_id FROM Debts WHERE debt_id > %s ORDER BY debt_id LIMIT %s FOR UPDATE
+            ''', (last_debt_id, batch_debts))
+            debt_ids = [row[0] for row in cursor.fetchall()]
+            if not debt_ids:
+                connection.commit()
+                break
+            first, last = debt_ids[0], debt_ids[-1]
+            backfilled += len(backfill_ledger(cursor, 'd.debt_id BETWEEN %s AND %s', (first, last)))
+            connection.commit()
+            last_debt_id = last
+            print(f"📒 Ledger written up to debt {last_debt_id} ({backfilled} debts backfilled)")
+            time.sleep(pause)
+
+        print(f"✅ Moved {backfilled} debts onto the ledger in {time.perf_counter() - started:.1f}s")
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        print(f"❌ Migration failed: {e}")
+        connection.rollback()
+        connection.close()
+        return False
+
+def backfill_recurring_patterns(batch_users=MIGRATION_BATCH_USERS, pause=MIGRATION_PAUSE_SECONDS):
+    """Detect recurring transactions in every user's existing history
+
+    New transactions keep Recurring_Patterns up to date as they are written;
+    this scans the history recorded before it existed. Each user is rescanned
+    from scratch, so re-runs are safe.
+    """
+    if not bootstrap_schema():
+        return False
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        cursor = connection.cursor()
+        last_user_id = 0
+        users = 0
+        started = time.perf_counter()
+        while True:
+            cursor.execute('SELECT user_id FROM Users WHERE user_id > %s ORDER BY user_id LIMIT %s',
+                           (last_user_id, batch_users))
+            user_ids = [row[0] for row in cursor.fetchall()]
+            if not user_ids:
+                break
+            # Writers lock their user's version row too, so no insert lands mid-scan
+            placeholders = ', '.join(['%s'] * len(user_ids))
+            cursor.execute(f'SELECT user_id FROM Data_Versions WHERE user_id IN ({placeholders}) FOR UPDATE', user_ids)
+            cursor.fetchall()
+            for user_id in user_ids:
+                rescan_patterns(cursor, user_id)
+            connection.commit()
+            users += len(user_ids)
+            last_user_id = user_ids[-1]
+            print(f"🔁 Scanned transactions up to user {last_user_id} ({users} users)")
+            time.sleep(pause)
+
+        print(f"✅ Scanned {users} users in {time.perf_counter() - started:.1f}s")
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        print(f"❌ Migration failed: {e}")
+        connection.rollback()
+        connection.close()
+        return False
+
+MIGRATIONS = {
+    'normalize': normalize_data_table,
+    'primary_key': add_transaction_primary_key,
+    'hash_passwords': hash_user_passwords,
+    'debt_ledger': backfill_debt_ledger,
+    'recurring': backfill_recurring_patterns
+}
+
+# Migrations that rebuild Transactions and so can create it hash-partitioned by user
+PARTITIONABLE_MIGRATIONS = ('normalize', 'primary_key')
+
+def main():
+    """Run the migration named on the command line"""
+    args = sys.argv[1:]
+    options = set(args[1:])
+    if (not args or args[0] not in MIGRATIONS or options - {'--partition'}
+            or (options and args[0] not in PARTITIONABLE_MIGRATIONS)):
+        others = [name for name in MIGRATIONS if name not in PARTITIONABLE_MIGRATIONS]
+        print(f"Usage: python migrations.py [{'|'.join(PARTITIONABLE_MIGRATIONS)}] [--partition]")
+        print(f"       python migrations.py [{'|'.join(others)}]")
+        return
+    MIGRATIONS[args[0]](**({'partitioned': True} if options else {}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Daily goal and debt notifications
+
+Once a day every user's goals and debts are scanned for:
+
+  - goal target dates and debt due dates entering each of the
+    NOTIFY_WINDOWS (30, 7 and 1 days ahead), and once when they pass
+  - goal milestones (GOAL_MILESTONES percent of the target) reached by goals
+    updated since the previous day
+
+Each check is one INSERT ... SELECT over a date range of an index (Goals by
+status and target date, Goals by updated_at, Debts by due date). So a run
+reads only the rows near a deadline or just changed, whatever the number of
+users. Notifications are keyed by subject and window, so re-running a day or
+overlapping ranges never repeats one. The app reads a user's unread
+notifications with one seek on (user_id, read_at) when they log in.
+
+Each run's count and duration are recorded in Notification_Runs. Backfill
+mode replays every day from a start date, as if the job had run on each.
+
+Usage: python notifications.py [YYYY-MM-DD] [--backfill-from YYYY-MM-DD]
+"""
+
+import sys
+import time
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+from mysql.connector import Error
+from database import get_mysql_connection
+from schema import bootstrap_schema
+
+# Days ahead of a deadline at which a notification is sent, once per window
+NOTIFY_WINDOWS = (30, 7, 1)
+
+# How long after a missed deadline its overdue notification can still be sent
+OVERDUE_LOOKBACK_DAYS = 30
+
+# Percent of the target at which a goal milestone is announced (only the highest reached)
+GOAL_MILESTONES = (25, 50, 75, 100)
+
+# Unread notifications loaded at login
+NOTIFICATION_LIMIT = 20
+
+# 'overdue' or the smallest window containing the days left
+_WINDOW = "CASE WHEN days < 0 THEN 'overdue' " + " ".join(
+    f"WHEN days <= {window} THEN '{window}'" for window in sorted(NOTIFY_WINDOWS)) + " END"
+
+_MILESTONE = "CASE " + " ".join(
+    f"WHEN current_amount >= target_amount * {milestone / 100} THEN {milestone}"
+    for milestone in sorted(GOAL_MILESTONES, reverse=True)) + " END"
+
+_CHECKS = [
+    ('goal deadlines', f'''
+        INSERT IGNORE INTO Notifications (user_id, kind, subject_id, dedupe_key, due_date, notify_date, message)
+        SELECT user_id, 'goal_deadline', goal_id, CONCAT(target_date, ':', {_WINDOW}), target_date, %(day)s,
+               CASE WHEN days < 0 THEN CONCAT('Goal "', goal_name, '" passed its target date with ₹',
+                                              FORMAT(target_amount - current_amount, 0), ' still to save')
+                    WHEN days = 0 THEN CONCAT('Goal "', goal_name, '" is due today: ₹',
+                                              FORMAT(target_amount - current_amount, 0), ' still to save')
+                    ELSE CONCAT('Goal "', goal_name, '" is due in ', days, ' days: ₹',
+                                FORMAT(target_amount - current_amount, 0), ' still to save') END
+        FROM (
+            SELECT user_id, goal_id, goal_name, target_date, target_amount, current_amount,
+                   DATEDIFF(target_date, %(day)s) AS days
+            FROM Goals
+            WHERE goal_status = 'Active' AND target_date BETWEEN %(overdue_from)s AND %(ahead_to)s
+              AND current_amount < target_amount
+        ) due
+    '''),
+    ('debt due dates', f'''
+        INSERT IGNORE INTO Notifications (user_id, kind, subject_id, dedupe_key, due_date, notify_date, message)
+        SELECT user_id, 'debt_due', debt_id, CONCAT(due_date, ':', {_WINDOW}), due_date, %(day)s,
+               CASE WHEN days < 0 THEN CONCAT('Debt "', debt_name, '" to ', lender_name, ' is past due with ₹',
+                                              FORMAT(current_balance, 0), ' outstanding')
+                    WHEN days = 0 THEN CONCAT('Debt "', debt_name, '" to ', lender_name, ' is due today: ₹',
+                                              FORMAT(current_balance, 0), ' outstanding')
+                    ELSE CONCAT('Debt "', debt_name, '" to ', lender_name, ' is due in ', days, ' days: ₹',
+                                FORMAT(current_balance, 0), ' outstanding') END
+        FROM (
+            SELECT user_id, debt_id, debt_name, lender_name, due_date, current_balance,
+                   DATEDIFF(due_date, %(day)s) AS days
+            FROM Debts
+            WHERE due_date BETWEEN %(overdue_from)s AND %(ahead_to)s AND current_balance > 0
+        ) due
+    '''),
+    ('goal milestones', f'''
+        INSERT IGNORE INTO Notifications (user_id, kind, subject_id, dedupe_key, due_date, notify_date, message)
+        SELECT user_id, 'goal_milestone', goal_id, milestone, target_date, %(day)s,
+               CONCAT('Goal "', goal_name, '" reached ', milestone, '%% of its target (₹',
+                      FORMAT(current_amount, 0), ' of ₹', FORMAT(target_amount, 0), ')')
+        FROM (
+            SELECT user_id, goal_id, goal_name, target_date, target_amount, current_amount, {_MILESTONE} AS milestone
+            FROM Goals
+            WHERE updated_at >= %(updated_from)s AND updated_at < %(updated_to)s
+              AND goal_status IN ('Active', 'Completed') AND target_amount > 0
+        ) reached
+        WHERE milestone IS NOT NULL
+    ''')
+]
+
+def notify_day(cursor, day):
+    """Run every check for one day; returns [(check, notifications created, seconds)]
+
+    Runs inside the caller's transaction.
+    """
+    params = {
+        'day': day,
+        'overdue_from': day - timedelta(days=OVERDUE_LOOKBACK_DAYS),
+        'ahead_to': day + timedelta(days=max(NOTIFY_WINDOWS)),
+        # Overlaps the previous day, so updates made after yesterday's run are still seen
+        'updated_from': day - timedelta(days=1),
+        'updated_to': day + timedelta(days=1)
+    }
+    results = []
+    for name, statement in _CHECKS:
+        started = time.perf_counter()
+        cursor.execute(statement, params)
+        results.append((name, cursor.rowcount, time.perf_counter() - started))
+    return results
+
+def run_notifications(day=None, backfill_from=None):
+    """Create the notifications for day (today by default), or for every day from backfill_from
+
+    Returns the number of notifications created, or None on error.
+    """
+    day = day or date.today()
+    if not bootstrap_schema():
+        return None
+    connection = get_mysql_connection()
+    if connection is None:
+        return None
+
+    total = 0
+    run_day = backfill_from or day
+    try:
+        cursor = connection.cursor()
+        while run_day <= day:
+            started = time.perf_counter()
+            results = notify_day(cursor, run_day)
+            seconds = time.perf_counter() - started
+            created = sum(count for _, count, _ in results)
+            cursor.execute('''
+                INSERT INTO Notification_Runs (run_date, notifications, seconds) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE notifications = notifications + VALUES(notifications),
+                                        seconds = VALUES(seconds), finished_at = CURRENT_TIMESTAMP
+            ''', (run_day, created, round(seconds, 3)))
+            connection.commit()
+            print(f"✅ {run_day}: {created} notifications in {seconds * 1000:.0f} ms ("
+                  + ", ".join(f"{name} {count} in {check_seconds * 1000:.0f} ms"
+                              for name, count, check_seconds in results) + ")")
+            total += created
+            run_day += timedelta(days=1)
+        cursor.close()
+        connection.close()
+    except Error as e:
+        print(f"❌ Notifications for {run_day} failed: {e}")
+        connection.rollback()
+        connection.close()
+        return None
+    return total
+
+def get_unread_notifications(user_id, limit=NOTIFICATION_LIMIT):
+    """A user's unread notifications, soonest deadline first"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return pd.DataFrame()
+
+    try:
+        query = '''
+            SELECT notification_id, kind, due_date, notify_date, message
+            FROM Notifications
+            WHERE user_id = %s AND read_at IS NULL
+            ORDER BY due_date, notification_id
+            LIMIT %s
+        '''
+        df = pd.read_sql_query(query, connection, params=(int(user_id), int(limit)))
+        connection.close()
+        return df
+    except Exception as e:
+        st.error(f"Error fetching notifications: {e}")
+        return pd.DataFrame()
+
+def mark_notifications_read(user_id):
+    """Mark all of a user's notifications read"""
+    connection = get_mysql_connection()
+    if connection is None:
+        return False
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute('UPDATE Notifications SET read_at = CURRENT_TIMESTAMP WHERE user_id = %s AND read_at IS NULL',
+                       (int(user_id),))
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        st.error(f"Error updating notifications: {e}")
+        return False
+
+def main():
+    """Command line entry point"""
+    args = sys.argv[1:]
+    backfill_from = None
+    if '--backfill-from' in args:
+        index = args.index('--backfill-from')
+        backfill_from = date.fromisoformat(args[index + 1])
+        del args[index:index + 2]
+    day = date.fromisoformat(args[0]) if args else None
+    run_notifications(day, backfill_from)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Salted password hashing and login throttling
+
+Stored hashes are self-describing strings, so the algorithm and cost can be
+raised later without invalidating existing passwords:
+
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+
+Anything without a known prefix is a legacy plaintext password; it still
+verifies, and authenticate_user replaces it with a hash on the next login.
+Size the cost with benchmarks/bench_password_hash.py.
+"""
+
+import os
+import time
+import hmac
+import base64
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+# Algorithm for new hashes: 'pbkdf2_sha256' or 'scrypt'
+PASSWORD_HASH_ALGORITHM = os.environ.get("DABBA_PASSWORD_HASH", "pbkdf2_sha256")
+
+# PBKDF2 work factor; raise it as long as login p99 stays on target (bench_password_hash.py)
+PBKDF2_ITERATIONS = int(os.environ.get("DABBA_PBKDF2_ITERATIONS", "100000"))
+
+# scrypt cost (N, r, p); memory use is about 128 * N * r bytes
+SCRYPT_N = int(os.environ.get("DABBA_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+SALT_BYTES = 16
+
+# Failed logins allowed per email within the window before it is locked for the rest of the window
+LOGIN_MAX_FAILURES = 5
+LOGIN_FAILURE_WINDOW_SECONDS = 900
+
+# Emails tracked at once; the least recently seen are forgotten first
+LOGIN_ATTEMPT_CACHE_SIZE = 10000
+
+_login_attempts = OrderedDict()
+_login_attempts_lock = threading.Lock()
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+def _derive(algorithm, params, password, salt):
+    if algorithm == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, params[0])
+    n, r, p = params
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+
+def _current_params(algorithm):
+    return (PBKDF2_ITERATIONS,) if algorithm == 'pbkdf2_sha256' else (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+def _parse(stored):
+    """(algorithm, params, salt, hash) of a stored hash, or None for legacy plaintext"""
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            return parts[0], (int(parts[1]),), _unb64(parts[2]), _unb64(parts[3])
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            return parts[0], tuple(int(part) for part in parts[1:4]), _unb64(parts[4]), _unb64(parts[5])
+    except ValueError:
+        pass
+    return None
+
+def hash_password(password, algorithm=None, params=None):
+    """Salted hash of password in the stored-string format"""
+    algorithm = algorithm or PASSWORD_HASH_ALGORITHM
+    params = params or _current_params(algorithm)
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _derive(algorithm, params, password, salt)
+    return '$'.join([algorithm] + [str(param) for param in params] + [_b64(salt), _b64(digest)])
+
+def verify_password(password, stored):
+    """True if password matches the stored hash (or legacy plaintext), compared in constant time"""
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    algorithm, params, salt, digest = parsed
+    return hmac.compare_digest(_derive(algorithm, params, password, salt), digest)
+
+def needs_rehash(stored):
+    """True for plaintext and for hashes made with another algorithm or cost than the current one"""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != PASSWORD_HASH_ALGORITHM or parsed[1] != _current_params(parsed[0])
+
+# Verified against unknown emails so they take as long as a wrong password
+_DUMMY_HASH = None
+
+def burn_verification_time(password):
+    """Spend one hash's worth of time, for logins with an unknown email"""
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password(secrets.token_hex(8))
+    verify_password(password, _DUMMY_HASH)
+
+def login_locked_for(email, now=None):
+    """Seconds until email may try again, 0 when it is not locked"""
+    now = time.monotonic() if now is None else now
+    with _login_attempts_lock:
+        entry = _login_attempts.get(email)
+        if entry is None or now - entry[1] >= LOGIN_FAILURE_WINDOW_SECONDS:
+            return 0
+        return LOGIN_FAILURE_WINDOW_SECONDS - (now - entry[1]) if entry[0] >= LOGIN_MAX_FAILURES else 0
+
+def record_login_failure(email, now=None):
+    """Count a failed login; the window starts at the first failure"""
+    now = time.monotonic() if now is None else now
+    with _login_attempts_lock:
+        entry = _login_attempts.get(email)
+        if entry is None or now - entry[1] >= LOGIN_FAILURE_WINDOW_SECONDS:
+            entry = (0, now)
+        _login_attempts[email] = (entry[0] + 1, entry[1])
+        _login_attempts.move_to_end(email)
+        while len(_login_attempts) > LOGIN_ATTEMPT_CACHE_SIZE:
+            _login_attempts.popitem(last=False)
+
+def clear_login_failures(email):
+    """Forget failures after a successful login"""
+    with _login_attempts_lock:
+        _login_attempts.pop(email, None)
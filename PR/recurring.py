@@ -0,0 +1,238 @@
+"""
+Recurring transaction detection
+
+Transactions are grouped by type, category, mode and amount bucket. Buckets
+are fixed steps of AMOUNT_BUCKET_WIDTH on a log scale: amounts in one bucket
+differ by less than that fraction, but close amounts either side of an edge
+land in different buckets. So a payment that varies around an edge splits
+into two less regular groups, and a price change that crosses an edge starts
+a new group. A group recurs when it has happened on at least
+MIN_OCCURRENCES distinct days and the gaps between those days are regular:
+their coefficient of variation is at most MAX_GAP_CV. The period is the
+mean gap.
+
+Everything the test needs is a running sum, kept per group in
+Recurring_Patterns: occurrences, first and last day, and the sum and sum of
+squares of the gaps. One sort of the rows gives every group's state at once
+(pattern_states). New transactions dated on or after a group's last day
+extend its state without reading its history (merge_pattern_states). Only
+back-dated inserts, edits and deletes rescan history, and then only the
+affected (type, category, mode) groups.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+
+# Amounts in one bucket differ by less than this fraction
+AMOUNT_BUCKET_WIDTH = 0.10
+
+# Distinct days a group needs before it can count as recurring
+MIN_OCCURRENCES = 4
+
+# Largest gap standard deviation, relative to the mean gap, of a recurring group
+MAX_GAP_CV = 0.35
+
+# Named periods, matched when the mean gap is within PERIOD_TOLERANCE of one
+PERIOD_NAMES = [(1, 'Daily'), (7, 'Weekly'), (14, 'Fortnightly'), (30.44, 'Monthly'),
+                (91.31, 'Quarterly'), (365.25, 'Yearly')]
+PERIOD_TOLERANCE = 0.2
+
+PATTERN_KEY = ['user_id', 'income_expense', 'category', 'mode', 'amount_bucket']
+STATE_COLUMNS = PATTERN_KEY + ['occurrences', 'transactions', 'first_day', 'last_day',
+                               'gap_sum', 'gap_sq_sum', 'amount_sum']
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def amount_buckets(amounts):
+    """Log-scale bucket of each amount"""
+    amounts = np.maximum(np.abs(np.asarray(amounts, dtype='float64')), 0.01)
+    return np.floor(np.log(amounts) / np.log1p(AMOUNT_BUCKET_WIDTH)).astype('int64')
+
+def transaction_frame(rows):
+    """Data rows (dicts or a DataFrame with user_id, Date, Mode, Category, Amount, income_expense)
+    as the key columns plus day (days since 1970) and amount"""
+    rows = pd.DataFrame(rows)
+    if rows.empty:
+        return pd.DataFrame({column: [] for column in PATTERN_KEY + ['day', 'amount']})
+    amount = rows['Amount'].astype('float64').to_numpy()
+    return pd.DataFrame({
+        'user_id': rows['user_id'].astype('int64').to_numpy(),
+        'income_expense': rows['income_expense'].astype(str).to_numpy(),
+        'category': rows['Category'].astype(str).to_numpy(),
+        'mode': rows['Mode'].astype(str).to_numpy(),
+        'amount_bucket': amount_buckets(amount),
+        'day': pd.to_datetime(rows['Date']).to_numpy().astype('datetime64[D]').astype('int64'),
+        'amount': amount
+    })
+
+def pattern_states(transactions):
+    """Per-group running state of a transaction_frame, computed with one sort"""
+    if transactions.empty:
+        return pd.DataFrame({column: [] for column in STATE_COLUMNS})
+    codes = transactions.groupby(PATTERN_KEY, sort=False).ngroup().to_numpy()
+    groups = codes.max() + 1
+    days = transactions['day'].to_numpy()
+
+    order = np.lexsort((days, codes))
+    codes_sorted, days_sorted = codes[order], days[order]
+    # Several transactions on one day count as one occurrence
+    first_of_day = np.r_[True, (codes_sorted[1:] != codes_sorted[:-1]) | (days_sorted[1:] != days_sorted[:-1])]
+    codes_sorted, days_sorted = codes_sorted[first_of_day], days_sorted[first_of_day]
+
+    starts = np.r_[0, np.flatnonzero(codes_sorted[1:] != codes_sorted[:-1]) + 1]
+    ends = np.r_[starts[1:] - 1, len(codes_sorted) - 1]
+    same_group = codes_sorted[1:] == codes_sorted[:-1]
+    gaps = (days_sorted[1:] - days_sorted[:-1])[same_group].astype('float64')
+    gap_codes = codes_sorted[1:][same_group]
+
+    _, first_rows = np.unique(codes, return_index=True)
+    states = transactions[PATTERN_KEY].iloc[first_rows].reset_index(drop=True)
+    states['occurrences'] = np.bincount(codes_sorted, minlength=groups)
+    states['transactions'] = np.bincount(codes, minlength=groups)
+    states['first_day'] = days_sorted[starts]
+    states['last_day'] = days_sorted[ends]
+    states['gap_sum'] = np.bincount(gap_codes, weights=gaps, minlength=groups)
+    states['gap_sq_sum'] = np.bincount(gap_codes, weights=gaps ** 2, minlength=groups)
+    states['amount_sum'] = np.bincount(codes, weights=transactions['amount'].to_numpy(), minlength=groups)
+    return states
+
+def merge_pattern_states(states, added):
+    """Extend stored states with the states of newly added transactions
+
+    Returns (merged states, keys of groups to rescan). A group is rescanned
+    when the new transactions start before its last stored day, since the
+    gaps then can't be extended from the end.
+    """
+    merged = added.merge(states, on=PATTERN_KEY, how='left', suffixes=('', '_old'))
+    known = merged['occurrences_old'].notna().to_numpy()
+    last_old = merged['last_day_old'].to_numpy()
+    rescan = known & (merged['first_day'].to_numpy() < last_old)
+    same_day = known & (merged['first_day'].to_numpy() == last_old)
+    join_gap = np.where(known & ~same_day, merged['first_day'].to_numpy() - np.nan_to_num(last_old), 0.0)
+
+    old = lambda column: merged[f'{column}_old'].fillna(0).to_numpy()
+    merged['occurrences'] = merged['occurrences'] + old('occurrences') - same_day
+    merged['transactions'] = merged['transactions'] + old('transactions')
+    merged['first_day'] = np.where(known, merged['first_day_old'], merged['first_day'])
+    merged['gap_sum'] = merged['gap_sum'] + old('gap_sum') + join_gap
+    merged['gap_sq_sum'] = merged['gap_sq_sum'] + old('gap_sq_sum') + join_gap ** 2
+    merged['amount_sum'] = merged['amount_sum'] + old('amount_sum')
+    return merged.loc[~rescan, STATE_COLUMNS].reset_index(drop=True), merged.loc[rescan, PATTERN_KEY]
+
+def classify_patterns(states):
+    """Add period_days, gap_cv, is_recurring and next_day to states"""
+    states = states.copy()
+    intervals = (states['occurrences'] - 1).to_numpy().astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = states['gap_sum'].to_numpy() / intervals
+        variance = np.maximum(states['gap_sq_sum'].to_numpy() / intervals - mean ** 2, 0.0)
+        cv = np.sqrt(variance) / mean
+    states['period_days'] = np.where(intervals > 0, mean, np.nan)
+    states['gap_cv'] = cv
+    states['is_recurring'] = (states['occurrences'] >= MIN_OCCURRENCES).to_numpy() & (cv <= MAX_GAP_CV)
+    states['next_day'] = np.where(states['is_recurring'], states['last_day'] + np.round(np.nan_to_num(mean)), np.nan)
+    return states
+
+def period_name(period_days):
+    """'Monthly', 'Weekly', ... or 'Every N days'"""
+    for days, name in PERIOD_NAMES:
+        if abs(period_days - days) <= days * PERIOD_TOLERANCE:
+            return name
+    return f"Every {period_days:.0f} days"
+
+def _to_date(day):
+    return date.fromordinal(int(day) + _EPOCH_ORDINAL)
+
+def _to_day(value):
+    return value.toordinal() - _EPOCH_ORDINAL
+
+def _triple_filter(triples):
+    """SQL condition and parameters selecting (income_expense, category, mode) triples"""
+    triples = sorted(triples)
+    # Matches Data's Category and Mode columns too (MySQL column names ignore case)
+    return ('(' + ' OR '.join(['(income_expense = %s AND category = %s AND mode = %s)'] * len(triples)) + ')',
+            [value for triple in triples for value in triple])
+
+def read_user_transactions(cursor, user_id, triples=None):
+    """A user's Data rows as a transaction_frame, optionally only some (type, category, mode) triples"""
+    where, params = 'id = %s', [user_id]
+    if triples:
+        condition, triple_params = _triple_filter(triples)
+        where += ' AND ' + condition
+        params += triple_params
+    cursor.execute(f'SELECT id, Date, Mode, Category, Amount, income_expense FROM Data WHERE {where}', params)
+    rows = cursor.fetchall()
+    return transaction_frame(pd.DataFrame(rows, columns=['user_id', 'Date', 'Mode', 'Category', 'Amount',
+                                                         'income_expense']))
+
+def read_pattern_states(cursor, user_id, triples):
+    """Stored states of a user's groups in the given triples, locked until commit"""
+    condition, params = _triple_filter(triples)
+    cursor.execute(f'''
+        SELECT user_id, income_expense, category, mode, amount_bucket, occurrences, transactions,
+               first_date, last_date, gap_sum, gap_sq_sum, amount_sum
+        FROM Recurring_Patterns
+        WHERE user_id = %s AND {condition}
+        FOR UPDATE
+    ''', [user_id] + params)
+    states = pd.DataFrame(cursor.fetchall(), columns=STATE_COLUMNS)
+    for column in ['first_day', 'last_day']:
+        states[column] = states[column].map(_to_day)
+    return states.astype({'user_id': 'int64', 'amount_bucket': 'int64', 'occurrences': 'int64',
+                          'transactions': 'int64', 'first_day': 'int64', 'last_day': 'int64',
+                          'gap_sum': 'float64', 'gap_sq_sum': 'float64', 'amount_sum': 'float64'})
+
+def write_pattern_states(cursor, states):
+    """Insert or replace states, with their classification"""
+    if states.empty:
+        return
+    states = classify_patterns(states)
+    cursor.executemany('''
+        INSERT INTO Recurring_Patterns (user_id, income_expense, category, mode, amount_bucket, occurrences,
+                                        transactions, first_date, last_date, gap_sum, gap_sq_sum, amount_sum,
+                                        period_days, is_recurring, next_expected)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE occurrences = VALUES(occurrences), transactions = VALUES(transactions),
+            first_date = VALUES(first_date), last_date = VALUES(last_date), gap_sum = VALUES(gap_sum),
+            gap_sq_sum = VALUES(gap_sq_sum), amount_sum = VALUES(amount_sum), period_days = VALUES(period_days),
+            is_recurring = VALUES(is_recurring), next_expected = VALUES(next_expected)
+    ''', [(int(row.user_id), row.income_expense, row.category, row.mode, int(row.amount_bucket),
+           int(row.occurrences), int(row.transactions), _to_date(row.first_day), _to_date(row.last_day),
+           float(row.gap_sum), float(row.gap_sq_sum), round(float(row.amount_sum), 2),
+           None if np.isnan(row.period_days) else round(float(row.period_days), 2), bool(row.is_recurring),
+           None if np.isnan(row.next_day) else _to_date(row.next_day))
+          for row in states.itertuples(index=False)])
+
+def rescan_patterns(cursor, user_id, triples=None):
+    """Recompute a user's groups in the given triples (all groups if None) from their transactions"""
+    if triples is None:
+        cursor.execute('DELETE FROM Recurring_Patterns WHERE user_id = %s', (user_id,))
+    else:
+        condition, params = _triple_filter(triples)
+        cursor.execute(f'''
+            DELETE FROM Recurring_Patterns
+            WHERE user_id = %s AND {condition}
+        ''', [user_id] + params)
+    write_pattern_states(cursor, pattern_states(read_user_transactions(cursor, user_id, triples)))
+
+def record_recurring_changes(cursor, user_id, removed, added):
+    """Update a user's stored patterns for removed and added Data rows, in the caller's transaction
+
+    Added rows extend their groups from the stored state. Groups with
+    removed rows, or added rows dated before the group's last day, are
+    rescanned.
+    """
+    triple = lambda row: (str(row['income_expense']), str(row['Category']), str(row['Mode']))
+    rescan = {triple(row) for row in removed}
+    added = transaction_frame([dict(row, user_id=user_id) for row in added if triple(row) not in rescan])
+    if not added.empty:
+        added_states = pattern_states(added)
+        stored = read_pattern_states(cursor, user_id, set(zip(added_states['income_expense'],
+                                                              added_states['category'], added_states['mode'])))
+        merged, conflicts = merge_pattern_states(stored, added_states)
+        rescan |= set(zip(conflicts['income_expense'], conflicts['category'], conflicts['mode']))
+        keep = [key not in rescan for key in zip(merged['income_expense'], merged['category'], merged['mode'])]
+        write_pattern_states(cursor, merged[keep])
+    if rescan:
+        rescan_patterns(cursor, user_id, rescan)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+One-time schema bootstrap
+
+Every table the app needs is created here, in numbered steps, and the
+highest step applied is recorded in Schema_Version. The app calls
+bootstrap_schema() once when a process starts. When the recorded version is
+current that costs one SELECT, and after it the data layer's lazy create_*
+helpers are no-ops. Page renders therefore issue no DDL. Deployments can also
+run the steps ahead of time:
+
+Usage: python schema.py
+"""
+
+import threading
+from mysql.connector import Error, ProgrammingError, errorcode
+from database import (get_mysql_connection, create_support_tables, create_vocabulary_tables,
+                      prepare_users_table, mark_schema_ready, VOCABULARY_TABLES)
+
+# Seconds to wait for another process that is bootstrapping at the same time
+SCHEMA_LOCK_TIMEOUT = 60
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def create_debt_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Debts (
+            debt_id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            debt_name VARCHAR(255) NOT NULL,
+            lender_name VARCHAR(255) NOT NULL,
+            original_amount DECIMAL(15,2) NOT NULL,
+            current_balance DECIMAL(15,2) NOT NULL,
+            interest_rate DECIMAL(5,2) NOT NULL,
+            interest_type ENUM('Simple', 'Compound') DEFAULT 'Simple',
+            payment_frequency ENUM('Monthly', 'Weekly', 'Daily') DEFAULT 'Monthly',
+            start_date DATE NOT NULL,
+            due_date DATE,
+            minimum_payment DECIMAL(15,2) DEFAULT 0,
+            debt_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Debt_Payments (
+            payment_id INT AUTO_INCREMENT PRIMARY KEY,
+            debt_id INT NOT NULL,
+            user_id INT NOT NULL,
+            payment_amount DECIMAL(15,2) NOT NULL,
+            payment_date DATE NOT NULL,
+            payment_type ENUM('Regular', 'Extra', 'Lump Sum') DEFAULT 'Regular',
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (debt_id) REFERENCES Debts(debt_id),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        )
+    ''')
+
+def create_goals_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Goals (
+            goal_id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            goal_name VARCHAR(255) NOT NULL,
+            goal_description TEXT,
+            target_amount DECIMAL(15,2) NOT NULL,
+            current_amount DECIMAL(15,2) DEFAULT 0.00,
+            goal_category ENUM('Emergency Fund', 'Vacation', 'Home', 'Car', 'Education', 'Wedding', 'Business', 'Investment', 'Other') DEFAULT 'Other',
+            goal_priority ENUM('High', 'Medium', 'Low') DEFAULT 'Medium',
+            target_date DATE,
+            start_date DATE DEFAULT (CURDATE()),
+            goal_status ENUM('Active', 'Completed', 'Paused', 'Cancelled') DEFAULT 'Active',
+            monthly_target DECIMAL(15,2),
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Goal_Contributions (
+            contribution_id INT AUTO_INCREMENT PRIMARY KEY,
+            goal_id INT NOT NULL,
+            user_id INT NOT NULL,
+            contribution_amount DECIMAL(15,2) NOT NULL,
+            contribution_date DATE NOT NULL,
+            contribution_type ENUM('Manual', 'Automatic', 'Bonus', 'Refund', 'Other') DEFAULT 'Manual',
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (goal_id) REFERENCES Goals(goal_id),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        )
+    ''')
+
+def create_write_queue_table(cursor):
+    """Last journal sequence number committed, per journal file (makes write-queue replay exactly-once)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Write_Queue_State (
+            journal_id VARCHAR(255) PRIMARY KEY,
+            applied_seq BIGINT UNSIGNED NOT NULL DEFAULT 0
+        )
+    ''')
+
+def create_debt_ledger_tables(cursor):
+    """Append-only debt events and the balance snapshots taken every few events (see debt_ledger.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Debt_Ledger (
+            event_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+            debt_id INT NOT NULL,
+            user_id INT NOT NULL,
+            event_date DATE NOT NULL,
+            event_type ENUM('Opening', 'Payment', 'Interest', 'Adjustment') NOT NULL,
+            amount DECIMAL(15,2) NOT NULL,
+            source_key VARCHAR(64) NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (debt_id, event_date, event_id),
+            KEY idx_debt_ledger_event (event_id),
+            UNIQUE KEY uq_debt_ledger_source (debt_id, source_key),
+            FOREIGN KEY (debt_id) REFERENCES Debts(debt_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Debt_Balance_Snapshots (
+            debt_id INT NOT NULL,
+            snapshot_date DATE NOT NULL,
+            last_event_id BIGINT UNSIGNED NOT NULL,
+            balance DECIMAL(15,2) NOT NULL,
+            event_count INT UNSIGNED NOT NULL,
+            PRIMARY KEY (debt_id, snapshot_date, last_event_id),
+            FOREIGN KEY (debt_id) REFERENCES Debts(debt_id)
+        )
+    ''')
+
+def create_interest_accrual_tables(cursor):
+    """Accrual state on Debts and the per-range checkpoints of the nightly job (see interest_accrual.py)"""
+    cursor.execute('''
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Debts'
+          AND COLUMN_NAME IN ('uncapitalized_interest', 'interest_accrued_through')
+    ''')
+    columns = {row[0] for row in cursor.fetchall()}
+    if 'uncapitalized_interest' not in columns:
+        cursor.execute('ALTER TABLE Debts ADD COLUMN uncapitalized_interest DECIMAL(15,2) NOT NULL DEFAULT 0')
+    if 'interest_accrued_through' not in columns:
+        cursor.execute('ALTER TABLE Debts ADD COLUMN interest_accrued_through DATE NULL')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Interest_Accrual_Progress (
+            accrual_date DATE NOT NULL,
+            range_start INT NOT NULL,
+            range_end INT NOT NULL,
+            last_user_id INT NOT NULL,
+            debts_accrued INT UNSIGNED NOT NULL DEFAULT 0,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (accrual_date, range_start, range_end)
+        )
+    ''')
+
+def widen_vocabulary_names(cursor):
+    """Bring dimension tables created with a narrower name column up to VOCABULARY_TABLES' widths"""
+    for table, _, width in VOCABULARY_TABLES.values():
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'name'
+              AND CHARACTER_MAXIMUM_LENGTH < %s
+        ''', (table, width))
+        if cursor.fetchone()[0]:
+            cursor.execute(f'ALTER TABLE {table} MODIFY name VARCHAR({width}) NOT NULL')
+
+# Composite indexes that keep keyset-paginated history (history_pages.py) to a range seek
+HISTORY_INDEXES = [
+    ('Debt_Payments', 'idx_debt_payments_user_date', 'user_id, payment_date'),
+    ('Goal_Contributions', 'idx_goal_contributions_user_date', 'user_id, contribution_date')
+]
+
+def add_missing_indexes(cursor, indexes):
+    """Add each (table, index, columns) that doesn't exist yet"""
+    for table, index, columns in indexes:
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        ''', (table, index))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f'ALTER TABLE {table} ADD INDEX {index} ({columns})')
+
+def create_goal_allocation_table(cursor):
+    """Per-month checkpoint of the nightly surplus allocation (see goal_allocation.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Goal_Allocation_Progress (
+            allocation_month DATE PRIMARY KEY,
+            last_user_id INT NOT NULL,
+            goals_funded INT UNSIGNED NOT NULL DEFAULT 0,
+            amount_allocated DECIMAL(15,2) NOT NULL DEFAULT 0,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    ''')
+
+# Date-range indexes behind the daily notification checks (notifications.py)
+NOTIFICATION_INDEXES = [
+    ('Goals', 'idx_goals_status_target', 'goal_status, target_date'),
+    ('Goals', 'idx_goals_updated', 'updated_at'),
+    ('Debts', 'idx_debts_due', 'due_date')
+]
+
+def create_notification_tables(cursor):
+    """Per-user notifications and the timing of each daily run (see notifications.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Notifications (
+            notification_id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            kind ENUM('goal_deadline', 'goal_milestone', 'debt_due') NOT NULL,
+            subject_id INT NOT NULL,
+            dedupe_key VARCHAR(32) NOT NULL,
+            due_date DATE NULL,
+            notify_date DATE NOT NULL,
+            message VARCHAR(500) NOT NULL,
+            read_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_notifications_subject (kind, subject_id, dedupe_key),
+            KEY idx_notifications_unread (user_id, read_at, due_date),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Notification_Runs (
+            run_date DATE PRIMARY KEY,
+            notifications INT UNSIGNED NOT NULL DEFAULT 0,
+            seconds DECIMAL(10,3) NOT NULL,
+            finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    add_missing_indexes(cursor, NOTIFICATION_INDEXES)
+
+def create_recurring_patterns_table(cursor):
+    """Running state of each transaction group checked for recurrence (see recurring.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Recurring_Patterns (
+            user_id INT NOT NULL,
+            income_expense VARCHAR(30) NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            mode VARCHAR(50) NOT NULL,
+            amount_bucket SMALLINT NOT NULL,
+            occurrences INT UNSIGNED NOT NULL,
+            transactions INT UNSIGNED NOT NULL,
+            first_date DATE NOT NULL,
+            last_date DATE NOT NULL,
+            gap_sum DOUBLE NOT NULL,
+            gap_sq_sum DOUBLE NOT NULL,
+            amount_sum DECIMAL(17,2) NOT NULL,
+            period_days DECIMAL(9,2) NULL,
+            is_recurring BOOLEAN NOT NULL,
+            next_expected DATE NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, income_expense, category, mode, amount_bucket),
+            KEY idx_recurring_patterns_next (user_id, is_recurring, next_expected)
+        )
+    ''')
+
+# (version, description, step); steps take (connection, cursor), must be idempotent and never reorder.
+# Append new steps with the next version number.
+SCHEMA_STEPS = [
+    (1, "data versions and FX rates", lambda connection, cursor: create_support_tables(connection)),
+    (2, "dimension tables", lambda connection, cursor: create_vocabulary_tables(connection)),
+    (3, "users: auto-increment ids, unique email, hashed passwords", lambda connection, cursor: prepare_users_table(connection)),
+    (4, "debts", lambda connection, cursor: create_debt_tables(cursor)),
+    (5, "goals", lambda connection, cursor: create_goals_tables(cursor)),
+    (6, "write queue state", lambda connection, cursor: create_write_queue_table(cursor)),
+    (7, "debt ledger and balance snapshots", lambda connection, cursor: create_debt_ledger_tables(cursor)),
+    (8, "interest accrual state", lambda connection, cursor: create_interest_accrual_tables(cursor)),
+    (9, "payment and contribution history indexes", lambda connection, cursor: add_missing_indexes(cursor, HISTORY_INDEXES)),
+    (10, "goal allocation progress", lambda connection, cursor: create_goal_allocation_table(cursor)),
+    (11, "notifications", lambda connection, cursor: create_notification_tables(cursor)),
+    (12, "recurring transaction patterns", lambda connection, cursor: create_recurring_patterns_table(cursor)),
+    (13, "dimension name widths", lambda connection, cursor: widen_vocabulary_names(cursor))
+]
+
+SCHEMA_VERSION = SCHEMA_STEPS[-1][0]
+
+def read_schema_version(cursor):
+    """Recorded schema version, 0 before the first bootstrap (no Schema_Version table yet)"""
+    try:
+        cursor.execute("SELECT version FROM Schema_Version WHERE component = 'dabba'")
+    except ProgrammingError as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        return 0
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def apply_schema_steps(connection, cursor, current_version):
+    """Run the steps after current_version, recording each as it completes"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Schema_Version (
+            component VARCHAR(50) PRIMARY KEY,
+            version INT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    ''')
+    for version, description, step in SCHEMA_STEPS:
+        if version <= current_version:
+            continue
+        step(connection, cursor)
+        cursor.execute('''
+            INSERT INTO Schema_Version (component, version) VALUES ('dabba', %s)
+            ON DUPLICATE KEY UPDATE version = VALUES(version)
+        ''', (version,))
+        connection.commit()
+        print(f"🧱 Schema step {version}: {description}")
+
+def bootstrap_schema():
+    """Bring the schema up to SCHEMA_VERSION once per process; True when it is current
+
+    Concurrent processes serialize on a MySQL named lock, so only one of them
+    applies missing steps. Returns False (and retries on the next call) when
+    the database can't be reached.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+
+    with _schema_lock:
+        if _schema_ready:
+            return True
+        connection = get_mysql_connection()
+        if connection is None:
+            return False
+
+        try:
+            cursor = connection.cursor()
+            if read_schema_version(cursor) < SCHEMA_VERSION:
+                cursor.execute('SELECT GET_LOCK(%s, %s)', ('dabba_schema_bootstrap', SCHEMA_LOCK_TIMEOUT))
+                if cursor.fetchone()[0] != 1:
+                    raise Error("timed out waiting for another schema bootstrap")
+                try:
+                    apply_schema_steps(connection, cursor, read_schema_version(cursor))
+                finally:
+                    cursor.execute('SELECT RELEASE_LOCK(%s)', ('dabba_schema_bootstrap',))
+                    cursor.fetchone()
+            cursor.close()
+            connection.close()
+        except Error as e:
+            print(f"❌ Schema bootstrap failed: {e}")
+            connection.close()
+            return False
+
+        mark_schema_ready()
+        _schema_ready = True
+        return True
+
+def main():
+    """Command line entry point"""
+    if bootstrap_schema():
+        print(f"✅ Schema is at version {SCHEMA_VERSION}")
+
+if __name__ == "__main__":
+    main()
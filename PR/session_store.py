@@ -0,0 +1,324 @@
+"""
+Server-side sessions that survive reconnects and restarts
+
+With DABBA_SESSION_STORE=sqlite (or =file), logging in creates a random
+session token, kept in the page URL as ?sid=<token>. The store holds the
+user, their data version and their warmed aggregates. A browser that
+reconnects, or lands on a restarted process, is logged straight back in and
+its summary, category and trend aggregates are served from the restored
+cache instead of MySQL. Pages that list rows (the dashboard's transactions)
+and the login-time notification check still query the database.
+
+Streamlit can't set an HttpOnly cookie, so the token stays in the URL, with
+two limits on what a leaked URL is worth: a session only resumes for the
+browser that started it (same User-Agent), and every resume replaces the
+token, so a copied link stops working once its owner reconnects. Only a
+SHA-256 of each token is stored. Sessions expire after SESSION_TTL_SECONDS
+without use, and expired ones are swept periodically.
+
+Stored sessions are pickles, so each is signed with an HMAC under a server
+secret and only unpickled once the signature checks out: whoever can write
+to the store's file or directory still can't make the app load their data.
+Hosts sharing a session directory must share DABBA_SESSION_SECRET.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import secrets
+import hmac
+import hashlib
+import threading
+from contextlib import closing
+import streamlit as st
+from aggregate_cache import export_cached_aggregates, seed_cached_aggregates
+from database import remember_data_version
+
+# 'sqlite', 'file' or 'off'
+SESSION_STORE_BACKEND = os.environ.get("DABBA_SESSION_STORE", "off")
+
+SESSION_STORE_PATH = os.environ.get(
+    "DABBA_SESSION_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db" if SESSION_STORE_BACKEND == "sqlite" else "sessions")
+)
+
+# Idle lifetime of a session; every save extends it
+SESSION_TTL_SECONDS = 24 * 3600
+
+# Minimum seconds between expiry sweeps (a sweep runs as part of a save)
+SESSION_SWEEP_INTERVAL_SECONDS = 600
+
+# URL query parameter carrying the session token
+SESSION_QUERY_PARAM = "sid"
+
+# Key that signs stored sessions; without it a random key is created once in SESSION_SECRET_PATH
+SESSION_SECRET = os.environ.get("DABBA_SESSION_SECRET")
+SESSION_SECRET_PATH = os.environ.get(
+    "DABBA_SESSION_SECRET_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_secret")
+)
+
+_session_store = None
+_session_store_lock = threading.Lock()
+_session_secret = None
+
+def _token_key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def session_secret():
+    """DABBA_SESSION_SECRET, or this host's random key from SESSION_SECRET_PATH (created, mode 0600, on first use)"""
+    global _session_secret
+    with _session_store_lock:
+        if _session_secret is None:
+            if SESSION_SECRET:
+                _session_secret = SESSION_SECRET.encode('utf-8')
+            else:
+                try:
+                    fd = os.open(SESSION_SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(secrets.token_bytes(32))
+                except FileExistsError:
+                    pass
+                with open(SESSION_SECRET_PATH, 'rb') as f:
+                    _session_secret = f.read()
+        return _session_secret
+
+def seal(secret, value):
+    """value pickled, prefixed with its HMAC-SHA256 under secret"""
+    data = pickle.dumps(value)
+    return hmac.new(secret, data, hashlib.sha256).digest() + data
+
+def unseal(secret, blob):
+    """The value sealed in blob, or None when its signature doesn't match (nothing is unpickled then)"""
+    mac, data = blob[:32], blob[32:]
+    if len(mac) < 32 or not hmac.compare_digest(mac, hmac.new(secret, data, hashlib.sha256).digest()):
+        return None
+    return pickle.loads(data)
+
+class SQLiteSessionStore:
+    """Sessions in one local SQLite file, shared by every process on the host"""
+
+    def __init__(self, path, secret=None):
+        self.path = path
+        self.secret = secret or session_secret()
+        self._last_sweep = 0.0
+        with closing(self._connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    token_key TEXT PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                )
+            ''')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, token, now=None):
+        now = time.time() if now is None else now
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute('SELECT payload FROM sessions WHERE token_key = ? AND expires_at > ?',
+                                     (_token_key(token), now)).fetchone()
+        return unseal(self.secret, row[0]) if row else None
+
+    def put(self, token, payload, ttl=SESSION_TTL_SECONDS, now=None):
+        now = time.time() if now is None else now
+        with closing(self._connect()) as connection, connection:
+            connection.execute('INSERT OR REPLACE INTO sessions (token_key, user_id, expires_at, payload) VALUES (?, ?, ?, ?)',
+                               (_token_key(token), payload['user_id'], now + ttl, seal(self.secret, payload)))
+        if now - self._last_sweep >= SESSION_SWEEP_INTERVAL_SECONDS:
+            self.sweep(now)
+
+    def delete(self, token):
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM sessions WHERE token_key = ?', (_token_key(token),))
+
+    def sweep(self, now=None):
+        """Remove expired sessions; returns how many"""
+        now = time.time() if now is None else now
+        self._last_sweep = now
+        with closing(self._connect()) as connection, connection:
+            return connection.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,)).rowcount
+
+class FileSessionStore:
+    """Sessions as one file each in a directory (e.g. on a volume shared by several hosts)"""
+
+    def __init__(self, path, secret=None):
+        self.path = path
+        self.secret = secret or session_secret()
+        self._last_sweep = 0.0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, token):
+        return os.path.join(self.path, _token_key(token) + '.session')
+
+    def _read(self, file_path):
+        try:
+            with open(file_path, 'rb') as f:
+                return unseal(self.secret, f.read())
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def get(self, token, now=None):
+        now = time.time() if now is None else now
+        record = self._read(self._file(token))
+        return record[1] if record is not None and record[0] > now else None
+
+    def put(self, token, payload, ttl=SESSION_TTL_SECONDS, now=None):
+        now = time.time() if now is None else now
+        file_path = self._file(token)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(seal(self.secret, (now + ttl, payload)))
+        os.replace(tmp_path, file_path)
+        if now - self._last_sweep >= SESSION_SWEEP_INTERVAL_SECONDS:
+            self.sweep(now)
+
+    def delete(self, token):
+        try:
+            os.remove(self._file(token))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, now=None):
+        """Remove expired sessions; returns how many"""
+        now = time.time() if now is None else now
+        self._last_sweep = now
+        removed = 0
+        for name in os.listdir(self.path):
+            if not name.endswith('.session'):
+                continue
+            file_path = os.path.join(self.path, name)
+            record = self._read(file_path)
+            if record is None or record[0] <= now:
+                try:
+                    os.remove(file_path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+SESSION_STORES = {
+    'sqlite': SQLiteSessionStore,
+    'file': FileSessionStore
+}
+
+def get_session_store():
+    """The configured store, or None when sessions are off"""
+    global _session_store
+    if SESSION_STORE_BACKEND not in SESSION_STORES:
+        return None
+    with _session_store_lock:
+        if _session_store is None:
+            _session_store = SESSION_STORES[SESSION_STORE_BACKEND](SESSION_STORE_PATH)
+        return _session_store
+
+def client_key(user_agent):
+    """What a session is bound to: a hash of the browser's User-Agent"""
+    return hashlib.sha256((user_agent or '').encode('utf-8')).hexdigest()
+
+def _current_client_key():
+    return client_key(st.context.headers.get('User-Agent'))
+
+def _session_payload(user_id, user_name, data_version, client):
+    return {
+        'user_id': user_id,
+        'user_name': user_name,
+        'data_version': data_version,
+        'client': client,
+        'aggregates': export_cached_aggregates(user_id)
+    }
+
+def claim_session(store, token, client):
+    """Swap a live session's token for a new one; returns (new token, payload), or None
+
+    None when the token is unknown or expired, or the session belongs to
+    another client. The old token stops working.
+    """
+    payload = store.get(token)
+    if payload is None or payload.get('client') != client:
+        return None
+    store.delete(token)
+    new_token = secrets.token_urlsafe(32)
+    store.put(new_token, payload)
+    return new_token, payload
+
+def _use_token(token, client):
+    st.session_state.session_token = token
+    st.session_state.session_client = client
+    st.query_params[SESSION_QUERY_PARAM] = token
+
+def start_session(user_id, user_name):
+    """Create a session for a user who just logged in and put its token in the URL"""
+    store = get_session_store()
+    if store is None:
+        return
+    token = secrets.token_urlsafe(32)
+    client = _current_client_key()
+    store.put(token, _session_payload(user_id, user_name, None, client))
+    _use_token(token, client)
+
+def resume_session():
+    """Log the browser back in from the token in its URL; True if a live session was found
+
+    The session must have been started by the same browser. Its token is
+    replaced by a fresh one. Restores the saved aggregates into the process
+    cache and trusts the saved data version for a moment (see
+    DATA_VERSION_TTL_SECONDS), so the aggregate queries are skipped on the
+    first render after a reconnect.
+    """
+    store = get_session_store()
+    token = st.query_params.get(SESSION_QUERY_PARAM)
+    if store is None or not token:
+        return False
+    claimed = claim_session(store, token, _current_client_key())
+    if claimed is None:
+        del st.query_params[SESSION_QUERY_PARAM]
+        return False
+    token, payload = claimed
+    _use_token(token, payload['client'])
+
+    seed_cached_aggregates(payload['aggregates'])
+    if payload['data_version'] is not None:
+        remember_data_version(payload['user_id'], payload['data_version'])
+    st.session_state.authenticated = True
+    st.session_state.user_id = payload['user_id']
+    st.session_state.user_name = payload['user_name']
+    st.session_state.session_saved = _fingerprint(payload['aggregates'])
+    return True
+
+def _fingerprint(aggregates):
+    return tuple(sorted((key, version) for key, (version, _) in aggregates.items()))
+
+def save_session():
+    """Store the user's current aggregates with their session; skipped when nothing changed"""
+    store = get_session_store()
+    token = st.session_state.get('session_token')
+    if store is None or not token:
+        return
+    user_id = st.session_state.user_id
+    payload = _session_payload(user_id, st.session_state.user_name, None, st.session_state.session_client)
+    fingerprint = _fingerprint(payload['aggregates'])
+    if fingerprint == st.session_state.get('session_saved'):
+        return
+    # The newest version any cached aggregate was computed at is the one to trust on resume
+    versions = [version for _, version in fingerprint]
+    payload['data_version'] = max(versions) if versions else None
+    store.put(token, payload)
+    st.session_state.session_saved = fingerprint
+
+def end_session():
+    """Forget the session on logout"""
+    store = get_session_store()
+    token = st.session_state.get('session_token')
+    if store is not None and token:
+        store.delete(token)
+    st.session_state.session_token = None
+    st.session_state.session_client = None
+    st.session_state.session_saved = None
+    if SESSION_QUERY_PARAM in st.query_params:
+        del st.query_params[SESSION_QUERY_PARAM]
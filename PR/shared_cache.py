@@ -0,0 +1,115 @@
+"""
+Aggregate cache shared by every worker process on a host
+
+Several Streamlit processes behind a load balancer each keep their own
+in-process aggregate cache (aggregate_cache.py), so a user moving between
+workers would recompute everything. Setting DABBA_SHARED_CACHE to a file path
+adds an SQLite-backed second tier that all workers read and write.
+
+Entries carry the user's data version, exactly like the in-process tier.
+Every write bumps the version in Data_Versions, so an entry computed before a
+write is never served after it, on any worker. No invalidation messages are
+needed. After a write, the delta-updated aggregates are published here, so the
+other workers pick them up instead of recomputing.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+
+# SQLite file shared by the workers; unset keeps caching per process
+SHARED_CACHE_PATH = os.environ.get("DABBA_SHARED_CACHE")
+
+# Entries kept; the least recently stored are pruned first
+SHARED_CACHE_MAX_ENTRIES = 20000
+
+# Stores between prunes
+SHARED_CACHE_PRUNE_EVERY = 500
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+class SharedCache:
+    """Versioned pickled results in one SQLite file (WAL mode, so readers never block)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._stores = 0
+        self.metrics = {'hits': 0, 'misses': 0, 'stores': 0}
+        connection = self._connection()
+        with connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS aggregate_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                )
+            ''')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_aggregate_cache_stored ON aggregate_cache (stored_at)')
+
+    def _connection(self):
+        """One connection per thread, reused across calls"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, version, max_age):
+        """The result stored for key at exactly version and younger than max_age seconds, else None"""
+        try:
+            row = self._connection().execute('''
+                SELECT payload FROM aggregate_cache WHERE cache_key = ? AND version = ? AND stored_at > ?
+            ''', (repr(key), version, time.time() - max_age)).fetchone()
+        except sqlite3.Error as e:
+            print(f"❌ Shared cache read failed: {e}")
+            row = None
+        self.metrics['hits' if row else 'misses'] += 1
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, key, version, result):
+        """Store result for key unless a newer version is already there"""
+        connection = self._connection()
+        try:
+            with connection:
+                connection.execute('''
+                    INSERT INTO aggregate_cache (cache_key, version, stored_at, payload) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        version = excluded.version, stored_at = excluded.stored_at, payload = excluded.payload
+                    WHERE excluded.version >= aggregate_cache.version
+                ''', (repr(key), version, time.time(), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+                self._stores += 1
+                self.metrics['stores'] += 1
+                if self._stores % SHARED_CACHE_PRUNE_EVERY == 0:
+                    connection.execute('''
+                        DELETE FROM aggregate_cache WHERE stored_at < (
+                            SELECT stored_at FROM aggregate_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?
+                        )
+                    ''', (SHARED_CACHE_MAX_ENTRIES,))
+        except sqlite3.Error as e:
+            # The in-process tier still works; the next store retries
+            print(f"❌ Shared cache write failed: {e}")
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM aggregate_cache')
+
+def get_shared_cache():
+    """The shared tier, or None when DABBA_SHARED_CACHE is unset"""
+    global _shared_cache
+    if not SHARED_CACHE_PATH:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedCache(SHARED_CACHE_PATH)
+        return _shared_cache
+
+def get_shared_cache_metrics():
+    """Hit/miss/store counts of this process, or None when the shared tier is off"""
+    return dict(_shared_cache.metrics) if _shared_cache is not None else None
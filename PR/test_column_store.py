@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped transaction column store
+"""
+
+import sys
+import os
+import time
+import tempfile
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from column_store import (append_to_store, load_store_meta, open_store, store_summary, store_transaction_stats,
+                          store_category_data, store_monthly_trends, store_analytics_data, _store_lock)
+
+def make_transactions(rows, seed=11):
+    """Date-sorted transactions shaped like the Data table"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': np.sort(pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 900, rows), unit='D')),
+        'Mode': rng.choice(['UPI', 'Cash', 'Card'], rows),
+        'Category': rng.choice(['Food', 'Rent', 'Travel', 'Salary', 'Other'], rows),
+        'Amount': rng.integers(10, 5000, rows).astype('float64'),
+        'income_expense': rng.choice(['Income', 'Expense'], rows, p=[0.3, 0.7]),
+        'Currency': 'INR'
+    })
+
+def build_store(path, transactions, split_dates):
+    """Load transactions in several syncs, each re-sending the high-water date like sync_user_store"""
+    meta = load_store_meta(path)
+    for split in split_dates + [None]:
+        start = transactions['Date'].min() if meta['hwm_date'] is None else np.datetime64(meta['hwm_date'], 'D')
+        batch = transactions[transactions['Date'] >= start]
+        if split is not None:
+            batch = batch[batch['Date'] <= split]
+        meta = append_to_store(path, meta, batch.reset_index(drop=True))
+    return open_store(path, meta)
+
+def test_incremental_sync_matches_full_load():
+    """Appending past the high-water mark gives the same columns as one full load"""
+    transactions = make_transactions(5000)
+    with tempfile.TemporaryDirectory() as base_dir:
+        full = build_store(os.path.join(base_dir, 'full'), transactions, [])
+        incremental = build_store(os.path.join(base_dir, 'incremental'), transactions,
+                                  [pd.Timestamp('2022-06-30'), pd.Timestamp('2023-03-15')])
+
+        assert incremental['rows'] == full['rows'] == len(transactions)
+        assert np.array_equal(incremental['date'], full['date'])
+        assert np.isclose(incremental['amount'].sum(), full['amount'].sum())
+        assert isinstance(incremental['amount'], np.memmap)
+    print("✅ Incremental syncs reproduce the full load")
+
+def test_aggregates_match_sql_shapes():
+    """Store aggregates equal the grouped results the SQL queries return"""
+    transactions = make_transactions(5000)
+    expenses = transactions[transactions['income_expense'] == 'Expense']
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = build_store(base_dir, transactions, [pd.Timestamp('2023-01-01')])
+
+        summary = store_summary(store)
+        assert summary['transaction_count'] == len(transactions)
+        assert np.isclose(summary['total_expenses'], expenses['Amount'].sum())
+
+        expected = expenses.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        category_data = store_category_data(store)
+        assert list(category_data['Category']) == list(expected.index)
+        assert np.allclose(category_data['TotalAmount'], expected.values)
+
+        months = transactions['Date'].dt.strftime('%Y-%m')
+        expected = transactions.groupby([months, 'income_expense'])['Amount'].sum()
+        trends = store_monthly_trends(store).set_index(['Month', 'income_expense'])['TotalAmount']
+        assert np.allclose(trends.sort_index().values, expected.sort_index().values)
+
+        analytics = store_analytics_data(store)
+        daily = analytics['daily_data']
+        assert len(daily) == transactions['Date'].nunique()
+        assert daily['ExpenseCount'].sum() == len(expenses)
+        assert np.isclose(daily['DailyExpense'].sum(), expenses['Amount'].sum())
+
+        weekly = analytics['weekly_patterns'].set_index('DayName')['WeeklyExpense']
+        expected = expenses.groupby(expenses['Date'].dt.day_name())['Amount'].sum()
+        assert np.allclose(weekly[expected.index].values, expected.values)
+
+        payments = analytics['payment_analysis'].set_index('Mode')
+        expected = transactions.groupby('Mode')['Amount'].agg(['max', 'min', 'count'])
+        assert np.allclose(payments.loc[expected.index, 'MaxAmount'], expected['max'])
+        assert np.allclose(payments.loc[expected.index, 'MinAmount'], expected['min'])
+        assert (payments.loc[expected.index, 'TransactionCount'] == expected['count']).all()
+
+        stats = store_transaction_stats(store)
+        assert stats['expense_count'] == len(expenses) and stats['income_count'] == len(transactions) - len(expenses)
+        assert np.isclose(stats['avg_expense'], expenses['Amount'].mean())
+        assert stats['payment_methods'].to_dict() == transactions['Mode'].value_counts().to_dict()
+    print("✅ Store aggregates match the SQL results")
+
+def test_mapped_store_survives_sync():
+    """A store mapped before a sync still reads its rows: files grow in place, never shrink under it"""
+    transactions = make_transactions(3000)
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'store')
+        cutoff = pd.Timestamp('2023-01-01')
+        meta = append_to_store(path, load_store_meta(path), transactions[transactions['Date'] <= cutoff])
+        before = open_store(path, meta)
+        total = float(before['amount'].sum())
+
+        hwm = np.datetime64(meta['hwm_date'], 'D')
+        meta = append_to_store(path, meta, transactions[transactions['Date'] >= hwm].reset_index(drop=True))
+        assert np.isclose(float(before['amount'].sum()), total)
+        assert open_store(path, meta)['rows'] == len(transactions)
+    print("✅ Mapped columns stay readable across a sync")
+
+def _hold_store_lock(base_dir, events):
+    with _store_lock(7, base_dir):
+        events.put(('child', time.monotonic()))
+        time.sleep(0.3)
+        events.put(('child done', time.monotonic()))
+
+def test_store_lock_spans_processes():
+    """Another process holding a user's store lock keeps this one waiting"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        context = multiprocessing.get_context('fork')
+        events = context.Queue()
+        child = context.Process(target=_hold_store_lock, args=(base_dir, events))
+        child.start()
+        assert events.get(timeout=10)[0] == 'child'
+        with _store_lock(7, base_dir):
+            acquired = time.monotonic()
+        _, child_done = events.get(timeout=10)
+        child.join()
+        assert acquired >= child_done
+    print("✅ Store lock excludes other processes")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing column store")
+    print("=" * 50)
+
+    tests = [
+        ("Incremental sync", test_incremental_sync_matches_full_load),
+        ("Aggregate parity", test_aggregates_match_sql_shapes),
+        ("Mapped store survives sync", test_mapped_store_survives_sync),
+        ("Lock across processes", test_store_lock_spans_processes)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
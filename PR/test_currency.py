@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for FX rate expansion and vectorized currency conversion
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from currency import densify_rates, convert_amounts
+
+QUOTES = pd.DataFrame({
+    'date': ['2024-01-01', '2024-01-01', '2024-03-01'],
+    'currency': ['USD', 'EUR', 'USD'],
+    'rate': [80.0, 90.0, 84.0]
+})
+
+def day_number(day):
+    return int(np.datetime64(day, 'D').astype('int64'))
+
+def to_fx_rates(daily):
+    """Same {currency: (first day, rates)} shape get_fx_rates builds from FX_Rates"""
+    return {
+        currency: (day_number(group['rate_date'].iloc[0]), group['rate_to_pivot'].to_numpy())
+        for currency, group in daily.groupby('currency_code')
+    }
+
+def test_densify_fills_every_day():
+    """Every currency gets one rate per day, carried forward and back from the quotes"""
+    daily = densify_rates(QUOTES, start='2023-12-01', end='2024-04-30')
+    rates = daily.set_index(['currency_code', 'rate_date'])['rate_to_pivot']
+
+    assert len(daily) == 3 * len(pd.date_range('2023-12-01', '2024-04-30'))
+    assert rates[('USD', pd.Timestamp('2023-12-15'))] == 80.0   # before the first quote
+    assert rates[('USD', pd.Timestamp('2024-02-29'))] == 80.0   # carried forward
+    assert rates[('USD', pd.Timestamp('2024-04-30'))] == 84.0
+    assert rates[('EUR', pd.Timestamp('2024-04-30'))] == 90.0
+    assert (rates.loc['INR'] == 1.0).all()
+    print("✅ Sparse quotes expand to daily rates")
+
+def test_convert_amounts():
+    """Rows convert at their own day's rate; base-currency and unknown rows are untouched"""
+    fx_rates = to_fx_rates(densify_rates(QUOTES, start='2024-01-01', end='2024-12-31'))
+    currencies = ['INR', 'USD', 'EUR', 'JPY']
+    amounts = np.array([1000.0, 10.0, 10.0, 10.0, 500.0])
+    codes = np.array([0, 1, 1, 2, 3])
+    days = np.array([day_number(d) for d in ['2024-02-01', '2024-02-01', '2024-06-01', '2024-06-01', '2024-06-01']])
+
+    in_inr = convert_amounts(amounts, codes, currencies, days, 'INR', fx_rates)
+    assert np.allclose(in_inr, [1000.0, 800.0, 840.0, 900.0, 500.0])
+
+    in_usd = convert_amounts(amounts, codes, currencies, days, 'USD', fx_rates)
+    assert np.allclose(in_usd[:4], [12.5, 10.0, 10.0, 900.0 / 84.0])
+
+    inr_amounts = amounts[:2]
+    assert convert_amounts(inr_amounts, np.array([0, 0]), currencies, days[:2], 'INR', fx_rates) is inr_amounts
+    print("✅ Amounts convert per row date and currency")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing currency conversion")
+    print("=" * 50)
+
+    tests = [
+        ("Daily rate expansion", test_densify_fills_every_day),
+        ("Vectorized conversion", test_convert_amounts)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
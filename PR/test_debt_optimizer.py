@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the extra-payment allocator
+"""
+
+import sys
+import os
+import time
+import itertools
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from debt_optimizer import plan_debt_payments
+
+def make_debts(count, seed=3):
+    rng = np.random.default_rng(seed)
+    balances = rng.uniform(5000, 500000, count).round(2)
+    rates = rng.uniform(0, 36, count).round(1)
+    minimums = (balances * rng.uniform(0.01, 0.03, count)).round(2)
+    return balances, rates, minimums
+
+def simulate_random_allocation(balances, rates, minimums, budget, rng, months=360):
+    """Interest and months to debt-free when each month's extra is split at random"""
+    balance = balances.astype('float64').copy()
+    monthly = rates / 100 / 12
+    total_interest = 0.0
+    for month in range(1, months + 1):
+        interest = balance * monthly
+        total_interest += interest.sum()
+        balance += interest
+        payment = np.minimum(minimums, balance)
+        extra = budget - payment.sum()
+        room = balance - payment
+        while extra > 1e-9 and room.sum() > 1e-9:
+            share = rng.dirichlet(np.ones(len(balance))) * extra
+            add = np.minimum(share, room)
+            payment += add
+            room -= add
+            extra -= add.sum()
+        balance -= payment
+        balance[balance < 0.005] = 0.0
+        if balance.sum() == 0:
+            return total_interest, month
+    return total_interest, None
+
+def test_avalanche_beats_every_alternative():
+    """No priority order and no random split pays less interest or finishes sooner"""
+    balances, rates, minimums = make_debts(4)
+    budget = minimums.sum() * 3
+    best = plan_debt_payments(balances, rates, minimums, budget)
+
+    for order in itertools.permutations(range(4)):
+        plan = plan_debt_payments(balances, rates, minimums, budget, priority=list(order))
+        assert best['total_interest'] <= plan['total_interest'] + 1e-6, order
+        assert best['months_to_debt_free'] <= plan['months_to_debt_free'], order
+
+    rng = np.random.default_rng(11)
+    for _ in range(20):
+        interest, months = simulate_random_allocation(balances, rates, minimums, budget, rng)
+        assert best['total_interest'] <= interest + 1e-6
+        assert months is None or best['months_to_debt_free'] <= months
+    print(f"✅ Avalanche: {best['months_to_debt_free']} months, ₹{best['total_interest']:,.0f} interest, "
+          f"no worse than 24 orders and 20 random splits")
+
+def test_schedule_is_consistent():
+    """Budget is spent in full until the last month, minimums are met and balances roll forward"""
+    balances, rates, minimums = make_debts(10)
+    budget = minimums.sum() * 2
+    plan = plan_debt_payments(balances, rates, minimums, budget)
+    payments, interest, after = plan['payments'], plan['interest'], plan['balances']
+
+    before = np.vstack([balances, after[:-1]])
+    assert np.allclose(before + interest - payments, after, atol=0.01)
+    assert (after >= 0).all()
+    assert np.allclose(payments[:-1].sum(axis=1), budget)
+    assert (payments >= np.minimum(minimums, before + interest) - 1e-9).all()
+    assert plan['payoff_month'].max() == plan['months_to_debt_free'] == len(payments)
+    assert plan_debt_payments(balances, rates, minimums, minimums.sum() / 2) is None
+    print("✅ Schedule spends the budget and meets every minimum")
+
+def test_fifty_debts_thirty_years_is_interactive():
+    """50 debts over 360 months plans in well under 100 ms"""
+    balances, rates, _ = make_debts(50)
+    # Minimums barely above the interest, so the plan runs the full 360 months
+    rates = 5.0 + rates / 12
+    minimums = balances * rates / 1200 + 1
+    budget = minimums.sum() + 10
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        plan = plan_debt_payments(balances, rates, minimums, budget)
+        timings.append((time.perf_counter() - started) * 1000)
+    assert plan['payments'].shape == (360, 50)
+    assert min(timings) < 100, timings
+    print(f"✅ 50 debts x 360 months planned in {min(timings):.1f} ms")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing debt optimizer")
+    print("=" * 50)
+
+    tests = [
+        ("Optimality", test_avalanche_beats_every_alternative),
+        ("Schedule", test_schedule_is_consistent),
+        ("Speed", test_fifty_debts_thirty_years_is_interactive)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
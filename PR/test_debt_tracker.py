@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached debt overview (debt_tracker.get_debt_overview)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import debt_tracker
+from aggregate_cache import clear_aggregate_cache, _aggregate_cache
+
+class FailingConnection:
+    """A connection whose queries fail; records whether it was closed"""
+
+    def __init__(self):
+        self.closed = False
+
+    def cursor(self, *args, **kwargs):
+        raise RuntimeError("lost connection during query")
+
+    def close(self):
+        self.closed = True
+
+def test_failed_read_closes_connection():
+    """A failed overview query closes its connection and caches nothing"""
+    clear_aggregate_cache()
+    connections = []
+
+    def connect():
+        connections.append(FailingConnection())
+        return connections[-1]
+
+    original = debt_tracker.get_mysql_connection, debt_tracker.get_data_version
+    debt_tracker.get_mysql_connection = connect
+    debt_tracker.get_data_version = lambda user_id: 0
+    try:
+        assert debt_tracker.get_debt_overview(7) == {}
+        assert debt_tracker.get_debt_overview(7) == {}
+    finally:
+        debt_tracker.get_mysql_connection, debt_tracker.get_data_version = original
+    assert len(connections) == 2 and all(connection.closed for connection in connections)
+    assert not _aggregate_cache
+    print("✅ Failed reads close their connection")
+
+def test_keyed_by_base_currency():
+    """The overview is cached under the configured base currency, like the other aggregates"""
+    clear_aggregate_cache()
+    original = debt_tracker.BASE_CURRENCY, debt_tracker.get_data_version, debt_tracker.cached_aggregate
+    keys = []
+    debt_tracker.BASE_CURRENCY = 'USD'
+    debt_tracker.get_data_version = lambda user_id: 0
+    debt_tracker.cached_aggregate = lambda key, version, compute: keys.append(key) or {}
+    try:
+        debt_tracker.get_debt_overview(7)
+    finally:
+        debt_tracker.BASE_CURRENCY, debt_tracker.get_data_version, debt_tracker.cached_aggregate = original
+    assert keys == [('debt_overview', 7, 'USD')], keys
+    print("✅ Keyed by the base currency")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing debt overview")
+    print("=" * 50)
+
+    tests = [
+        ("Failed read closes connection", test_failed_read_closes_connection),
+        ("Keyed by base currency", test_keyed_by_base_currency)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
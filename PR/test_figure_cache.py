@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the serialized figure cache (figure_cache.cached_figure)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from collections import Counter
+
+import pandas as pd
+import plotly.express as px
+
+import figure_cache
+from figure_cache import cached_figure, clear_figure_cache
+
+def counting_builder(calls, name, data):
+    """A build_figure for data that records each call under name"""
+    def build():
+        calls[name] += 1
+        return px.bar(data, x='Category', y='TotalAmount', title=name)
+    return build
+
+def category_data(rent=9000.0):
+    return pd.DataFrame({'Category': ['Rent', 'Food'], 'TotalAmount': [rent, 1200.0]})
+
+def test_hits_and_misses():
+    """Unchanged data is served from the cache; new data, charts or themes build again"""
+    clear_figure_cache()
+    calls = Counter()
+    data = category_data()
+
+    first = cached_figure('categories', [data], counting_builder(calls, 'categories', data))
+    again = cached_figure('categories', [category_data()], counting_builder(calls, 'categories', data))
+    assert calls['categories'] == 1
+    assert list(again.data[0].y) == [9000.0, 1200.0] and again.layout.title.text == 'categories' and again is not first
+
+    changed = category_data(rent=9500.0)
+    fig = cached_figure('categories', [changed], counting_builder(calls, 'categories', changed))
+    assert calls['categories'] == 2 and list(fig.data[0].y) == [9500.0, 1200.0]
+
+    cached_figure('payments', [data], counting_builder(calls, 'payments', data))
+    assert calls['payments'] == 1
+
+    original = figure_cache.get_chart_theme
+    figure_cache.get_chart_theme = lambda: 'dark'
+    try:
+        cached_figure('categories', [data], counting_builder(calls, 'categories', data))
+    finally:
+        figure_cache.get_chart_theme = original
+    assert calls == Counter({'categories': 3, 'payments': 1}), calls
+    print("✅ Hits reuse the figure; data, chart and theme changes miss")
+
+def test_lru_eviction():
+    """Past FIGURE_CACHE_SIZE the least recently used figure is rebuilt, recently used ones are not"""
+    clear_figure_cache()
+    calls = Counter()
+    data = category_data()
+
+    def show(name):
+        cached_figure(name, [data], counting_builder(calls, name, data))
+
+    original = figure_cache.FIGURE_CACHE_SIZE
+    figure_cache.FIGURE_CACHE_SIZE = 3
+    try:
+        for name in ['a', 'b', 'c']:
+            show(name)
+        show('a')  # now the most recently used
+        show('d')  # evicts 'b'
+        assert len(figure_cache._figure_cache) == 3
+        for name in ['a', 'c', 'd']:
+            show(name)
+        assert calls == Counter({'a': 1, 'b': 1, 'c': 1, 'd': 1}), calls
+        show('b')
+        assert calls['b'] == 2, calls
+    finally:
+        figure_cache.FIGURE_CACHE_SIZE = original
+        clear_figure_cache()
+    print("✅ Least recently used figures are evicted first")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing figure cache")
+    print("=" * 50)
+
+    tests = [
+        ("Hits and misses", test_hits_and_misses),
+        ("LRU eviction", test_lru_eviction)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
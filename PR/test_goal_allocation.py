@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the surplus allocation engine
+"""
+
+import sys
+import os
+import time
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+from datetime import date
+
+import goal_allocation
+from goal_allocation import allocate_surplus, write_allocations, GOAL_COLUMNS
+
+MONTH = date(2024, 3, 1)
+
+def make_goals(rows):
+    goals = pd.DataFrame(rows, columns=GOAL_COLUMNS)
+    goals['target_date'] = pd.to_datetime(goals['target_date'])
+    goals['monthly_target'] = goals['monthly_target'].astype('float64')
+    return goals
+
+def test_priority_and_deadlines():
+    """Deadline needs are met in priority order, infeasible deadlines yield, leftovers fill in order"""
+    goals = make_goals([
+        # user, goal, priority (1 High, 2 Medium, 3 Low), target date, target, current, monthly target
+        (1, 1, 1, date(2024, 6, 30), 9000, 1000, None),    # 8000 over 4 months: 2000
+        (1, 2, 2, date(2024, 1, 31), 30000, 0, None),      # overdue: needs all 30000, more than the surplus
+        (1, 3, 2, None, 50000, 0, 3000),                   # monthly target 3000
+        (2, 4, 3, None, 300, 0, None),
+        (2, 5, 3, None, 5000, 0, None),
+        (3, 6, 1, None, 1000, 0, 500),                     # negative surplus
+        (4, 7, 1, None, 1000, 0, 500)                      # no transactions
+    ])
+    surplus = pd.Series({1: 10000.0, 2: 1000.0, 3: -200.0})
+    allocations = allocate_surplus(goals, surplus, MONTH)
+    got = dict(zip(allocations['goal_id'], allocations['amount']))
+
+    # Goal 3 (feasible) is funded before goal 2 (same priority, infeasible), which takes the rest
+    assert got == {1: 2000.0, 3: 3000.0, 2: 5000.0, 4: 300.0, 5: 700.0}, got
+    assert list(allocations['goal_id']) == [1, 3, 2, 4, 5]
+    print("✅ Needs by priority and deadline, then leftovers in order")
+
+def test_bounds_at_scale():
+    """Vectorized over 100k users: never more than the surplus or what a goal still needs"""
+    rng = np.random.default_rng(21)
+    users, goals_per_user = 100000, 4
+    count = users * goals_per_user
+    target = rng.integers(1000, 500000, count).astype('float64')
+    goals = pd.DataFrame({
+        'user_id': np.repeat(np.arange(1, users + 1), goals_per_user),
+        'goal_id': np.arange(1, count + 1),
+        'priority_rank': rng.integers(1, 4, count).astype('int8'),
+        'target_date': pd.to_datetime('2024-03-01') + pd.to_timedelta(rng.integers(-60, 1500, count), unit='D'),
+        'target_amount': target,
+        'current_amount': (target * rng.uniform(0, 1, count)).round(2),
+        'monthly_target': np.where(rng.random(count) < 0.5, np.nan, rng.integers(100, 20000, count))
+    })
+    goals.loc[rng.random(count) < 0.2, 'target_date'] = pd.NaT
+    surplus = pd.Series(rng.normal(20000, 30000, users).round(2), index=np.arange(1, users + 1))
+
+    started = time.perf_counter()
+    allocations = allocate_surplus(goals, surplus, MONTH)
+    elapsed = time.perf_counter() - started
+
+    per_user = allocations.groupby('user_id')['amount'].sum()
+    assert (per_user <= surplus.reindex(per_user.index) + 1e-6).all()
+    remaining = (goals.set_index('goal_id')['target_amount'] - goals.set_index('goal_id')['current_amount'])
+    assert (allocations['amount'].to_numpy() <= remaining.reindex(allocations['goal_id']).to_numpy() + 1e-6).all()
+    assert (allocations['amount'] > 0).all() and allocations['goal_id'].is_unique
+
+    # A user whose surplus covers every goal has every goal funded in full
+    totals = goals.assign(remaining=goals['target_amount'] - goals['current_amount']).groupby('user_id')['remaining'].sum()
+    rich = totals.index[surplus.reindex(totals.index) >= totals + 1]
+    funded = allocations[allocations['user_id'].isin(rich)].groupby('user_id')['amount'].sum()
+    assert len(rich) > 0 and np.allclose(funded.reindex(rich).to_numpy(), totals[rich].to_numpy(), atol=0.05)
+
+    assert elapsed < 5, elapsed
+    print(f"✅ {count:,} goals of {users:,} users allocated in {elapsed:.2f}s ({count / elapsed:,.0f} goals/s)")
+
+class SQLiteCursor:
+    """MySQL-style %s placeholders over an sqlite3 cursor"""
+
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+
+    def execute(self, statement, params=()):
+        self.cursor.execute(statement.replace('%s', '?'), params)
+
+    def executemany(self, statement, rows):
+        self.cursor.executemany(statement.replace('%s', '?'), rows)
+
+def test_write_credits_only_allocations():
+    """Goals are credited the allocated amounts, even when a user's own contribution looks the same"""
+    connection = sqlite3.connect(':memory:')
+    connection.executescript('''
+        CREATE TABLE Goals (goal_id INTEGER PRIMARY KEY, user_id INT, target_amount REAL, current_amount REAL,
+                            goal_status TEXT);
+        CREATE TABLE Goal_Contributions (contribution_id INTEGER PRIMARY KEY, goal_id INT, user_id INT,
+                                         contribution_amount REAL, contribution_date TEXT,
+                                         contribution_type TEXT, notes TEXT);
+        INSERT INTO Goals VALUES (1, 1, 1000, 100, 'Active'), (2, 1, 5000, 0, 'Active'), (3, 2, 800, 0, 'Active');
+        INSERT INTO Goal_Contributions VALUES (1, 2, 1, 250, '2024-03-31', 'Automatic', 'Surplus allocation 2024-03');
+    ''')
+    allocations = pd.DataFrame({'goal_id': [1, 2, 3], 'user_id': [1, 1, 2], 'amount': [900.0, 400.0, 120.5]})
+
+    original = goal_allocation.ALLOCATION_UPDATE_BATCH
+    goal_allocation.ALLOCATION_UPDATE_BATCH = 2  # two statements for three goals
+    try:
+        write_allocations(SQLiteCursor(connection), allocations, date(2024, 3, 31), 1, 2)
+    finally:
+        goal_allocation.ALLOCATION_UPDATE_BATCH = original
+
+    goals = connection.execute('SELECT goal_id, current_amount, goal_status FROM Goals ORDER BY goal_id').fetchall()
+    assert goals == [(1, 1000.0, 'Completed'), (2, 400.0, 'Active'), (3, 120.5, 'Active')], goals
+    assert connection.execute('SELECT COUNT(*) FROM Goal_Contributions').fetchone()[0] == 4
+    print("✅ Only the allocated amounts are credited")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing goal allocation")
+    print("=" * 50)
+
+    tests = [
+        ("Priority and deadlines", test_priority_and_deadlines),
+        ("Bounds at scale", test_bounds_at_scale),
+        ("Write credits only allocations", test_write_credits_only_allocations)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for goal contributions
+
+Worker threads each open their own connection to a shared SQLite database
+file. SQLite locks the whole database at the first write rather than the
+goal row, so this checks that concurrent calls lose no update and write one
+history row each under a write lock. It can't show that InnoDB's row-lock
+ordering is right; that needs a MySQL server.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import warnings
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import goals_manager
+from goals_manager import add_goal_contribution
+
+class SQLiteConnection:
+    """MySQL-style %s placeholders over an sqlite3 connection"""
+
+    open_connections = 0
+
+    def __init__(self, path, timeout=60):
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        SQLiteConnection.open_connections += 1
+
+    def cursor(self):
+        return SQLiteCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def close(self):
+        self.connection.close()
+        SQLiteConnection.open_connections -= 1
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.rowcount = 0
+
+    def execute(self, statement, params=()):
+        self.cursor.execute(statement.replace('%s', '?'), params)
+        self.rowcount = self.cursor.rowcount
+
+    def close(self):
+        self.cursor.close()
+
+def make_database(path):
+    """Goals 1-4 belong to user 1, goal 5 to user 2"""
+    connection = sqlite3.connect(path)
+    connection.execute('''
+        CREATE TABLE Goals (goal_id INTEGER PRIMARY KEY, user_id INT, target_amount REAL,
+                            current_amount REAL, goal_status TEXT)
+    ''')
+    connection.execute('''
+        CREATE TABLE Goal_Contributions (contribution_id INTEGER PRIMARY KEY, goal_id INT, user_id INT,
+                                         contribution_amount REAL, contribution_date TEXT,
+                                         contribution_type TEXT CHECK (contribution_type IN
+                                             ('Manual', 'Automatic', 'Bonus', 'Refund', 'Other')),
+                                         notes TEXT)
+    ''')
+    connection.executemany('INSERT INTO Goals VALUES (?, ?, ?, ?, ?)', [
+        (1, 1, 10000.0, 0.0, 'Active'),
+        (2, 1, 1e9, 0.0, 'Active'),
+        (3, 1, 5000.0, 0.0, 'Paused'),
+        (4, 1, 1e9, 0.0, 'Paused'),
+        (5, 2, 100.0, 0.0, 'Active')
+    ])
+    connection.commit()
+    connection.close()
+
+def test_parallel_contributions():
+    """Thousands of concurrent contributions: no lost updates, one history row each, correct status"""
+    threads, per_thread = 16, 125
+    rng = np.random.default_rng(5)
+    work = [[(int(goal_id), float(amount)) for goal_id, amount in
+             zip(rng.integers(1, 6, per_thread), rng.integers(1, 200, per_thread))]
+            for _ in range(threads)]
+    results = [[] for _ in range(threads)]
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'goals.db')
+        make_database(path)
+        original = goals_manager.get_mysql_connection
+        goals_manager.get_mysql_connection = lambda: SQLiteConnection(path)
+        try:
+            def contribute(index):
+                for goal_id, amount in work[index]:
+                    results[index].append(add_goal_contribution(1, goal_id, amount, '2024-03-01', 'Manual', ''))
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')  # st.error outside a Streamlit session
+                workers = [threading.Thread(target=contribute, args=(index,)) for index in range(threads)]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+        finally:
+            goals_manager.get_mysql_connection = original
+
+        connection = sqlite3.connect(path)
+        goals = {goal_id: (current, status) for goal_id, current, status in
+                 connection.execute('SELECT goal_id, current_amount, goal_status FROM Goals')}
+        history = dict(connection.execute(
+            'SELECT goal_id, SUM(contribution_amount) FROM Goal_Contributions GROUP BY goal_id').fetchall())
+        rows = connection.execute('SELECT COUNT(*) FROM Goal_Contributions').fetchone()[0]
+        connection.close()
+
+    calls = [(goal_id, amount, ok) for items, oks in zip(work, results) for (goal_id, amount), ok in zip(items, oks)]
+    assert len(calls) == threads * per_thread
+    # Goal 5 is user 2's: every attempt is refused and nothing is written
+    assert all(ok == (goal_id != 5) for goal_id, _, ok in calls)
+    assert goals[5] == (0.0, 'Active') and 5 not in history
+
+    expected = {goal_id: sum(amount for g, amount, _ in calls if g == goal_id) for goal_id in range(1, 5)}
+    assert rows == sum(1 for goal_id, _, _ in calls if goal_id != 5)
+    for goal_id in range(1, 5):
+        assert goals[goal_id][0] == expected[goal_id] == history[goal_id], goal_id
+    assert [goals[goal_id][1] for goal_id in range(1, 5)] == ['Completed', 'Active', 'Completed', 'Paused']
+    print(f"✅ {len(calls)} contributions from {threads} threads, totals and statuses exact")
+
+def test_failures_release_connection():
+    """Rejected and failed contributions close their connection and leave the goal row unlocked"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'goals.db')
+        make_database(path)
+        connection = sqlite3.connect(path)
+        connection.execute('DROP TABLE Goal_Contributions')  # the INSERT after the goal UPDATE fails
+        connection.commit()
+        connection.close()
+
+        original = goals_manager.get_mysql_connection
+        goals_manager.get_mysql_connection = lambda: SQLiteConnection(path)
+        SQLiteConnection.open_connections = 0
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                assert add_goal_contribution(1, 1, 0, '2024-03-01', 'Manual', '') is False
+                assert add_goal_contribution(1, 5, 10, '2024-03-01', 'Manual', '') is False
+                assert add_goal_contribution(1, 1, 10, '2024-03-01', 'Manual', '') is False
+        finally:
+            goals_manager.get_mysql_connection = original
+        assert SQLiteConnection.open_connections == 0
+
+        # Another writer gets the goal at once, and the failed UPDATE was rolled back
+        other = SQLiteConnection(path, timeout=0.1)
+        cursor = other.cursor()
+        cursor.execute('UPDATE Goals SET current_amount = current_amount + 1 WHERE goal_id = %s', (1,))
+        other.commit()
+        assert other.connection.execute('SELECT current_amount FROM Goals WHERE goal_id = 1').fetchone()[0] == 1.0
+        other.close()
+    print("✅ Failed contributions close their connection and release the row")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing goal contributions")
+    print("=" * 50)
+
+    tests = [
+        ("Parallel contributions", test_parallel_contributions),
+        ("Failures release connection", test_failures_release_connection)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
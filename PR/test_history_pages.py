@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset-paginated history
+
+The queries run against an in-memory SQLite copy of the two history tables,
+which supports the same window functions and seeks.
+"""
+
+import sys
+import os
+import sqlite3
+import warnings
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import history_pages
+from history_pages import fetch_history_page
+
+class SQLiteConnection:
+    """MySQL-style %s placeholders over an sqlite3 connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+
+    def cursor(self):
+        return SQLiteCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, statement, params=()):
+        self.cursor.execute(statement.replace('%s', '?'), params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+def make_database(payments=230, seed=9):
+    """Two debts for user 1 (one with same-day payments) and one for user 2"""
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE Debts (debt_id INTEGER PRIMARY KEY, debt_name TEXT, lender_name TEXT)')
+    connection.execute('''
+        CREATE TABLE Debt_Payments (payment_id INTEGER PRIMARY KEY, debt_id INT, user_id INT,
+                                    payment_amount REAL, payment_date TEXT, payment_type TEXT, notes TEXT)
+    ''')
+    connection.executemany('INSERT INTO Debts VALUES (?, ?, ?)', [(1, 'Car', 'A'), (2, 'Card', 'B'), (3, 'Other', 'C')])
+    rng = np.random.default_rng(seed)
+    rows = []
+    for payment_id in range(1, payments + 1):
+        debt_id = int(rng.choice([1, 2, 3]))
+        # Few distinct dates, so many rows share a date and the id breaks ties
+        payment_date = date(2024, 1, 1) + timedelta(days=int(rng.integers(0, 60)))
+        rows.append((payment_id, debt_id, 2 if debt_id == 3 else 1, float(rng.integers(1, 1000)),
+                     payment_date.isoformat(), 'Regular', ''))
+    connection.executemany('INSERT INTO Debt_Payments VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    return connection, rows
+
+def read_all_pages(connection, page_size, **filters):
+    original = history_pages.get_mysql_connection
+    history_pages.get_mysql_connection = lambda: SQLiteConnection(connection)
+    pages, cursor = [], None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # pandas warns about non-SQLAlchemy connections
+            while True:
+                df, cursor = fetch_history_page('debt_payments', 1, cursor=cursor, page_size=page_size, **filters)
+                pages.append(df)
+                if cursor is None:
+                    return pages
+    finally:
+        history_pages.get_mysql_connection = original
+
+def expected_rows(rows, start_date=None, end_date=None):
+    """User 1's rows newest first, with the cumulative amount up to each"""
+    selected = [row for row in rows if row[2] == 1
+                and (start_date is None or row[4] >= start_date.isoformat())
+                and (end_date is None or row[4] <= end_date.isoformat())]
+    selected.sort(key=lambda row: (row[4], row[0]))
+    totals = np.cumsum([row[3] for row in selected])
+    return list(reversed([(row[0], total) for row, total in zip(selected, totals)]))
+
+def test_pages_cover_history_once():
+    """Pages return every row once, newest first, with running totals over the whole history"""
+    connection, rows = make_database()
+    pages = read_all_pages(connection, page_size=25)
+    got = [(int(row.payment_id), float(row.running_total)) for page in pages for row in page.itertuples()]
+    expected = expected_rows(rows)
+
+    assert all(len(page) == 25 for page in pages[:-1]) and 0 < len(pages[-1]) <= 25
+    assert [payment_id for payment_id, _ in got] == [payment_id for payment_id, _ in expected]
+    assert np.allclose([total for _, total in got], [total for _, total in expected])
+    print(f"✅ {len(got)} payments over {len(pages)} pages, running totals match")
+
+def test_date_filter():
+    """A date range limits the rows, and running totals start inside the range"""
+    connection, rows = make_database()
+    start_date, end_date = date(2024, 1, 20), date(2024, 2, 10)
+    pages = read_all_pages(connection, page_size=10, start_date=start_date, end_date=end_date)
+    got = [(int(row.payment_id), float(row.running_total)) for page in pages for row in page.itertuples()]
+    expected = expected_rows(rows, start_date, end_date)
+
+    assert [payment_id for payment_id, _ in got] == [payment_id for payment_id, _ in expected]
+    assert np.allclose([total for _, total in got], [total for _, total in expected])
+    print(f"✅ {len(got)} payments between {start_date} and {end_date}")
+
+def test_failed_read_closes_connection():
+    """A page read that fails returns an empty page and still closes its connection"""
+    connection, _ = make_database()
+    connection.execute('DROP TABLE Debts')
+    opened = []
+    original = history_pages.get_mysql_connection
+    history_pages.get_mysql_connection = lambda: opened.append(SQLiteConnection(connection)) or opened[-1]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            df, cursor = fetch_history_page('debt_payments', 1)
+    finally:
+        history_pages.get_mysql_connection = original
+    assert df.empty and cursor is None
+    assert len(opened) == 1 and opened[0].closed
+    print("✅ Failed reads close their connection")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing history pages")
+    print("=" * 50)
+
+    tests = [
+        ("Full history", test_pages_cover_history_once),
+        ("Date filter", test_date_filter),
+        ("Failed read closes connection", test_failed_read_closes_connection)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the online migrations' catch-up and mirror triggers
+
+The statements run on SQLite against a label-per-row Data table and a
+partly copied Transactions table.
+"""
+
+import sys
+import os
+import re
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import migrations
+from migrations import catch_up_users, copy_users, mirror_triggers
+
+class SQLiteCursor:
+    """MySQL-style statements over an sqlite3 cursor"""
+
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+        self.rowcount = 0
+
+    def execute(self, statement, params=()):
+        self.cursor.execute(statement.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE'), params)
+        self.rowcount = self.cursor.rowcount
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+def make_database():
+    connection = sqlite3.connect(':memory:')
+    connection.executescript('''
+        CREATE TABLE Data (id INT, Date TEXT, Mode TEXT, Category TEXT, Amount INT, income_expense TEXT, Currency TEXT);
+        CREATE TABLE Transactions (txn_id INTEGER PRIMARY KEY, id INT, Date TEXT, mode_id INT, category_id INT,
+                                   Amount INT, type_id INT, currency_id INT);
+    ''')
+    for table in ['Modes', 'Categories', 'Transaction_Types', 'Currencies']:
+        connection.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT UNIQUE)')
+    connection.executemany('INSERT INTO Data VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (1, '2024-01-05', 'UPI', 'Food', 120, 'Expense', 'INR'),
+        (1, '2024-01-05', 'UPI', 'Food', 120, 'Expense', 'INR'),
+        (2, '2024-01-06', 'Cash', 'Salary', 50000, 'Income', 'INR')
+    ])
+    return connection
+
+def transactions(connection):
+    return sorted(connection.execute('''
+        SELECT t.id, t.Date, c.name, t.Amount FROM Transactions t JOIN Categories c ON c.id = t.category_id
+    ''').fetchall())
+
+def test_catch_up_inserts_only_missing_rows():
+    """Rows added after a user's batch are copied once each; copied rows are left in place"""
+    connection = make_database()
+    cursor = SQLiteCursor(connection)
+    catch_up_users(cursor, 'Data')
+    copied_ids = [row[0] for row in connection.execute('SELECT txn_id FROM Transactions ORDER BY txn_id')]
+    assert transactions(connection) == [(1, '2024-01-05', 'Food', 120)] * 2 + [(2, '2024-01-06', 'Salary', 50000)]
+
+    # A third identical purchase and a new user arrive while the swap waits for its lock
+    connection.executemany('INSERT INTO Data VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (1, '2024-01-05', 'UPI', 'Food', 120, 'Expense', 'INR'),
+        (3, '2024-01-07', 'Card', 'Rent', 9000, 'Expense', 'INR')
+    ])
+    assert catch_up_users(cursor, 'Data') == (2, 2)
+    assert transactions(connection) == ([(1, '2024-01-05', 'Food', 120)] * 3 + [(2, '2024-01-06', 'Salary', 50000),
+                                         (3, '2024-01-07', 'Rent', 9000)])
+    # Rows already copied keep their txn_ids
+    assert [row[0] for row in connection.execute('SELECT txn_id FROM Transactions ORDER BY txn_id')][:3] == copied_ids
+    assert catch_up_users(cursor, 'Data') == (0, 0)
+    print("✅ Catch-up copies only the missing rows")
+
+def test_batch_copy_is_repeatable():
+    """Re-running a batch after an interruption replaces its rows rather than duplicating them"""
+    connection = make_database()
+    cursor = SQLiteCursor(connection)
+    catch_up_users(cursor, 'Data')
+    copy_users(cursor, 'Data', '{user} > %s AND {user} <= %s', (0, 1))
+    assert len(transactions(connection)) == 3
+    print("✅ Batch copy is repeatable")
+
+def test_mirror_triggers_keep_ids():
+    """Inserts, edits and deletes during a rebuild reach the new table under the same txn_id"""
+    connection = sqlite3.connect(':memory:')
+    for table in ['Transactions', 'Transactions_New']:
+        connection.execute(f'''
+            CREATE TABLE {table} (txn_id INTEGER PRIMARY KEY, id INT, Date TEXT, mode_id INT, category_id INT,
+                                  Amount INT, type_id INT, currency_id INT)
+        ''')
+    for statement in mirror_triggers(True).values():
+        connection.execute(re.sub(r'FOR EACH ROW\s+(.*)', r'FOR EACH ROW BEGIN \1; END', statement.strip(), flags=re.S))
+
+    connection.execute("INSERT INTO Transactions VALUES (41, 1, '2024-01-05', 1, 1, 120, 1, 1)")
+    connection.execute("INSERT INTO Transactions VALUES (42, 1, '2024-01-06', 1, 2, 300, 1, 1)")
+    connection.execute("UPDATE Transactions SET Amount = 150, category_id = 3 WHERE txn_id = 41")
+    connection.execute("DELETE FROM Transactions WHERE txn_id = 42")
+    connection.execute("INSERT INTO Transactions VALUES (43, 2, '2024-01-07', 2, 1, 80, 1, 1)")
+
+    rows = lambda table: connection.execute(f'SELECT * FROM {table} ORDER BY txn_id').fetchall()
+    assert rows('Transactions_New') == rows('Transactions') == [(41, 1, '2024-01-05', 1, 3, 150, 1, 1),
+                                                                (43, 2, '2024-01-07', 2, 1, 80, 1, 1)]
+    assert list(mirror_triggers(False)) == ['trg_transactions_mirror']
+    print("✅ Mirror triggers replay inserts, edits and deletes by txn_id")
+
+def test_partition_flag_only_for_rebuilds():
+    """--partition reaches normalize and primary_key; other migrations print usage instead of failing"""
+    calls = []
+    original_migrations, original_argv = dict(migrations.MIGRATIONS), sys.argv
+    migrations.MIGRATIONS['normalize'] = lambda partitioned=False: calls.append(('normalize', partitioned))
+    migrations.MIGRATIONS['hash_passwords'] = lambda: calls.append(('hash_passwords',))
+    try:
+        for argv in [['normalize', '--partition'], ['hash_passwords', '--partition'], ['hash_passwords']]:
+            sys.argv = ['migrations.py'] + argv
+            migrations.main()
+    finally:
+        migrations.MIGRATIONS.update(original_migrations)
+        sys.argv = original_argv
+    assert calls == [('normalize', True), ('hash_passwords',)], calls
+    print("✅ --partition accepted only where it applies")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing migrations")
+    print("=" * 50)
+
+    tests = [
+        ("Catch-up inserts only missing rows", test_catch_up_inserts_only_missing_rows),
+        ("Batch copy is repeatable", test_batch_copy_is_repeatable),
+        ("Mirror triggers keep ids", test_mirror_triggers_keep_ids),
+        ("Partition flag", test_partition_flag_only_for_rebuilds)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
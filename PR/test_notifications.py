@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the daily notification checks
+
+The window and milestone expressions are plain SQL CASEs, evaluated here
+with SQLite; the checks themselves are recorded rather than run.
+"""
+
+import sys
+import os
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+
+from notifications import notify_day, _WINDOW, _MILESTONE
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, statement, params=()):
+        self.statements.append((statement, params))
+        self.rowcount = 2
+
+def test_windows_and_milestones():
+    """Days left map to their window, progress to the highest milestone reached"""
+    connection = sqlite3.connect(':memory:')
+    window = lambda days: connection.execute(f'SELECT {_WINDOW} FROM (SELECT ? AS days)', (days,)).fetchone()[0]
+    assert [window(days) for days in [-3, 0, 1, 2, 7, 8, 30]] == ['overdue', '1', '1', '7', '7', '30', '30']
+
+    milestone = lambda current: connection.execute(
+        f'SELECT {_MILESTONE} FROM (SELECT ? AS current_amount, 1000.0 AS target_amount)', (current,)).fetchone()[0]
+    assert [milestone(current) for current in [0, 249.99, 250, 600, 999, 1000, 1200]] == [None, None, 25, 50, 75, 100, 100]
+    print("✅ Window and milestone expressions")
+
+def test_one_pass_per_day():
+    """A day runs one statement per check, over date ranges around that day"""
+    cursor = RecordingCursor()
+    results = notify_day(cursor, date(2024, 5, 10))
+
+    assert [name for name, _, _ in results] == ['goal deadlines', 'debt due dates', 'goal milestones']
+    assert sum(count for _, count, _ in results) == 6
+    assert all(statement.lstrip().startswith('INSERT IGNORE INTO Notifications') for statement, _ in cursor.statements)
+    params = cursor.statements[0][1]
+    assert params['overdue_from'] == date(2024, 4, 10) and params['ahead_to'] == date(2024, 6, 9)
+    assert params['updated_from'] == date(2024, 5, 9) and params['updated_to'] == date(2024, 5, 11)
+    print("✅ Three range-bounded inserts per day")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing notifications")
+    print("=" * 50)
+
+    tests = [
+        ("Windows and milestones", test_windows_and_milestones),
+        ("One pass per day", test_one_pass_per_day)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Parity checks between the monolithic app.py and the modular entry point
+"""
+
+import sys
+import os
+import inspect
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app
+import database
+import analytics
+import chatbot
+import debt_tracker
+import goals_manager
+
+DATA_LAYER_MODULES = [database, analytics, chatbot, debt_tracker, goals_manager]
+
+# Page functions are allowed to differ between the two UIs; everything else must be shared
+UI_FUNCTIONS = {
+    'advanced_analytics_page', 'login_page', 'dashboard', 'transaction_page',
+    'chatbot_page', 'debt_tracker_page', 'goals_management_page', 'main'
+}
+
+def test_app_uses_shared_data_layer():
+    """Every data function app.py calls must be the same object the modular app uses"""
+    mismatched = []
+    for module in DATA_LAYER_MODULES:
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if func.__module__ != module.__name__ or name in UI_FUNCTIONS:
+                continue
+            if hasattr(app, name) and getattr(app, name) is not func:
+                mismatched.append(f"{module.__name__}.{name}")
+
+    assert not mismatched, f"app.py has its own copy of: {', '.join(mismatched)}"
+    print("✅ app.py and the modular pages share the same data functions")
+
+def test_app_defines_no_data_functions():
+    """app.py should only define page functions, never re-implement queries"""
+    local_functions = {
+        name for name, func in inspect.getmembers(app, inspect.isfunction)
+        if func.__module__ == app.__name__
+    }
+    extra = sorted(local_functions - UI_FUNCTIONS)
+
+    assert not extra, f"app.py defines non-UI functions: {', '.join(extra)}"
+    print(f"✅ app.py defines only {len(local_functions)} page functions")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing app.py / modular parity")
+    print("=" * 50)
+
+    tests = [
+        ("Shared data layer", test_app_uses_shared_data_layer),
+        ("No local data functions", test_app_defines_no_data_functions)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
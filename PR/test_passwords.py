@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for password hashing and login throttling
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import passwords
+from passwords import (hash_password, verify_password, needs_rehash, login_locked_for,
+                       record_login_failure, clear_login_failures)
+
+def test_hash_and_verify():
+    """Hashes are salted, verify only the right password, and accept legacy plaintext"""
+    for algorithm, params in [('pbkdf2_sha256', (1000,)), ('scrypt', (1024, 8, 1))]:
+        first = hash_password('s3cret!', algorithm, params)
+        second = hash_password('s3cret!', algorithm, params)
+        assert first != second and first.startswith(algorithm + '$')
+        assert verify_password('s3cret!', first) and verify_password('s3cret!', second)
+        assert not verify_password('s3cret?', first)
+
+    assert verify_password('himnish@123', 'himnish@123')
+    assert not verify_password('wrong', 'himnish@123')
+    print("✅ Salted hashes verify; plaintext still verifies")
+
+def test_needs_rehash():
+    """Plaintext and hashes with another cost are upgraded, current ones are kept"""
+    assert needs_rehash('himnish@123')
+    assert needs_rehash(hash_password('pw', 'pbkdf2_sha256', (1000,)))
+    assert not needs_rehash(hash_password('pw'))
+    print("✅ Outdated hashes are flagged for rehashing")
+
+def test_login_lockout():
+    """An email locks after too many failures in the window and unlocks after it"""
+    email = 'lockout@example.com'
+    now = 1000.0
+    for _ in range(passwords.LOGIN_MAX_FAILURES - 1):
+        record_login_failure(email, now)
+    assert login_locked_for(email, now) == 0
+    record_login_failure(email, now)
+    assert login_locked_for(email, now + 1) > 0
+    assert login_locked_for(email, now + passwords.LOGIN_FAILURE_WINDOW_SECONDS) == 0
+
+    record_login_failure(email, now)
+    clear_login_failures(email)
+    assert login_locked_for(email, now) == 0
+    print("✅ Repeated failures lock an email for the window")
+
+def test_attempt_cache_is_bounded():
+    """Tracking many emails never grows the cache past its limit"""
+    original = passwords.LOGIN_ATTEMPT_CACHE_SIZE
+    passwords.LOGIN_ATTEMPT_CACHE_SIZE = 100
+    try:
+        for i in range(1000):
+            record_login_failure(f'user{i}@example.com')
+        assert len(passwords._login_attempts) == 100
+        assert 'user999@example.com' in passwords._login_attempts
+    finally:
+        passwords.LOGIN_ATTEMPT_CACHE_SIZE = original
+        passwords._login_attempts.clear()
+    print("✅ Login-attempt cache stays bounded")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing password hashing")
+    print("=" * 50)
+
+    tests = [
+        ("Hash and verify", test_hash_and_verify),
+        ("Rehash detection", test_needs_rehash),
+        ("Login lockout", test_login_lockout),
+        ("Bounded attempt cache", test_attempt_cache_is_bounded)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for recurring transaction detection
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from recurring import (transaction_frame, pattern_states, merge_pattern_states, classify_patterns,
+                       period_name, PATTERN_KEY, STATE_COLUMNS)
+
+def make_history(seed=4, noise_rows=3000):
+    """Random spending plus a monthly rent, a weekly recharge and a daily metro fare (twice a day)"""
+    rng = np.random.default_rng(seed)
+    noise = pd.DataFrame({
+        'user_id': 1,
+        'Date': pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 730, noise_rows), unit='D'),
+        'Mode': rng.choice(['UPI', 'Cash', 'Debit Card'], noise_rows),
+        'Category': rng.choice(['Food', 'Shopping', 'Travel'], noise_rows),
+        'Amount': rng.integers(50, 5000, noise_rows).astype('float64'),
+        'income_expense': 'Expense'
+    })
+    rent = pd.DataFrame({'user_id': 1, 'Date': pd.date_range('2022-01-05', periods=24, freq='MS') + pd.Timedelta(days=4),
+                         'Mode': 'Bank Transfer', 'Category': 'Rent', 'Amount': 15000.0, 'income_expense': 'Expense'})
+    # The plan's price goes up halfway through, which starts a second weekly pattern
+    recharge = pd.DataFrame({'user_id': 1, 'Date': pd.date_range('2022-01-03', periods=100, freq='7D'),
+                             'Mode': 'UPI', 'Category': 'Recharge', 'Amount': np.repeat([299.0, 349.0], 50),
+                             'income_expense': 'Expense'})
+    metro = pd.DataFrame({'user_id': 1, 'Date': pd.date_range('2022-01-01', periods=700, freq='D').repeat(2),
+                          'Mode': 'Card', 'Category': 'Metro', 'Amount': 40.0, 'income_expense': 'Expense'})
+    return pd.concat([noise, rent, recharge, metro], ignore_index=True)
+
+def by_key(states):
+    return states[STATE_COLUMNS].sort_values(PATTERN_KEY).reset_index(drop=True)
+
+def test_detects_known_patterns():
+    """The planted rent, recharge and metro patterns recur with the right periods"""
+    states = classify_patterns(pattern_states(transaction_frame(make_history())))
+    recurring = states[states['is_recurring']]
+    planted = recurring[recurring['category'].isin(['Rent', 'Recharge', 'Metro'])]
+    found = sorted((row.category, period_name(row.period_days)) for row in planted.itertuples())
+
+    assert found == [('Metro', 'Daily'), ('Recharge', 'Weekly'), ('Recharge', 'Weekly'), ('Rent', 'Monthly')], found
+    metro = planted[planted['category'] == 'Metro'].iloc[0]
+    assert metro['occurrences'] == 700 and metro['transactions'] == 1400
+    # Random spending rarely lines up into regular gaps
+    noise = len(recurring) - len(planted)
+    assert noise <= 0.02 * len(states), noise
+    print(f"✅ Found {found} among {len(states)} groups ({noise} chance matches)")
+
+def test_incremental_matches_full_scan():
+    """Extending stored states batch by batch gives the same states as scanning everything"""
+    history = make_history().sort_values('Date', kind='stable').reset_index(drop=True)
+    stored = pattern_states(transaction_frame(history.iloc[:0]))
+    for batch in np.array_split(np.arange(len(history)), 40):
+        added = pattern_states(transaction_frame(history.iloc[batch]))
+        merged, rescan = merge_pattern_states(stored, added)
+        assert rescan.empty
+        stored = pd.concat([stored.merge(merged[PATTERN_KEY], on=PATTERN_KEY, how='left', indicator=True)
+                            .query("_merge == 'left_only'")[STATE_COLUMNS], merged], ignore_index=True)
+
+    full = pattern_states(transaction_frame(history))
+    pd.testing.assert_frame_equal(by_key(stored), by_key(full), check_dtype=False)
+    print(f"✅ 40 incremental batches match the full scan ({len(full)} groups)")
+
+def test_back_dated_rows_are_rescanned():
+    """A transaction before a group's last day sends the group to a rescan"""
+    history = make_history()
+    stored = pattern_states(transaction_frame(history))
+    late = pd.DataFrame([{'user_id': 1, 'Date': '2022-06-20', 'Mode': 'Bank Transfer', 'Category': 'Rent',
+                          'Amount': 15000.0, 'income_expense': 'Expense'}])
+    merged, rescan = merge_pattern_states(stored, pattern_states(transaction_frame(late)))
+    assert merged.empty and list(rescan['category']) == ['Rent']
+    print("✅ Back-dated insert triggers a rescan")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing recurring transaction detection")
+    print("=" * 50)
+
+    tests = [
+        ("Known patterns", test_detects_known_patterns),
+        ("Incremental updates", test_incremental_matches_full_scan),
+        ("Back-dated rows", test_back_dated_rows_are_rescanned)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
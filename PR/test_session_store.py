@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for the server-side session stores
+"""
+
+import sys
+import os
+import pickle
+import builtins
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from aggregate_cache import cached_aggregate, clear_aggregate_cache, export_cached_aggregates, seed_cached_aggregates
+from session_store import SQLiteSessionStore, FileSessionStore, claim_session, client_key
+
+SECRET = b'test-session-secret'
+
+class Planted:
+    """Runs code when unpickled, as a file planted in a shared session directory would"""
+
+    def __reduce__(self):
+        return (exec, ("import builtins; builtins.session_store_pwned = True",))
+
+def make_payload():
+    return {
+        'user_id': 7,
+        'user_name': 'Test',
+        'data_version': 3,
+        'client': client_key('Firefox'),
+        'aggregates': {('categories', 7, 'INR'): (3, pd.DataFrame({'Category': ['Food'], 'TotalAmount': [120.0]}))}
+    }
+
+def check_store(store, base_dir):
+    store.put('token-a', make_payload(), ttl=60, now=1000)
+    store.put('token-b', make_payload(), ttl=10, now=1000)
+
+    restored = store.get('token-a', now=1030)
+    assert restored['user_id'] == 7 and restored['data_version'] == 3
+    assert restored['aggregates'][('categories', 7, 'INR')][1]['TotalAmount'].iloc[0] == 120.0
+    assert store.get('token-b', now=1030) is None
+    assert store.get('unknown', now=1030) is None
+
+    # Tokens themselves never reach the disk
+    for root, _, files in os.walk(base_dir):
+        for name in files:
+            with open(os.path.join(root, name), 'rb') as f:
+                assert b'token-a' not in f.read()
+
+    assert store.sweep(now=1030) == 1
+    store.delete('token-a')
+    assert store.get('token-a', now=1030) is None
+
+def test_sqlite_store():
+    """SQLite sessions expire, sweep and delete"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        check_store(SQLiteSessionStore(os.path.join(base_dir, 'sessions.db'), SECRET), base_dir)
+    print("✅ SQLite session store")
+
+def test_file_store():
+    """File sessions expire, sweep and delete"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        check_store(FileSessionStore(os.path.join(base_dir, 'sessions'), SECRET), base_dir)
+    print("✅ File session store")
+
+def test_claim_rotates_and_binds():
+    """Resuming needs the starting browser and replaces the token; the old one stops working"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = SQLiteSessionStore(os.path.join(base_dir, 'sessions.db'), SECRET)
+        store.put('token-a', make_payload())
+
+        assert claim_session(store, 'token-a', client_key('curl')) is None
+        new_token, payload = claim_session(store, 'token-a', client_key('Firefox'))
+        assert new_token != 'token-a' and payload['user_id'] == 7
+        assert store.get('token-a') is None and store.get(new_token)['user_id'] == 7
+        assert claim_session(store, 'token-a', client_key('Firefox')) is None
+    print("✅ Sessions resume only for their browser, on a fresh token")
+
+def test_unsigned_sessions_not_loaded():
+    """A session file not signed with the server secret is ignored without being unpickled"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = FileSessionStore(os.path.join(base_dir, 'sessions'), SECRET)
+        store.put('token-a', make_payload())
+        file_path = store._file('token-a')
+
+        with open(file_path, 'wb') as f:
+            f.write(pickle.dumps((2e9, Planted())))
+        assert store.get('token-a') is None
+
+        # Signed, but with another key
+        other = FileSessionStore(os.path.join(base_dir, 'sessions'), b'attacker-secret')
+        other.put('token-a', make_payload())
+        assert store.get('token-a') is None and other.get('token-a')['user_id'] == 7
+        assert store.sweep() == 1
+        assert not hasattr(builtins, 'session_store_pwned')
+    print("✅ Unsigned and foreign-signed sessions are refused")
+
+def test_aggregates_survive_restart():
+    """Aggregates exported with a session are served from cache after a restart"""
+    clear_aggregate_cache()
+    key = ('summary', 7, 'INR')
+    cached_aggregate(key, 5, lambda: {'total_income': 10.0})
+    saved = export_cached_aggregates(7)
+    clear_aggregate_cache()  # process restart
+
+    seed_cached_aggregates(saved)
+    calls = []
+    result = cached_aggregate(key, 5, lambda: calls.append(1) or {'total_income': 0.0})
+    assert result == {'total_income': 10.0} and not calls
+
+    # A newer entry already in the cache is not replaced by an older saved one
+    cached_aggregate(key, 6, lambda: {'total_income': 20.0})
+    seed_cached_aggregates(saved)
+    assert cached_aggregate(key, 6, lambda: {'total_income': 0.0}) == {'total_income': 20.0}
+    clear_aggregate_cache()
+    print("✅ Saved aggregates warm the cache without recomputing")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing session store")
+    print("=" * 50)
+
+    tests = [
+        ("SQLite store", test_sqlite_store),
+        ("File store", test_file_store),
+        ("Unsigned sessions refused", test_unsigned_sessions_not_loaded),
+        ("Claim rotates and binds", test_claim_rotates_and_binds),
+        ("Warm aggregates", test_aggregates_survive_restart)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
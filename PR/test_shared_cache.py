@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the cross-process shared aggregate cache
+"""
+
+import sys
+import os
+import tempfile
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shared_cache
+from shared_cache import SharedCache
+from aggregate_cache import cached_aggregate, update_cached_aggregates, clear_aggregate_cache
+
+KEY = ('summary', 7, 'INR')
+
+# Run in a separate interpreter: read KEY at a version through the shared tier only
+READER = '''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from shared_cache import SharedCache
+print(SharedCache(sys.argv[2]).get(('summary', 7, 'INR'), int(sys.argv[3]), 600))
+'''
+
+def read_in_other_process(path, version):
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', READER, here, path, str(version)],
+                            capture_output=True, text=True, check=True).stdout
+    return output.strip()
+
+def test_versions_gate_reads():
+    """A result is only served at the version it was stored with, and never replaced by an older one"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'shared.db')
+        SharedCache(path).put(KEY, 3, {'total_income': 30.0})
+
+        assert read_in_other_process(path, 3) == "{'total_income': 30.0}"
+        assert read_in_other_process(path, 4) == 'None'
+
+        cache = SharedCache(path)
+        cache.put(KEY, 4, {'total_income': 40.0})
+        cache.put(KEY, 3, {'total_income': 30.0})  # late write from a slower worker
+        assert cache.get(KEY, 4, 600) == {'total_income': 40.0}
+        assert cache.get(KEY, 3, 600) is None
+    print("✅ Shared entries are gated by data version")
+
+def test_second_worker_skips_compute():
+    """A worker with a cold in-process cache takes results, and delta updates, from the shared tier"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        shared_cache._shared_cache = SharedCache(os.path.join(base_dir, 'shared.db'))
+        shared_cache.SHARED_CACHE_PATH = shared_cache._shared_cache.path
+        try:
+            clear_aggregate_cache()
+            cached_aggregate(KEY, 1, lambda: {'total_income': 10.0})
+
+            # A write on the first worker moves its entry to version 2 and publishes it
+            update_cached_aggregates(7, 1, 2, lambda name, base, result: {'total_income': result['total_income'] + 5})
+
+            clear_aggregate_cache()  # second worker: nothing in process
+            calls = []
+            result = cached_aggregate(KEY, 2, lambda: calls.append(1) or {'total_income': 0.0})
+            assert result == {'total_income': 15.0} and not calls
+        finally:
+            shared_cache._shared_cache = None
+            shared_cache.SHARED_CACHE_PATH = None
+            clear_aggregate_cache()
+    print("✅ Second worker served from the shared tier")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing shared cache")
+    print("=" * 50)
+
+    tests = [
+        ("Version gating", test_versions_gate_reads),
+        ("Cross-worker reuse", test_second_worker_skips_compute)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
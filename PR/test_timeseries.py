@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the chart time-series reducers
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from timeseries import downsample_time_series, aggregate_time_series, choose_time_granularity
+
+def make_daily_data(days, seed=7):
+    """Build a multi-year daily spending frame shaped like get_advanced_analytics_data output"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Day': pd.date_range('2019-01-01', periods=days, freq='D').date,
+        'DailyExpense': rng.gamma(2.0, 300.0, days).round(),
+        'DailyIncome': rng.gamma(1.5, 500.0, days).round(),
+        'ExpenseCount': rng.integers(0, 8, days),
+        'IncomeCount': rng.integers(0, 3, days)
+    })
+
+def test_short_series_untouched():
+    """Series under the point budget are returned as-is"""
+    daily_data = make_daily_data(120)
+    reduced = downsample_time_series(daily_data, 'Day', ['DailyExpense', 'DailyIncome'], max_points=500)
+    aggregated, granularity = aggregate_time_series(daily_data, 'Day', ['ExpenseCount'], max_points=500)
+
+    assert reduced is daily_data
+    assert aggregated is daily_data and granularity is None
+    print("✅ Short series are not reduced")
+
+def test_downsample_preserves_peaks():
+    """Min/max bucketing keeps every spike and trough with its real date"""
+    daily_data = make_daily_data(5 * 365)
+    # Plant isolated spikes that a plain average or stride would smear away
+    for position, amount in [(37, 250000.0), (901, 180000.0), (1700, 310000.0)]:
+        daily_data.loc[position, 'DailyExpense'] = amount
+
+    reduced = downsample_time_series(daily_data, 'Day', ['DailyExpense', 'DailyIncome'], max_points=400)
+
+    assert len(reduced) <= 400 + 2, f"{len(reduced)} points over budget"
+    for position in [37, 901, 1700]:
+        assert position in reduced.index, f"spike at row {position} was dropped"
+    assert reduced['DailyExpense'].max() == daily_data['DailyExpense'].max()
+    assert reduced['DailyExpense'].min() == daily_data['DailyExpense'].min()
+    assert reduced['DailyIncome'].max() == daily_data['DailyIncome'].max()
+    assert reduced['Day'].is_monotonic_increasing
+    print(f"✅ {len(daily_data)} daily points reduced to {len(reduced)} with all peaks kept")
+
+def test_aggregate_preserves_totals():
+    """Rolling counts up to weeks or months keeps the totals and fits the budget"""
+    daily_data = make_daily_data(4 * 365)
+    aggregated, granularity = aggregate_time_series(daily_data, 'Day', ['ExpenseCount', 'IncomeCount'], max_points=300)
+
+    assert granularity == 'Weekly', granularity
+    assert len(aggregated) <= 300
+    assert aggregated['ExpenseCount'].sum() == daily_data['ExpenseCount'].sum()
+    assert aggregated['IncomeCount'].sum() == daily_data['IncomeCount'].sum()
+    print(f"✅ {len(daily_data)} days rolled up to {len(aggregated)} {granularity.lower()} buckets")
+
+def test_granularity_follows_range():
+    """Longer ranges switch from daily to weekly to monthly buckets"""
+    dates = pd.Series(pd.date_range('2015-01-01', periods=10 * 365, freq='D'))
+
+    assert choose_time_granularity(dates[:200], 250) == 'D'
+    assert choose_time_granularity(dates[:1500], 250) == 'W'
+    assert choose_time_granularity(dates, 250) == 'M'
+    print("✅ Granularity widens with the visible range")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing time-series reducers")
+    print("=" * 50)
+
+    tests = [
+        ("Short series untouched", test_short_series_untouched),
+        ("Peaks preserved", test_downsample_preserves_peaks),
+        ("Totals preserved", test_aggregate_preserves_totals),
+        ("Granularity selection", test_granularity_follows_range)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
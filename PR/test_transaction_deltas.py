@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental maintenance of cached aggregates
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import aggregate_cache
+import transaction_deltas
+from aggregate_cache import cached_aggregate, clear_aggregate_cache, begin_cached_change, _aggregate_cache
+from transaction_deltas import apply_transaction_changes
+
+def make_transactions(rows, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 200, rows), unit='D'),
+        'Mode': rng.choice(['UPI', 'Cash'], rows),
+        'Category': rng.choice(['Food', 'Rent', 'Travel'], rows),
+        'Amount': rng.integers(10, 500, rows).astype('float64'),
+        'income_expense': rng.choice(['Income', 'Expense'], rows),
+        'Currency': 'INR'
+    })
+
+def summarize(df):
+    expense = df[df['income_expense'] == 'Expense']
+    income = df[df['income_expense'] == 'Income']
+    summary = {
+        'total_income': income['Amount'].sum(),
+        'total_expenses': expense['Amount'].sum(),
+        'net_balance': income['Amount'].sum() - expense['Amount'].sum(),
+        'transaction_count': len(df)
+    }
+    categories = (expense.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+                  .rename('TotalAmount').reset_index())
+    trends = (df.groupby([df['Date'].dt.strftime('%Y-%m').rename('Month'), 'income_expense'])['Amount'].sum()
+              .rename('TotalAmount').reset_index())
+    return summary, categories, trends
+
+def cache_aggregates(df, version):
+    summary, categories, trends = summarize(df)
+    for name, result in [('summary', summary), ('categories', categories), ('monthly_trends', trends)]:
+        cached_aggregate((name, 1, 'INR'), version, lambda result=result: result)
+
+def cached(name):
+    return _aggregate_cache[(name, 1, 'INR')][2]
+
+def test_edits_match_recompute():
+    """Insert, edit and delete deltas leave the cache equal to a full recompute"""
+    clear_aggregate_cache()
+    df = make_transactions(300)
+    cache_aggregates(df, 0)
+
+    added = {'Date': pd.Timestamp('2024-09-15'), 'Mode': 'Card', 'Category': 'Gifts', 'Amount': 75.0,
+             'income_expense': 'Expense', 'Currency': 'INR'}
+    apply_transaction_changes(1, (0, 1), [], [added])
+    df = pd.concat([df, pd.DataFrame([added])], ignore_index=True)
+
+    edited = dict(df.iloc[0].to_dict(), Amount=999.0, income_expense='Expense', Category='Rent')
+    apply_transaction_changes(1, (1, 2), [df.iloc[0].to_dict()], [edited])
+    df.iloc[0] = pd.Series(edited)
+
+    removed = df[df['Category'] == 'Travel']
+    apply_transaction_changes(1, (2, 3), removed.to_dict('records'), [])
+    df = df.drop(removed.index)
+
+    summary, categories, trends = summarize(df)
+    for key, value in summary.items():
+        assert np.isclose(cached('summary')[key], value), key
+    assert list(cached('categories')['Category']) == list(categories['Category'])
+    assert np.allclose(cached('categories')['TotalAmount'], categories['TotalAmount'])
+    assert np.allclose(cached('monthly_trends')['TotalAmount'], trends['TotalAmount'])
+    assert all(entry[0] == 3 for entry in _aggregate_cache.values())
+    print("✅ Deltas match a full recompute")
+
+def test_stale_entries_dropped():
+    """Entries cached at an older version are dropped instead of patched"""
+    clear_aggregate_cache()
+    cache_aggregates(make_transactions(50), 4)
+    apply_transaction_changes(1, (7, 8), [], [make_transactions(1).iloc[0].to_dict()])
+    assert not _aggregate_cache
+    print("✅ Out-of-date entries are dropped")
+
+def test_results_that_may_include_the_write_dropped():
+    """Results computed during a write are dropped, not given its delta a second time"""
+    clear_aggregate_cache()
+    df = make_transactions(50)
+    added = make_transactions(1, seed=9).iloc[0].to_dict()
+    with_added = pd.concat([df, pd.DataFrame([added])], ignore_index=True)
+
+    # A reader still on version 0 recomputes after the write committed but before its delta ran
+    begin_cached_change(1, 1)
+    cache_aggregates(with_added, 0)
+    apply_transaction_changes(1, (0, 1), [], [added])
+    assert not _aggregate_cache
+
+    # A reader recomputing while the delta runs: its entry is dropped, and its late
+    # result at version 0 doesn't replace an entry another reader stored at version 1
+    started, release = threading.Event(), threading.Event()
+
+    def slow_summary():
+        started.set()
+        release.wait()
+        return summarize(with_added)[0]
+
+    reader = threading.Thread(target=cached_aggregate, args=(('summary', 1, 'INR'), 0, slow_summary))
+    reader.start()
+    started.wait()
+    cache_aggregates(df, 0)
+    apply_transaction_changes(1, (0, 1), [], [added])
+    assert ('summary', 1, 'INR') not in _aggregate_cache and cached('categories') is not None
+    cached_aggregate(('summary', 1, 'INR'), 1, lambda: summarize(with_added)[0])
+    release.set()
+    reader.join()
+    assert _aggregate_cache[('summary', 1, 'INR')][0] == 1
+    assert cached('summary')['transaction_count'] == 51
+    print("✅ Results racing a write are never patched twice")
+
+def test_fx_rates_read_outside_cache_lock():
+    """Amounts are converted before the cache lock is taken"""
+    clear_aggregate_cache()
+    cache_aggregates(make_transactions(50), 0)
+    calls = []
+
+    def base_amounts(rows, base_currency):
+        assert not aggregate_cache._aggregate_cache_lock.locked()
+        calls.append(base_currency)
+        return np.array([float(row['Amount']) for row in rows])
+
+    original = transaction_deltas._base_amounts
+    transaction_deltas._base_amounts = base_amounts
+    try:
+        apply_transaction_changes(1, (0, 1), [], [dict(make_transactions(1).iloc[0].to_dict(), Currency='USD')])
+    finally:
+        transaction_deltas._base_amounts = original
+    assert calls == ['INR'] and len(_aggregate_cache) == 3
+    print("✅ FX conversion runs outside the cache lock")
+
+def test_debt_writes_only_drop_debt_aggregates():
+    """Transaction writes carry the debt overview forward; debt writes drop only it"""
+    # Importing debt_tracker registers the debt overview's (no-op) transaction delta
+    from debt_tracker import apply_debt_changes
+    clear_aggregate_cache()
+    cache_aggregates(make_transactions(50), 0)
+    cached_aggregate(('debt_overview', 1, 'INR'), 0, lambda: {'totals': {'total_debt': 100.0}})
+
+    apply_transaction_changes(1, (0, 1), [], [make_transactions(1).iloc[0].to_dict()])
+    assert cached('debt_overview') == {'totals': {'total_debt': 100.0}}
+
+    apply_debt_changes(1, (1, 2))
+    assert ('debt_overview', 1, 'INR') not in _aggregate_cache
+    assert all(entry[0] == 2 for entry in _aggregate_cache.values()) and len(_aggregate_cache) == 3
+    print("✅ Debt overview follows debt writes, not transaction writes")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing incremental aggregates")
+    print("=" * 50)
+
+    tests = [
+        ("Deltas match recompute", test_edits_match_recompute),
+        ("Stale entries dropped", test_stale_entries_dropped),
+        ("Results racing a write dropped", test_results_that_may_include_the_write_dropped),
+        ("FX outside the cache lock", test_fx_rates_read_outside_cache_lock),
+        ("Debt aggregates", test_debt_writes_only_drop_debt_aggregates)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
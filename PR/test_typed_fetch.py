@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the typed, chunked fetch (database.fetch_typed_frame)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from decimal import Decimal
+
+import database
+from database import fetch_typed_frame
+
+class ListCursor:
+    """Serves fixed rows through execute/fetchmany like a MySQL cursor"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query, params=()):
+        self.position = 0
+
+    def fetchmany(self, size):
+        chunk = self.rows[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+    def close(self):
+        pass
+
+class ListConnection:
+    """Hands out a ListCursor; records whether it was closed"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def cursor(self):
+        return ListCursor(self.rows)
+
+    def close(self):
+        self.closed = True
+
+def test_compact_dtypes():
+    """Dates, amounts and labels arrive in their compact dtypes"""
+    rows = [(1, date(2024, 1, 5), Decimal('120.50'), 'Food'), (2, date(2024, 1, 6), Decimal('80'), 'Rent')]
+    df = fetch_typed_frame(ListCursor(rows), "SELECT ...", (), ['id', 'Date', 'Amount', 'Category'],
+                           {'id': 'int32', 'Date': 'datetime64[ns]', 'Amount': 'float64', 'Category': 'category'})
+    assert [str(dtype) for dtype in df.dtypes] == ['int32', 'datetime64[ns]', 'float64', 'category']
+    assert df['Date'].iloc[1] == pd.Timestamp('2024-01-06') and df['Amount'].sum() == 200.5
+    print("✅ Compact dtypes")
+
+def test_nulls_in_integer_column():
+    """A NULL in an integer column gives a nullable integer column, in any chunk"""
+    rows = [(1, Decimal('10')), (2, None), (3, Decimal('30')), (None, Decimal('40'))]
+    original = database.FETCH_CHUNK_SIZE
+    database.FETCH_CHUNK_SIZE = 2  # the first chunk has no NULL ids, the second has one
+    try:
+        df = fetch_typed_frame(ListCursor(rows), "SELECT ...", (), ['goal_id', 'amount'],
+                               {'goal_id': 'int64', 'amount': 'float64'})
+    finally:
+        database.FETCH_CHUNK_SIZE = original
+    assert str(df['goal_id'].dtype) == 'Int64'
+    assert df['goal_id'].tolist()[:3] == [1, 2, 3] and df['goal_id'].isna().tolist() == [False, False, False, True]
+    assert np.isnan(df['amount'].iloc[1]) and df['amount'].iloc[3] == 40.0
+
+    df = fetch_typed_frame(ListCursor([(None,), (7,)]), "SELECT ...", (), ['n'], {'n': 'uint8'})
+    assert str(df['n'].dtype) == 'UInt8' and df['n'].iloc[1] == 7
+    print("✅ NULL integers become nullable integer columns")
+
+def test_recurring_transactions_typed():
+    """Recurring patterns arrive through the typed fetch, with the period named"""
+    rows = [('Rent', 'UPI', 'Expense', Decimal('15000.0000'), Decimal('30.50'), 6, date(2024, 6, 1), date(2024, 7, 1)),
+            ('Gym', 'Card', 'Expense', Decimal('1200.0000'), None, 4, date(2024, 6, 20), None)]
+    connection = ListConnection(rows)
+    original = database.get_mysql_connection
+    database.get_mysql_connection = lambda: connection
+    try:
+        df = database.get_recurring_transactions(1)
+    finally:
+        database.get_mysql_connection = original
+    assert connection.closed
+    assert list(df.columns) == ['category', 'mode', 'income_expense', 'typical_amount', 'period', 'period_days',
+                                'occurrences', 'last_date', 'next_expected']
+    assert str(df['typical_amount'].dtype) == 'float64' and str(df['category'].dtype) == 'category'
+    assert str(df['next_expected'].dtype) == 'datetime64[ns]' and pd.isna(df['next_expected'].iloc[1])
+    assert df['period'].iloc[0] == 'Monthly' and df['typical_amount'].iloc[0] == 15000.0
+    print("✅ Recurring transactions use compact dtypes")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing typed fetch")
+    print("=" * 50)
+
+    tests = [
+        ("Compact dtypes", test_compact_dtypes),
+        ("NULLs in integer columns", test_nulls_in_integer_column),
+        ("Recurring transactions", test_recurring_transactions_typed)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory vocabulary cache (database.get_vocabulary)
+
+Connections are replaced by a fake over a dict of dimension tables, and the
+clock by a settable one, so the TTL can be stepped through.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from types import SimpleNamespace
+
+import database
+from database import get_vocabulary, add_to_vocabulary, VOCABULARY_TTL_SECONDS
+
+class TableCursor:
+    """Answers SELECT name / INSERT IGNORE ... (name) against the shared tables"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+
+    def execute(self, statement, params=()):
+        table = statement.split('FROM ' if 'SELECT' in statement else 'INTO ')[1].split()[0]
+        if statement.startswith('SELECT'):
+            self.rows = [(name,) for name in self.tables[table]]
+        else:
+            self.tables[table].add(params[0])
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class TableConnection:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self):
+        return TableCursor(self.tables)
+
+    def close(self):
+        pass
+
+def with_fake_database(test):
+    """Run test(tables, clock, connections) with connections and time.monotonic replaced"""
+    tables = {'Categories': {'Rent', 'Food'}, 'Modes': {'UPI'}}
+    clock = [1000.0]
+    connections = []
+
+    def connect():
+        connections.append(1)
+        return TableConnection(tables)
+
+    original = database.get_mysql_connection, database.time, database._vocabulary_tables_ready
+    database.get_mysql_connection = connect
+    database.time = SimpleNamespace(monotonic=lambda: clock[0])
+    database._vocabulary_tables_ready = True
+    database._vocabulary_cache.clear()
+    try:
+        test(tables, clock, connections)
+    finally:
+        database.get_mysql_connection, database.time, database._vocabulary_tables_ready = original
+        database._vocabulary_cache.clear()
+
+def test_reads_served_from_memory():
+    """Within the TTL a vocabulary is read from its table once"""
+    def test(tables, clock, connections):
+        assert get_vocabulary('categories') == ['Food', 'Rent']
+        clock[0] += VOCABULARY_TTL_SECONDS - 1
+        assert get_vocabulary('categories') == ['Food', 'Rent']
+        assert get_vocabulary('modes') == ['UPI']
+        assert len(connections) == 2
+    with_fake_database(test)
+    print("✅ One read per vocabulary within the TTL")
+
+def test_own_inserts_visible_immediately():
+    """Labels this process adds show up without a re-read"""
+    def test(tables, clock, connections):
+        get_vocabulary('categories')
+        add_to_vocabulary(TableCursor(tables), 'categories', 'Travel')
+        assert get_vocabulary('categories') == ['Food', 'Rent', 'Travel']
+        assert len(connections) == 1
+    with_fake_database(test)
+    print("✅ Own inserts are served from memory")
+
+def test_other_inserts_after_ttl():
+    """Labels added by another process appear once the TTL has passed"""
+    def test(tables, clock, connections):
+        get_vocabulary('categories')
+        tables['Categories'].add('Gifts')
+        assert 'Gifts' not in get_vocabulary('categories')
+        clock[0] += VOCABULARY_TTL_SECONDS
+        assert get_vocabulary('categories') == ['Food', 'Gifts', 'Rent']
+        assert len(connections) == 2
+    with_fake_database(test)
+    print("✅ Other processes' inserts show up after the TTL")
+
+def test_failed_read_not_cached():
+    """Without a connection the dropdown is empty and the next call tries again"""
+    def test(tables, clock, connections):
+        database.get_mysql_connection = lambda: None
+        assert get_vocabulary('modes') == []
+        database.get_mysql_connection = lambda: connections.append(1) or TableConnection(tables)
+        assert get_vocabulary('modes') == ['UPI'] and len(connections) == 1
+    with_fake_database(test)
+    print("✅ Failed reads are retried")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing vocabulary cache")
+    print("=" * 50)
+
+    tests = [
+        ("Reads served from memory", test_reads_served_from_memory),
+        ("Own inserts visible", test_own_inserts_visible_immediately),
+        ("Other inserts after TTL", test_other_inserts_after_ttl),
+        ("Failed read not cached", test_failed_read_not_cached)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
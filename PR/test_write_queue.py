@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind transaction queue
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+from mysql.connector import DataError, InterfaceError
+
+from write_queue import WriteQueue, journal_slot_path, dead_letter_path
+
+def make_row(i):
+    return {'user_id': 1 + i % 3, 'Date': date(2024, 1, 1 + i % 28), 'Mode': 'UPI', 'Category': 'Food',
+            'Amount': 10 + i, 'income_expense': 'Expense', 'Currency': 'INR'}
+
+class FakeDatabase:
+    """Records committed batches like the Data table plus Write_Queue_State"""
+
+    def __init__(self, delay=0.0, failures=0, lost_replies=0, crashes=0):
+        self.delay = delay
+        self.failures = failures
+        self.lost_replies = lost_replies
+        self.crashes = crashes
+        self.batches = []
+        self.applied = {}
+        self.lock = threading.Lock()
+
+    def commit(self, journal_id, batch):
+        time.sleep(self.delay)
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise InterfaceError("connection lost")
+            if self.crashes:
+                self.crashes -= 1
+                raise ValueError("unexpected row")
+            if any(row['Amount'] > 10 ** 11 - 1 for _, row in batch):
+                raise DataError("Out of range value for column 'Amount'", errno=1264)
+            self.batches.append([row for _, row in batch])
+            self.applied[journal_id] = max(self.applied.get(journal_id, 0), max(seq for seq, _ in batch))
+            if self.lost_replies:
+                self.lost_replies -= 1
+                raise InterfaceError("connection lost after commit")
+
+    def read_applied(self, journal_id):
+        return self.applied.get(journal_id, 0)
+
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+def test_group_commit():
+    """Concurrent submits are committed together, each row exactly once"""
+    db = FakeDatabase(delay=0.01)
+    with tempfile.TemporaryDirectory() as base_dir:
+        write_queue = WriteQueue(os.path.join(base_dir, 'journal.log'), db.commit, db.read_applied)
+        threads = [threading.Thread(target=lambda start=start: [write_queue.submit(make_row(start + i)) for i in range(50)])
+                   for start in range(0, 400, 50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert write_queue.wait_until_applied(400, timeout=10)
+        assert sorted(row['Amount'] for row in db.rows()) == [10 + i for i in range(400)]
+        metrics = write_queue.get_metrics()
+        assert metrics['batches'] < 400 and metrics['max_batch_size'] > 1
+        assert metrics['depth'] == 0
+    print(f"✅ 400 inserts committed in {metrics['batches']} batches")
+
+def test_backpressure_and_retry():
+    """A full queue rejects new work; failed commits are retried until they succeed"""
+    db = FakeDatabase(failures=2)
+    with tempfile.TemporaryDirectory() as base_dir:
+        write_queue = WriteQueue(os.path.join(base_dir, 'journal.log'), db.commit, db.read_applied, max_depth=5)
+        seqs = [write_queue.submit(make_row(i), timeout=0.01) for i in range(20)]
+        accepted = [seq for seq in seqs if seq is not None]
+        assert len(accepted) < 20
+        assert write_queue.get_metrics()['rejected'] == 20 - len(accepted)
+
+        assert write_queue.wait_until_applied(max(accepted), timeout=10)
+        assert len(db.rows()) == len(accepted)
+        assert write_queue.get_metrics()['retries'] == 2
+    print(f"✅ Accepted {len(accepted)} of 20 with depth 5, survived 2 failed commits")
+
+def test_ambiguous_and_unexpected_failures():
+    """A commit whose reply is lost isn't repeated; a non-database error is set aside, not retried"""
+    db = FakeDatabase(lost_replies=1, crashes=1)
+    with tempfile.TemporaryDirectory() as base_dir:
+        write_queue = WriteQueue(os.path.join(base_dir, 'journal.log'), db.commit, db.read_applied)
+        assert write_queue.submit(make_row(1)) == 1
+        assert write_queue.wait_until_applied(1, timeout=10)
+        assert write_queue.submit(make_row(2)) == 2
+        assert write_queue.wait_until_applied(2, timeout=10)
+        assert write_queue.submit(make_row(3)) == 3
+        assert write_queue.wait_until_applied(3, timeout=10)
+        assert [row['Amount'] for row in db.rows()] == [12, 13]
+        metrics = write_queue.get_metrics()
+        assert metrics['retries'] == 1 and metrics['dead_lettered'] == 1
+        write_queue.close()
+    print("✅ Lost reply committed once, unexpected error dead-lettered")
+
+def test_bad_row_does_not_block_queue():
+    """A row the database rejects is dead-lettered; the rows around it commit, also after a restart"""
+    db = FakeDatabase()
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'journal.log')
+        # Journaled before the queue starts, so all six are replayed as one batch
+        with open(path, 'w') as f:
+            for seq in range(1, 7):
+                row = dict(make_row(seq), Amount=10 ** 11) if seq == 3 else make_row(seq)
+                f.write(json.dumps({'seq': seq, 'row': {**row, 'Date': row['Date'].isoformat()}}) + '\n')
+
+        write_queue = WriteQueue(path, db.commit, db.read_applied)
+        assert write_queue.wait_until_applied(6, timeout=10)
+        assert sorted(row['Amount'] for row in db.rows()) == [11, 12, 14, 15, 16]
+        assert write_queue.submit(make_row(7)) == 7
+        assert write_queue.wait_until_applied(7, timeout=10)
+        metrics = write_queue.get_metrics()
+        assert metrics['retries'] == 0 and metrics['dead_lettered'] == 1 and metrics['committed'] == 6
+        write_queue.close()
+
+        with open(dead_letter_path(path)) as f:
+            dead = [json.loads(line) for line in f]
+        assert [(entry['seq'], entry['row']['Amount']) for entry in dead] == [(3, 10 ** 11)]
+        assert 'Out of range' in dead[0]['error']
+
+        # Nothing is left to replay
+        restarted = WriteQueue(path, db.commit, db.read_applied)
+        assert restarted.get_metrics()['recovered'] == 0
+        restarted.close()
+    print("✅ Bad row dead-lettered without holding up the rest")
+
+def test_recovery_replays_only_uncommitted():
+    """Restarting replays journal entries past the committed sequence number"""
+    db = FakeDatabase()
+    with tempfile.TemporaryDirectory() as base_dir:
+        path = os.path.join(base_dir, 'journal.log')
+        crashed = WriteQueue(path, db.commit, db.read_applied)
+        journal_id = crashed.journal_id
+        crashed.close()
+        # Journal left by a crashed process: seq 1-2 committed, 3-5 not, and a torn last line
+        with open(path, 'w') as f:
+            for seq in range(1, 6):
+                row = make_row(seq)
+                f.write(json.dumps({'seq': seq, 'row': {**row, 'Date': row['Date'].isoformat()}}) + '\n')
+            f.write('{"seq": 6, "row": {"user_')
+        db.applied[journal_id] = 2
+
+        write_queue = WriteQueue(path, db.commit, db.read_applied)
+        assert write_queue.wait_until_applied(5, timeout=10)
+        assert sorted(row['Amount'] for row in db.rows()) == [13, 14, 15]
+        assert db.rows()[0]['Date'] == date(2024, 1, 4)
+        assert write_queue.submit(make_row(6)) == 6
+        assert write_queue.wait_until_applied(6, timeout=10)
+        time.sleep(0.05)
+        assert os.path.getsize(path) == 0
+    print("✅ Recovery replayed 3 uncommitted inserts and compacted the journal")
+
+def test_journal_per_process():
+    """Each live queue owns its journal slot; one compacting never touches another's entries"""
+    db = FakeDatabase()
+    with tempfile.TemporaryDirectory() as base_dir:
+        base = os.path.join(base_dir, 'journal.log')
+        first = WriteQueue(journal_slot_path(0, base), db.commit, db.read_applied)
+        try:
+            WriteQueue(journal_slot_path(0, base), db.commit, db.read_applied)
+            assert False, "a second owner claimed the same journal"
+        except BlockingIOError:
+            pass
+        release = threading.Event()
+        second = WriteQueue(journal_slot_path(1, base), lambda *args: release.wait() and db.commit(*args),
+                            db.read_applied)
+        assert second.journal_path == os.path.join(base_dir, 'journal.1.log')
+        assert first.journal_id != second.journal_id
+
+        # The second queue's entry waits in its journal while the first commits and compacts
+        assert second.submit(make_row(1)) == 1
+        assert first.submit(make_row(2)) == 1
+        assert first.wait_until_applied(1, timeout=10)
+        time.sleep(0.05)
+        assert os.path.getsize(first.journal_path) == 0
+        with open(second.journal_path) as f:
+            assert [json.loads(line)['seq'] for line in f] == [1]
+        release.set()
+        assert second.wait_until_applied(1, timeout=10)
+        first.close()
+        second.close()
+        assert db.applied == {first.journal_id: 1, second.journal_id: 1}
+    print("✅ Two queues keep separate journals and sequence numbers")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing write queue")
+    print("=" * 50)
+
+    tests = [
+        ("Group commit", test_group_commit),
+        ("Backpressure and retry", test_backpressure_and_retry),
+        ("Ambiguous and unexpected failures", test_ambiguous_and_unexpected_failures),
+        ("Bad row does not block", test_bad_row_does_not_block_queue),
+        ("Crash recovery", test_recovery_replays_only_uncommitted),
+        ("Journal per process", test_journal_per_process)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
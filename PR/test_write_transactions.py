@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for batched transaction inserts into the normalized schema (database.write_transactions)
+
+The statements run on SQLite; data versions and recurring-pattern upkeep,
+which have their own tests, are stubbed out.
+"""
+
+import sys
+import os
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+from mysql.connector import DataError
+
+import database
+from database import write_transactions, VOCABULARY_TABLES
+
+class CountingCursor:
+    """MySQL-style statements over an sqlite3 cursor, counting round trips"""
+
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+        self.statements = 0
+        self.rowcount = 0
+
+    @staticmethod
+    def _translate(statement):
+        return statement.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+
+    def execute(self, statement, params=()):
+        self.statements += 1
+        self.cursor.execute(self._translate(statement), params)
+        self.rowcount = self.cursor.rowcount
+
+    def executemany(self, statement, rows):
+        self.statements += 1
+        self.cursor.executemany(self._translate(statement), rows)
+        self.rowcount = self.cursor.rowcount
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+def make_database():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('''
+        CREATE TABLE Transactions (txn_id INTEGER PRIMARY KEY, id INT, Date TEXT, mode_id INT, category_id INT,
+                                   Amount INT, type_id INT, currency_id INT)
+    ''')
+    for table, _, _ in VOCABULARY_TABLES.values():
+        connection.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT UNIQUE)')
+    connection.execute("INSERT INTO Categories (name) VALUES ('Rent')")
+    return connection
+
+def make_rows(count):
+    return [{'user_id': 1 + i % 4, 'Date': date(2024, 1, 1 + i % 28), 'Mode': ['UPI', 'Cash'][i % 2],
+             'Category': ['Food', 'Rent', 'Travel'][i % 3], 'Amount': 10 + i, 'income_expense': 'Expense',
+             'Currency': 'INR'} for i in range(count)]
+
+def with_normalized_schema(test):
+    """Run test() with the schema marked normalized and version/recurring upkeep stubbed"""
+    saved = (database._schema_normalized, database._vocabulary_tables_ready, database._support_tables_ready,
+             database.bump_data_version, database.record_recurring_changes, dict(database._vocabulary_cache))
+    database._schema_normalized = database._vocabulary_tables_ready = database._support_tables_ready = True
+    database.bump_data_version = lambda cursor, user_id: (0, 1)
+    database.record_recurring_changes = lambda *args: None
+    try:
+        test()
+    finally:
+        (database._schema_normalized, database._vocabulary_tables_ready, database._support_tables_ready,
+         database.bump_data_version, database.record_recurring_changes) = saved[:5]
+        database._vocabulary_cache.clear()
+        database._vocabulary_cache.update(saved[5])
+
+def test_batch_costs_fixed_statements():
+    """A 200-row batch costs as many statements as a 6-row one with the same labels; every row is encoded"""
+    def test():
+        statements = []
+        for count in [6, 200]:
+            connection = make_database()
+            cursor = CountingCursor(connection)
+            write_transactions(connection, cursor, make_rows(count))
+            statements.append(cursor.statements)
+            stored = connection.execute('''
+                SELECT t.id, t.Date, c.name, m.name, t.Amount FROM Transactions t
+                JOIN Categories c ON c.id = t.category_id JOIN Modes m ON m.id = t.mode_id ORDER BY t.txn_id
+            ''').fetchall()
+            assert stored == [(row['user_id'], str(row['Date']), row['Category'], row['Mode'], row['Amount'])
+                              for row in make_rows(count)]
+        assert statements[0] == statements[1], statements
+    with_normalized_schema(test)
+    print("✅ Batch size doesn't change the number of statements")
+
+def test_unknown_label_raises():
+    """A label missing from its dimension table fails the batch instead of inserting nothing"""
+    def test():
+        connection = make_database()
+        cursor = CountingCursor(connection)
+        original = database.add_to_vocabulary
+        database.add_to_vocabulary = lambda cursor, kind, label: None
+        try:
+            write_transactions(connection, cursor, make_rows(3))
+            assert False, "rows with unknown labels were accepted"
+        except DataError as e:
+            assert 'Food' in str(e) and 'Rent' not in str(e), e
+        finally:
+            database.add_to_vocabulary = original
+        assert connection.execute('SELECT COUNT(*) FROM Transactions').fetchone()[0] == 0
+    with_normalized_schema(test)
+    print("✅ Unknown labels raise")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing batched transaction writes")
+    print("=" * 50)
+
+    tests = [
+        ("Batch costs fixed statements", test_batch_costs_fixed_statements),
+        ("Unknown label raises", test_unknown_label_raises)
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing: {test_name}")
+        try:
+            test_func()
+            passed += 1
+            print(f"✅ {test_name} - PASSED")
+        except AssertionError as e:
+            print(f"❌ {test_name} - FAILED: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
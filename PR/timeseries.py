@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# Maximum number of points a single time-series chart sends to the browser
+MAX_CHART_POINTS = 500
+
+# Candidate bucket sizes, finest first
+TIME_GRANULARITIES = [
+    ('D', 'Daily'),
+    ('W', 'Weekly'),
+    ('M', 'Monthly'),
+    ('Q', 'Quarterly'),
+    ('Y', 'Yearly')
+]
+
+def choose_time_granularity(dates, max_buckets):
+    """Pick the finest period ('D', 'W', 'M', ...) that splits dates into at most max_buckets"""
+    for freq, _ in TIME_GRANULARITIES:
+        if dates.dt.to_period(freq).nunique() <= max_buckets:
+            return freq
+    return TIME_GRANULARITIES[-1][0]
+
+def get_granularity_label(freq):
+    """Human readable label for a period code"""
+    return dict(TIME_GRANULARITIES).get(freq, freq)
+
+def downsample_time_series(df, x_col, y_cols, max_points=MAX_CHART_POINTS):
+    """Reduce a line series to roughly max_points using min/max bucketing
+
+    Rows are grouped into calendar buckets (day, week, month, ...) chosen so the
+    output fits the point budget, and for every bucket the rows holding the
+    minimum and maximum of each y column are kept. Peaks and troughs therefore
+    survive with their exact dates and values; series already under budget are
+    returned unchanged.
+    """
+    if len(df) <= max_points or not y_cols:
+        return df
+
+    dates = pd.to_datetime(df[x_col])
+    max_buckets = max(1, max_points // (2 * len(y_cols)))
+    freq = choose_time_granularity(dates, max_buckets)
+    buckets = dates.dt.to_period(freq).to_numpy()
+
+    positions = np.arange(len(df))
+    keep = [np.array([0, len(df) - 1])]
+    for col in y_cols:
+        values = pd.Series(df[col].to_numpy(dtype='float64'), index=positions)
+        grouped = values.groupby(buckets, sort=False)
+        keep.append(grouped.idxmin().dropna().to_numpy(dtype='int64'))
+        keep.append(grouped.idxmax().dropna().to_numpy(dtype='int64'))
+
+    return df.iloc[np.unique(np.concatenate(keep))]
+
+def aggregate_time_series(df, x_col, sum_cols, max_points=MAX_CHART_POINTS):
+    """Roll a series up to a coarser period so it fits max_points
+
+    Meant for bar charts of totals and counts, where summing per week or month
+    keeps the totals intact. Returns the (possibly) aggregated frame and the
+    granularity label, or None when the series was already under budget.
+    """
+    if len(df) <= max_points:
+        return df, None
+
+    dates = pd.to_datetime(df[x_col])
+    freq = choose_time_granularity(dates, max_points)
+    periods = dates.dt.to_period(freq)
+
+    aggregated = df[sum_cols].groupby(periods.to_numpy()).sum()
+    aggregated.index = pd.PeriodIndex(aggregated.index, freq=freq).start_time
+    aggregated = aggregated.rename_axis(x_col).reset_index()
+
+    return aggregated, get_granularity_label(freq)
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from aggregate_cache import update_cached_aggregates, cached_keys
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def _base_amounts(rows, base_currency):
+    """Each row's Amount in base_currency, converted like BASE_AMOUNT_SQL"""
+    amounts = np.array([float(row['Amount']) for row in rows])
+    if all(row['Currency'] == base_currency for row in rows):
+        return amounts
+
+    # Imported here: currency.py depends on database.py, which imports this module
+    from currency import convert_amounts, get_fx_rates
+    currencies = sorted({row['Currency'] for row in rows})
+    codes = np.array([currencies.index(row['Currency']) for row in rows])
+    days = np.array([pd.Timestamp(row['Date']).to_datetime64().astype('datetime64[D]').astype('int64') for row in rows])
+    return convert_amounts(amounts, codes, currencies, days, base_currency, get_fx_rates())
+
+def _add_to_group(df, keys, deltas, count_col=None):
+    """Add deltas to the row matching keys, creating or dropping the row as needed
+
+    A group is dropped once count_col reaches zero or, without a count column,
+    once every delta column is back to zero. Returns the (possibly new) frame.
+    """
+    match = np.ones(len(df), dtype=bool)
+    for col, value in keys.items():
+        match &= (df[col] == value).to_numpy()
+    position = np.flatnonzero(match)
+
+    if len(position) == 0:
+        row = {col: 0 for col in df.columns}
+        row.update(keys)
+        row.update(deltas)
+        return pd.concat([df, pd.DataFrame([row]).astype(df.dtypes.to_dict())], ignore_index=True)
+
+    index = df.index[position[0]]
+    for col, value in deltas.items():
+        df.at[index, col] += value
+    remaining = df.at[index, count_col] if count_col else max(abs(df.at[index, col]) for col in deltas)
+    if remaining <= 1e-9:
+        df = df.drop(index).reset_index(drop=True)
+    return df
+
+def apply_summary_delta(summary, changes):
+    for sign, row, amount in changes:
+        total = 'total_income' if row['income_expense'] == 'Income' else 'total_expenses'
+        summary[total] += sign * amount
+        summary['transaction_count'] += sign
+    summary['net_balance'] = summary['total_income'] - summary['total_expenses']
+    return summary
+
+def apply_category_delta(df, changes):
+    for sign, row, amount in changes:
+        if row['income_expense'] == 'Expense':
+            df = _add_to_group(df, {'Category': row['Category']}, {'TotalAmount': sign * amount})
+    return df.sort_values('TotalAmount', ascending=False, kind='stable').reset_index(drop=True)
+
+def apply_monthly_trends_delta(df, changes):
+    for sign, row, amount in changes:
+        keys = {'Month': pd.Timestamp(row['Date']).strftime('%Y-%m'), 'income_expense': row['income_expense']}
+        df = _add_to_group(df, keys, {'TotalAmount': sign * amount})
+    return df.sort_values('Month', kind='stable').reset_index(drop=True)
+
+def apply_analytics_delta(data, changes):
+    """Update the get_advanced_analytics_data frames; None when a min/max can't be maintained"""
+    data = dict(data)
+    for sign, row, amount in changes:
+        day = pd.Timestamp(row['Date']).normalize()
+        month = day.strftime('%Y-%m')
+        is_income = row['income_expense'] == 'Income'
+        expense = 0.0 if is_income else sign * amount
+        income = sign * amount if is_income else 0.0
+
+        daily = data['daily_data']
+        data['daily_data'] = _add_to_group(daily, {'Day': day}, {
+            'DailyExpense': expense, 'DailyIncome': income,
+            'ExpenseCount': 0 if is_income else sign, 'IncomeCount': sign if is_income else 0
+        })
+        if not is_income:
+            data['category_trends'] = _add_to_group(data['category_trends'], {'Category': row['Category'], 'Month': month},
+                                                    {'TotalAmount': expense, 'TransactionCount': sign}, 'TransactionCount')
+
+        payments = data['payment_analysis']
+        existing = payments[payments['Mode'] == row['Mode']]
+        if sign < 0 and not existing.empty and (amount <= existing['MinAmount'].iloc[0] or amount >= existing['MaxAmount'].iloc[0]):
+            # Removing the current extreme: the next one is only known to the database
+            return None
+        payments = _add_to_group(payments, {'Mode': row['Mode']},
+                                 {'TransactionCount': sign, 'TotalAmount': sign * amount}, 'TransactionCount')
+        mode_rows = payments['Mode'] == row['Mode']
+        if mode_rows.any() and sign > 0:
+            index = payments.index[mode_rows][0]
+            previous_count = payments.at[index, 'TransactionCount'] - 1
+            payments.at[index, 'MinAmount'] = amount if previous_count == 0 else min(payments.at[index, 'MinAmount'], amount)
+            payments.at[index, 'MaxAmount'] = amount if previous_count == 0 else max(payments.at[index, 'MaxAmount'], amount)
+        payments['AvgAmount'] = payments['TotalAmount'] / payments['TransactionCount']
+        data['payment_analysis'] = payments
+
+        weekday = (day.dayofweek + 1) % 7  # MySQL DAYOFWEEK - 1
+        weekly = data['weekly_patterns']
+        if not (weekly['DayOfWeek'] == weekday + 1).any():
+            weekly = pd.concat([weekly, pd.DataFrame([{'DayOfWeek': weekday + 1, 'DayName': DAY_NAMES[weekday],
+                                                       'WeeklyExpense': 0.0, 'ExpenseCount': 0}]).astype(weekly.dtypes.to_dict())],
+                               ignore_index=True)
+        index = weekly.index[weekly['DayOfWeek'] == weekday + 1][0]
+        weekly.at[index, 'WeeklyExpense'] += expense
+        weekly.at[index, 'ExpenseCount'] += 0 if is_income else sign
+        data['weekly_patterns'] = weekly
+
+        data['monthly_ratio'] = _add_to_group(data['monthly_ratio'], {'Month': month},
+                                              {'TotalIncome': income, 'TotalExpense': expense})
+        ratio = data['monthly_ratio']
+        ratio['NetAmount'] = ratio['TotalIncome'] - ratio['TotalExpense']
+
+    data['daily_data'] = data['daily_data'].sort_values('Day', kind='stable').reset_index(drop=True)
+    data['category_trends'] = data['category_trends'].sort_values(['Month', 'TotalAmount'], ascending=[True, False],
+                                                                  kind='stable').reset_index(drop=True)
+    data['payment_analysis'] = data['payment_analysis'].sort_values('TotalAmount', ascending=False,
+                                                                    kind='stable').reset_index(drop=True)
+    data['weekly_patterns'] = data['weekly_patterns'].sort_values('DayOfWeek').reset_index(drop=True)
+    data['monthly_ratio'] = data['monthly_ratio'].sort_values('Month', kind='stable').reset_index(drop=True)
+    return data
+
+# Cached aggregate name -> function applying a list of (sign, row, base amount) changes
+# (other modules register their own aggregates here)
+AGGREGATE_DELTAS = {
+    'summary': apply_summary_delta,
+    'categories': apply_category_delta,
+    'monthly_trends': apply_monthly_trends_delta,
+    'advanced_analytics': apply_analytics_delta
+}
+
+def apply_transaction_changes(user_id, versions, removed, added):
+    """Carry a user's cached aggregates from the old to the new data version by applying deltas
+
+    removed/added are Data rows (dicts with Date, Mode, Category, Amount,
+    income_expense, Currency). Work depends on the number of changed rows, not
+    on how many transactions the user has. Aggregates without a delta rule
+    (and min/max that can't be maintained) are dropped and reload on next use.
+    """
+    old_version, new_version = versions
+    rows = list(removed) + list(added)
+    signs = [-1] * len(removed) + [1] * len(added)
+    # Converted before taking the cache lock: conversion may read FX rates from the database
+    converted = {base_currency: _base_amounts(rows, base_currency)
+                 for base_currency in {key[2] for key in cached_keys(user_id)}} if rows else {}
+
+    def update(name, base_currency, result):
+        apply_delta = AGGREGATE_DELTAS.get(name)
+        if apply_delta is None or base_currency not in converted:
+            return None
+        changes = list(zip(signs, rows, converted[base_currency]))
+        try:
+            return apply_delta(result, changes)
+        except (KeyError, IndexError, ValueError):
+            # Result shaped unexpectedly (e.g. an empty frame without columns); reload it instead
+            return None
+
+    update_cached_aggregates(user_id, old_version, new_version, update)
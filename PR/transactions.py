@@ -1,7 +1,44 @@
 import streamlit as st
 from datetime import datetime
-from database import insert_transaction, get_user_data, get_user_summary, get_available_categories, get_available_modes, get_mysql_connection
-import pandas as pd 
+from write_queue import submit_transaction, WRITE_QUEUE_ENABLED
+from database import update_transaction, delete_transactions, is_schema_normalized, get_user_data, get_recurring_transactions, get_user_summary, get_available_categories, get_available_modes, get_mysql_connection, fetch_typed_frame, TRANSACTION_DTYPES, MAX_TRANSACTION_AMOUNT, VOCABULARY_TABLES
+
+def selected_transactions_actions(selected, all_categories, all_modes):
+    """Bulk delete for the selected rows, plus an edit form when exactly one is selected"""
+    st.markdown(f"**{len(selected)} transaction(s) selected**")
+    if st.button("🗑️ Delete selected", key="delete_selected"):
+        deleted = delete_transactions(st.session_state.user_id, selected['txn_id'].astype(int).tolist())
+        if deleted:
+            st.success(f"✅ Deleted {deleted} transaction(s).")
+            st.rerun()
+
+    if len(selected) != 1:
+        return
+
+    row = selected.iloc[0]
+    with st.form("edit_transaction_form"):
+        st.markdown("#### Edit Transaction")
+        col1, col2 = st.columns(2)
+        with col1:
+            edit_date = st.date_input("Transaction Date", value=row['Date'].date())
+            edit_amount = st.number_input("Amount", min_value=0.01, max_value=float(MAX_TRANSACTION_AMOUNT),
+                                          value=float(row['Amount']), step=0.01, format="%.2f")
+            types = ["Expense", "Income"]
+            edit_type = st.selectbox("Transaction Type", types, index=types.index(row['Income_Expense']) if row['Income_Expense'] in types else 0)
+        with col2:
+            modes = all_modes if row['Mode'] in all_modes else all_modes + [row['Mode']]
+            edit_mode = st.selectbox("Payment Mode", modes, index=modes.index(row['Mode']))
+            categories = all_categories if row['Category'] in all_categories else all_categories + [row['Category']]
+            edit_category = st.selectbox("Category", categories, index=categories.index(row['Category']))
+            currencies = ["INR", "USD", "EUR", "GBP"]
+            edit_currency = st.selectbox("Currency", currencies, index=currencies.index(row['Currency']) if row['Currency'] in currencies else 0)
+
+        if st.form_submit_button("💾 Save Changes"):
+            if update_transaction(st.session_state.user_id, int(row['txn_id']), edit_date, edit_mode,
+                                  edit_category, edit_amount, edit_type, edit_currency):
+                st.success("✅ Transaction updated.")
+                st.rerun()
+
 def transaction_page():
     """Display the transaction insertion page"""
     st.markdown(f'<h1 class="main-header"> Transactions </h1>', unsafe_allow_html=True)
@@ -41,21 +78,19 @@ def transaction_page():
 
     user_id = st.session_state.user_id
 
-    # Fetch transactions
-    cursor.execute("SELECT  Date, Mode, Category, Amount, income_expense, Currency FROM data WHERE id = %s ORDER BY Date DESC", (user_id,))
-    results = cursor.fetchall()
+    # Fetch transactions straight into compact dtypes; txn_id exists once Data is normalized
+    columns = ["Date", "Mode", "Category", "Amount", "Income_Expense", "Currency"]
+    dtypes = {**TRANSACTION_DTYPES, "Income_Expense": "category", "txn_id": "int64"}
+    editable = is_schema_normalized(cursor)
+    if editable:
+        columns = ["txn_id"] + columns
+    user_data = fetch_typed_frame(cursor, f"SELECT {', '.join(columns)} FROM data WHERE id = %s ORDER BY Date DESC", (user_id,), columns, dtypes)
     conn.close()
 
-    if not results:
+    if user_data.empty:
         st.info("No transactions found.")
         return
 
-    # Prepare DataFrame
-    user_data = pd.DataFrame(results, columns=[ "Date", "Mode", "Category", "Amount", "Income_Expense", "Currency"])
-    
-    # Convert Date column to datetime
-    user_data['Date'] = pd.to_datetime(user_data['Date'], errors='coerce')
-
     # --- FILTERS ---
     st.markdown("### Filters", unsafe_allow_html=True)
 
@@ -109,14 +144,16 @@ def transaction_page():
             col1, col2 = st.columns(2)
             with col1:
                 transaction_date = st.date_input("Transaction Date", value=datetime.now().date())
-                amount = st.number_input("Amount (₹)", min_value=0.01, value=100.0, step=0.01, format="%.2f")
+                amount = st.number_input("Amount (₹)", min_value=0.01, max_value=float(MAX_TRANSACTION_AMOUNT),
+                                         value=100.0, step=0.01, format="%.2f")
                 transaction_type = st.selectbox("Transaction Type", ["Expense", "Income"])
             with col2:
                 payment_mode = st.selectbox("Payment Mode", all_modes)
                 category = st.selectbox("Category", all_categories)
                 currency = st.selectbox("Currency", ["INR", "USD", "EUR", "GBP"], index=0)
 
-            custom_category = st.text_input("Custom Category (optional)", placeholder="Enter custom category")
+            custom_category = st.text_input("Custom Category (optional)", placeholder="Enter custom category",
+                                            max_chars=VOCABULARY_TABLES['categories'][2])
 
             submit = st.form_submit_button("💾 Save Transaction")
             if submit:
@@ -134,7 +171,7 @@ def transaction_page():
                     final_category = custom_category if custom_category else category
                     
                     # Insert transaction
-                    success = insert_transaction(
+                    success = submit_transaction(
                         st.session_state.user_id,
                         transaction_date,
                         payment_mode,
@@ -146,6 +183,8 @@ def transaction_page():
                     
                 if success:
                     st.success(f"✅ Transaction added successfully!")
+                    if WRITE_QUEUE_ENABLED:
+                        st.caption("Saved to the write queue; totals include it within a moment.")
                         
                         # Show transaction summary
                     st.markdown("###  Transaction Summary")
@@ -192,12 +231,29 @@ def transaction_page():
     else:
         filtered_data = filtered_data.sort_values(by="Date", ascending=False)
 
-        # Show only top 15
-        st.dataframe(
-            filtered_data,
-            use_container_width=True,
-            height=600
-        )
+        if editable:
+            # Tick rows to delete them in bulk, or a single row to edit it
+            display_columns = ["Date", "Mode", "Category", "Amount", "Income_Expense", "Currency"]
+            edited = st.data_editor(
+                filtered_data.assign(Select=False),
+                column_order=["Select"] + display_columns,
+                column_config={"Select": st.column_config.CheckboxColumn("Select", default=False)},
+                disabled=display_columns,
+                hide_index=True,
+                use_container_width=True,
+                height=600,
+                key="transaction_selection"
+            )
+            selected = edited[edited["Select"]]
+            if not selected.empty:
+                selected_transactions_actions(selected, all_categories, all_modes)
+        else:
+            st.dataframe(
+                filtered_data,
+                use_container_width=True,
+                height=600
+            )
+            st.caption("Editing and deleting need transaction ids: run `python migrations.py primary_key`.")
 
     cursor.close()
     conn.close()
@@ -224,4 +280,19 @@ def transaction_page():
             else:
                 st.info("No payment method data available yet.")
     
-    
\ No newline at end of file
+    
+
+    # Recurring transactions, kept up to date as transactions are written (recurring.py)
+    recurring = get_recurring_transactions(st.session_state.user_id)
+    if not recurring.empty:
+        with st.expander(f"🔁 Recurring Transactions ({len(recurring)})"):
+            st.dataframe(
+                recurring.drop(columns=['period_days']),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "typical_amount": st.column_config.NumberColumn("Typical Amount", format="₹%.0f"),
+                    "next_expected": st.column_config.DateColumn("Next Expected"),
+                    "last_date": st.column_config.DateColumn("Last Seen")
+                }
+            )
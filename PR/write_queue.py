@@ -0,0 +1,393 @@
+"""
+Write-behind queue for transaction inserts
+
+When DABBA_WRITE_QUEUE=1, saving a transaction appends it to a local journal
+(fsync'd) and returns; a background thread commits queued rows in groups, one
+database transaction per batch. The batch's last journal sequence number is
+stored in Write_Queue_State in the same transaction, so replaying the journal
+after a crash never inserts a row twice. Reads may lag a queued insert by one
+batch window.
+
+Each process holds an exclusive flock on its own journal file, the first
+free slot next to WRITE_JOURNAL_PATH, and uses it as its journal id. So
+processes never compact each other's journal or share sequence numbers, and
+a restarted process takes over (and replays) a journal whose owner died.
+
+Only failures a retry can clear (lost connections, lock waits, deadlocks)
+are retried. A batch failing any other way is split until the offending row
+is alone, and that row goes to the journal's dead-letter file, so one bad
+row never holds up the ones queued behind it.
+"""
+
+import os
+import json
+import fcntl
+import itertools
+import time
+import queue
+import socket
+import threading
+from collections import deque
+from datetime import date
+import numpy as np
+import streamlit as st
+from mysql.connector import Error, InterfaceError, OperationalError, errorcode
+from database import (get_mysql_connection, write_transactions, apply_inserted_transactions, insert_transaction,
+                      transaction_problem)
+from schema import bootstrap_schema
+
+# Route form inserts through the background writer; off by default
+WRITE_QUEUE_ENABLED = os.environ.get("DABBA_WRITE_QUEUE", "0") == "1"
+
+# Append-only journal; every queued insert is fsync'd here before it is acknowledged.
+# Further processes use numbered slots beside it (write_journal.1.log, ...)
+WRITE_JOURNAL_PATH = os.environ.get(
+    "DABBA_WRITE_JOURNAL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "write_journal.log")
+)
+
+# Inserts accepted but not yet committed; submitters wait for room up to WRITE_QUEUE_SUBMIT_TIMEOUT
+WRITE_QUEUE_MAX_DEPTH = 1000
+WRITE_QUEUE_SUBMIT_TIMEOUT = 2.0
+
+# Group commit: up to WRITE_BATCH_MAX rows, waiting at most WRITE_BATCH_WAIT_SECONDS for more to arrive
+WRITE_BATCH_MAX = 200
+WRITE_BATCH_WAIT_SECONDS = 0.02
+
+# Backoff between retries while the database is failing
+WRITE_RETRY_MAX_SECONDS = 5.0
+
+# MySQL errors that a retry can clear, besides InterfaceError/OperationalError
+TRANSIENT_ERRNOS = {
+    errorcode.CR_SERVER_GONE_ERROR, errorcode.CR_SERVER_LOST, errorcode.CR_CONN_HOST_ERROR,
+    errorcode.ER_CON_COUNT_ERROR, errorcode.ER_SERVER_SHUTDOWN,
+    errorcode.ER_LOCK_WAIT_TIMEOUT, errorcode.ER_LOCK_DEADLOCK
+}
+
+_write_queue = None
+_write_queue_guard = threading.Lock()
+
+def _journal_row(row):
+    return {**row, 'Date': row['Date'].isoformat(), 'Amount': float(row['Amount'])}
+
+def _row_from_journal(entry):
+    return {**entry, 'Date': date.fromisoformat(entry['Date'])}
+
+def journal_slot_path(slot, journal_path=WRITE_JOURNAL_PATH):
+    """Path of a journal slot; slot 0 is journal_path itself"""
+    if slot == 0:
+        return journal_path
+    root, ext = os.path.splitext(journal_path)
+    return f"{root}.{slot}{ext}"
+
+def dead_letter_path(journal_path):
+    """Where a journal's rows that can never be committed are kept (write_journal.dead.log, ...)"""
+    root, ext = os.path.splitext(journal_path)
+    return f"{root}.dead{ext}"
+
+def is_transient_error(error):
+    """True when retrying the same batch can succeed; False for bad data, SQL errors and bugs"""
+    if isinstance(error, (InterfaceError, OperationalError)):
+        return True
+    return isinstance(error, Error) and error.errno in TRANSIENT_ERRNOS
+
+def commit_to_database(journal_id, batch):
+    """Insert a batch of (seq, row) in one transaction together with its journal position
+
+    Returns the {user_id: (old, new)} data versions for applying the rows to
+    cached aggregates once committed.
+    """
+    if not bootstrap_schema():
+        raise InterfaceError("schema bootstrap failed")
+    connection = get_mysql_connection()
+    if connection is None:
+        raise InterfaceError("no database connection")
+
+    try:
+        cursor = connection.cursor()
+        versions = write_transactions(connection, cursor, [row for _, row in batch])
+        cursor.execute('''
+            INSERT INTO Write_Queue_State (journal_id, applied_seq) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE applied_seq = GREATEST(applied_seq, VALUES(applied_seq))
+        ''', (journal_id, max(seq for seq, _ in batch)))
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return versions
+    except Exception:
+        connection.close()
+        raise
+
+def read_applied_seq(journal_id):
+    """Highest journal sequence number already in the database"""
+    if not bootstrap_schema():
+        raise InterfaceError("schema bootstrap failed")
+    connection = get_mysql_connection()
+    if connection is None:
+        raise InterfaceError("no database connection")
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT applied_seq FROM Write_Queue_State WHERE journal_id = %s', (journal_id,))
+        row = cursor.fetchone()
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return row[0] if row else 0
+    except Error:
+        connection.close()
+        raise
+
+class WriteQueue:
+    """Write-behind queue: journal and acknowledge inserts, commit them in groups on a background thread"""
+
+    def __init__(self, journal_path=WRITE_JOURNAL_PATH, commit_batch=commit_to_database,
+                 read_applied=read_applied_seq, max_depth=WRITE_QUEUE_MAX_DEPTH):
+        """Claim journal_path and replay what it holds past the committed position
+
+        Raises BlockingIOError when another live queue owns the journal.
+        """
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path(journal_path)
+        # Held until close() or process exit; a crashed owner's lock goes with it
+        self._journal_owner = open(journal_path, 'a')
+        try:
+            fcntl.flock(self._journal_owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._journal_owner.close()
+            raise
+        self.journal_id = f"{socket.gethostname()}:{os.path.abspath(journal_path)}"
+        self.commit_batch = commit_batch
+        self.read_applied = read_applied
+        self._pending = queue.Queue()
+        self._journal_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=500)
+        self._commit_seconds = deque(maxlen=500)
+        self.metrics = {'submitted': 0, 'rejected': 0, 'committed': 0, 'batches': 0, 'retries': 0, 'dead_lettered': 0,
+                        'max_depth_seen': 0}
+
+        # Recover anything journaled but not committed before the last shutdown
+        applied = read_applied(self.journal_id)
+        recovered = [(seq, row) for seq, row in self._read_journal() if seq > applied]
+        self._next_seq = max([applied] + [seq for seq, _ in recovered]) + 1
+        # A backlog larger than max_depth is still replayed in full; it just delays new submits
+        self.max_depth = max(max_depth, len(recovered))
+        self._slots = threading.BoundedSemaphore(self.max_depth)
+        for entry in recovered:
+            self._slots.acquire()
+            self._pending.put(entry)
+        self.metrics['recovered'] = len(recovered)
+
+        self._applied_seq = applied
+        self._writer = threading.Thread(target=self._run, name="dabba-write-queue", daemon=True)
+        self._writer.start()
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash mid-write; it was never acknowledged
+                entries.append((record['seq'], _row_from_journal(record['row'])))
+        return entries
+
+    def submit(self, row, timeout=WRITE_QUEUE_SUBMIT_TIMEOUT):
+        """Durably accept one insert; returns its sequence number, or None when the queue stays full"""
+        if not self._slots.acquire(timeout=timeout):
+            with self._metrics_lock:
+                self.metrics['rejected'] += 1
+            return None
+
+        with self._journal_lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps({'seq': seq, 'row': _journal_row(row)}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.put((seq, row))
+
+        with self._metrics_lock:
+            self.metrics['submitted'] += 1
+            self.metrics['max_depth_seen'] = max(self.metrics['max_depth_seen'], self.depth())
+        return seq
+
+    def depth(self):
+        """Inserts acknowledged but not yet committed (queued plus the batch in flight)"""
+        return self.max_depth - self._slots._value
+
+    def wait_until_applied(self, seq, timeout):
+        """Block until seq is committed; True if it was within timeout"""
+        deadline = time.monotonic() + timeout
+        while self._applied_seq < seq:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self):
+        """Commit what is queued, stop the writer and release the journal"""
+        self._pending.put(None)
+        self._writer.join()
+        self._journal_owner.close()
+
+    def _next_batch(self):
+        """Up to WRITE_BATCH_MAX queued inserts, or None once close() was called and the queue is drained"""
+        first = self._pending.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + WRITE_BATCH_WAIT_SECONDS
+        while len(batch) < WRITE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._pending.get(timeout=max(remaining, 0)) if remaining > 0 else self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._pending.put(None)  # stop after this batch
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            committed = self._commit(batch)
+
+            with self._metrics_lock:
+                self.metrics['batches'] += 1
+                self.metrics['committed'] += sum(len(rows) for _, rows in committed)
+                self._batch_sizes.append(len(batch))
+                self._commit_seconds.append(time.perf_counter() - started)
+            self._applied_seq = max(self._applied_seq, max(seq for seq, _ in batch))
+            for _ in batch:
+                self._slots.release()
+            self._compact_journal()
+
+            # Cache upkeep is outside the retry loop: the rows are committed whatever happens here
+            for versions, rows in committed:
+                if versions:
+                    try:
+                        apply_inserted_transactions(versions, rows)
+                    except Exception as e:
+                        print(f"❌ Write queue couldn't update cached aggregates: {e}")
+
+    def _commit(self, batch):
+        """Commit batch, retrying transient failures; returns [(versions, rows)] for the parts committed
+
+        versions is None for a part whose commit went through but whose reply
+        was lost. A batch failing for any other reason is split in halves until
+        the rows that fail are alone; those are dead-lettered.
+        """
+        last_seq = max(seq for seq, _ in batch)
+        backoff = 0.05
+        while True:
+            try:
+                return [(self.commit_batch(self.journal_id, batch), [row for _, row in batch])]
+            except Exception as e:
+                if not is_transient_error(e):
+                    error = e
+                    break
+                # Keep the batch; new submitters feel the backpressure while we retry
+                print(f"❌ Write queue commit failed, retrying in {backoff:.2f}s: {e}")
+                with self._metrics_lock:
+                    self.metrics['retries'] += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, WRITE_RETRY_MAX_SECONDS)
+                if self._committed_before(last_seq):
+                    # The commit went through but its reply was lost; cached aggregates catch up on their own
+                    return [(None, [row for _, row in batch])]
+
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            return self._commit(batch[:middle]) + self._commit(batch[middle:])
+        self._dead_letter(batch[0], error)
+        return []
+
+    def _dead_letter(self, entry, error):
+        """Set aside a journal entry that can't be committed, with the reason"""
+        seq, row = entry
+        print(f"❌ Write queue dead-lettered entry {seq}: {error}")
+        with open(self.dead_letter_path, 'a') as f:
+            f.write(json.dumps({'seq': seq, 'row': row, 'error': str(error)}, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        with self._metrics_lock:
+            self.metrics['dead_lettered'] += 1
+
+    def _committed_before(self, seq):
+        """True if the database already holds journal entries up to seq; False when it can't tell"""
+        try:
+            return self.read_applied(self.journal_id) >= seq
+        except Exception:
+            return False
+
+    def _compact_journal(self):
+        """Empty the journal once everything in it is committed"""
+        with self._journal_lock:
+            if self._pending.empty() and self._applied_seq == self._next_seq - 1:
+                open(self.journal_path, 'w').close()
+
+    def get_metrics(self):
+        """Queue depth, batch sizes and commit latency for monitoring"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+            sizes = np.array(self._batch_sizes, dtype='float64')
+            latencies = np.array(self._commit_seconds, dtype='float64')
+        metrics['depth'] = self.depth()
+        metrics['avg_batch_size'] = float(sizes.mean()) if len(sizes) else 0.0
+        metrics['max_batch_size'] = int(sizes.max()) if len(sizes) else 0
+        metrics['commit_ms_p50'] = float(np.percentile(latencies, 50) * 1000) if len(latencies) else 0.0
+        metrics['commit_ms_p95'] = float(np.percentile(latencies, 95) * 1000) if len(latencies) else 0.0
+        return metrics
+
+def get_write_queue():
+    """The process-wide queue on the first journal slot no live process owns, started (and recovered) on first use"""
+    global _write_queue
+    with _write_queue_guard:
+        if _write_queue is None:
+            for slot in itertools.count():
+                try:
+                    _write_queue = WriteQueue(journal_slot_path(slot))
+                    break
+                except BlockingIOError:
+                    pass  # owned by another live process
+        return _write_queue
+
+def submit_transaction(user_id, date, mode, category, amount, income_expense, currency):
+    """Save a transaction through the write queue when enabled, else insert it directly
+
+    Returns True once the row is durable (journaled or committed). Rows that
+    don't fit the table are refused here, before they are acknowledged.
+    """
+    problem = transaction_problem(mode, category, amount, income_expense, currency)
+    if problem:
+        st.error(f"❌ {problem}")
+        return False
+    if not WRITE_QUEUE_ENABLED:
+        return insert_transaction(user_id, date, mode, category, amount, income_expense, currency)
+
+    row = {'user_id': user_id, 'Date': date, 'Mode': mode, 'Category': category, 'Amount': amount,
+           'income_expense': income_expense, 'Currency': currency}
+    try:
+        seq = get_write_queue().submit(row)
+    except (Error, OSError) as e:
+        st.error(f"Error queueing transaction: {e}")
+        return False
+    if seq is None:
+        st.warning("⏳ The server is busy saving other transactions. Please try again in a moment.")
+        return False
+    return True
+
+def get_write_queue_metrics():
+    """Metrics of the running queue, or None when it is disabled or not started"""
+    return _write_queue.get_metrics() if _write_queue is not None else None